@@ -0,0 +1,12 @@
+"""
+Benchmarks for Banana Slides
+
+Each module is runnable on its own, e.g.:
+
+    python -m banana_slides.benchmarks.prompt_cache --help
+    python -m banana_slides.benchmarks.reference_upload --help
+    python -m banana_slides.benchmarks.db_writes --help
+    python -m banana_slides.benchmarks.query_indexes --help
+    python -m banana_slides.benchmarks.page_serialization --help
+    python -m banana_slides.benchmarks.worker_pool --help
+"""
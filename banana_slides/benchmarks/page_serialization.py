@@ -0,0 +1,106 @@
+"""
+Page serialization benchmark
+
+Times Project.to_dict on a deck with many pages (100 by default), each with
+an outline and a description of realistic size:
+
+- parse every call: to_dict with the memoised JSON dropped first, i.e. the
+  cost before JSON columns were memoised
+- memoised: repeated to_dict on the same loaded instances
+- reload + to_dict: the session expired first, as for a new API request
+- summaries: to_dict(page_summaries=True), which skips description_content
+
+    python -m banana_slides.benchmarks.page_serialization --pages 100
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+from ..models import Page, Project, db
+from .db_writes import create_app
+
+
+def create_deck(pages: int, description_chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = "market growth strategy revenue customer product team data cloud model".split()
+    project = Project(idea_prompt="serialization benchmark", status="COMPLETED")
+    db.session.add(project)
+    db.session.flush()
+    for index in range(pages):
+        page = Page(project_id=project.id, order_index=index, status="COMPLETED")
+        page.set_outline_content(
+            {"title": f"Page {index + 1}", "points": [" ".join(rng.choices(words, k=8)) for _ in range(4)]}
+        )
+        text = " ".join(rng.choices(words, k=description_chars // 7))
+        page.set_description_content({"text": text, "generated_at": "2026-01-01T00:00:00"})
+        page.generated_image_path = f"{project.id}/pages/page{index}_v1.png"
+        db.session.add(page)
+    db.session.commit()
+    return project.id
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument(
+        "--description-chars", type=int, default=3000, help="Description size per page"
+    )
+    parser.add_argument("--repeat", type=int, default=50, help="Timed calls per variant")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="banana-serialize-bench-")
+    app = create_app(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+
+    with app.app_context():
+        project_id = create_deck(args.pages, args.description_chars)
+        project = Project.query.get(project_id)
+        pages = project.pages
+
+        def parse_every_call():
+            for page in pages:
+                page.__dict__.pop("_parsed_json", None)
+            return project.to_dict(include_pages=True)
+
+        def reload_and_serialize():
+            db.session.expire_all()
+            return Project.query.get(project_id).to_dict(include_pages=True)
+
+        def summaries():
+            db.session.expire_all()
+            return Project.query.get(project_id).to_dict(page_summaries=True)
+
+        project.to_dict(include_pages=True)  # Warm the memoised values
+        results = {
+            "parse every call": timed(parse_every_call, args.repeat),
+            "memoised": timed(lambda: project.to_dict(include_pages=True), args.repeat),
+            "reload + to_dict": timed(reload_and_serialize, args.repeat),
+            "reload + summaries": timed(summaries, args.repeat),
+        }
+        full_bytes = len(json.dumps(project.to_dict(include_pages=True)))
+        summary_bytes = len(json.dumps(project.to_dict(page_summaries=True)))
+
+    print(f"Project with {args.pages} pages ({args.description_chars} chars per description)")
+    for name, ms in results.items():
+        print(f"  {name:<20} {ms:8.2f} ms")
+    print(f"  response size: full={full_bytes / 1024:.0f} KB summaries={summary_bytes / 1024:.0f} KB")
+    print(f"Scratch files: {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Prompt prefix-cache benchmark
+
+Replays the description and image prompts of a deck and reports the share of
+prompt tokens an upstream prefix cache can serve.
+
+    # Synthetic deck: 20 pages, 50 KB reference document
+    python -m banana_slides.benchmarks.prompt_cache --pages 20 --reference-kb 50
+
+    # Replay an existing project from the database
+    python -m banana_slides.benchmarks.prompt_cache --project-id <id>
+
+    # Send the description prompts for real and read usage.cached_tokens
+    python -m banana_slides.benchmarks.prompt_cache --project-id <id> --live
+
+Simulated mode estimates tokens as UTF-8 bytes / 3 and models an OpenAI-style
+cache: each request reuses the longest prefix it shares with an earlier
+request, counted in 128-token blocks once at least 1024 tokens match. The
+"suffix-first" layout puts the per-page part ahead of the shared part, which
+approximates the interleaved prompts used before the prefix/suffix split.
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, List, Tuple
+
+from ..core.generator import AIService, ProjectContext
+from ..services.prompts import get_page_description_prompt
+
+MIN_CACHED_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text.encode("utf-8")) // 3
+
+
+def simulate_prefix_cache(prompts: List[str]) -> Dict[str, float]:
+    """
+    Replay prompts in order against an idealised prefix cache
+
+    Returns:
+        {"requests", "prompt_tokens", "cached_tokens", "cached_ratio"}
+    """
+    seen: List[str] = []
+    prompt_tokens = 0
+    cached_tokens = 0
+
+    for prompt in prompts:
+        shared = max((len(os.path.commonprefix([prompt, old])) for old in seen), default=0)
+        shared_tokens = estimate_tokens(prompt[:shared])
+        if shared_tokens >= MIN_CACHED_TOKENS:
+            cached_tokens += shared_tokens // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+        prompt_tokens += estimate_tokens(prompt)
+        seen.append(prompt)
+
+    return {
+        "requests": len(prompts),
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "cached_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+    }
+
+
+class _NoProvider:
+    """Placeholder so AIService can build prompts without API credentials"""
+
+
+def synthetic_deck(pages: int, reference_kb: int) -> Tuple[ProjectContext, List[Dict], List[str]]:
+    """Build a deterministic deck: context, flat outline and page descriptions"""
+    paragraph = (
+        "碳中和是指通过节能减排、植树造林等方式抵消自身产生的二氧化碳排放，实现正负抵消。"
+        "Carbon neutrality balances emitted and removed greenhouse gases. "
+    )
+    reference = (paragraph * (reference_kb * 1024 // len(paragraph.encode("utf-8")) + 1))[
+        : reference_kb * 1024 // 3
+    ]
+    context = ProjectContext(
+        {"idea_prompt": "生成一份关于碳中和路径的演示文稿", "creation_type": "idea"},
+        reference_files_content=[{"filename": "reference.md", "content": reference}]
+        if reference_kb
+        else None,
+    )
+    outline = [
+        {
+            "title": f"第 {i} 部分：碳中和主题 {i}",
+            "points": [f"要点 {i}.{j}：政策、技术与市场" for j in range(1, 4)],
+            "part": f"章节 {(i - 1) // 5 + 1}",
+        }
+        for i in range(1, pages + 1)
+    ]
+    descriptions = [
+        f"页面标题：{page['title']}\n\n页面文字：\n"
+        + "\n".join(f"- {point}" for point in page["points"])
+        for page in outline
+    ]
+    return context, outline, descriptions
+
+
+def project_deck(project_id: str) -> Tuple[ProjectContext, List[Dict], List[str]]:
+    """Load a deck from the database (outline and generated descriptions)"""
+    from ..cli import get_cli_app
+    from ..models import Page, Project
+
+    app = get_cli_app()
+    with app.app_context():
+        project = Project.query.get(project_id)
+        if project is None:
+            raise SystemExit(f"Project {project_id} not found")
+        pages = (
+            Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        )
+        outline = [page.get_outline_content() or {} for page in pages]
+        descriptions = [
+            (page.get_description_content() or {}).get("text", "") for page in pages
+        ]
+        return ProjectContext(project), outline, descriptions
+
+
+def build_prompts(
+    ai_service: AIService,
+    context: ProjectContext,
+    outline: List[Dict],
+    descriptions: List[str],
+    language: str,
+) -> Dict[str, List]:
+    description_prompts = []
+    image_prompts = []
+    for idx, page in enumerate(outline):
+        description_prompts.append(
+            get_page_description_prompt(
+                context, outline, page, idx + 1, language=language
+            )
+        )
+        image_prompts.append(
+            ai_service.generate_image_prompt(
+                outline=outline,
+                page=page,
+                page_desc=descriptions[idx] or page.get("title", ""),
+                page_index=idx + 1,
+                language=language,
+            )
+        )
+    return {"description": description_prompts, "image": image_prompts}
+
+
+def _print_row(name: str, stats: Dict[str, float]):
+    print(
+        f"  {name:<28} requests={stats['requests']:<4} "
+        f"prompt_tokens={stats['prompt_tokens']:<9} "
+        f"cached_tokens={stats['cached_tokens']:<9} "
+        f"cached_ratio={stats['cached_ratio']:.1%}"
+    )
+
+
+def run_live(ai_service: AIService, prompts: List[str]):
+    """Send prompts one by one and report the cached tokens the endpoint returned"""
+    from ..services.ai_providers import get_prompt_usage_stats, reset_prompt_usage_stats
+
+    reset_prompt_usage_stats()
+    start = time.perf_counter()
+    for prompt in prompts:
+        ai_service.text_provider.generate_text(prompt, thinking_budget=1000)
+    elapsed = time.perf_counter() - start
+
+    for model, stats in get_prompt_usage_stats().items():
+        _print_row(f"live {model}", stats)
+    print(f"  live elapsed: {elapsed:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--project-id", help="Replay an existing project")
+    parser.add_argument("--pages", type=int, default=20, help="Synthetic deck size")
+    parser.add_argument(
+        "--reference-kb", type=int, default=50, help="Synthetic reference document size"
+    )
+    parser.add_argument("--language", default="zh")
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Also send the description prompts and read cached tokens from usage",
+    )
+    args = parser.parse_args(argv)
+
+    if args.project_id:
+        context, outline, descriptions = project_deck(args.project_id)
+    else:
+        context, outline, descriptions = synthetic_deck(args.pages, args.reference_kb)
+
+    if args.live:
+        ai_service = AIService()
+    else:
+        ai_service = AIService(text_provider=_NoProvider(), image_provider=_NoProvider())
+
+    prompts = build_prompts(ai_service, context, outline, descriptions, args.language)
+
+    print(f"Deck: {len(outline)} pages")
+    for kind, kind_prompts in prompts.items():
+        print(f"{kind} prompts:")
+        _print_row("prefix-first (current)", simulate_prefix_cache(kind_prompts))
+        _print_row(
+            "suffix-first",
+            simulate_prefix_cache([p.suffix + p.prefix for p in kind_prompts]),
+        )
+
+    if args.live:
+        print("description prompts (live):")
+        run_live(ai_service, prompts["description"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Query index benchmark
+
+Fills a throwaway SQLite database with many projects (pages, image versions
+and tasks each), then times the hot read paths with and without the indexes
+of migration 008:
+
+- pages of a project in order (every deck task and export)
+- the current image version of a page
+- active tasks (``status`` command)
+- the most recent projects plus their page counts, one COUNT per project
+  (the old ``status`` loop) vs. one grouped count
+
+    python -m banana_slides.benchmarks.query_indexes --projects 10000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+from sqlalchemy import text
+
+from ..models import Page, PageImageVersion, Project, Task, db
+from ..utils import count_pages_by_project
+from .db_writes import create_app
+
+# Indexes added by migration 008 (name, table)
+QUERY_INDEXES = [
+    ("ix_pages_project_id_order_index", "pages"),
+    ("ix_page_image_versions_page_id_is_current", "page_image_versions"),
+    ("ix_tasks_status", "tasks"),
+    ("ix_projects_created_at", "projects"),
+]
+
+
+def populate(projects: int, pages: int, versions: int, seed: int = 0):
+    """Bulk insert projects, their pages, image versions and one task each"""
+    rng = random.Random(seed)
+    start = datetime.utcnow() - timedelta(days=365)
+    project_rows, page_rows, version_rows, task_rows = [], [], [], []
+    for _ in range(projects):
+        project_id = str(uuid.uuid4())
+        created_at = start + timedelta(seconds=rng.randrange(365 * 86400))
+        project_rows.append(
+            {
+                "id": project_id,
+                "idea_prompt": "benchmark deck",
+                "creation_type": "idea",
+                "status": "COMPLETED",
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+        # A few tasks are still running, as in a live database
+        task_rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "project_id": project_id,
+                "task_type": "GENERATE_IMAGES",
+                "status": "PROCESSING" if rng.random() < 0.001 else "COMPLETED",
+                "created_at": created_at,
+            }
+        )
+        # Insert pages in shuffled order so the table is not already sorted
+        for order_index in rng.sample(range(pages), pages):
+            page_id = str(uuid.uuid4())
+            page_rows.append(
+                {
+                    "id": page_id,
+                    "project_id": project_id,
+                    "order_index": order_index,
+                    "status": "COMPLETED",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+            for number in range(1, versions + 1):
+                version_rows.append(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "page_id": page_id,
+                        "image_path": f"{project_id}/pages/{page_id}_v{number}.png",
+                        "version_number": number,
+                        "is_current": number == versions,
+                        "created_at": created_at,
+                    }
+                )
+
+    for model, rows in (
+        (Project, project_rows),
+        (Task, task_rows),
+        (Page, page_rows),
+        (PageImageVersion, version_rows),
+    ):
+        db.session.execute(model.__table__.insert(), rows)
+    db.session.commit()
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_queries(repeat: int, rng: random.Random) -> Dict[str, float]:
+    project_ids = [row[0] for row in db.session.query(Project.id).all()]
+    page_ids = [row[0] for row in db.session.query(Page.id).limit(10000).all()]
+
+    def recent_projects_n_plus_one():
+        projects = Project.query.order_by(Project.created_at.desc()).limit(20).all()
+        return [Page.query.filter_by(project_id=p.id).count() for p in projects]
+
+    def recent_projects_grouped():
+        projects = Project.query.order_by(Project.created_at.desc()).limit(20).all()
+        return count_pages_by_project(p.id for p in projects)
+
+    results = {
+        "pages of a project": timed(
+            lambda: Page.query.filter_by(project_id=rng.choice(project_ids))
+            .order_by(Page.order_index)
+            .all(),
+            repeat,
+        ),
+        "current image version": timed(
+            lambda: PageImageVersion.query.filter_by(
+                page_id=rng.choice(page_ids), is_current=True
+            ).first(),
+            repeat,
+        ),
+        "active tasks": timed(
+            lambda: Task.query.filter(Task.status.in_(["PENDING", "PROCESSING"])).all(),
+            repeat,
+        ),
+        "status: 20 recent + COUNT each": timed(recent_projects_n_plus_one, repeat),
+        "status: 20 recent + grouped count": timed(recent_projects_grouped, repeat),
+    }
+    db.session.rollback()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--pages", type=int, default=10, help="Pages per project")
+    parser.add_argument("--versions", type=int, default=2, help="Image versions per page")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed calls per query")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="banana-index-bench-")
+    app = create_app(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+
+    with app.app_context():
+        start = time.perf_counter()
+        populate(args.projects, args.pages, args.versions)
+        print(
+            f"Inserted {args.projects} projects, {args.projects * args.pages} pages, "
+            f"{args.projects * args.pages * args.versions} versions "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        db.session.execute(text("ANALYZE"))
+        with_indexes = run_queries(args.repeat, random.Random(1))
+
+        for name, _ in QUERY_INDEXES:
+            db.session.execute(text(f"DROP INDEX {name}"))
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        without_indexes = run_queries(args.repeat, random.Random(1))
+
+    print(f"{'query':<36} {'no index':>10} {'indexed':>10}  (median ms)")
+    for name, indexed in with_indexes.items():
+        baseline = without_indexes[name]
+        print(
+            f"{name:<36} {baseline:>10.2f} {indexed:>10.2f}  "
+            f"x{baseline / max(indexed, 1e-6):.0f}"
+        )
+    print(f"Scratch files: {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Reference-image upload benchmark
+
+Compares the bytes uploaded per deck, and the time spent producing them,
+under the legacy policy (full size, JPEG quality 95) and the configured
+IMAGE_UPLOAD_* policy.
+
+    # Synthetic deck: 2752x1536 template plus two material images per page
+    python -m banana_slides.benchmarks.reference_upload --pages 20
+
+    # Reference images of an existing project (template + materials)
+    python -m banana_slides.benchmarks.reference_upload --project-id <id>
+
+    # Also time real image requests for the first pages with each policy
+    python -m banana_slides.benchmarks.reference_upload --project-id <id> --live 3
+
+Offline mode reports base64 bytes per deck, resize+encode CPU time (the
+template and materials are encoded once per deck thanks to the encode cache)
+and the transfer time those bytes take at --uplink-mbps. Live mode sends
+the same request with each policy and reports wall-clock latency.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from PIL import Image, ImageDraw
+
+from ..services.ai_providers import LEGACY_UPLOAD_POLICY, UploadPolicy
+
+
+def synthetic_image(width: int, height: int, seed: int) -> Image.Image:
+    """Gradient background with shapes and noise, roughly as compressible as a slide template"""
+    rng = random.Random(seed)
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randrange(50, width // 3), y0 + rng.randrange(50, height // 3)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+        else:
+            draw.ellipse((x0, y0, x1, y1), outline=color, width=6)
+    noise = Image.effect_noise((width, height), 24).convert("RGB")
+    return Image.blend(image, noise, 0.15)
+
+
+def synthetic_deck(pages: int) -> List[List[Image.Image]]:
+    """Reference images per page: a shared template plus two materials"""
+    template = synthetic_image(2752, 1536, seed=0)
+    materials = [synthetic_image(2048, 1536, seed=i + 1) for i in range(pages)]
+    return [[template, materials[i], materials[(i + 1) % pages]] for i in range(pages)]
+
+
+def project_deck(project_id: str) -> List[List[Image.Image]]:
+    """Template and material images each page of a project would send"""
+    from ..cli import get_cli_app
+    from ..config import get_config
+    from ..core.file_service import FileService
+    from ..core.generator import AIService
+    from ..models import Page
+    from ..services.reference_images import get_reference_image_loader
+
+    app = get_cli_app()
+    loader = get_reference_image_loader()
+    with app.app_context():
+        template_path = FileService(get_config().UPLOAD_FOLDER).get_template_path(
+            project_id
+        )
+        template = loader.load_file(template_path) if template_path else None
+        pages = (
+            Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        )
+        deck = []
+        for page in pages:
+            text = (page.get_description_content() or {}).get("text", "")
+            images = [template] if template is not None else []
+            for url in AIService.extract_image_urls_from_markdown(text):
+                image = loader.load(url)
+                if image is not None:
+                    images.append(image)
+            deck.append(images)
+        return deck
+
+
+def measure_offline(deck: List[List[Image.Image]], policy: UploadPolicy) -> Dict[str, float]:
+    """Bytes a deck uploads and the CPU time spent encoding them"""
+    # Each image is encoded once per deck, as the encoded-payload cache does
+    payloads = {}
+    upload_bytes = 0
+    start = time.perf_counter()
+    for images in deck:
+        for image in images:
+            if id(image) not in payloads:
+                payloads[id(image)] = policy.encode_base64(image)
+            upload_bytes += len(payloads[id(image)])
+    return {
+        "requests": len(deck),
+        "upload_bytes": upload_bytes,
+        "encode_seconds": time.perf_counter() - start,
+    }
+
+
+def measure_live(deck: List[List[Image.Image]], policy: UploadPolicy, pages: int) -> List[float]:
+    """Wall-clock latency of real image requests for the first pages"""
+    from ..config import get_config
+    from ..services.ai_providers import OpenAIImageProvider
+
+    config = get_config()
+    provider = OpenAIImageProvider(
+        api_key=config.OPENAI_API_KEY,
+        api_base=config.OPENAI_API_BASE,
+        model=config.IMAGE_MODEL,
+        upload_policy=policy,
+    )
+    latencies = []
+    for idx, images in enumerate(deck[:pages]):
+        start = time.perf_counter()
+        provider.generate_image(
+            prompt=f"A clean presentation slide, page {idx + 1}, matching the reference style",
+            ref_images=images or None,
+        )
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--project-id", help="Use the reference images of a project")
+    parser.add_argument("--pages", type=int, default=20, help="Synthetic deck size")
+    parser.add_argument(
+        "--uplink-mbps", type=float, default=20.0, help="Uplink used to estimate transfer time"
+    )
+    parser.add_argument(
+        "--live", type=int, default=0, metavar="N", help="Send N real requests per policy"
+    )
+    args = parser.parse_args(argv)
+
+    deck = project_deck(args.project_id) if args.project_id else synthetic_deck(args.pages)
+    policies = {
+        "legacy (full size, JPEG q95)": LEGACY_UPLOAD_POLICY,
+        "configured": UploadPolicy.from_config(),
+    }
+
+    print(f"Deck: {len(deck)} pages, {sum(len(images) for images in deck)} reference images")
+    for name, policy in policies.items():
+        stats = measure_offline(deck, policy)
+        transfer = stats["upload_bytes"] * 8 / (args.uplink_mbps * 1_000_000)
+        print(
+            f"  {name:<30} {policy.format} q{policy.quality} max_edge={policy.max_edge or '-'}: "
+            f"upload={stats['upload_bytes'] / 1024 / 1024:.1f} MB "
+            f"({stats['upload_bytes'] / max(1, stats['requests']) / 1024:.0f} KB/request) "
+            f"encode={stats['encode_seconds']:.2f}s "
+            f"transfer@{args.uplink_mbps:g}Mbps={transfer:.1f}s"
+        )
+
+    if args.live:
+        print(f"Live requests ({args.live} per policy):")
+        for name, policy in policies.items():
+            latencies = measure_live(deck, policy, args.live)
+            print(
+                f"  {name:<30} mean={statistics.mean(latencies):.1f}s "
+                f"max={max(latencies):.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
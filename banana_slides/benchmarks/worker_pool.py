@@ -0,0 +1,178 @@
+"""
+Worker pool benchmark
+
+Runs a simulated editable export with the shape of the real one, with sleeps
+for the MinerU / OCR / inpainting / caption calls and a buffer per image held
+while it is processed:
+
+- pages analysed concurrently (``--page-workers``)
+- each image: MinerU + Baidu OCR in parallel, then up to 8 child elements
+  analysed the same way, recursively down to ``--depth``
+- text style extraction over all text elements (``--page-workers * 2``)
+
+Two schedulers are compared:
+
+- nested: a new ThreadPoolExecutor at every layer, as before
+- shared: every layer submits into one WorkerPool (``--pool-size``)
+
+Reports wall time, peak thread count (sampled) and peak traced memory.  With
+sleeps only, wall time scales with thread count; real calls are also capped
+by the per-provider rate limiters, so extra threads mostly wait there.
+
+    python -m banana_slides.benchmarks.worker_pool --pages 20 --children 4
+"""
+
+import argparse
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List
+
+from ..services.worker_pool import WorkerPool
+
+
+class Workload:
+    """Fake export: sleeps stand in for remote calls, bytearrays for decoded images"""
+
+    def __init__(self, args):
+        self.args = args
+
+    def extract(self, size: int) -> List[int]:
+        # MinerU or OCR call on one image
+        time.sleep(self.args.call_ms / 1000)
+        return list(range(self.args.children))
+
+    def inpaint(self):
+        time.sleep(self.args.call_ms / 1000)
+
+    def style(self, item: int):
+        time.sleep(self.args.call_ms / 2000)
+        return item
+
+    def image_bytes(self, depth: int) -> int:
+        # Child crops are smaller than the page image
+        return int(self.args.image_kb * 1024 / (4 ** depth))
+
+
+def run_nested(workload: Workload) -> int:
+    args = workload.args
+
+    def editable(depth: int) -> int:
+        image = bytearray(workload.image_bytes(depth))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(workload.extract, len(image)) for _ in range(2)]
+            children = [f.result() for f in as_completed(futures)][0]
+        workload.inpaint()
+        texts = 1
+        if depth < args.depth and children:
+            with ThreadPoolExecutor(max_workers=min(8, len(children))) as executor:
+                futures = [executor.submit(editable, depth + 1) for _ in children]
+                texts += sum(f.result() for f in as_completed(futures))
+        del image
+        return texts
+
+    with ThreadPoolExecutor(max_workers=args.page_workers) as executor:
+        futures = [executor.submit(editable, 0) for _ in range(args.pages)]
+        texts = sum(f.result() for f in as_completed(futures))
+    with ThreadPoolExecutor(max_workers=args.page_workers * 2) as executor:
+        futures = [executor.submit(workload.style, i) for i in range(texts)]
+        for f in as_completed(futures):
+            f.result()
+    return texts
+
+
+def run_shared(workload: Workload, pool: WorkerPool) -> int:
+    args = workload.args
+
+    def editable(depth: int) -> int:
+        image = bytearray(workload.image_bytes(depth))
+        futures = [pool.submit(workload.extract, len(image)) for _ in range(2)]
+        children = [f.result() for f in pool.as_completed(futures)][0]
+        workload.inpaint()
+        texts = 1
+        if depth < args.depth and children:
+            for _, future in pool.map_unordered(lambda _: editable(depth + 1), children, limit=8):
+                texts += future.result()
+        del image
+        return texts
+
+    texts = sum(
+        future.result()
+        for _, future in pool.map_unordered(lambda _: editable(0), range(args.pages), limit=args.page_workers)
+    )
+    for _, future in pool.map_unordered(workload.style, range(texts), limit=args.page_workers * 2):
+        future.result()
+    return texts
+
+
+def measure(func: Callable[[], int]) -> Dict[str, float]:
+    """Wall time, peak threads and peak traced memory of one run"""
+    peak_threads = threading.active_count()
+    stop = threading.Event()
+
+    def sample():
+        nonlocal peak_threads
+        while not stop.wait(0.002):
+            peak_threads = max(peak_threads, threading.active_count())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    tracemalloc.start()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        texts = func()
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        sampler.join()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "seconds": elapsed,
+        # The sampler thread itself is not part of the workload
+        "peak_threads": peak_threads - 1,
+        "peak_mb": peak_bytes / 1024 / 1024,
+        "texts": texts,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--children", type=int, default=4, help="Child elements per image")
+    parser.add_argument("--depth", type=int, default=2, help="Recursion depth below the page")
+    parser.add_argument("--page-workers", type=int, default=8, help="Export max_workers")
+    parser.add_argument("--pool-size", type=int, default=16, help="Shared pool threads (WORKER_POOL_SIZE)")
+    parser.add_argument("--call-ms", type=float, default=50, help="Simulated latency per remote call")
+    parser.add_argument("--image-kb", type=int, default=8192, help="Buffer held per page image")
+    args = parser.parse_args(argv)
+
+    workload = Workload(args)
+    pool = WorkerPool(args.pool_size, name="bench-worker")
+    try:
+        results = {
+            "nested": measure(lambda: run_nested(workload)),
+            "shared": measure(lambda: run_shared(workload, pool)),
+        }
+        pool_stats = pool.stats()
+    finally:
+        pool.shutdown()
+
+    print(
+        f"Export of {args.pages} pages, {args.children} children per image, depth {args.depth}, "
+        f"{args.call_ms:.0f} ms per call, page workers {args.page_workers}"
+    )
+    for name, result in results.items():
+        print(
+            f"  {name:<7} {result['seconds']:7.2f} s  peak threads {result['peak_threads']:4d}  "
+            f"peak memory {result['peak_mb']:7.1f} MB  ({result['texts']} text elements)"
+        )
+    print(
+        f"  shared pool: {pool_stats['peak_threads']} threads, "
+        f"{pool_stats['inline_runs']} tasks run inline by waiting workers"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,15 @@
 Banana Slides CLI - Command-line interface for PPT generation
 """
 
+# The package imports below must follow the sys.path setup: some services
+# still import sibling modules by absolute name (e.g. `from utils...`)
+# ruff: noqa: E402
+
 import os
+import signal
 import sys
 import json
+import asyncio
 import logging
 import time
 from pathlib import Path
@@ -28,11 +34,17 @@ backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
 from .config import Config, get_config
-from .models import db, Project, Page, Task
+from .models import db, init_engine, Project, Page, Task
+from .models.engine import create_missing_indexes
+from .utils import count_pages_by_project
 from .core.generator import AIService, ProjectContext
 from .core.file_service import FileService
 from .core.exporter import ExportService
+from .core.pipeline import run_page_pipeline, run_page_pipeline_async
+from .services.hedging import deck_hedge_budget, get_hedging_stats
+from .services.worker_pool import get_worker_pool
 from .services.ai_service_manager import get_ai_service
+from .services.ai_providers import get_encoded_image_cache
 from .services.image_editability import (
     ImageEditabilityService,
     ServiceConfig,
@@ -58,34 +70,20 @@ class CLIDatabase:
 
     @staticmethod
     def init_db():
-        """Initialize database connection"""
+        """Initialize database connection (DATABASE_URL, default instance/database.db)"""
         config = get_config()
-        db_path = os.path.join(backend_dir, "instance", "database.db")
-
-        # Ensure instance directory exists
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-
-        # Configure SQLAlchemy for CLI
-        db_uri = f"sqlite:///{db_path}"
-        db.config = {
-            "SQLALCHEMY_DATABASE_URI": db_uri,
-            "SQLALCHEMY_TRACK_MODIFICATIONS": False,
-            "SQLALCHEMY_ENGINE_OPTIONS": {
-                "connect_args": {"check_same_thread": False, "timeout": 30},
-                "pool_pre_ping": True,
-                "pool_recycle": 3600,
-            },
-        }
 
         # Create app context for database operations
         from flask import Flask
 
         app = Flask(__name__)
-        app.config.update(db.config)
+        app.config["SQLALCHEMY_DATABASE_URI"] = config.SQLALCHEMY_DATABASE_URI
+        init_engine(app, config)
         db.init_app(app)
 
         with app.app_context():
             db.create_all()
+            create_missing_indexes(db.engine, db.metadata)
             return app
 
 
@@ -171,7 +169,7 @@ def cli():
 
 @cli.command()
 @click.option(
-    "--prompt", "-p", required=True, help="PPT generation prompt (idea/description)"
+    "--prompt", "-p", default=None, help="PPT generation prompt (idea/description)"
 )
 @click.option(
     "--output",
@@ -202,6 +200,46 @@ def cli():
 @click.option(
     "--pages", "-n", type=int, default=None, help="Number of pages (optional)"
 )
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Concurrent pages per stage "
+    "(default: MAX_DESCRIPTION_WORKERS / MAX_IMAGE_WORKERS)",
+)
+@click.option(
+    "--pipeline/--no-pipeline",
+    default=False,
+    help="Start each page's image as soon as its description is ready",
+)
+@click.option(
+    "--asyncio",
+    "use_asyncio",
+    is_flag=True,
+    default=False,
+    help="Run the pipeline on an asyncio event loop with async providers",
+)
+@click.option(
+    "--stream-outline",
+    is_flag=True,
+    default=False,
+    help="Stream the outline and start each page as soon as its outline is written "
+    "(descriptions only see the outline so far; no outline prompt caching)",
+)
+@click.option(
+    "--batch-descriptions",
+    is_flag=True,
+    default=False,
+    help="Generate several page descriptions per LLM call (staged mode only)",
+)
+@click.option(
+    "--resume",
+    "resume_id",
+    metavar="PROJECT_ID",
+    default=None,
+    help="Continue an interrupted run, only generating pages that are not finished",
+)
 def create(
     prompt: str,
     output: Optional[str],
@@ -209,24 +247,78 @@ def create(
     template: Optional[str],
     language: str,
     pages: Optional[int],
+    workers: Optional[int],
+    pipeline: bool,
+    use_asyncio: bool,
+    stream_outline: bool,
+    batch_descriptions: bool,
+    resume_id: Optional[str],
 ):
     """
     Generate PPT from a prompt
 
+    Every page is saved as soon as its description or image is ready, so an
+    interrupted run can be continued with --resume: the saved outline and
+    descriptions are reused and only unfinished pages are generated. An
+    outline that was interrupted while streaming is generated again first.
+
     Example:
         banana-slides create --prompt "Create a presentation about climate change" --output climate.pptx
+        banana-slides create --resume <project_id>
     """
+    if not prompt and not resume_id:
+        raise click.UsageError("Either --prompt or --resume is required")
+
     rprint(
         Panel.fit(
             f"[bold blue]🍌 Banana Slides CLI[/bold blue]\nGenerating PPT from prompt..."
         )
     )
 
+    if batch_descriptions and (pipeline or use_asyncio):
+        rprint(
+            "[yellow]--batch-descriptions only applies to staged mode, ignoring it[/yellow]"
+        )
+        batch_descriptions = False
+
     app = get_cli_app()
     with app.app_context():
         # Initialize services
         ai_service = get_ai_service()
 
+        config = get_config()
+        file_service = FileService(
+            upload_folder=config.UPLOAD_FOLDER,
+            allowed_extensions=config.ALLOWED_EXTENSIONS,
+        )
+
+        # Step 1: Create project (or load the one being resumed)
+        if resume_id:
+            rprint("\n[yellow]Step 1/4[/yellow]: Loading project...")
+            project = Project.query.get(resume_id)
+            if project is None:
+                rprint(f"[red]✗ Project {resume_id} not found[/red]")
+                return
+            if prompt and prompt != project.idea_prompt:
+                rprint("  [dim]--prompt is ignored, using the project's prompt[/dim]")
+            prompt = project.idea_prompt or project.id
+            rprint(f"  ✓ Resuming project [cyan]{project.id}[/cyan]")
+        else:
+            rprint("\n[yellow]Step 1/4[/yellow]: Creating project...")
+
+            project = Project(
+                creation_type="idea",
+                idea_prompt=prompt,
+                status="DRAFT",
+                extra_requirements=""
+                if pages is None
+                else f"Generate approximately {pages} pages",
+            )
+            db.session.add(project)
+            db.session.commit()
+
+            rprint(f"  ✓ Created project [cyan]{project.id}[/cyan]")
+
         # Determine output filename
         if output:
             output_path = Path(output)
@@ -237,30 +329,8 @@ def create(
             )
             output_path = Path(f"{safe_name}.{format}")
 
-        config = get_config()
-        file_service = FileService(
-            upload_folder=config.UPLOAD_FOLDER,
-            allowed_extensions=config.ALLOWED_EXTENSIONS,
-        )
-
-        # Step 1: Create project
-        rprint("\n[yellow]Step 1/4[/yellow]: Creating project...")
-
-        project = Project(
-            creation_type="idea",
-            idea_prompt=prompt,
-            status="DRAFT",
-            extra_requirements=""
-            if pages is None
-            else f"Generate approximately {pages} pages",
-        )
-        db.session.add(project)
-        db.session.commit()
-
-        rprint(f"  ✓ Created project [cyan]{project.id}[/cyan]")
-
         # Step 2: Upload template (if provided)
-        template_path = None
+        template_path = file_service.get_template_path(project.id) if resume_id else None
         if template:
             rprint("\n[yellow]Step 2/4[/yellow]: Uploading template...")
             try:
@@ -274,25 +344,163 @@ def create(
         rprint("\n[yellow]Step 3/4[/yellow]: Generating outline...")
 
         project_context = ProjectContext(project)
-        outline = ai_service.generate_outline(project_context, language=language)
-
-        # Flatten outline and create pages
-        pages_data = ai_service.flatten_outline(outline)
-        rprint(f"  ✓ Generated {len(pages_data)} pages")
+        pages_data = []
+        page_rows = []
 
-        for idx, page_data in enumerate(pages_data):
-            page = Page(
-                project_id=project.id,
-                order_index=idx,
-                outline_content=page_data,
-                status="DRAFT",
-            )
+        def add_page(page_data):
+            """Create the Page row for the next outline page and return its index"""
+            page = Page(project_id=project.id, order_index=len(page_rows), status="DRAFT")
+            page.set_outline_content(page_data)
             db.session.add(page)
+            pages_data.append(page_data)
+            page_rows.append(page)
+            return len(page_rows) - 1
+
+        saved_pages = (
+            Page.query.filter_by(project_id=project.id)
+            .order_by(Page.order_index)
+            .all()
+            if resume_id
+            else []
+        )
 
-        db.session.commit()
+        if saved_pages and project.status == "DRAFT":
+            # A streamed outline was interrupted: regenerate it, keeping saved
+            # pages whose outline entry is unchanged at the same position
+            outline = ai_service.generate_outline(project_context, language=language)
+            new_pages = ai_service.flatten_outline(outline)
+            kept = 0
+            for idx, page_data in enumerate(new_pages):
+                page = saved_pages[idx] if idx < len(saved_pages) else None
+                if page is None:
+                    add_page(page_data)
+                    continue
+                old_data = page.get_outline_content() or {}
+                if old_data.get("title") == page_data.get("title"):
+                    kept += 1
+                else:
+                    page.set_outline_content(page_data)
+                    page.description_content = None
+                    page.generated_image_path = None
+                    page.status = "DRAFT"
+                pages_data.append(page_data)
+                page_rows.append(page)
+            for page in saved_pages[len(new_pages):]:
+                db.session.delete(page)
+            project.status = "OUTLINE_GENERATED"
+            db.session.commit()
+            stream_outline = False
+            rprint(
+                f"  ✓ Regenerated interrupted outline ({len(pages_data)} pages, "
+                f"{kept} saved pages kept)"
+            )
+        elif saved_pages:
+            # Resume: the outline was completed, reuse its pages
+            for page in saved_pages:
+                pages_data.append(page.get_outline_content() or {})
+                page_rows.append(page)
+            outline = pages_data
+            stream_outline = False
+            rprint(f"  ✓ Reusing saved outline ({len(pages_data)} pages)")
+        elif stream_outline:
+            # Pages are created (and start generating) while the outline streams in.
+            # Known trade-off: descriptions and image prompts see only the outline
+            # written so far, not the complete one, so early pages are written with
+            # less context, and the outline prefix differs on every call, so the
+            # cacheable prompt prefix never hits. The project stays DRAFT until the
+            # stream ends, so --resume can tell a partial outline apart
+            outline = pages_data
+            rprint("  [dim]Streaming outline, pages start as they arrive...[/dim]")
+        else:
+            outline = ai_service.generate_outline(project_context, language=language)
+
+            # Flatten outline and create pages
+            for page_data in ai_service.flatten_outline(outline):
+                add_page(page_data)
+            project.status = "OUTLINE_GENERATED"
+            db.session.commit()
+            rprint(f"  ✓ Generated {len(pages_data)} pages")
+
+        # Checkpoint: skip finished pages, reuse saved descriptions
+        saved_descs = {}
+        remaining = []
+        for idx, page in enumerate(page_rows):
+            image_path = page.generated_image_path
+            if (
+                page.status == "COMPLETED"
+                and image_path
+                and os.path.exists(file_service.get_absolute_path(image_path))
+            ):
+                continue
+            desc_text = (page.get_description_content() or {}).get("text")
+            if desc_text:
+                saved_descs[idx] = desc_text
+            remaining.append(idx)
+
+        if saved_pages:
+            rprint(
+                f"  ✓ {len(page_rows) - len(remaining)} pages done, "
+                f"{len(saved_descs)} with saved descriptions, "
+                f"{len(remaining) - len(saved_descs)} to generate from scratch"
+            )
 
         # Step 4: Generate descriptions and images
         rprint("\n[yellow]Step 4/4[/yellow]: Generating PPT content...")
+        rprint(
+            f"  [dim]Progress is saved per page; if interrupted, continue with: "
+            f"banana-slides create --resume {project.id}[/dim]"
+        )
+        if not stream_outline:
+            project.status = "GENERATING_IMAGES"
+            db.session.commit()
+
+        desc_workers = workers or config.MAX_DESCRIPTION_WORKERS
+        image_workers = workers or config.MAX_IMAGE_WORKERS
+        encode_stats_before = get_encoded_image_cache().stats()
+        # Streamed outlines have no page count yet; budget for the configured deck size
+        hedge_budget = deck_hedge_budget(len(pages_data) or pages or 10)
+
+        def generate_single_desc(idx, page_data):
+            """Generate the description for one page (runs in a worker thread)"""
+            if idx in saved_descs:
+                return saved_descs[idx]
+            return ai_service.generate_page_description(
+                project_context=project_context,
+                outline=outline,
+                page_outline=page_data,
+                page_index=idx + 1,
+                language=language,
+            )
+
+        def generate_single_image(idx, page_data, desc_text):
+            """Generate the image for one page (runs in a worker thread)"""
+            # Extract material images from description
+            additional_ref_images = ai_service.extract_image_urls_from_markdown(
+                desc_text
+            )
+
+            # Generate image prompt
+            prompt_text = ai_service.generate_image_prompt(
+                outline=outline,
+                page=page_data,
+                page_desc=desc_text,
+                page_index=idx + 1,
+                has_material_images=bool(additional_ref_images),
+                language=language,
+                has_template=bool(template_path),
+            )
+
+            # Generate image
+            return ai_service.generate_image(
+                prompt=prompt_text,
+                ref_image_path=template_path,
+                aspect_ratio=config.DEFAULT_ASPECT_RATIO,
+                resolution=config.DEFAULT_RESOLUTION,
+                additional_ref_images=additional_ref_images
+                if additional_ref_images
+                else None,
+                hedge_budget=hedge_budget,
+            )
 
         # Use progress bar for generation
         with Progress(
@@ -303,86 +511,272 @@ def create(
             TimeRemainingColumn(),
             console=console,
         ) as progress:
-            # Generate descriptions
-            desc_task = progress.add_task(
-                "Generating descriptions...", total=len(pages_data)
-            )
-            for idx, page_data in enumerate(pages_data):
-                page = Page.query.filter_by(
-                    project_id=project.id, order_index=idx
-                ).first()
-
-                desc_text = ai_service.generate_page_description(
-                    project_context=project_context,
-                    outline=outline,
-                    page_outline=page_data,
-                    page_index=idx + 1,
-                    language=language,
-                )
+            total = None if stream_outline else len(remaining)
+            desc_task = progress.add_task("Generating descriptions...", total=total)
+            img_task = progress.add_task("Generating images...", total=total)
+            desc_texts = {}
+
+            if stream_outline:
+
+                def add_streamed_page(page_data):
+                    idx = add_page(page_data)
+                    db.session.commit()
+                    progress.update(desc_task, total=len(page_rows))
+                    progress.update(img_task, total=len(page_rows))
+                    return idx, page_data
+
+                def finish_streamed_outline():
+                    project.status = "OUTLINE_GENERATED"
+                    db.session.commit()
+
+                def streamed_pages():
+                    for page_data in ai_service.generate_outline_stream(
+                        project_context, language=language
+                    ):
+                        yield add_streamed_page(page_data)
+                    finish_streamed_outline()
+
+                async def streamed_pages_async():
+                    # Only the blocking stream leaves the loop; pages are added
+                    # on the loop thread, like the save callbacks
+                    stream = iter(
+                        ai_service.generate_outline_stream(
+                            project_context, language=language
+                        )
+                    )
+                    done = object()
+                    while True:
+                        page_data = await asyncio.to_thread(next, stream, done)
+                        if page_data is done:
+                            finish_streamed_outline()
+                            return
+                        yield add_streamed_page(page_data)
+
+                def streamed_outline_items():
+                    # Advanced on the pipeline's feeder thread: no database work
+                    # here, pages are added by add_streamed_item instead
+                    return enumerate(
+                        ai_service.generate_outline_stream(
+                            project_context, language=language
+                        )
+                    )
 
-                page.set_description_content(
-                    {
-                        "text": desc_text,
-                        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    }
-                )
-                page.status = "DESCRIPTION_GENERATED"
-                db.session.commit()
+                def add_streamed_item(idx, page_data):
+                    add_streamed_page(page_data)
 
+                if use_asyncio:
+                    page_items = streamed_pages_async()
+                elif pipeline:
+                    page_items = streamed_outline_items()
+                else:
+                    page_items = streamed_pages()
+            else:
+                page_items = [(idx, pages_data[idx]) for idx in remaining]
+
+            # Results are written back on this thread only; workers make AI calls
+            def save_description(idx, desc_text, error):
+                page = page_rows[idx]
+                if error is None and desc_text:
+                    desc_texts[idx] = desc_text
+                    if idx not in saved_descs:
+                        page.set_description_content(
+                            {
+                                "text": desc_text,
+                                "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                            }
+                        )
+                    page.status = "DESCRIPTION_GENERATED"
+                else:
+                    logger.error(
+                        f"Failed to generate description for page {idx + 1}: {error}"
+                    )
+                    page.status = "FAILED"
+                    rprint(
+                        f"  [red]✗ Failed to generate description for page {idx + 1}[/red]"
+                    )
+                    # This page will never reach the image stage
+                    progress.update(img_task, advance=1)
+                db.session.commit()
                 progress.update(desc_task, advance=1)
 
-            # Generate images
-            img_task = progress.add_task("Generating images...", total=len(pages_data))
-            for idx, page_data in enumerate(pages_data):
-                page = Page.query.filter_by(
-                    project_id=project.id, order_index=idx
-                ).first()
-
-                desc_content = page.get_description_content()
-                desc_text = desc_content.get("text", "")
-
-                # Extract material images from description
-                additional_ref_images = ai_service.extract_image_urls_from_markdown(
-                    desc_text
-                )
-
-                # Generate image prompt
-                prompt_text = ai_service.generate_image_prompt(
-                    outline=outline,
-                    page=page_data,
-                    page_desc=desc_text,
-                    page_index=idx + 1,
-                    has_material_images=bool(additional_ref_images),
-                    language=language,
-                    has_template=bool(template_path),
-                )
-
-                # Generate image
-                image = ai_service.generate_image(
-                    prompt=prompt_text,
-                    ref_image_path=template_path,
-                    aspect_ratio=config.DEFAULT_ASPECT_RATIO,
-                    resolution=config.DEFAULT_RESOLUTION,
-                    additional_ref_images=additional_ref_images
-                    if additional_ref_images
-                    else None,
-                )
-
-                if image:
+            def save_image(idx, image, error):
+                page = page_rows[idx]
+                if error is None and image:
                     image_path = file_service.save_generated_image(
                         image, project.id, page.id
                     )
                     page.generated_image_path = image_path
                     page.status = "COMPLETED"
                 else:
+                    if error is not None:
+                        logger.error(
+                            f"Failed to generate image for page {idx + 1}: {error}"
+                        )
                     page.status = "FAILED"
                     rprint(
                         f"  [red]✗ Failed to generate image for page {idx + 1}[/red]"
                     )
-
                 db.session.commit()
                 progress.update(img_task, advance=1)
 
+            if use_asyncio:
+                # Same pipeline on one event loop with AsyncOpenAI providers
+                async def describe_async(idx, page_data):
+                    if idx in saved_descs:
+                        return saved_descs[idx]
+                    return await ai_service.generate_page_description_async(
+                        project_context=project_context,
+                        outline=outline,
+                        page_outline=page_data,
+                        page_index=idx + 1,
+                        language=language,
+                    )
+
+                async def render_async(idx, page_data, desc_text):
+                    additional_ref_images = ai_service.extract_image_urls_from_markdown(
+                        desc_text
+                    )
+                    prompt_text = ai_service.generate_image_prompt(
+                        outline=outline,
+                        page=page_data,
+                        page_desc=desc_text,
+                        page_index=idx + 1,
+                        has_material_images=bool(additional_ref_images),
+                        language=language,
+                        has_template=bool(template_path),
+                    )
+                    return await ai_service.generate_image_async(
+                        prompt=prompt_text,
+                        ref_image_path=template_path,
+                        aspect_ratio=config.DEFAULT_ASPECT_RATIO,
+                        resolution=config.DEFAULT_RESOLUTION,
+                        additional_ref_images=additional_ref_images
+                        if additional_ref_images
+                        else None,
+                    )
+
+                async def run_async_pipeline():
+                    try:
+                        await run_page_pipeline_async(
+                            page_items,
+                            describe=describe_async,
+                            render=render_async,
+                            text_concurrency=desc_workers,
+                            image_concurrency=image_workers,
+                            on_description=save_description,
+                            on_image=save_image,
+                        )
+                    finally:
+                        await ai_service.aclose()
+
+                asyncio.run(run_async_pipeline())
+            elif pipeline:
+                # Each page enters the image stage as soon as its description lands
+                run_page_pipeline(
+                    page_items,
+                    describe=generate_single_desc,
+                    render=generate_single_image,
+                    text_workers=desc_workers,
+                    image_workers=image_workers,
+                    on_description=save_description,
+                    on_image=save_image,
+                    on_item=add_streamed_item if stream_outline else None,
+                    on_items_done=finish_streamed_outline if stream_outline else None,
+                )
+            else:
+                # Generate descriptions
+                with ThreadPoolExecutor(max_workers=desc_workers) as executor:
+                    if batch_descriptions:
+                        for idx, desc_text in saved_descs.items():
+                            save_description(idx, desc_text, None)
+                        # Several pages per call; shared context is sent once per batch
+                        batches = ai_service.plan_description_batches(
+                            project_context,
+                            outline,
+                            [
+                                (idx + 1, page_data)
+                                for idx, page_data in page_items
+                                if idx not in saved_descs
+                            ],
+                            language=language,
+                        )
+                        futures = {
+                            executor.submit(
+                                ai_service.generate_page_descriptions_batch,
+                                project_context,
+                                outline,
+                                batch,
+                                language,
+                            ): batch
+                            for batch in batches
+                        }
+                        for future in as_completed(futures):
+                            batch = futures[future]
+                            try:
+                                descriptions, errors = future.result()
+                            except Exception as e:
+                                descriptions = {}
+                                errors = {page_index: e for page_index, _ in batch}
+                            for page_index, _ in batch:
+                                save_description(
+                                    page_index - 1,
+                                    descriptions.get(page_index),
+                                    errors.get(page_index),
+                                )
+                    else:
+                        futures = {
+                            executor.submit(generate_single_desc, idx, page_data): idx
+                            for idx, page_data in page_items
+                        }
+                        for future in as_completed(futures):
+                            try:
+                                result, error = future.result(), None
+                            except Exception as e:
+                                result, error = None, e
+                            save_description(futures[future], result, error)
+
+                # Generate images
+                with ThreadPoolExecutor(max_workers=image_workers) as executor:
+                    futures = {
+                        executor.submit(
+                            generate_single_image, idx, page_data, desc_texts[idx]
+                        ): idx
+                        for idx, page_data in enumerate(pages_data)
+                        if desc_texts.get(idx)
+                    }
+                    for future in as_completed(futures):
+                        try:
+                            result, error = future.result(), None
+                        except Exception as e:
+                            result, error = None, e
+                        save_image(futures[future], result, error)
+
+        encode_stats = get_encoded_image_cache().stats()
+        encode_hits = encode_stats["hits"] - encode_stats_before["hits"]
+        if encode_hits:
+            saved = encode_stats["saved_seconds"] - encode_stats_before["saved_seconds"]
+            rprint(
+                f"  [dim]Reference image encode cache: {encode_hits} hits, "
+                f"{saved:.1f}s CPU saved[/dim]"
+            )
+
+        if hedge_budget is not None and hedge_budget.used:
+            hedge_stats = get_hedging_stats().get("openai_image", {})
+            rprint(
+                f"  [dim]Hedged image requests: {hedge_budget.used} "
+                f"(p99 saved {hedge_stats.get('p99_saved', 0.0):.1f}s)[/dim]"
+            )
+
+        unfinished = sum(1 for page in page_rows if page.status != "COMPLETED")
+        if unfinished:
+            rprint(
+                f"  [yellow]{unfinished} pages not finished; retry them with: "
+                f"banana-slides create --resume {project.id}[/yellow]"
+            )
+        else:
+            project.status = "COMPLETED"
+            db.session.commit()
+
         # Export to PPTX/PDF
         rprint(f"\n[yellow]Exporting to {format.upper()}...[/yellow]")
 
@@ -556,33 +950,31 @@ def convert(images, output, extractor, inpaint, extract_styles):
             service = ImageEditabilityService(service_config)
 
             # 2. Analyze images
-            editable_images = []
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = {
-                    executor.submit(service.make_image_editable, path): idx
-                    for idx, path in enumerate(image_paths)
-                }
-
-                results = [None] * len(image_paths)
-                with Progress(
-                    SpinnerColumn(),
-                    TextColumn("[progress.description]{task.description}"),
-                    BarColumn(),
-                    TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-                    console=console,
-                ) as progress:
-                    task = progress.add_task("Analyzing...", total=len(image_paths))
-
-                    for future in as_completed(futures):
-                        idx = futures[future]
-                        try:
-                            results[idx] = future.result()
-                            progress.update(task, advance=1)
-                        except Exception as e:
-                            logger.error(
-                                f"Failed to analyze image {image_paths[idx]}: {e}"
-                            )
-                            raise
+            # Images and their child elements share the process-wide worker pool
+            pool = get_worker_pool()
+            results = [None] * len(image_paths)
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+                console=console,
+            ) as progress:
+                task = progress.add_task("Analyzing...", total=len(image_paths))
+
+                for idx, future in pool.map_unordered(
+                    lambda i: service.make_image_editable(image_paths[i]),
+                    range(len(image_paths)),
+                    limit=4,
+                ):
+                    try:
+                        results[idx] = future.result()
+                        progress.update(task, advance=1)
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to analyze image {image_paths[idx]}: {e}"
+                        )
+                        raise
 
             editable_images = results
 
@@ -824,6 +1216,21 @@ def status():
         else:
             rprint("\n[dim]No active tasks[/dim]")
 
+        # Show queue depth per priority class
+        if get_config().TASK_QUEUE_BACKEND != "memory":
+            from .services.task_manager import PRIORITY_CLASSES
+            from .services.task_queue import create_task_queue
+
+            try:
+                depths = create_task_queue(app).depths()
+                queued = ", ".join(
+                    f"{name}={depths.get(priority, 0)}"
+                    for priority, name in enumerate(PRIORITY_CLASSES)
+                )
+                rprint(f"\n[bold yellow]Queued:[/bold yellow] {queued}")
+            except Exception as e:
+                rprint(f"\n[dim]Task queue unavailable: {e}[/dim]")
+
         # Show recent projects
         rprint("\n[bold yellow]Recent Projects:[/bold yellow]")
 
@@ -839,8 +1246,9 @@ def status():
             table.add_column("Pages", style="blue")
             table.add_column("Created", style="dim")
 
+            page_counts = count_pages_by_project(project.id for project in projects)
             for project in projects:
-                page_count = Page.query.filter_by(project_id=project.id).count()
+                page_count = page_counts.get(project.id, 0)
                 title = (
                     project.idea_prompt[:30] + "..."
                     if len(project.idea_prompt or "") > 30
@@ -858,5 +1266,76 @@ def status():
             console.print(table)
 
 
+@cli.command()
+@click.argument("task_id")
+def cancel(task_id: str):
+    """
+    Cancel a queued or running task
+
+    A queued task is dropped; a running one stops at its next check (between
+    pages, before each model call) and ends as CANCELLED.
+    """
+    from .services.task_manager import TaskManager
+
+    app = get_cli_app()
+    if TaskManager().cancel_task(task_id, app=app):
+        rprint(f"[green]✓ Task {task_id} cancelled[/green]")
+    else:
+        rprint(f"[red]✗ Task {task_id} not found or already finished[/red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option(
+    "--concurrency",
+    "-c",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Tasks run at the same time (default: TASK_WORKER_CONCURRENCY)",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["database", "redis"]),
+    default=None,
+    help="Queue backend (default: TASK_QUEUE_BACKEND)",
+)
+def worker(concurrency: Optional[int], backend: Optional[str]):
+    """
+    Run a worker that drains the durable task queue
+
+    Several workers (on one or more machines sharing the database or Redis)
+    can drain the same queue. Ctrl-C / SIGTERM stops leasing new tasks and
+    waits for running ones to finish.
+    """
+    from .services.task_queue import TaskWorker, create_task_queue
+
+    config = get_config()
+    backend = backend or config.TASK_QUEUE_BACKEND
+    if backend == "memory":
+        rprint("[red]✗ TASK_QUEUE_BACKEND=memory has no shared queue to drain[/red]")
+        sys.exit(1)
+
+    app = get_cli_app()
+    task_worker = TaskWorker.from_config(
+        create_task_queue(app, backend), app, concurrency=concurrency
+    )
+
+    def request_stop(signum, frame):
+        rprint("\n[yellow]Stopping, waiting for running tasks...[/yellow]")
+        task_worker.stop()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    rprint(
+        Panel.fit(
+            f"[bold blue]🍌 Banana Slides Worker[/bold blue]\n"
+            f"{task_worker.worker_id} | backend={backend} | "
+            f"concurrency={task_worker.concurrency}"
+        )
+    )
+    task_worker.run()
+
+
 if __name__ == "__main__":
     cli()
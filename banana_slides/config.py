@@ -16,17 +16,23 @@ class Config:
 
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this")
 
-    # 数据库配置
+    # 数据库配置：默认 SQLite，设置 DATABASE_URL=postgresql://... 可切换到 PostgreSQL
+    # 引擎参数（连接池、SQLite pragma）由 models.engine.init_engine 根据以下配置生成
     db_path = os.path.join(BASE_DIR, "instance", "database.db")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", f"sqlite:///{db_path}")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    # SQLite线程安全配置
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "connect_args": {"check_same_thread": False, "timeout": 30},
-        "pool_pre_ping": True,
-        "pool_recycle": 3600,
-    }
+    # 连接池：每个并发写数据库的线程（图片/描述线程、队列 worker）占用一个连接
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # 仅服务端数据库
+    # SQLite：WAL 允许读写并发，synchronous=NORMAL 在 WAL 下仍保证不损坏数据库
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE_MB = float(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+    SQLITE_CACHE_SIZE_MB = float(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))
+    SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))  # 秒
 
     # 文件存储配置
     UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, "uploads")
@@ -58,6 +64,11 @@ class Config:
     # MinerU 文件解析服务配置
     MINERU_TOKEN = os.getenv("MINERU_TOKEN", "")
     MINERU_API_BASE = os.getenv("MINERU_API_BASE", "https://mineru.net")
+    # MinerU 图片解析结果缓存：按图片内容哈希复用 uploads/mineru_files 下的结果目录
+    # 超过 MINERU_CACHE_MAX_AGE_DAYS 天未使用或总大小超过 MINERU_CACHE_MAX_MB 的条目被回收（0 = 不限制）
+    MINERU_CACHE_ENABLED = os.getenv("MINERU_CACHE_ENABLED", "true").lower() == "true"
+    MINERU_CACHE_MAX_MB = float(os.getenv("MINERU_CACHE_MAX_MB", "2048"))
+    MINERU_CACHE_MAX_AGE_DAYS = float(os.getenv("MINERU_CACHE_MAX_AGE_DAYS", "30"))
 
     # 图片识别模型配置
     IMAGE_CAPTION_MODEL = os.getenv("IMAGE_CAPTION_MODEL", "")
@@ -65,6 +76,122 @@ class Config:
     # 并发配置
     MAX_DESCRIPTION_WORKERS = int(os.getenv("MAX_DESCRIPTION_WORKERS", "5"))
     MAX_IMAGE_WORKERS = int(os.getenv("MAX_IMAGE_WORKERS", "8"))
+    # 共享工作线程池：可编辑导出的页面分析、子元素递归、MinerU/OCR 并行提取和文本样式提取
+    # 都提交到这一个线程池，进程内线程总数不超过该值（不再随页数 × 子元素 × 递归深度增长）
+    WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", "16"))
+    # 可编辑导出结果缓存：按（图片内容哈希, 提取方法, 重绘方法, 递归深度）保存分析结果到
+    # uploads/editable_images/cache，未修改的页面重新导出时直接复用；条目按引用计数删除
+    EDITABLE_CACHE_ENABLED = os.getenv("EDITABLE_CACHE_ENABLED", "true").lower() == "true"
+
+    # 上游前缀缓存：off 为单条消息（可缓存前缀在前）；messages 为前缀/每页后缀分成两条消息；
+    # cache_control 在 messages 基础上为前缀附加 cache_control 提示（Anthropic/OpenRouter 类网关）
+    PROMPT_CACHE_MODE = os.getenv("PROMPT_CACHE_MODE", "off").lower()
+
+    # 图片生成对冲请求：单次调用超过近期 p{IMAGE_HEDGE_PERCENTILE} 延迟时再发一个相同请求，先返回的有效结果胜出
+    # 每个项目最多对冲 ceil(页数 * IMAGE_HEDGE_BUDGET_RATIO) 次
+    IMAGE_HEDGE_ENABLED = os.getenv("IMAGE_HEDGE_ENABLED", "false").lower() == "true"
+    IMAGE_HEDGE_PERCENTILE = float(os.getenv("IMAGE_HEDGE_PERCENTILE", "0.9"))
+    IMAGE_HEDGE_BUDGET_RATIO = float(os.getenv("IMAGE_HEDGE_BUDGET_RATIO", "0.1"))
+    IMAGE_HEDGE_MIN_SAMPLES = int(os.getenv("IMAGE_HEDGE_MIN_SAMPLES", "10"))
+    IMAGE_HEDGE_MIN_DELAY = float(os.getenv("IMAGE_HEDGE_MIN_DELAY", "5.0"))
+
+    # 批量描述生成：一次调用生成多页描述，参考文件/原始需求/大纲每批只发送一次
+    # 批大小取 DESCRIPTION_BATCH_MAX_PAGES 与上下文窗口能容纳的页数中的较小值
+    DESCRIPTION_BATCH_MAX_PAGES = int(os.getenv("DESCRIPTION_BATCH_MAX_PAGES", "8"))
+    TEXT_CONTEXT_TOKENS = int(os.getenv("TEXT_CONTEXT_TOKENS", "128000"))
+    DESCRIPTION_TOKENS_PER_PAGE = int(os.getenv("DESCRIPTION_TOKENS_PER_PAGE", "1500"))
+
+    # 文本生成响应缓存（相同模型 + 提示词 + thinking_budget 直接读本地缓存）
+    TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "false").lower() == "true"
+    TEXT_CACHE_PATH = os.getenv(
+        "TEXT_CACHE_PATH", os.path.join(BASE_DIR, "instance", "text_cache.db")
+    )
+    TEXT_CACHE_TTL = float(os.getenv("TEXT_CACHE_TTL", str(7 * 24 * 3600)))
+    TEXT_CACHE_MAX_MB = float(os.getenv("TEXT_CACHE_MAX_MB", "200"))
+
+    # 结构化输出：auto 表示端点支持时用 response_format 约束 JSON，不支持时自动回退；off 表示关闭
+    TEXT_STRUCTURED_OUTPUT = os.getenv("TEXT_STRUCTURED_OUTPUT", "auto").lower()
+
+    # 上游限流配置：rps 为每秒请求数（0 表示不限），max_in_flight 为最大并发请求数
+    # 遇到 429/5xx 时并发上限按 AIMD 自动收缩，成功后逐步恢复
+    RATE_LIMITS = {
+        "openai_text": {
+            "rps": float(os.getenv("OPENAI_TEXT_RPS", "0")),
+            "max_in_flight": int(os.getenv("OPENAI_TEXT_MAX_IN_FLIGHT", "16")),
+        },
+        "openai_image": {
+            "rps": float(os.getenv("OPENAI_IMAGE_RPS", "0")),
+            "max_in_flight": int(os.getenv("OPENAI_IMAGE_MAX_IN_FLIGHT", "8")),
+        },
+        "baidu_ocr": {
+            "rps": float(os.getenv("BAIDU_OCR_RPS", "2")),
+            "max_in_flight": int(os.getenv("BAIDU_OCR_MAX_IN_FLIGHT", "4")),
+        },
+        "baidu_inpaint": {
+            "rps": float(os.getenv("BAIDU_INPAINT_RPS", "2")),
+            "max_in_flight": int(os.getenv("BAIDU_INPAINT_MAX_IN_FLIGHT", "4")),
+        },
+        "volcengine_inpaint": {
+            "rps": float(os.getenv("VOLCENGINE_INPAINT_RPS", "0")),
+            "max_in_flight": int(os.getenv("VOLCENGINE_INPAINT_MAX_IN_FLIGHT", "4")),
+        },
+        "mineru": {
+            "rps": float(os.getenv("MINERU_RPS", "5")),
+            "max_in_flight": int(os.getenv("MINERU_MAX_IN_FLIGHT", "4")),
+        },
+    }
+
+    # 参考图编码缓存（模板/素材图只编码一次，跨页面、跨线程共享）
+    IMAGE_ENCODE_CACHE_MB = float(os.getenv("IMAGE_ENCODE_CACHE_MB", "64"))
+    # 为非文件来源的 PIL 图片计算像素指纹后缓存（需遍历一次像素）
+    IMAGE_ENCODE_CACHE_FINGERPRINT = (
+        os.getenv("IMAGE_ENCODE_CACHE_FINGERPRINT", "false").lower() == "true"
+    )
+
+    # 后台任务队列：database（默认，tasks 同库的 task_jobs 表）/ redis / memory（进程内，重启丢失）
+    TASK_QUEUE_BACKEND = os.getenv("TASK_QUEUE_BACKEND", "database").lower()
+    TASK_QUEUE_REDIS_URL = os.getenv("TASK_QUEUE_REDIS_URL", "redis://localhost:6379/0")
+    # Web 进程内是否同时运行一个 worker（关闭后需单独运行 banana-slides worker）
+    TASK_EMBEDDED_WORKER = os.getenv("TASK_EMBEDDED_WORKER", "true").lower() == "true"
+    TASK_WORKER_CONCURRENCY = int(os.getenv("TASK_WORKER_CONCURRENCY", "4"))
+    # 租约（可见性超时）与心跳间隔（秒）：worker 崩溃后任务在租约到期后被重新领取
+    TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "120"))
+    TASK_HEARTBEAT_SECONDS = float(os.getenv("TASK_HEARTBEAT_SECONDS", "30"))
+    TASK_QUEUE_POLL_SECONDS = float(os.getenv("TASK_QUEUE_POLL_SECONDS", "1"))
+    # 失败重试：指数退避（秒），超过最大尝试次数后任务标记为 FAILED
+    TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+    TASK_RETRY_BACKOFF_SECONDS = float(os.getenv("TASK_RETRY_BACKOFF_SECONDS", "10"))
+    TASK_RETRY_BACKOFF_MAX = float(os.getenv("TASK_RETRY_BACKOFF_MAX", "600"))
+    # 调度优先级：交互编辑 > 单页生成 > 批量生成 > 导出；保留的并发槽只执行交互编辑任务
+    TASK_RESERVED_INTERACTIVE_SLOTS = int(os.getenv("TASK_RESERVED_INTERACTIVE_SLOTS", "1"))
+    # 任务每等待这么多秒提升一个优先级，避免批量/导出任务被饿死（0 = 不提升）
+    TASK_PRIORITY_AGING_SECONDS = float(os.getenv("TASK_PRIORITY_AGING_SECONDS", "120"))
+    # 任务进度批量写入：最多缓冲这么久（秒）或这么多页结果后一次性 UPDATE，任务结束时总会写入
+    TASK_PROGRESS_FLUSH_SECONDS = float(os.getenv("TASK_PROGRESS_FLUSH_SECONDS", "0.5"))
+    TASK_PROGRESS_FLUSH_PAGES = int(os.getenv("TASK_PROGRESS_FLUSH_PAGES", "10"))
+    # 单次运行的截止时间（秒，从开始执行算起）：超时后任务被取消并标记为 CANCELLED（0 = 不限制）
+    TASK_DEADLINE_SECONDS = float(os.getenv("TASK_DEADLINE_SECONDS", "0"))
+    # 独立 worker 进程检查任务是否已被取消的间隔（秒）
+    TASK_CANCEL_POLL_SECONDS = float(os.getenv("TASK_CANCEL_POLL_SECONDS", "2"))
+
+    # 参考图上传策略：上传前缩放到最长边并重新编码（OpenAI 格式只输出约 1K 图片）
+    IMAGE_UPLOAD_MAX_EDGE = int(os.getenv("IMAGE_UPLOAD_MAX_EDGE", "1536"))  # 0 = 不缩放
+    IMAGE_UPLOAD_QUALITY = int(os.getenv("IMAGE_UPLOAD_QUALITY", "85"))
+    IMAGE_UPLOAD_FORMAT = os.getenv("IMAGE_UPLOAD_FORMAT", "jpeg").upper()  # jpeg / webp
+
+    # 参考图加载（素材图下载复用连接池并缓存到磁盘，解码结果按来源缓存在内存中）
+    REF_IMAGE_CACHE_DIR = os.getenv(
+        "REF_IMAGE_CACHE_DIR", os.path.join(BASE_DIR, "instance", "ref_images")
+    )
+    # 素材参考图解码后缩放到的最长边（像素），0 表示保持原尺寸；模板与待编辑图片不缩放
+    REF_IMAGE_MAX_EDGE = int(os.getenv("REF_IMAGE_MAX_EDGE", "2048"))
+    REF_IMAGE_MEMORY_CACHE_MB = float(os.getenv("REF_IMAGE_MEMORY_CACHE_MB", "128"))
+    REF_IMAGE_DISK_CACHE_MB = float(os.getenv("REF_IMAGE_DISK_CACHE_MB", "500"))
+    REF_IMAGE_MAX_DOWNLOAD_MB = float(os.getenv("REF_IMAGE_MAX_DOWNLOAD_MB", "20"))
+    # 磁盘缓存超过该时间（秒）后用 ETag/Last-Modified 向源站重新校验
+    REF_IMAGE_REVALIDATE_SECONDS = float(
+        os.getenv("REF_IMAGE_REVALIDATE_SECONDS", "3600")
+    )
 
     # 图片生成配置
     DEFAULT_ASPECT_RATIO = "16:9"
@@ -2,14 +2,18 @@
 Core functionality for Banana Slides
 """
 
-from .generator import AIService, ProjectContext
+from .generator import AIService, ProjectContext, get_json_generation_stats
 from .exporter import ExportService, ExportWarnings
-from .storage import FileService
+from .file_service import FileService
+from .pipeline import run_page_pipeline, run_page_pipeline_async
 
 __all__ = [
     "AIService",
     "ProjectContext",
+    "get_json_generation_stats",
     "ExportService",
     "ExportWarnings",
     "FileService",
+    "run_page_pipeline",
+    "run_page_pipeline_async",
 ]
@@ -16,6 +16,8 @@ from PIL import Image
 import io
 import tempfile
 import img2pdf
+
+from ..services.worker_pool import get_worker_pool
 logger = logging.getLogger(__name__)
 
 
@@ -573,13 +575,11 @@ class ExportService:
         Args:
             text_items: 元组列表，每个元组为 (element_id, image_path, text_content)
             text_attribute_extractor: 文本属性提取器
-            max_workers: 并发数
+            max_workers: 并发数（本次调用同时提交到共享线程池的任务数上限）
         
         Returns:
             字典，key为element_id，value为TextStyleResult
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
         if not text_items or not text_attribute_extractor:
             return {}
         
@@ -599,13 +599,11 @@ class ExportService:
                 logger.warning(f"提取文字样式失败 [{element_id}]: {e}")
                 return element_id, None
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(extract_single, item): item[0] for item in text_items}
-            
-            for future in as_completed(futures):
-                element_id, style = future.result()
-                if style is not None:
-                    results[element_id] = style
+        pool = get_worker_pool()
+        for _, future in pool.map_unordered(extract_single, text_items, limit=max_workers):
+            element_id, style = future.result()
+            if style is not None:
+                results[element_id] = style
         
         logger.info(f"✓ 文本样式提取完成，成功 {len(results)}/{len(text_items)} 个")
         return results
@@ -675,8 +673,6 @@ class ExportService:
         Returns:
             字典，key为element_id，value为TextStyleResult
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
         if not editable_images or not text_attribute_extractor:
             return {}
         
@@ -698,8 +694,9 @@ class ExportService:
         
         all_results = {}
         
-        def process_single_page(editable_img, page_idx):
+        def process_single_page(page_idx):
             """处理单个页面的文本样式提取"""
+            editable_img = editable_images[page_idx]
             try:
                 # 收集该页面的所有文本元素
                 text_elements = ExportService._collect_text_elements_for_batch_extraction(
@@ -728,20 +725,16 @@ class ExportService:
                 logger.error(f"页面 {page_idx + 1} 文本样式提取失败: {e}", exc_info=True)
                 return {}
         
-        # 并发处理所有页面
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(process_single_page, img, idx): idx 
-                for idx, img in enumerate(editable_images)
-            }
-            
-            for future in as_completed(futures):
-                page_idx = futures[future]
-                try:
-                    page_results = future.result()
-                    all_results.update(page_results)
-                except Exception as e:
-                    logger.error(f"页面 {page_idx + 1} 处理失败: {e}")
+        # 并发处理所有页面（共享线程池）
+        pool = get_worker_pool()
+        for page_idx, future in pool.map_unordered(
+            process_single_page, range(len(editable_images)), limit=max_workers
+        ):
+            try:
+                page_results = future.result()
+                all_results.update(page_results)
+            except Exception as e:
+                logger.error(f"页面 {page_idx + 1} 处理失败: {e}")
         
         total_elements = sum(
             len(ExportService._collect_text_elements_for_batch_extraction(img.elements))
@@ -776,7 +769,6 @@ class ExportService:
             - results: 字典，key为element_id，value为TextStyleResult（合并后的结果）
             - failed_extractions: 失败列表，每项为 (element_id, error_reason)
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
         from services.image_editability.text_attribute_extractors import TextStyleResult
         
         if not editable_images or not text_attribute_extractor:
@@ -859,31 +851,28 @@ class ExportService:
         # 并发执行全局识别和单个裁剪识别
         logger.info(f"  并发执行: 全局识别 {len(page_text_elements)} 页 + 单个识别 {len(all_text_items)} 个元素...")
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交全局识别任务
-            global_futures = {
-                executor.submit(extract_global_for_page, idx, data): ('global', idx)
-                for idx, data in page_text_elements.items()
-            }
-            
-            # 提交单个裁剪识别任务
-            local_futures = {
-                executor.submit(extract_local_single, item): ('local', item[0])
-                for item in all_text_items
-            }
-            
-            # 收集全局识别结果
-            for future in as_completed(global_futures):
-                task_type, page_idx = global_futures[future]
+        # 两类任务放在同一批次提交到共享线程池，本次调用最多 max_workers 个同时执行
+        jobs = [('global', idx) for idx in page_text_elements]
+        jobs.extend(('local', item) for item in all_text_items)
+        
+        def run_job(job):
+            task_type, payload = job
+            if task_type == 'global':
+                return extract_global_for_page(payload, page_text_elements[payload])
+            return extract_local_single(payload)
+        
+        pool = get_worker_pool()
+        for (task_type, payload), future in pool.map_unordered(run_job, jobs, limit=max_workers):
+            if task_type == 'global':
+                # 收集全局识别结果
                 try:
                     _, page_results = future.result()
                     global_results.update(page_results)
                 except Exception as e:
                     logger.error(f"全局识别任务失败: {e}")
-            
-            # 收集单个裁剪识别结果
-            for future in as_completed(local_futures):
-                task_type, element_id = local_futures[future]
+            else:
+                # 收集单个裁剪识别结果
+                element_id = payload[0]
                 try:
                     elem_id, style, error = future.result()
                     if style is not None:
@@ -943,7 +932,8 @@ class ExportService:
         text_attribute_extractor = None,  # 可选：文字属性提取器，用于提取颜色、粗体、斜体等样式
         progress_callback = None,  # 可选：进度回调函数 (step, message, percent) -> None
         export_extractor_method: str = 'hybrid',  # 组件提取方法: mineru, hybrid
-        export_inpaint_method: str = 'hybrid'  # 背景修复方法: generative, baidu, hybrid
+        export_inpaint_method: str = 'hybrid',  # 背景修复方法: generative, baidu, hybrid
+        cancel_token = None  # 可选：任务取消令牌（services.cancellation.CancellationToken）
     ) -> Tuple[Optional[bytes], ExportWarnings]:
         """
         使用递归图片可编辑化服务创建可编辑PPTX
@@ -962,12 +952,13 @@ class ExportService:
             slide_width_pixels: 目标幻灯片宽度
             slide_height_pixels: 目标幻灯片高度
             max_depth: 最大递归深度
-            max_workers: 并发处理数
+            max_workers: 并发处理页数（各页的子元素、MinerU/OCR 等任务共用同一个共享线程池）
             editable_images: 已分析的EditableImage列表（可选，与image_paths二选一）
             text_attribute_extractor: 文字属性提取器（可选），用于提取文字颜色、粗体、斜体等样式
                 可通过 TextAttributeExtractorFactory.create_caption_model_extractor() 创建
             export_extractor_method: 组件提取方法 ('mineru' 或 'hybrid'，默认 'hybrid')
             export_inpaint_method: 背景修复方法 ('generative', 'baidu', 'hybrid'，默认 'hybrid')
+            cancel_token: 任务取消令牌（可选），取消后丢弃未开始的页面并抛出 TaskCancelled
         
         Returns:
             (pptx_bytes, warnings): 元组，包含 PPTX 字节流和警告信息
@@ -980,8 +971,10 @@ class ExportService:
         # 初始化警告收集器
         warnings = ExportWarnings()
         
-        # 辅助函数：报告进度
+        # 辅助函数：报告进度（同时检查任务是否已取消）
         def report_progress(step: str, message: str, percent: int):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
             logger.info(f"[进度 {percent}%] {step}: {message}")
             if progress_callback:
                 try:
@@ -1012,30 +1005,29 @@ class ExportService:
             
             # 2. 并发处理所有页面，生成EditableImage结构
             report_progress("版面分析", f"开始分析 {total_pages} 张图片（并发数: {max_workers}）...", 5)
-            from concurrent.futures import ThreadPoolExecutor, as_completed
             
-            editable_images = []
+            def analyze_page(idx):
+                return editability_service.make_image_editable(
+                    image_paths[idx], cancel_token=cancel_token
+                )
+            
             completed_count = 0
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {
-                    executor.submit(editability_service.make_image_editable, img_path): idx
-                    for idx, img_path in enumerate(image_paths)
-                }
-                
-                results = [None] * len(image_paths)
-                for future in as_completed(futures):
-                    idx = futures[future]
-                    try:
-                        results[idx] = future.result()
-                        completed_count += 1
-                        # 版面分析占 5% - 40% 的进度
-                        percent = 5 + int(35 * completed_count / total_pages)
-                        report_progress("版面分析", f"已完成第 {completed_count}/{total_pages} 页的版面分析", percent)
-                    except Exception as e:
-                        logger.error(f"处理图片 {image_paths[idx]} 失败: {e}")
-                        raise
-                
-                editable_images = results
+            results = [None] * len(image_paths)
+            # 页面、子元素与提取器任务共用共享线程池，线程总数不随页数和递归深度增长；
+            # 出错（含取消）时退出循环会取消尚未开始的页面
+            pool = get_worker_pool()
+            for idx, future in pool.map_unordered(analyze_page, range(total_pages), limit=max_workers):
+                try:
+                    results[idx] = future.result()
+                    completed_count += 1
+                    # 版面分析占 5% - 40% 的进度
+                    percent = 5 + int(35 * completed_count / total_pages)
+                    report_progress("版面分析", f"已完成第 {completed_count}/{total_pages} 页的版面分析", percent)
+                except Exception as e:
+                    logger.error(f"处理图片 {image_paths[idx]} 失败: {e}")
+                    raise
+            
+            editable_images = results
         
         # 2.5. 使用混合策略提取所有文本元素的样式（如果提供了提取器）
         # 混合策略：全局识别（粗体/斜体/下划线/对齐）+ 单个裁剪识别（颜色）
@@ -1,22 +1,25 @@
 """
 AI Service - handles all AI model interactions
 Based on demo.py and gemini_genai.py
-TODO: use structured output API
 """
 
 import os
 import json
 import re
+import asyncio
 import logging
-import requests
-from typing import List, Dict, Optional, Union
+import threading
+import time
+from typing import Iterator, List, Dict, Optional, Tuple, Union
 from textwrap import dedent
 from PIL import Image
+from pydantic import TypeAdapter
 from tenacity import retry, stop_after_attempt, retry_if_exception_type
 from ..services.prompts import (
     get_outline_generation_prompt,
     get_outline_parsing_prompt,
     get_page_description_prompt,
+    get_batch_page_description_prompt,
     get_image_generation_prompt,
     get_image_edit_prompt,
     get_description_to_outline_prompt,
@@ -27,13 +30,66 @@ from ..services.prompts import (
 from ..services.ai_providers import (
     get_text_provider,
     get_image_provider,
+    get_async_text_provider,
+    get_async_image_provider,
     TextProvider,
     ImageProvider,
+    AsyncTextProvider,
+    AsyncImageProvider,
 )
+from ..services.cancellation import CancellationToken, TaskCancelled
+from ..services.hedging import HedgeBudget, get_hedger
+from ..services.reference_images import get_reference_image_loader
 from ..config import get_config
+from ..utils.json_repair import repair_json
+from ..utils.json_stream import JsonArrayStream
+from .schemas import (
+    BATCH_PAGE_DESCRIPTIONS_SCHEMA,
+    OUTLINE_SCHEMA,
+    PAGE_DESCRIPTIONS_SCHEMA,
+    get_response_schema,
+    unwrap_response,
+)
 
 logger = logging.getLogger(__name__)
 
+# JSON 生成统计（进程级）：重试次数、结构化输出调用、本地修复节省的耗时
+_json_stats = {
+    "calls": 0,
+    "structured_calls": 0,
+    "structured_fallbacks": 0,
+    "repairs": 0,
+    "parse_failures": 0,
+    "validation_failures": 0,
+    "retries": 0,
+    "repair_saved_seconds": 0.0,
+    "description_batches": 0,
+    "description_batch_pages": 0,
+    "description_batch_fallback_pages": 0,
+}
+_json_stats_lock = threading.Lock()
+
+
+def _record_json_stat(name: str, amount: Union[int, float] = 1):
+    with _json_stats_lock:
+        _json_stats[name] += amount
+
+
+def _record_json_retry(retry_state):
+    """tenacity before_sleep 回调：每次重新生成前计数"""
+    _record_json_stat("retries")
+
+
+def get_json_generation_stats() -> Dict:
+    """
+    JSON 生成统计快照
+
+    repair_saved_seconds 为本地修复成功时对应那次模型调用的耗时，
+    即省掉的一次重新生成的估计耗时
+    """
+    with _json_stats_lock:
+        return dict(_json_stats)
+
 
 class ProjectContext:
     """项目上下文数据类，统一管理 AI 需要的所有项目信息"""
@@ -79,7 +135,11 @@ class AIService:
     """Service for AI model interactions using pluggable providers"""
 
     def __init__(
-        self, text_provider: TextProvider = None, image_provider: ImageProvider = None
+        self,
+        text_provider: TextProvider = None,
+        image_provider: ImageProvider = None,
+        async_text_provider: AsyncTextProvider = None,
+        async_image_provider: AsyncImageProvider = None,
     ):
         """
         Initialize AI service with providers
@@ -87,6 +147,10 @@ class AIService:
         Args:
             text_provider: Optional pre-configured TextProvider. If None, created from factory.
             image_provider: Optional pre-configured ImageProvider. If None, created from factory.
+            async_text_provider: Optional AsyncTextProvider for the *_async methods.
+                If None, created lazily on first async call.
+            async_image_provider: Optional AsyncImageProvider for the *_async methods.
+                If None, created lazily on first async call.
         """
         config = get_config()
 
@@ -110,6 +174,40 @@ class AIService:
             model=self.image_model
         )
 
+        # Async clients are bound to an event loop, so they are created lazily
+        # inside the running loop and released with aclose()
+        self._async_text_provider = async_text_provider
+        self._async_image_provider = async_image_provider
+
+    @property
+    def async_text_provider(self) -> AsyncTextProvider:
+        """AsyncTextProvider used by the *_async methods (created on first use)"""
+        if self._async_text_provider is None:
+            self._async_text_provider = get_async_text_provider(model=self.text_model)
+        return self._async_text_provider
+
+    @property
+    def async_image_provider(self) -> AsyncImageProvider:
+        """AsyncImageProvider used by the *_async methods (created on first use)"""
+        if self._async_image_provider is None:
+            self._async_image_provider = get_async_image_provider(
+                model=self.image_model
+            )
+        return self._async_image_provider
+
+    async def aclose(self):
+        """
+        Close async providers created for the current event loop
+
+        Call this before the loop that used the *_async methods shuts down;
+        the next async call will create fresh providers.
+        """
+        for provider in (self._async_text_provider, self._async_image_provider):
+            if provider is not None:
+                await provider.aclose()
+        self._async_text_provider = None
+        self._async_image_provider = None
+
     @staticmethod
     def extract_image_urls_from_markdown(text: str) -> List[str]:
         """
@@ -173,43 +271,229 @@ class AIService:
     @retry(
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
+        before_sleep=_record_json_retry,
         reraise=True,
     )
     def generate_json(
-        self, prompt: str, thinking_budget: int = 1000
+        self,
+        prompt: str,
+        thinking_budget: int = 1000,
+        schema: Optional[TypeAdapter] = None,
     ) -> Union[Dict, List]:
         """
         生成并解析JSON，如果解析失败则重新生成
 
+        端点支持结构化输出时按 schema 约束生成；否则先用本地修复解析器
+        处理代码块、前后说明文字、尾随逗号等问题，仍失败才重新生成。
+
         Args:
             prompt: 生成提示词
             thinking_budget: 思考预算
+            schema: 期望的响应结构（见 core.schemas），用于结构化输出和校验
 
         Returns:
             解析后的JSON对象（字典或列表）
 
         Raises:
             json.JSONDecodeError: JSON解析失败（重试3次后仍失败）
+            ValueError: 响应不符合 schema（重试3次后仍失败）
         """
-        # 调用AI生成文本
-        response_text = self.text_provider.generate_text(
-            prompt, thinking_budget=thinking_budget
+        return self._generate_json_once(prompt, thinking_budget, schema)
+
+    def _generate_json_once(
+        self,
+        prompt: str,
+        thinking_budget: int = 1000,
+        schema: Optional[TypeAdapter] = None,
+    ) -> Union[Dict, List]:
+        """generate_json 的单次尝试（不重试），供有自己兜底策略的调用方使用"""
+        provider = self.text_provider
+        response_schema = self._structured_schema_for(provider, schema)
+        start = time.perf_counter()
+
+        response_text = None
+        if response_schema is not None:
+            try:
+                response_text = provider.generate_structured(
+                    prompt, response_schema, thinking_budget=thinking_budget
+                )
+            except Exception as e:
+                if not self._disable_structured_output(provider, e):
+                    raise
+                response_schema = None
+        if response_text is None:
+            response_text = provider.generate_text(
+                prompt, thinking_budget=thinking_budget
+            )
+
+        try:
+            return self._load_json_response(
+                response_text, schema, time.perf_counter() - start
+            )
+        except ValueError:
+            self._invalidate_cached_response(
+                provider, prompt, thinking_budget, response_schema
+            )
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
+        before_sleep=_record_json_retry,
+        reraise=True,
+    )
+    async def generate_json_async(
+        self,
+        prompt: str,
+        thinking_budget: int = 1000,
+        schema: Optional[TypeAdapter] = None,
+    ) -> Union[Dict, List]:
+        """
+        generate_json 的异步版本，使用 async_text_provider
+
+        Args:
+            prompt: 生成提示词
+            thinking_budget: 思考预算
+            schema: 期望的响应结构（见 core.schemas）
+
+        Returns:
+            解析后的JSON对象（字典或列表）
+        """
+        provider = self.async_text_provider
+        response_schema = self._structured_schema_for(provider, schema)
+        start = time.perf_counter()
+
+        response_text = None
+        if response_schema is not None:
+            try:
+                response_text = await provider.generate_structured(
+                    prompt, response_schema, thinking_budget=thinking_budget
+                )
+            except Exception as e:
+                if not self._disable_structured_output(provider, e):
+                    raise
+                response_schema = None
+        if response_text is None:
+            response_text = await provider.generate_text(
+                prompt, thinking_budget=thinking_budget
+            )
+
+        try:
+            return self._load_json_response(
+                response_text, schema, time.perf_counter() - start
+            )
+        except ValueError:
+            self._invalidate_cached_response(
+                provider, prompt, thinking_budget, response_schema
+            )
+            raise
+
+    @staticmethod
+    def _structured_schema_for(
+        provider, schema: Optional[TypeAdapter]
+    ) -> Optional[Dict]:
+        """
+        返回本次调用应使用的 response_format JSON schema，不使用结构化输出时返回 None
+
+        TEXT_STRUCTURED_OUTPUT=off 时关闭；provider 没有 generate_structured
+        或此前被端点拒绝过（supports_structured_output=False）时也不使用
+        """
+        if schema is None or get_config().TEXT_STRUCTURED_OUTPUT == "off":
+            return None
+        if not hasattr(provider, "generate_structured"):
+            return None
+        if getattr(provider, "supports_structured_output", True) is False:
+            return None
+        _record_json_stat("structured_calls")
+        return get_response_schema(schema)
+
+    @staticmethod
+    def _disable_structured_output(provider, error: Exception) -> bool:
+        """
+        端点不支持 response_format（400 / NotImplementedError）时，
+        对该 provider 关闭结构化输出并返回 True，由调用方改走普通文本生成
+        """
+        status = getattr(error, "status_code", None)
+        if status != 400 and not isinstance(error, NotImplementedError):
+            return False
+        logger.warning(
+            f"端点不支持结构化输出，改用普通文本生成 + 本地修复解析: {str(error)[:200]}"
         )
+        provider.supports_structured_output = False
+        _record_json_stat("structured_fallbacks")
+        return True
 
+    @staticmethod
+    def _invalidate_cached_response(
+        provider, prompt: str, thinking_budget: int, response_schema: Dict = None
+    ):
+        """解析失败的响应不能被缓存，否则重试会再次命中同一个坏响应"""
+        if hasattr(provider, "invalidate"):
+            provider.invalidate(prompt, thinking_budget, response_schema=response_schema)
+
+    def _load_json_response(
+        self, response_text: str, schema: Optional[TypeAdapter], elapsed: float
+    ) -> Union[Dict, List]:
+        """
+        解析模型响应并按 schema 校验
+
+        Raises:
+            json.JSONDecodeError: JSON解析失败
+            ValueError: 结构不符合 schema（pydantic.ValidationError 是 ValueError 子类）
+        """
+        _record_json_stat("calls")
+        data = unwrap_response(self._parse_json_response(response_text, elapsed))
+        if schema is not None:
+            try:
+                schema.validate_python(data)
+            except ValueError as e:
+                _record_json_stat("validation_failures")
+                logger.warning(f"JSON结构校验失败，将重新生成: {str(e)[:300]}")
+                raise
+        return data
+
+    @staticmethod
+    def _parse_json_response(
+        response_text: str, elapsed: float = 0.0
+    ) -> Union[Dict, List]:
+        """
+        清理并解析模型返回的JSON文本，必要时在本地修复
+
+        Args:
+            response_text: 模型返回的文本
+            elapsed: 本次模型调用耗时，修复成功时计入节省的耗时
+
+        Raises:
+            json.JSONDecodeError: JSON解析失败（由调用方的 @retry 重新生成）
+        """
         # 清理响应文本：移除markdown代码块标记和多余空白
         cleaned_text = response_text.strip().strip("```json").strip("```").strip()
 
         try:
             return json.loads(cleaned_text)
+        except json.JSONDecodeError:
+            pass
+
+        # 本地修复（提取代码块/平衡括号、去除尾随逗号），省去一次重新生成
+        try:
+            data = repair_json(response_text)
         except json.JSONDecodeError as e:
+            _record_json_stat("parse_failures")
             logger.warning(
                 f"JSON解析失败，将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}"
             )
             raise
 
+        with _json_stats_lock:
+            _json_stats["repairs"] += 1
+            _json_stats["repair_saved_seconds"] += elapsed
+        logger.debug("JSON响应经本地修复后解析成功")
+        return data
+
     @retry(
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
+        before_sleep=_record_json_retry,
         reraise=True,
     )
     def generate_json_with_image(
@@ -242,22 +526,7 @@ class AIService:
         else:
             raise ValueError("text_provider 不支持图片输入")
 
-        # 清理响应文本：移除markdown代码块标记和多余空白
-        cleaned_text = (
-            response_text.strip()
-            .removeprefix("```json")
-            .removeprefix("```")
-            .removesuffix("```")
-            .strip()
-        )
-
-        try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            logger.warning(
-                f"JSON解析失败（带图片），将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}"
-            )
-            raise
+        return self._parse_json_response(response_text)
 
     @staticmethod
     def _convert_mineru_path_to_local(mineru_path: str) -> Optional[str]:
@@ -280,26 +549,16 @@ class AIService:
         """
         从 URL 下载图片并返回 PIL Image 对象
 
+        通过共享的参考图加载器下载（连接池、磁盘缓存、并发去重），
+        返回的图片在调用方之间共享，应视为只读。
+
         Args:
             url: 图片 URL
 
         Returns:
             PIL Image 对象，如果下载失败则返回 None
         """
-        try:
-            logger.debug(f"Downloading image from URL: {url}")
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-
-            # 从响应内容创建 PIL Image
-            image = Image.open(response.raw)
-            # 确保图片被加载
-            image.load()
-            logger.debug(f"Successfully downloaded image: {image.size}, {image.mode}")
-            return image
-        except Exception as e:
-            logger.error(f"Failed to download image from {url}: {str(e)}")
-            return None
+        return get_reference_image_loader().load(url)
 
     def generate_outline(
         self, project_context: ProjectContext, language: str = None
@@ -315,9 +574,96 @@ class AIService:
             List of outline items (may contain parts with pages or direct pages)
         """
         outline_prompt = get_outline_generation_prompt(project_context, language)
-        outline = self.generate_json(outline_prompt, thinking_budget=1000)
+        outline = self.generate_json(
+            outline_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA
+        )
         return outline
 
+    async def generate_outline_async(
+        self, project_context: ProjectContext, language: str = None
+    ) -> List[Dict]:
+        """
+        Async version of generate_outline
+
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+
+        Returns:
+            List of outline items (may contain parts with pages or direct pages)
+        """
+        outline_prompt = get_outline_generation_prompt(project_context, language)
+        return await self.generate_json_async(
+            outline_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA
+        )
+
+    def generate_outline_stream(
+        self, project_context: ProjectContext, language: str = None
+    ) -> Iterator[Dict]:
+        """
+        流式生成大纲，每个大纲条目一完成就产出其中的页面（已展平，同 flatten_outline）
+
+        调用方可以在后面的页面还在生成时就开始处理前面的页面。
+        流结束后用完整响应校对：按内容比对，完整大纲中未产出过的页面在最后补发，
+        产出过但不在完整大纲中的页面只记录警告（已产出的页面无法撤回）；
+        完整响应无法解析且一页都没产出时，回退到 generate_outline（带重试）。
+        text_provider 不支持 stream_text 时直接退化为 generate_outline。
+
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+
+        Yields:
+            页面大纲字典（属于某个 part 的页面带 "part" 字段）
+        """
+        if not hasattr(self.text_provider, "stream_text"):
+            yield from self.flatten_outline(
+                self.generate_outline(project_context, language=language)
+            )
+            return
+
+        outline_prompt = get_outline_generation_prompt(project_context, language)
+        parser = JsonArrayStream()
+        chunks = []
+        emitted = []
+        start = time.perf_counter()
+
+        for chunk in self.text_provider.stream_text(outline_prompt, thinking_budget=1000):
+            chunks.append(chunk)
+            for item in parser.feed(chunk):
+                if not isinstance(item, dict):
+                    continue
+                for page in self.flatten_outline([item]):
+                    emitted.append(page)
+                    yield page
+
+        try:
+            outline = self._load_json_response(
+                "".join(chunks), OUTLINE_SCHEMA, time.perf_counter() - start
+            )
+        except ValueError:
+            self._invalidate_cached_response(self.text_provider, outline_prompt, 1000)
+            if emitted:
+                logger.warning(f"流式大纲完整响应解析失败，保留已产出的 {len(emitted)} 页")
+                return
+            logger.warning("流式大纲解析失败，回退到非流式生成")
+            yield from self.flatten_outline(
+                self.generate_outline(project_context, language=language)
+            )
+            return
+
+        # 按内容而不是数量对账：流式解析可能跳过或拆错了某个条目
+        unmatched = list(emitted)
+        missing = []
+        for page in self.flatten_outline(outline):
+            if page in unmatched:
+                unmatched.remove(page)
+            else:
+                missing.append(page)
+        if unmatched:
+            logger.warning(f"流式大纲有 {len(unmatched)} 页与完整响应不一致，已产出的页面保持不变")
+        if missing:
+            logger.warning(f"流式解析漏掉了 {len(missing)} 页，在最后补发")
+        yield from missing
+
     def parse_outline_text(
         self, project_context: ProjectContext, language: str = None
     ) -> List[Dict]:
@@ -332,7 +678,9 @@ class AIService:
             List of outline items (may contain parts with pages or direct pages)
         """
         parse_prompt = get_outline_parsing_prompt(project_context, language)
-        outline = self.generate_json(parse_prompt, thinking_budget=1000)
+        outline = self.generate_json(
+            parse_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA
+        )
         return outline
 
     def flatten_outline(self, outline: List[Dict]) -> List[Dict]:
@@ -374,13 +722,163 @@ class AIService:
         Returns:
             Text description for the page
         """
+        desc_prompt = self._build_page_description_prompt(
+            project_context, outline, page_outline, page_index, language
+        )
+
+        response_text = self.text_provider.generate_text(
+            desc_prompt, thinking_budget=1000
+        )
+
+        return dedent(response_text)
+
+    async def generate_page_description_async(
+        self,
+        project_context: ProjectContext,
+        outline: List[Dict],
+        page_outline: Dict,
+        page_index: int,
+        language="zh",
+    ) -> str:
+        """
+        Async version of generate_page_description
+
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+            outline: Complete outline
+            page_outline: Outline for this specific page
+            page_index: Page number (1-indexed)
+
+        Returns:
+            Text description for the page
+        """
+        desc_prompt = self._build_page_description_prompt(
+            project_context, outline, page_outline, page_index, language
+        )
+
+        response_text = await self.async_text_provider.generate_text(
+            desc_prompt, thinking_budget=1000
+        )
+
+        return dedent(response_text)
+
+    def plan_description_batches(
+        self,
+        project_context: ProjectContext,
+        outline: List[Dict],
+        pages: List[Tuple[int, Dict]],
+        language="zh",
+        max_pages: int = None,
+    ) -> List[List[Tuple[int, Dict]]]:
+        """
+        按上下文窗口把页面划分为批次
+
+        共享部分（参考文件、原始需求、完整大纲）每批只发送一次，剩余的
+        TEXT_CONTEXT_TOKENS 按每页 DESCRIPTION_TOKENS_PER_PAGE 分配，
+        且每批不超过 max_pages（默认 DESCRIPTION_BATCH_MAX_PAGES）页。
+        参考文件过大、放不下两页时退化为每批一页（即逐页生成）。
+
+        Args:
+            pages: [(页面编号（从1开始）, 页面大纲), ...]
+
+        Returns:
+            批次列表，每个批次是 pages 的一个连续切片
+        """
+        config = get_config()
+        max_pages = max_pages or config.DESCRIPTION_BATCH_MAX_PAGES
+
+        shared_prompt = get_batch_page_description_prompt(
+            project_context, outline, [], language
+        )
+        available = config.TEXT_CONTEXT_TOKENS - self._estimate_tokens(shared_prompt)
+        batch_size = max(
+            1, min(max_pages, available // max(1, config.DESCRIPTION_TOKENS_PER_PAGE))
+        )
+        return [pages[i : i + batch_size] for i in range(0, len(pages), batch_size)]
+
+    def generate_page_descriptions_batch(
+        self,
+        project_context: ProjectContext,
+        outline: List[Dict],
+        pages: List[Tuple[int, Dict]],
+        language="zh",
+    ) -> Tuple[Dict[int, str], Dict[int, Exception]]:
+        """
+        一次调用为多页生成描述
+
+        批量响应解析失败（不重试）或缺少某些页面时，这些页面逐页调用
+        generate_page_description 兜底。
+
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+            outline: Complete outline
+            pages: [(页面编号（从1开始）, 页面大纲), ...]
+
+        Returns:
+            ({页面编号: 描述}, {页面编号: 兜底生成时的异常})
+        """
+        descriptions = {}
+        if len(pages) > 1:
+            batch_prompt = get_batch_page_description_prompt(
+                project_context, outline, pages, language
+            )
+            wanted = {page_index for page_index, _ in pages}
+            try:
+                items = self._generate_json_once(
+                    batch_prompt,
+                    thinking_budget=1000,
+                    schema=BATCH_PAGE_DESCRIPTIONS_SCHEMA,
+                )
+                for item in items:
+                    page_index = item["page_index"]
+                    text = str(item["description"]).strip()
+                    if page_index in wanted and text:
+                        descriptions[page_index] = dedent(text)
+            except ValueError as e:
+                logger.warning(f"批量描述解析失败，改为逐页生成: {str(e)[:200]}")
+
+            with _json_stats_lock:
+                _json_stats["description_batches"] += 1
+                _json_stats["description_batch_pages"] += len(descriptions)
+                _json_stats["description_batch_fallback_pages"] += len(pages) - len(
+                    descriptions
+                )
+
+        errors = {}
+        for page_index, page_outline in pages:
+            if page_index in descriptions:
+                continue
+            try:
+                descriptions[page_index] = self.generate_page_description(
+                    project_context, outline, page_outline, page_index, language=language
+                )
+            except Exception as e:
+                logger.error(f"Failed to generate description for page {page_index}: {e}")
+                errors[page_index] = e
+
+        return descriptions, errors
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗略估算 token 数：UTF-8 字节数 / 3（中文约 1 字 1 token，英文偏保守）"""
+        return len(text.encode("utf-8")) // 3
+
+    @staticmethod
+    def _build_page_description_prompt(
+        project_context: ProjectContext,
+        outline: List[Dict],
+        page_outline: Dict,
+        page_index: int,
+        language,
+    ) -> str:
+        """构建单页描述提示词（同步和异步版本共用）"""
         part_info = (
             f"\nThis page belongs to: {page_outline['part']}"
             if "part" in page_outline
             else ""
         )
 
-        desc_prompt = get_page_description_prompt(
+        return get_page_description_prompt(
             project_context=project_context,
             outline=outline,
             page_outline=page_outline,
@@ -389,12 +887,6 @@ class AIService:
             language=language,
         )
 
-        response_text = self.text_provider.generate_text(
-            desc_prompt, thinking_budget=1000
-        )
-
-        return dedent(response_text)
-
     def generate_outline_text(self, outline: List[Dict]) -> str:
         """
         Convert outline to text format for prompts
@@ -469,6 +961,8 @@ class AIService:
         aspect_ratio: str = "16:9",
         resolution: str = "2K",
         additional_ref_images: Optional[List[Union[str, Image.Image]]] = None,
+        hedge_budget: Optional[HedgeBudget] = None,
+        cancel_token: Optional[CancellationToken] = None,
     ) -> Optional[Image.Image]:
         """
         Generate image using configured image provider
@@ -480,14 +974,19 @@ class AIService:
             aspect_ratio: Image aspect ratio
             resolution: Image resolution (note: OpenAI format only supports 1K)
             additional_ref_images: 额外的参考图片列表，可以是本地路径、URL 或 PIL Image 对象
+            hedge_budget: 项目级对冲预算（见 services.hedging），为 None 时不对冲
+            cancel_token: 任务取消令牌（见 services.cancellation），请求超时不会超过其截止时间
 
         Returns:
             PIL Image object or None if failed
 
         Raises:
+            TaskCancelled: 任务已取消或超过截止时间
             Exception with detailed error message if generation fails
         """
         try:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
             logger.debug(f"Reference image: {ref_image_path}")
             if additional_ref_images:
                 logger.debug(
@@ -497,74 +996,150 @@ class AIService:
                 f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}"
             )
 
-            # 构建参考图片列表
-            ref_images = []
-
-            # 添加主参考图片（如果提供了路径）
-            if ref_image_path:
-                if not os.path.exists(ref_image_path):
-                    raise FileNotFoundError(
-                        f"Reference image not found: {ref_image_path}"
-                    )
-                main_ref_image = Image.open(ref_image_path)
-                ref_images.append(main_ref_image)
-
-            # 添加额外的参考图片
-            if additional_ref_images:
-                for ref_img in additional_ref_images:
-                    if isinstance(ref_img, Image.Image):
-                        # 已经是 PIL Image 对象
-                        ref_images.append(ref_img)
-                    elif isinstance(ref_img, str):
-                        # 可能是本地路径或 URL
-                        if os.path.exists(ref_img):
-                            # 本地路径
-                            ref_images.append(Image.open(ref_img))
-                        elif ref_img.startswith("http://") or ref_img.startswith(
-                            "https://"
-                        ):
-                            # URL，需要下载
-                            downloaded_img = self.download_image_from_url(ref_img)
-                            if downloaded_img:
-                                ref_images.append(downloaded_img)
-                            else:
-                                logger.warning(
-                                    f"Failed to download image from URL: {ref_img}, skipping..."
-                                )
-                        elif ref_img.startswith("/files/mineru/"):
-                            # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
-                            local_path = self._convert_mineru_path_to_local(ref_img)
-                            if local_path and os.path.exists(local_path):
-                                ref_images.append(Image.open(local_path))
-                                logger.debug(
-                                    f"Loaded MinerU image from local path: {local_path}"
-                                )
-                            else:
-                                logger.warning(
-                                    f"MinerU image file not found (with prefix matching): {ref_img}, skipping..."
-                                )
-                        else:
-                            logger.warning(
-                                f"Invalid image reference: {ref_img}, skipping..."
-                            )
+            ref_images = self._load_ref_images(ref_image_path, additional_ref_images)
 
             logger.debug(
                 f"Calling image provider for generation with {len(ref_images)} reference images..."
             )
 
-            # 使用 image_provider 生成图片
-            return self.image_provider.generate_image(
+            def call_provider():
+                kwargs = {}
+                if cancel_token is not None and cancel_token.remaining() is not None:
+                    # 阻塞的 HTTP 请求无法中途打断，只能让超时不超过任务截止时间
+                    cancel_token.raise_if_cancelled()
+                    kwargs["timeout"] = cancel_token.timeout(get_config().OPENAI_TIMEOUT)
+                return self.image_provider.generate_image(
+                    prompt=prompt,
+                    ref_images=ref_images if ref_images else None,
+                    aspect_ratio=aspect_ratio,
+                    resolution=resolution,
+                    **kwargs,
+                )
+
+            if hedge_budget is None:
+                # 使用 image_provider 生成图片
+                image = call_provider()
+            else:
+                # 对冲时两个请求会并发读取同一批参考图，先完成解码避免共享文件句柄
+                for ref_image in ref_images:
+                    ref_image.load()
+                image = get_hedger("openai_image").call(call_provider, budget=hedge_budget)
+
+            if cancel_token is not None:
+                # 请求期间任务被取消：丢弃结果
+                cancel_token.raise_if_cancelled()
+            return image
+
+        except TaskCancelled:
+            raise
+        except Exception as e:
+            error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+
+    async def generate_image_async(
+        self,
+        prompt: str,
+        ref_image_path: Optional[str] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        additional_ref_images: Optional[List[Union[str, Image.Image]]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[Image.Image]:
+        """
+        Async version of generate_image
+
+        Reference images are loaded in the default executor (file/HTTP I/O),
+        the generation call itself goes through async_image_provider.
+
+        Args:
+            prompt: Image generation prompt
+            ref_image_path: Path to reference image (optional)
+            aspect_ratio: Image aspect ratio
+            resolution: Image resolution (note: OpenAI format only supports 1K)
+            additional_ref_images: 额外的参考图片列表，可以是本地路径、URL 或 PIL Image 对象
+            cancel_token: 任务取消令牌；进行中的请求由取消协程中断，这里只在请求前后检查
+
+        Returns:
+            PIL Image object or None if failed
+
+        Raises:
+            TaskCancelled: 任务已取消或超过截止时间
+        """
+        try:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            ref_images = await asyncio.to_thread(
+                self._load_ref_images, ref_image_path, additional_ref_images
+            )
+
+            if cancel_token is not None:
+                # 加载参考图期间任务被取消：不再发起请求
+                cancel_token.raise_if_cancelled()
+            image = await self.async_image_provider.generate_image(
                 prompt=prompt,
                 ref_images=ref_images if ref_images else None,
                 aspect_ratio=aspect_ratio,
                 resolution=resolution,
             )
 
+            if cancel_token is not None:
+                # 请求期间任务被取消：丢弃结果
+                cancel_token.raise_if_cancelled()
+            return image
+
+        except TaskCancelled:
+            raise
         except Exception as e:
             error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
 
+    def _load_ref_images(
+        self,
+        ref_image_path: Optional[str] = None,
+        additional_ref_images: Optional[List[Union[str, Image.Image]]] = None,
+    ) -> List[Image.Image]:
+        """
+        加载主参考图片和额外参考图片（本地路径、URL、MinerU 路径或 PIL Image）
+
+        主参考图片（模板或待编辑的当前页面）保持原始分辨率，只有额外参考图片
+        会被缩小到 REF_IMAGE_MAX_EDGE；两者都经过加载器的解码缓存。
+
+        Returns:
+            PIL Image 列表，无法加载的额外图片会被跳过
+        """
+        # 构建参考图片列表
+        ref_images = []
+
+        loader = get_reference_image_loader()
+
+        # 添加主参考图片（如果提供了路径）
+        if ref_image_path:
+            if not os.path.exists(ref_image_path):
+                raise FileNotFoundError(
+                    f"Reference image not found: {ref_image_path}"
+                )
+            ref_images.append(loader.load_file(ref_image_path, max_edge=0))
+
+        # 添加额外的参考图片
+        if additional_ref_images:
+            for ref_img in additional_ref_images:
+                if isinstance(ref_img, Image.Image):
+                    # 已经是 PIL Image 对象
+                    ref_images.append(ref_img)
+                elif isinstance(ref_img, str):
+                    # 本地路径、URL 或 MinerU 路径（支持前缀匹配），均由加载器缓存
+                    image = loader.load(ref_img)
+                    if image is not None:
+                        ref_images.append(image)
+                    else:
+                        logger.warning(
+                            f"Failed to load reference image: {ref_img}, skipping..."
+                        )
+
+        return ref_images
+
     def edit_image(
         self,
         prompt: str,
@@ -573,6 +1148,7 @@ class AIService:
         resolution: str = "2K",
         original_description: str = None,
         additional_ref_images: Optional[List[Union[str, Image.Image]]] = None,
+        cancel_token: Optional[CancellationToken] = None,
     ) -> Optional[Image.Image]:
         """
         Edit existing image with natural language instruction
@@ -585,6 +1161,7 @@ class AIService:
             resolution: Image resolution
             original_description: Original page description to include in prompt
             additional_ref_images: 额外的参考图片列表，可以是本地路径、URL 或 PIL Image 对象
+            cancel_token: 任务取消令牌（见 services.cancellation）
 
         Returns:
             PIL Image object or None if failed
@@ -599,6 +1176,7 @@ class AIService:
             aspect_ratio,
             resolution,
             additional_ref_images,
+            cancel_token=cancel_token,
         )
 
     def parse_description_to_outline(
@@ -614,7 +1192,9 @@ class AIService:
             List of outline items (may contain parts with pages or direct pages)
         """
         parse_prompt = get_description_to_outline_prompt(project_context, language)
-        outline = self.generate_json(parse_prompt, thinking_budget=1000)
+        outline = self.generate_json(
+            parse_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA
+        )
         return outline
 
     def parse_description_to_page_descriptions(
@@ -631,7 +1211,9 @@ class AIService:
             List of page descriptions (strings), one for each page in the outline
         """
         split_prompt = get_description_split_prompt(project_context, outline, language)
-        descriptions = self.generate_json(split_prompt, thinking_budget=1000)
+        descriptions = self.generate_json(
+            split_prompt, thinking_budget=1000, schema=PAGE_DESCRIPTIONS_SCHEMA
+        )
 
         # 确保返回的是字符串列表
         if isinstance(descriptions, list):
@@ -669,7 +1251,9 @@ class AIService:
             previous_requirements=previous_requirements,
             language=language,
         )
-        outline = self.generate_json(refinement_prompt, thinking_budget=1000)
+        outline = self.generate_json(
+            refinement_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA
+        )
         return outline
 
     def refine_descriptions(
@@ -702,7 +1286,9 @@ class AIService:
             previous_requirements=previous_requirements,
             language=language,
         )
-        descriptions = self.generate_json(refinement_prompt, thinking_budget=1000)
+        descriptions = self.generate_json(
+            refinement_prompt, thinking_budget=1000, schema=PAGE_DESCRIPTIONS_SCHEMA
+        )
 
         # 确保返回的是字符串列表
         if isinstance(descriptions, list):
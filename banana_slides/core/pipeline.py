@@ -0,0 +1,262 @@
+"""
+Page Pipeline - streams pages from the description stage into the image stage
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ..services.cancellation import CancellationToken, TaskCancelled
+
+logger = logging.getLogger(__name__)
+
+
+def _feed_items(items, events: "queue.Queue", stop: threading.Event):
+    """Advance items on a feeder thread, posting each one to the pipeline loop"""
+    try:
+        for item in items:
+            if stop.is_set():
+                return
+            events.put(("item", item))
+        events.put(("end", None))
+    except BaseException as e:
+        events.put(("error", e))
+
+
+def run_page_pipeline(
+    items: Iterable[Tuple[Any, Any]],
+    describe: Callable[[Any, Any], Any],
+    render: Callable[[Any, Any, Any], Any],
+    text_workers: int = 5,
+    image_workers: int = 8,
+    on_description: Optional[Callable[[Any, Any, Optional[Exception]], None]] = None,
+    on_image: Optional[Callable[[Any, Any, Optional[Exception]], None]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+    on_item: Optional[Callable[[Any, Any], None]] = None,
+    on_items_done: Optional[Callable[[], None]] = None,
+):
+    """
+    Run description and image generation as a two-stage pipeline
+
+    Each page is handed to the image stage as soon as its own description
+    finishes, instead of waiting for every description in the deck. The two
+    stages have separate worker pools so text and image concurrency can be
+    limited independently.
+
+    items is advanced on a feeder thread, so a slow generator (e.g. a streamed
+    outline) never holds up finished descriptions. Its own side effects
+    therefore run on that thread; per-page bookkeeping that needs the caller's
+    database session belongs in on_item / on_items_done instead.
+
+    Callbacks are always invoked on the calling thread, so they may safely
+    touch the database session owned by the caller.
+
+    Args:
+        items: Iterable of (key, payload) pairs, one per page
+        describe: describe(key, payload) -> description, runs in the text pool
+        render: render(key, payload, description) -> result, runs in the image pool
+        text_workers: Maximum concurrent description calls
+        image_workers: Maximum concurrent image calls
+        on_description: Called with (key, description, error) for every page
+        on_image: Called with (key, result, error) for every rendered page
+        cancel_token: Once cancelled, pages not started yet are dropped and
+            TaskCancelled is raised after the running ones finish
+        on_item: Called with (key, payload) as each page arrives, before it is described
+        on_items_done: Called once items is exhausted
+
+    Pages whose description fails or comes back empty are not rendered. If
+    items raises, pages not started yet are dropped and the error propagates.
+    """
+    # Everything the loop reacts to: new items, finished futures, cancellation
+    events = queue.Queue()
+    stop = threading.Event()
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=text_workers) as text_pool, ThreadPoolExecutor(
+        max_workers=image_workers
+    ) as image_pool:
+
+        def submit(pool, stage, key, payload, fn, *args):
+            future = pool.submit(fn, *args)
+            pending[future] = (stage, key, payload)
+            future.add_done_callback(lambda f: events.put(("done", f)))
+
+        def handle(future):
+            stage, key, payload = pending.pop(future)
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                logger.error(f"Pipeline {stage} stage failed for {key}: {e}")
+                result, error = None, e
+
+            if stage == "describe":
+                if on_description:
+                    on_description(key, result, error)
+                if error is None and result:
+                    submit(image_pool, "render", key, payload, render, key, payload, result)
+            elif on_image:
+                on_image(key, result, error)
+
+        if cancel_token is not None:
+            # Wake the loop up even while nothing completes
+            cancel_token.on_cancel(lambda reason: events.put(("cancel", None)))
+
+        feeder = threading.Thread(
+            target=_feed_items, args=(items, events, stop), name="pipeline-items", daemon=True
+        )
+        feeder.start()
+        feeding = True
+        try:
+            while feeding or pending:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                kind, value = events.get()
+                if kind == "item":
+                    key, payload = value
+                    if on_item:
+                        on_item(key, payload)
+                    submit(text_pool, "describe", key, payload, describe, key, payload)
+                elif kind == "end":
+                    feeding = False
+                    if on_items_done:
+                        on_items_done()
+                elif kind == "error":
+                    raise value
+                elif kind == "done" and value in pending:
+                    handle(value)
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+        finally:
+            # A generator blocked in next() cannot be interrupted; the daemon
+            # feeder stops at its next item and its output is discarded
+            stop.set()
+            for future in pending:
+                future.cancel()
+
+
+async def _iterate_items(items):
+    """
+    Yield pipeline items without blocking the event loop
+
+    Async iterables are consumed on the loop. Any other iterable but a list
+    or tuple may be a slow generator, so each next() runs in a thread.
+    """
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+        return
+    if isinstance(items, (list, tuple)):
+        for item in items:
+            yield item
+        return
+
+    iterator, done = iter(items), object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+async def run_page_pipeline_async(
+    items: Union[Iterable[Tuple[Any, Any]], AsyncIterable[Tuple[Any, Any]]],
+    describe: Callable[[Any, Any], Awaitable[Any]],
+    render: Callable[[Any, Any, Any], Awaitable[Any]],
+    text_concurrency: int = 5,
+    image_concurrency: int = 8,
+    on_description: Optional[Callable[[Any, Any, Optional[Exception]], None]] = None,
+    on_image: Optional[Callable[[Any, Any, Optional[Exception]], None]] = None,
+    cancel_token: Optional[CancellationToken] = None,
+):
+    """
+    asyncio counterpart of run_page_pipeline
+
+    Every page is a coroutine on the current event loop; semaphores replace
+    the worker pools, so hundreds of model calls can be in flight without a
+    thread per request. Callbacks run on the loop thread and should be quick.
+
+    Items are consumed incrementally and each page starts as soon as it
+    arrives, so a streamed outline overlaps with generation.
+
+    Args:
+        items: Iterable or async iterable of (key, payload) pairs, one per
+            page. A plain generator is advanced in a worker thread; pass an
+            async generator to keep its side effects on the loop thread
+        describe: async describe(key, payload) -> description
+        render: async render(key, payload, description) -> result
+        text_concurrency: Maximum concurrent description calls
+        image_concurrency: Maximum concurrent image calls
+        on_description: Called with (key, description, error) for every page
+        on_image: Called with (key, result, error) for every rendered page
+        cancel_token: Cancelling it cancels every page coroutine, which aborts
+            in-flight HTTP requests, and raises TaskCancelled
+    """
+    text_semaphore = asyncio.Semaphore(text_concurrency)
+    image_semaphore = asyncio.Semaphore(image_concurrency)
+
+    async def process(key, payload):
+        try:
+            async with text_semaphore:
+                description, error = await describe(key, payload), None
+        except Exception as e:
+            logger.error(f"Pipeline describe stage failed for {key}: {e}")
+            description, error = None, e
+
+        if on_description:
+            on_description(key, description, error)
+        if error is not None or not description:
+            return
+
+        try:
+            async with image_semaphore:
+                result, error = await render(key, payload, description), None
+        except Exception as e:
+            logger.error(f"Pipeline render stage failed for {key}: {e}")
+            result, error = None, e
+
+        if on_image:
+            on_image(key, result, error)
+
+    async def run_pages():
+        tasks = []
+        try:
+            async for key, payload in _iterate_items(items):
+                tasks.append(asyncio.create_task(process(key, payload)))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        await asyncio.gather(*tasks)
+
+    pages = asyncio.ensure_future(run_pages())
+    if cancel_token is None:
+        await pages
+        return
+
+    loop = asyncio.get_running_loop()
+
+    def cancel_pages(reason):
+        # Called from whichever thread cancels the token
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(pages.cancel)
+
+    cancel_token.on_cancel(cancel_pages)
+    try:
+        await pages
+    except asyncio.CancelledError:
+        if not cancel_token.cancelled:
+            raise
+        raise TaskCancelled(cancel_token.reason) from None
@@ -0,0 +1,89 @@
+"""
+Response schemas for JSON-producing prompts
+
+The same definitions serve two purposes:
+- a JSON schema sent as ``response_format`` to endpoints that support
+  structured output, so the model cannot return malformed JSON
+- local validation of whatever came back, so a structurally wrong answer is
+  retried instead of crashing later in flatten_outline / page creation
+"""
+
+from typing import Dict, List, Union
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+
+class OutlinePage(BaseModel):
+    """A single slide in an outline"""
+
+    model_config = ConfigDict(extra="allow")
+
+    title: str
+    points: List[str] = []
+
+
+class OutlinePart(BaseModel):
+    """A chapter grouping several slides"""
+
+    model_config = ConfigDict(extra="allow")
+
+    part: str
+    pages: List[OutlinePage]
+
+
+# Outline: parts with pages, direct pages, or a mix of both
+OUTLINE_SCHEMA = TypeAdapter(List[Union[OutlinePart, OutlinePage]])
+
+# One description string per page (numbers are accepted and stringified)
+PAGE_DESCRIPTIONS_SCHEMA = TypeAdapter(
+    List[str], config=ConfigDict(coerce_numbers_to_str=True)
+)
+
+
+class BatchPageDescription(BaseModel):
+    """One page of a batched description response"""
+
+    page_index: int
+    description: str
+
+
+# Batched descriptions: [{"page_index": 3, "description": "..."}, ...]
+BATCH_PAGE_DESCRIPTIONS_SCHEMA = TypeAdapter(List[BatchPageDescription])
+
+# Structured-output endpoints require an object at the root
+RESPONSE_ROOT_KEY = "items"
+
+_response_schemas: Dict[int, dict] = {}
+
+
+def get_response_schema(adapter: TypeAdapter) -> dict:
+    """
+    JSON schema for ``response_format``, with the list wrapped in an object
+
+    Returns:
+        {"type": "object", "properties": {"items": <schema>}, ...}
+    """
+    cached = _response_schemas.get(id(adapter))
+    if cached is not None:
+        return cached
+
+    schema = adapter.json_schema()
+    defs = schema.pop("$defs", None)
+    response_schema = {
+        "type": "object",
+        "properties": {RESPONSE_ROOT_KEY: schema},
+        "required": [RESPONSE_ROOT_KEY],
+    }
+    if defs:
+        # $ref paths are "#/$defs/...", so definitions must live at the root
+        response_schema["$defs"] = defs
+
+    _response_schemas[id(adapter)] = response_schema
+    return response_schema
+
+
+def unwrap_response(data):
+    """Undo the object wrapping added by get_response_schema"""
+    if isinstance(data, dict) and set(data) == {RESPONSE_ROOT_KEY}:
+        return data[RESPONSE_ROOT_KEY]
+    return data
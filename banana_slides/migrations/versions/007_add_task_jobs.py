@@ -0,0 +1,51 @@
+"""add task_jobs table for the durable task queue
+
+Revision ID: 007_add_task_jobs
+Revises: 006_add_export_settings
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '007_add_task_jobs'
+down_revision = '006_add_export_settings'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Create task_jobs: one queue entry per task, with lease and retry state.
+    """
+    op.create_table(
+        'task_jobs',
+        sa.Column('task_id', sa.String(36), sa.ForeignKey('tasks.id'), primary_key=True),
+        sa.Column('func_name', sa.String(200), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='QUEUED'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('priority', sa.Integer(), nullable=False, server_default='2'),
+        sa.Column('project_id', sa.String(36), nullable=True),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('lease_owner', sa.String(100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_task_jobs_status', 'task_jobs', ['status'])
+    op.create_index('ix_task_jobs_available_at', 'task_jobs', ['available_at'])
+    op.create_index('ix_task_jobs_priority', 'task_jobs', ['priority'])
+
+
+def downgrade() -> None:
+    """
+    Drop the task_jobs table.
+    """
+    op.drop_index('ix_task_jobs_priority', table_name='task_jobs')
+    op.drop_index('ix_task_jobs_available_at', table_name='task_jobs')
+    op.drop_index('ix_task_jobs_status', table_name='task_jobs')
+    op.drop_table('task_jobs')
@@ -0,0 +1,42 @@
+"""add indexes for hot page, version, task and project queries
+
+Revision ID: 008_add_query_indexes
+Revises: 007_add_task_jobs
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '008_add_query_indexes'
+down_revision = '007_add_task_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Add indexes used by the hot queries:
+    - pages(project_id, order_index): pages of a project in order
+    - page_image_versions(page_id, is_current): current version of a page
+    - tasks(status): active tasks (status IN ('PENDING', 'PROCESSING'))
+    - projects(created_at): recent projects (ORDER BY created_at DESC)
+    """
+    op.create_index('ix_pages_project_id_order_index', 'pages', ['project_id', 'order_index'])
+    op.create_index(
+        'ix_page_image_versions_page_id_is_current',
+        'page_image_versions',
+        ['page_id', 'is_current'],
+    )
+    op.create_index('ix_tasks_status', 'tasks', ['status'])
+    op.create_index('ix_projects_created_at', 'projects', ['created_at'])
+
+
+def downgrade() -> None:
+    """
+    Drop the query indexes.
+    """
+    op.drop_index('ix_projects_created_at', table_name='projects')
+    op.drop_index('ix_tasks_status', table_name='tasks')
+    op.drop_index('ix_page_image_versions_page_id_is_current', table_name='page_image_versions')
+    op.drop_index('ix_pages_project_id_order_index', table_name='pages')
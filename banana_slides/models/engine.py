@@ -0,0 +1,187 @@
+"""
+Database engine setup
+
+One place that turns DATABASE_URL and the DB_* / SQLITE_* settings into
+Flask-SQLAlchemy engine options, so the same code runs on SQLite (default)
+and PostgreSQL:
+
+- SQLite: every new connection gets WAL journaling, synchronous=NORMAL, a
+  memory-mapped read window, a larger page cache and a busy timeout.
+  WAL lets readers proceed while one writer commits; NORMAL only fsyncs at
+  checkpoints, which is still crash-safe in WAL mode (a power loss may drop
+  the last transactions, never corrupt the file).
+- Server databases (``postgresql://...``): pre-ping and recycle pooled
+  connections; ``postgres://`` URLs are accepted as well.
+
+The pool is sized for thread-per-worker access: image/description worker
+threads, queue workers and the progress flush threads each hold a
+connection while they commit.
+
+    app.config.from_object(get_config())
+    init_engine(app)
+    db.init_app(app)
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new SQLite connection (see configure_sqlite_pragmas)
+_sqlite_pragmas: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # Negative: KiB instead of pages
+    "busy_timeout": 30_000,
+}
+
+
+def normalize_database_url(url: str) -> str:
+    """Accept the postgres:// scheme some hosts hand out"""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def configure_sqlite_pragmas(
+    journal_mode: str = "WAL",
+    synchronous: str = "NORMAL",
+    mmap_size_mb: float = 256,
+    cache_size_mb: float = 64,
+    busy_timeout: float = 30,
+):
+    """Set the pragmas applied to SQLite connections opened from now on"""
+    _sqlite_pragmas.update(
+        journal_mode=journal_mode.upper(),
+        synchronous=synchronous.upper(),
+        mmap_size=int(mmap_size_mb * 1024 * 1024),
+        cache_size=-int(cache_size_mb * 1024),
+        busy_timeout=int(busy_timeout * 1000),
+    )
+
+
+@event.listens_for(Engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        # busy_timeout first: switching to WAL needs a lock on a busy database
+        for name in ("busy_timeout", "journal_mode", "synchronous", "mmap_size", "cache_size"):
+            cursor.execute(f"PRAGMA {name}={_sqlite_pragmas[name]}")
+    finally:
+        cursor.close()
+
+
+def engine_options(
+    url: str,
+    pool_size: int = 20,
+    max_overflow: int = 10,
+    pool_timeout: float = 30,
+    pool_recycle: int = 1800,
+    busy_timeout: float = 30,
+) -> Dict[str, Any]:
+    """
+    Engine options for a database URL
+
+    Args:
+        url: SQLAlchemy database URL
+        pool_size: Connections kept open (one per concurrently writing thread)
+        max_overflow: Extra connections opened under bursts
+        pool_timeout: Seconds to wait for a free connection
+        pool_recycle: Reconnect server-side connections older than this (seconds)
+        busy_timeout: Seconds SQLite waits for the write lock
+    """
+    if is_sqlite(url):
+        if make_url(url).database in (None, "", ":memory:"):
+            # In-memory databases use a single shared connection
+            return {"connect_args": {"check_same_thread": False}}
+        return {
+            "connect_args": {"check_same_thread": False, "timeout": busy_timeout},
+            # Local file: no stale connections to detect or recycle
+            "pool_pre_ping": False,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+        }
+    return {
+        "pool_pre_ping": True,
+        "pool_recycle": pool_recycle,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+    }
+
+
+def init_engine(app, config: Optional[object] = None):
+    """
+    Fill SQLALCHEMY_DATABASE_URI and SQLALCHEMY_ENGINE_OPTIONS of a Flask app
+
+    Call before ``db.init_app(app)``. Options already present in
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] take precedence.
+
+    Args:
+        app: Flask app
+        config: Config class (default: get_config())
+    """
+    if config is None:
+        from ..config import get_config
+
+        config = get_config()
+
+    url = normalize_database_url(
+        app.config.get("SQLALCHEMY_DATABASE_URI") or config.SQLALCHEMY_DATABASE_URI
+    )
+    options = engine_options(
+        url,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        busy_timeout=config.SQLITE_BUSY_TIMEOUT,
+    )
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+
+    if is_sqlite(url):
+        configure_sqlite_pragmas(
+            journal_mode=config.SQLITE_JOURNAL_MODE,
+            synchronous=config.SQLITE_SYNCHRONOUS,
+            mmap_size_mb=config.SQLITE_MMAP_SIZE_MB,
+            cache_size_mb=config.SQLITE_CACHE_SIZE_MB,
+            busy_timeout=config.SQLITE_BUSY_TIMEOUT,
+        )
+        database = make_url(url).database
+        if database and database != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    logger.debug(f"Database engine: {make_url(url).render_as_string(hide_password=True)}")
+
+
+def create_missing_indexes(engine, metadata):
+    """
+    Create indexes declared on the models but missing from existing tables
+
+    ``db.create_all()`` (used by the CLI instead of Alembic) only creates
+    missing tables, so indexes added to a model later would never reach an
+    existing database.
+    """
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # e.g. the indexed column is missing until the migrations are run
+                logger.warning(f"Could not create index {index.name}: {e}")
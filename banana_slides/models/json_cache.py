@@ -0,0 +1,54 @@
+"""
+Memoised JSON columns
+
+Pages and tasks keep JSON documents in Text columns. Parsing them on every
+access adds up: a page's outline and description are parsed again by every
+to_dict(), prompt build and progress check. JSONColumnCache remembers the
+parsed value together with the raw string it came from, and reuses it while
+the column still holds that same string object. Any change to the column
+(a set_* call, direct assignment, a refresh or expiry after a bulk UPDATE)
+swaps the string, so the next read parses again.
+
+Parsed values are shared between calls: treat them as read-only and write
+changes back through the set_* methods.
+"""
+
+import json
+from typing import Any, Callable
+
+
+class JSONColumnCache:
+    """Mixin for models with JSON documents stored in Text columns"""
+
+    def _json_cache(self) -> dict:
+        # Not a mapped attribute; ORM-loaded instances skip __init__
+        cache = self.__dict__.get("_parsed_json")
+        if cache is None:
+            cache = self.__dict__["_parsed_json"] = {}
+        return cache
+
+    def _get_json(self, column: str, default: Callable[[], Any] = lambda: None):
+        """Parsed value of a JSON column (default() if empty or invalid)"""
+        raw = getattr(self, column)
+        if not raw:
+            return default()
+        cache = self._json_cache()
+        cached = cache.get(column)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return default()
+        cache[column] = (raw, value)
+        return value
+
+    def _set_json(self, column: str, data, **dumps_kwargs):
+        """Serialize data into a JSON column (None if empty) and remember it parsed"""
+        raw = json.dumps(data, **dumps_kwargs) if data else None
+        setattr(self, column, raw)
+        cache = self._json_cache()
+        if raw is None:
+            cache.pop(column, None)
+        else:
+            cache[column] = (raw, data)
@@ -5,13 +5,18 @@ import uuid
 import json
 from datetime import datetime
 from . import db
+from .json_cache import JSONColumnCache
 
 
-class Page(db.Model):
+class Page(JSONColumnCache, db.Model):
     """
     Page model - represents a single PPT page/slide
     """
     __tablename__ = 'pages'
+    __table_args__ = (
+        # Pages of a project in order (Page.query.filter_by(project_id).order_by(order_index))
+        db.Index('ix_pages_project_id_order_index', 'project_id', 'order_index'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
@@ -31,36 +36,68 @@ class Page(db.Model):
                                      order_by='PageImageVersion.version_number.desc()')
     
     def get_outline_content(self):
-        """Parse outline_content from JSON string"""
-        if self.outline_content:
-            try:
-                return json.loads(self.outline_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Parse outline_content from JSON string (memoised, treat as read-only)"""
+        return self._get_json('outline_content')
     
     def set_outline_content(self, data):
         """Set outline_content as JSON string"""
-        if data:
-            self.outline_content = json.dumps(data, ensure_ascii=False)
-        else:
-            self.outline_content = None
+        self._set_json('outline_content', data, ensure_ascii=False)
     
     def get_description_content(self):
-        """Parse description_content from JSON string"""
-        if self.description_content:
-            try:
-                return json.loads(self.description_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Parse description_content from JSON string (memoised, treat as read-only)"""
+        return self._get_json('description_content')
     
     def set_description_content(self, data):
         """Set description_content as JSON string"""
-        if data:
-            self.description_content = json.dumps(data, ensure_ascii=False)
-        else:
-            self.description_content = None
+        self._set_json('description_content', data, ensure_ascii=False)
+    
+    @staticmethod
+    def _image_url(project_id, generated_image_path):
+        if not generated_image_path:
+            return None
+        return f'/files/{project_id}/pages/{generated_image_path.split("/")[-1]}'
+    
+    @classmethod
+    def get_summaries(cls, project_id):
+        """
+        Lightweight page list of a project, without loading description_content
+        
+        Returns:
+            List of dicts (page_id, order_index, part, outline_content,
+            has_description, generated_image_url, status, updated_at)
+        """
+        rows = (
+            db.session.query(
+                cls.id,
+                cls.order_index,
+                cls.part,
+                cls.outline_content,
+                cls.description_content.isnot(None).label('has_description'),
+                cls.generated_image_path,
+                cls.status,
+                cls.updated_at,
+            )
+            .filter(cls.project_id == project_id)
+            .order_by(cls.order_index)
+            .all()
+        )
+        summaries = []
+        for row in rows:
+            try:
+                outline = json.loads(row.outline_content) if row.outline_content else None
+            except json.JSONDecodeError:
+                outline = None
+            summaries.append({
+                'page_id': row.id,
+                'order_index': row.order_index,
+                'part': row.part,
+                'outline_content': outline,
+                'has_description': bool(row.has_description),
+                'generated_image_url': cls._image_url(project_id, row.generated_image_path),
+                'status': row.status,
+                'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+            })
+        return summaries
     
     def to_dict(self, include_versions=False):
         """Convert to dictionary"""
@@ -70,7 +107,7 @@ class Page(db.Model):
             'part': self.part,
             'outline_content': self.get_outline_content(),
             'description_content': self.get_description_content(),
-            'generated_image_url': f'/files/{self.project_id}/pages/{self.generated_image_path.split("/")[-1]}' if self.generated_image_path else None,
+            'generated_image_url': self._image_url(self.project_id, self.generated_image_path),
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
@@ -11,6 +11,10 @@ class PageImageVersion(db.Model):
     Page Image Version model - represents a historical version of a page's generated image
     """
     __tablename__ = 'page_image_versions'
+    __table_args__ = (
+        # Current version of a page
+        db.Index('ix_page_image_versions_page_id_is_current', 'page_id', 'is_current'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     page_id = db.Column(db.String(36), db.ForeignKey('pages.id'), nullable=False, index=True)
@@ -24,7 +24,7 @@ class Project(db.Model):
     export_extractor_method = db.Column(db.String(50), nullable=True, default='hybrid')  # 组件提取方法: mineru, hybrid
     export_inpaint_method = db.Column(db.String(50), nullable=True, default='hybrid')  # 背景图获取方法: generative, baidu, hybrid
     status = db.Column(db.String(50), nullable=False, default='DRAFT')
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -36,8 +36,15 @@ class Project(db.Model):
     materials = db.relationship('Material', back_populates='project', lazy='select',
                            cascade='all, delete-orphan')
     
-    def to_dict(self, include_pages=False):
-        """Convert to dictionary"""
+    def to_dict(self, include_pages=False, page_summaries=False):
+        """
+        Convert to dictionary
+        
+        Args:
+            include_pages: Include full pages (outline and description content)
+            page_summaries: Include page summaries instead (see Page.get_summaries),
+                without loading the description texts
+        """
         # Format created_at and updated_at with UTC timezone indicator for proper frontend parsing
         created_at_str = None
         if self.created_at:
@@ -66,6 +73,9 @@ class Project(db.Model):
         if include_pages:
             # pages 现在是列表，不需要 order_by（已在 relationship 中定义）
             data['pages'] = [page.to_dict() for page in self.pages]
+        elif page_summaries:
+            from .page import Page
+            data['pages'] = Page.get_summaries(self.id)
         
         return data
     
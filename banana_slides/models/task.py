@@ -2,12 +2,12 @@
 Task model for tracking async operations
 """
 import uuid
-import json
 from datetime import datetime
 from . import db
+from .json_cache import JSONColumnCache
 
 
-class Task(db.Model):
+class Task(JSONColumnCache, db.Model):
     """
     Task model - tracks asynchronous generation tasks
     """
@@ -16,7 +16,7 @@ class Task(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
     task_type = db.Column(db.String(50), nullable=False)  # GENERATE_DESCRIPTIONS|GENERATE_IMAGES
-    status = db.Column(db.String(50), nullable=False, default='PENDING')
+    status = db.Column(db.String(50), nullable=False, default='PENDING', index=True)  # PENDING|PROCESSING|COMPLETED|FAILED|CANCELLED
     progress = db.Column(db.Text, nullable=True)  # JSON string: {"total": 10, "completed": 5, "failed": 0}
     error_message = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -26,24 +26,16 @@ class Task(db.Model):
     project = db.relationship('Project', back_populates='tasks')
     
     def get_progress(self):
-        """Parse progress from JSON string"""
-        if self.progress:
-            try:
-                return json.loads(self.progress)
-            except json.JSONDecodeError:
-                return {"total": 0, "completed": 0, "failed": 0}
-        return {"total": 0, "completed": 0, "failed": 0}
+        """Parse progress from JSON string (memoised, treat as read-only)"""
+        return self._get_json('progress', lambda: {"total": 0, "completed": 0, "failed": 0})
     
     def set_progress(self, data):
         """Set progress as JSON string"""
-        if data:
-            self.progress = json.dumps(data)
-        else:
-            self.progress = None
+        self._set_json('progress', data)
     
     def update_progress(self, completed=None, failed=None):
         """Update progress incrementally"""
-        prog = self.get_progress()
+        prog = dict(self.get_progress())
         if completed is not None:
             prog['completed'] = completed
         if failed is not None:
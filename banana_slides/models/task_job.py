@@ -0,0 +1,65 @@
+"""
+TaskJob model - durable queue entry for a Task
+"""
+import json
+from datetime import datetime
+
+from . import db
+
+
+class TaskJob(db.Model):
+    """
+    TaskJob model - the queued work behind a Task row
+
+    A Task tracks what the user sees (status, progress); its TaskJob tracks
+    delivery: which function to run, how often it was attempted, and which
+    worker holds the lease until when.
+    """
+    __tablename__ = 'task_jobs'
+
+    task_id = db.Column(db.String(36), db.ForeignKey('tasks.id'), primary_key=True)
+    func_name = db.Column(db.String(200), nullable=False)  # module:function
+    payload = db.Column(db.Text, nullable=True)  # JSON kwargs
+    status = db.Column(db.String(20), nullable=False, default='QUEUED', index=True)  # QUEUED|LEASED|DONE|DEAD|CANCELLED
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    priority = db.Column(db.Integer, nullable=False, default=2, index=True)  # 0=interactive ... 3=export
+    project_id = db.Column(db.String(36), nullable=True)  # Round-robin key within a priority class
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    lease_owner = db.Column(db.String(100), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def get_payload(self):
+        """Parse payload from JSON string"""
+        if self.payload:
+            try:
+                return json.loads(self.payload)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+
+    def set_payload(self, data):
+        """Set payload as JSON string"""
+        self.payload = json.dumps(data) if data else None
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'task_id': self.task_id,
+            'func_name': self.func_name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'priority': self.priority,
+            'project_id': self.project_id,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'lease_owner': self.lease_owner,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'last_error': self.last_error,
+        }
+
+    def __repr__(self):
+        return f'<TaskJob {self.task_id}: {self.func_name} - {self.status}>'
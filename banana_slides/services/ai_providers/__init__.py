@@ -14,19 +14,57 @@ Configuration:
 import logging
 from typing import Dict, Any, Optional
 
-from .text import TextProvider, OpenAITextProvider
-from .image import ImageProvider, OpenAIImageProvider
+from .text import (
+    TextProvider,
+    AsyncTextProvider,
+    OpenAITextProvider,
+    AsyncOpenAITextProvider,
+    CachedTextProvider,
+    AsyncCachedTextProvider,
+    bypass_response_cache,
+    get_response_cache,
+)
+from .image import (
+    ImageProvider,
+    AsyncImageProvider,
+    OpenAIImageProvider,
+    AsyncOpenAIImageProvider,
+    get_encoded_image_cache,
+    UploadPolicy,
+    LEGACY_UPLOAD_POLICY,
+)
+from .prompt_cache import (
+    build_user_messages,
+    get_prompt_usage_stats,
+    reset_prompt_usage_stats,
+)
 from ...config import get_config
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
     "TextProvider",
+    "AsyncTextProvider",
     "OpenAITextProvider",
+    "AsyncOpenAITextProvider",
+    "CachedTextProvider",
+    "AsyncCachedTextProvider",
+    "bypass_response_cache",
+    "get_response_cache",
     "ImageProvider",
+    "AsyncImageProvider",
     "OpenAIImageProvider",
+    "AsyncOpenAIImageProvider",
+    "get_encoded_image_cache",
+    "UploadPolicy",
+    "LEGACY_UPLOAD_POLICY",
+    "build_user_messages",
+    "get_prompt_usage_stats",
+    "reset_prompt_usage_stats",
     "get_text_provider",
     "get_image_provider",
+    "get_async_text_provider",
+    "get_async_image_provider",
 ]
 
 
@@ -60,7 +98,8 @@ def get_text_provider(model: Optional[str] = None) -> TextProvider:
         model: Model name to use. If None, uses TEXT_MODEL from environment.
 
     Returns:
-        OpenAITextProvider instance
+        OpenAITextProvider instance (wrapped in CachedTextProvider when
+        TEXT_CACHE_ENABLED is set)
     """
     config = get_config()
     provider_config = _get_provider_config()
@@ -73,12 +112,15 @@ def get_text_provider(model: Optional[str] = None) -> TextProvider:
             )
 
     logger.info(f"Creating text provider with model: {model}")
-    return OpenAITextProvider(
+    provider = OpenAITextProvider(
         api_key=str(provider_config["api_key"]),
         api_base=str(provider_config["api_base"]),
         model=str(model),
     )
 
+    cache = get_response_cache()
+    return CachedTextProvider(provider, cache) if cache else provider
+
 
 def get_image_provider(model: Optional[str] = None) -> ImageProvider:
     """
@@ -106,3 +148,66 @@ def get_image_provider(model: Optional[str] = None) -> ImageProvider:
         api_base=str(provider_config["api_base"]),
         model=str(model),
     )
+
+
+def get_async_text_provider(model: Optional[str] = None) -> AsyncTextProvider:
+    """
+    Factory function to get asyncio-native text generation provider
+
+    Note: the returned client is bound to the event loop it is first used on,
+    so create one per asyncio.run() and close it with aclose().
+
+    Args:
+        model: Model name to use. If None, uses TEXT_MODEL from environment.
+
+    Returns:
+        AsyncOpenAITextProvider instance
+    """
+    config = get_config()
+    provider_config = _get_provider_config()
+
+    model = model or config.TEXT_MODEL
+    if not model:
+        raise ValueError(
+            "TEXT_MODEL is required. Please set it in your .env file or pass model parameter."
+        )
+
+    logger.info(f"Creating async text provider with model: {model}")
+    provider = AsyncOpenAITextProvider(
+        api_key=str(provider_config["api_key"]),
+        api_base=str(provider_config["api_base"]),
+        model=str(model),
+    )
+
+    cache = get_response_cache()
+    return AsyncCachedTextProvider(provider, cache) if cache else provider
+
+
+def get_async_image_provider(model: Optional[str] = None) -> AsyncImageProvider:
+    """
+    Factory function to get asyncio-native image generation provider
+
+    Note: the returned client is bound to the event loop it is first used on,
+    so create one per asyncio.run() and close it with aclose().
+
+    Args:
+        model: Model name to use. If None, uses IMAGE_MODEL from environment.
+
+    Returns:
+        AsyncOpenAIImageProvider instance
+    """
+    config = get_config()
+    provider_config = _get_provider_config()
+
+    model = model or config.IMAGE_MODEL
+    if not model:
+        raise ValueError(
+            "IMAGE_MODEL is required. Please set it in your .env file or pass model parameter."
+        )
+
+    logger.info(f"Creating async image provider with model: {model}")
+    return AsyncOpenAIImageProvider(
+        api_key=str(provider_config["api_key"]),
+        api_base=str(provider_config["api_base"]),
+        model=str(model),
+    )
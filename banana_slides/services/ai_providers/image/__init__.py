@@ -1,7 +1,9 @@
 """Image generation providers"""
 
-from .base import ImageProvider
-from .openai_provider import OpenAIImageProvider
+from .base import ImageProvider, AsyncImageProvider
+from .openai_provider import OpenAIImageProvider, AsyncOpenAIImageProvider
+from .encoding_cache import EncodedImageCache, get_encoded_image_cache
+from .upload_policy import UploadPolicy, LEGACY_UPLOAD_POLICY
 from .baidu_inpainting_provider import (
     BaiduInpaintingProvider,
     create_baidu_inpainting_provider,
@@ -9,7 +11,13 @@ from .baidu_inpainting_provider import (
 
 __all__ = [
     "ImageProvider",
+    "AsyncImageProvider",
     "OpenAIImageProvider",
+    "AsyncOpenAIImageProvider",
+    "EncodedImageCache",
+    "get_encoded_image_cache",
+    "UploadPolicy",
+    "LEGACY_UPLOAD_POLICY",
     "BaiduInpaintingProvider",
     "create_baidu_inpainting_provider",
 ]
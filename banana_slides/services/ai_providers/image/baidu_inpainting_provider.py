@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional, Tuple
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from ...rate_limiter import get_rate_limiter, BAIDU_THROTTLE_ERROR_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -144,15 +145,18 @@ class BaiduInpaintingProvider:
             }
             
             logger.info("🌐 发送请求到百度图像修复API...")
-            response = requests.post(
-                url, 
-                headers=headers, 
-                json=request_body, 
-                timeout=60
-            )
-            response.raise_for_status()
-            
-            result = response.json()
+            with get_rate_limiter("baidu_inpaint").slot() as slot:
+                response = requests.post(
+                    url, 
+                    headers=headers, 
+                    json=request_body, 
+                    timeout=60
+                )
+                response.raise_for_status()
+                
+                result = response.json()
+                if result.get('error_code') in BAIDU_THROTTLE_ERROR_CODES:
+                    slot.mark_throttled()
             
             # 检查错误 - 抛出异常以触发 @retry 装饰器
             if 'error_code' in result:
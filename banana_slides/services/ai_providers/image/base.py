@@ -15,7 +15,8 @@ class ImageProvider(ABC):
         prompt: str,
         ref_images: Optional[List[Image.Image]] = None,
         aspect_ratio: str = "16:9",
-        resolution: str = "2K"
+        resolution: str = "2K",
+        timeout: Optional[float] = None
     ) -> Optional[Image.Image]:
         """
         Generate image from prompt
@@ -25,8 +26,44 @@ class ImageProvider(ABC):
             ref_images: Optional list of reference images (PIL Image objects)
             aspect_ratio: Image aspect ratio (e.g., "16:9", "1:1", "4:3")
             resolution: Image resolution ("1K", "2K", "4K") - note: OpenAI format only supports 1K
+            timeout: Request timeout in seconds (None = provider default), e.g. to honour a task deadline
             
         Returns:
             Generated PIL Image object, or None if failed
         """
         pass
+
+
+class AsyncImageProvider(ABC):
+    """Abstract base class for asyncio-native image generation"""
+    
+    @abstractmethod
+    async def generate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        """
+        Generate image from prompt without blocking the event loop
+        
+        Args:
+            prompt: The image generation prompt
+            ref_images: Optional list of reference images (PIL Image objects)
+            aspect_ratio: Image aspect ratio (e.g., "16:9", "1:1", "4:3")
+            resolution: Image resolution ("1K", "2K", "4K") - note: OpenAI format only supports 1K
+            
+        Returns:
+            Generated PIL Image object, or None if failed
+        """
+        pass
+
+    async def aclose(self):
+        """
+        Release network resources held by the provider
+
+        Deliberately not abstract: providers without a persistent client
+        have nothing to release and keep this no-op default.
+        """
+        return None
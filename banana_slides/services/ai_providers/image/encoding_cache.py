@@ -0,0 +1,164 @@
+"""
+Encoded reference-image cache
+
+Every slide of a deck sends the same template (and often the same material
+images) to the image model. Re-decoding a 2K PNG and re-encoding it as a
+quality-95 JPEG + base64 for each slide is pure waste, so encoded data is
+cached here, shared across worker threads.
+
+Cache keys:
+- images opened from a file (``Image.open(path)``, untouched): the file's
+  absolute path + mtime + size, so no pixel work is needed to look them up
+- images from the reference-image loader: the source key it stores in
+  ``image.info[SOURCE_KEY_INFO]`` (file path + mtime, or URL + ETag)
+- other PIL images: only when fingerprinting is enabled
+  (IMAGE_ENCODE_CACHE_FINGERPRINT), a blake2b digest of the raw pixels,
+  which still skips the JPEG encode but costs one pass over the pixels
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# image.info entry holding a stable identity for decoded reference images
+SOURCE_KEY_INFO = "banana_slides_source_key"
+
+
+class EncodedImageCache:
+    """Thread-safe LRU of encoded image payloads, bounded by total bytes"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, fingerprint: bool = False):
+        """
+        Args:
+            max_bytes: Upper bound on cached payload size
+            fingerprint: Also cache images that were not opened from a file,
+                keyed by a hash of their pixels
+        """
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint
+
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "uncacheable": 0,
+            "evictions": 0,
+            "encode_seconds": 0.0,
+            "saved_seconds": 0.0,
+        }
+
+    def key_for(self, image: Image.Image, variant: Hashable = None) -> Optional[Hashable]:
+        """
+        Build a cache key for an image, or None if it cannot be keyed cheaply
+
+        Args:
+            image: PIL image about to be encoded
+            variant: Encoding parameters (format, quality, ...) that change the output
+        """
+        source_key = image.info.get(SOURCE_KEY_INFO)
+        if source_key is not None:
+            return ("source", source_key, variant)
+
+        filename = getattr(image, "filename", None)
+        if isinstance(filename, str) and filename and os.path.isfile(filename):
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                stat = None
+            if stat is not None:
+                return (
+                    "file",
+                    os.path.abspath(filename),
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    variant,
+                )
+
+        if self.fingerprint:
+            digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+            digest.update(f"{image.mode}:{image.size}".encode("utf-8"))
+            return ("pixels", digest.hexdigest(), variant)
+
+        return None
+
+    def get_or_encode(
+        self, image: Image.Image, encode: Callable[[Image.Image], str], variant: Hashable = None
+    ) -> str:
+        """
+        Return the cached payload for image, encoding (and caching) it on a miss
+
+        Args:
+            image: PIL image
+            encode: Function producing the payload string
+            variant: Encoding parameters that are part of the key
+        """
+        key = self.key_for(image, variant)
+        if key is None:
+            with self._lock:
+                self._stats["uncacheable"] += 1
+            return encode(image)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["saved_seconds"] += entry[1]
+                return entry[0]
+            self._stats["misses"] += 1
+
+        start = time.perf_counter()
+        payload = encode(image)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._stats["encode_seconds"] += elapsed
+            if key not in self._entries and len(payload) <= self.max_bytes:
+                self._entries[key] = (payload, elapsed)
+                self._bytes += len(payload)
+                while self._bytes > self.max_bytes:
+                    _, (old_payload, _) = self._entries.popitem(last=False)
+                    self._bytes -= len(old_payload)
+                    self._stats["evictions"] += 1
+
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Counters plus CPU time spent encoding and saved by hits"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+
+_encoded_image_cache: Optional[EncodedImageCache] = None
+_encoded_image_cache_lock = threading.Lock()
+
+
+def get_encoded_image_cache() -> EncodedImageCache:
+    """Process-wide cache configured by IMAGE_ENCODE_CACHE_MB / IMAGE_ENCODE_CACHE_FINGERPRINT"""
+    global _encoded_image_cache
+    if _encoded_image_cache is None:
+        with _encoded_image_cache_lock:
+            if _encoded_image_cache is None:
+                from banana_slides.config import get_config
+
+                config = get_config()
+                _encoded_image_cache = EncodedImageCache(
+                    max_bytes=int(config.IMAGE_ENCODE_CACHE_MB * 1024 * 1024),
+                    fingerprint=config.IMAGE_ENCODE_CACHE_FINGERPRINT,
+                )
+    return _encoded_image_cache
@@ -8,9 +8,14 @@ import re
 import requests
 from io import BytesIO
 from typing import Optional, List
-from openai import OpenAI
+import asyncio
+from openai import OpenAI, AsyncOpenAI
 from PIL import Image
-from .base import ImageProvider
+from .base import ImageProvider, AsyncImageProvider
+from .encoding_cache import get_encoded_image_cache
+from .upload_policy import UploadPolicy
+from ...rate_limiter import get_rate_limiter
+from ..prompt_cache import build_user_messages, record_prompt_usage
 from banana_slides.config import get_config
 
 logger = logging.getLogger(__name__)
@@ -24,6 +29,7 @@ class OpenAIImageProvider(ImageProvider):
         api_key: str,
         api_base: str = None,
         model: str = "gemini-3-pro-image-preview",
+        upload_policy: Optional[UploadPolicy] = None,
     ):
         """
         Initialize OpenAI image provider
@@ -32,6 +38,7 @@ class OpenAIImageProvider(ImageProvider):
             api_key: API key
             api_base: API base URL (e.g., https://aihubmix.com/v1)
             model: Model name to use
+            upload_policy: Reference-image resize/encode policy (default: from config)
         """
         self.client = OpenAI(
             api_key=api_key,
@@ -40,23 +47,213 @@ class OpenAIImageProvider(ImageProvider):
             max_retries=get_config().OPENAI_MAX_RETRIES,  # set max retries from config
         )
         self.model = model
+        self.upload_policy = upload_policy or UploadPolicy.from_config()
 
     def _encode_image_to_base64(self, image: Image.Image) -> str:
         """
         Encode PIL Image to base64 string
 
+        The image is downscaled and re-encoded per the provider's upload
+        policy. Results are served from the shared EncodedImageCache (keyed by
+        the policy too), so the project template is resized and encoded once
+        per deck instead of once per slide.
+
         Args:
             image: PIL Image object
 
         Returns:
-            Base64 encoded string
+            Base64 encoded string (format: self.upload_policy.mime_type)
+        """
+        return get_encoded_image_cache().get_or_encode(
+            image, self.upload_policy.encode_base64, variant=self.upload_policy.variant
+        )
+
+    def _build_messages(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]],
+        aspect_ratio: str,
+    ) -> List[dict]:
+        """
+        Build chat messages for an image generation request
+
+        Args:
+            prompt: The image generation prompt
+            ref_images: Optional list of reference images
+            aspect_ratio: Image aspect ratio (passed via system message)
+
+        Returns:
+            Messages list for chat.completions.create
         """
-        buffered = BytesIO()
-        # Convert to RGB if necessary (e.g., RGBA images)
-        if image.mode in ("RGBA", "LA", "P"):
-            image = image.convert("RGB")
-        image.save(buffered, format="JPEG", quality=95)
-        return base64.b64encode(buffered.getvalue()).decode("utf-8")
+        # Reference images first (if any)
+        content = []
+        if ref_images:
+            for ref_img in ref_images:
+                base64_image = self._encode_image_to_base64(ref_img)
+                content.append(
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{self.upload_policy.mime_type};base64,{base64_image}"
+                        },
+                    }
+                )
+
+        # Text prompt goes last; a CacheablePrompt's stable prefix may be
+        # sent ahead of the images (see PROMPT_CACHE_MODE)
+        return [
+            {"role": "system", "content": f"aspect_ratio={aspect_ratio}"},
+            *build_user_messages(prompt, leading_content=content),
+        ]
+
+    def _extract_image(self, message) -> Image.Image:
+        """
+        Extract the generated image from a chat completion message
+
+        Args:
+            message: response.choices[0].message
+
+        Returns:
+            PIL Image object
+
+        Raises:
+            ValueError: If no image can be found in the message
+        """
+        # Debug: log available attributes
+        logger.debug(f"Response message attributes: {dir(message)}")
+
+        # Try multi_mod_content first (custom format from some proxies)
+        if hasattr(message, "multi_mod_content") and message.multi_mod_content:
+            parts = message.multi_mod_content
+            for part in parts:
+                if "text" in part:
+                    logger.debug(
+                        f"Response text: {part['text'][:100] if len(part['text']) > 100 else part['text']}"
+                    )
+                if "inline_data" in part:
+                    image_data = base64.b64decode(part["inline_data"]["data"])
+                    image = Image.open(BytesIO(image_data))
+                    logger.debug(
+                        f"Successfully extracted image: {image.size}, {image.mode}"
+                    )
+                    return image
+
+        # Try standard OpenAI content format (list of content parts)
+        if hasattr(message, "content") and message.content:
+            # If content is a list (multimodal response)
+            if isinstance(message.content, list):
+                for part in message.content:
+                    if isinstance(part, dict):
+                        # Handle image_url type
+                        if part.get("type") == "image_url":
+                            image_url = part.get("image_url", {}).get("url", "")
+                            if image_url.startswith("data:image"):
+                                # Extract base64 data from data URL
+                                base64_data = image_url.split(",", 1)[1]
+                                image_data = base64.b64decode(base64_data)
+                                image = Image.open(BytesIO(image_data))
+                                logger.debug(
+                                    f"Successfully extracted image from content: {image.size}, {image.mode}"
+                                )
+                                return image
+                        # Handle text type
+                        elif part.get("type") == "text":
+                            text = part.get("text", "")
+                            if text:
+                                logger.debug(
+                                    f"Response text: {text[:100] if len(text) > 100 else text}"
+                                )
+                    elif hasattr(part, "type"):
+                        # Handle as object with attributes
+                        if part.type == "image_url":
+                            image_url = getattr(part, "image_url", {})
+                            if isinstance(image_url, dict):
+                                url = image_url.get("url", "")
+                            else:
+                                url = getattr(image_url, "url", "")
+                            if url.startswith("data:image"):
+                                base64_data = url.split(",", 1)[1]
+                                image_data = base64.b64decode(base64_data)
+                                image = Image.open(BytesIO(image_data))
+                                logger.debug(
+                                    f"Successfully extracted image from content object: {image.size}, {image.mode}"
+                                )
+                                return image
+            # If content is a string, try to extract image from it
+            elif isinstance(message.content, str):
+                content_str = message.content
+                logger.debug(
+                    f"Response content (string): {content_str[:200] if len(content_str) > 200 else content_str}"
+                )
+
+                # Try to extract Markdown image URL: ![...](url)
+                markdown_pattern = r"!\[.*?\]\((https?://[^\s\)]+)\)"
+                markdown_matches = re.findall(markdown_pattern, content_str)
+                if markdown_matches:
+                    image_url = markdown_matches[0]  # Use the first image URL found
+                    logger.debug(f"Found Markdown image URL: {image_url}")
+                    try:
+                        response = requests.get(image_url, timeout=30, stream=True)
+                        response.raise_for_status()
+                        image = Image.open(BytesIO(response.content))
+                        image.load()  # Ensure image is fully loaded
+                        logger.debug(
+                            f"Successfully downloaded image from Markdown URL: {image.size}, {image.mode}"
+                        )
+                        return image
+                    except Exception as download_error:
+                        logger.warning(
+                            f"Failed to download image from Markdown URL: {download_error}"
+                        )
+
+                # Try to extract plain URL (not in Markdown format)
+                url_pattern = r"(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)"
+                url_matches = re.findall(url_pattern, content_str, re.IGNORECASE)
+                if url_matches:
+                    image_url = url_matches[0]
+                    logger.debug(f"Found plain image URL: {image_url}")
+                    try:
+                        response = requests.get(image_url, timeout=30, stream=True)
+                        response.raise_for_status()
+                        image = Image.open(BytesIO(response.content))
+                        image.load()
+                        logger.debug(
+                            f"Successfully downloaded image from plain URL: {image.size}, {image.mode}"
+                        )
+                        return image
+                    except Exception as download_error:
+                        logger.warning(
+                            f"Failed to download image from plain URL: {download_error}"
+                        )
+
+                # Try to extract base64 data URL from string
+                base64_pattern = r"data:image/[^;]+;base64,([A-Za-z0-9+/=]+)"
+                base64_matches = re.findall(base64_pattern, content_str)
+                if base64_matches:
+                    base64_data = base64_matches[0]
+                    logger.debug(f"Found base64 image data in string")
+                    try:
+                        image_data = base64.b64decode(base64_data)
+                        image = Image.open(BytesIO(image_data))
+                        logger.debug(
+                            f"Successfully extracted base64 image from string: {image.size}, {image.mode}"
+                        )
+                        return image
+                    except Exception as decode_error:
+                        logger.warning(
+                            f"Failed to decode base64 image from string: {decode_error}"
+                        )
+
+        # Log raw response for debugging
+        logger.warning(
+            f"Unable to extract image. Raw message type: {type(message)}"
+        )
+        logger.warning(
+            f"Message content type: {type(getattr(message, 'content', None))}"
+        )
+        logger.warning(f"Message content: {getattr(message, 'content', 'N/A')}")
+
+        raise ValueError("No valid multimodal response received from OpenAI API")
 
     def generate_image(
         self,
@@ -64,6 +261,7 @@ class OpenAIImageProvider(ImageProvider):
         ref_images: Optional[List[Image.Image]] = None,
         aspect_ratio: str = "16:9",
         resolution: str = "2K",
+        timeout: Optional[float] = None,
     ) -> Optional[Image.Image]:
         """
         Generate image using OpenAI SDK
@@ -75,29 +273,15 @@ class OpenAIImageProvider(ImageProvider):
             ref_images: Optional list of reference images
             aspect_ratio: Image aspect ratio
             resolution: Image resolution (only 1K supported, parameter ignored)
+            timeout: Request timeout in seconds (default: OPENAI_TIMEOUT)
 
         Returns:
             Generated PIL Image object, or None if failed
         """
         try:
-            # Build message content
-            content = []
-
-            # Add reference images first (if any)
-            if ref_images:
-                for ref_img in ref_images:
-                    base64_image = self._encode_image_to_base64(ref_img)
-                    content.append(
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            },
-                        }
-                    )
-
-            # Add text prompt
-            content.append({"type": "text", "text": prompt})
+            messages = self._build_messages(prompt, ref_images, aspect_ratio)
+            # Per-request timeout, e.g. the time left before a task deadline
+            client = self.client if timeout is None else self.client.with_options(timeout=timeout)
 
             logger.debug(
                 f"Calling OpenAI API for image generation with {len(ref_images) if ref_images else 0} reference images..."
@@ -107,157 +291,106 @@ class OpenAIImageProvider(ImageProvider):
             )
 
             # Note: resolution is not supported in OpenAI format, only aspect_ratio via system message
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"aspect_ratio={aspect_ratio}"},
-                    {"role": "user", "content": content},
-                ],
-                modalities=["text", "image"],
-            )
+            with get_rate_limiter("openai_image").slot():
+                response = client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    modalities=["text", "image"],
+                )
+            record_prompt_usage(self.model, response)
 
             logger.debug("OpenAI API call completed")
 
-            # Extract image from response - handle different response formats
-            message = response.choices[0].message
+            return self._extract_image(response.choices[0].message)
 
-            # Debug: log available attributes
-            logger.debug(f"Response message attributes: {dir(message)}")
+        except Exception as e:
+            error_detail = f"Error generating image with OpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
 
-            # Try multi_mod_content first (custom format from some proxies)
-            if hasattr(message, "multi_mod_content") and message.multi_mod_content:
-                parts = message.multi_mod_content
-                for part in parts:
-                    if "text" in part:
-                        logger.debug(
-                            f"Response text: {part['text'][:100] if len(part['text']) > 100 else part['text']}"
-                        )
-                    if "inline_data" in part:
-                        image_data = base64.b64decode(part["inline_data"]["data"])
-                        image = Image.open(BytesIO(image_data))
-                        logger.debug(
-                            f"Successfully extracted image: {image.size}, {image.mode}"
-                        )
-                        return image
 
-            # Try standard OpenAI content format (list of content parts)
-            if hasattr(message, "content") and message.content:
-                # If content is a list (multimodal response)
-                if isinstance(message.content, list):
-                    for part in message.content:
-                        if isinstance(part, dict):
-                            # Handle image_url type
-                            if part.get("type") == "image_url":
-                                image_url = part.get("image_url", {}).get("url", "")
-                                if image_url.startswith("data:image"):
-                                    # Extract base64 data from data URL
-                                    base64_data = image_url.split(",", 1)[1]
-                                    image_data = base64.b64decode(base64_data)
-                                    image = Image.open(BytesIO(image_data))
-                                    logger.debug(
-                                        f"Successfully extracted image from content: {image.size}, {image.mode}"
-                                    )
-                                    return image
-                            # Handle text type
-                            elif part.get("type") == "text":
-                                text = part.get("text", "")
-                                if text:
-                                    logger.debug(
-                                        f"Response text: {text[:100] if len(text) > 100 else text}"
-                                    )
-                        elif hasattr(part, "type"):
-                            # Handle as object with attributes
-                            if part.type == "image_url":
-                                image_url = getattr(part, "image_url", {})
-                                if isinstance(image_url, dict):
-                                    url = image_url.get("url", "")
-                                else:
-                                    url = getattr(image_url, "url", "")
-                                if url.startswith("data:image"):
-                                    base64_data = url.split(",", 1)[1]
-                                    image_data = base64.b64decode(base64_data)
-                                    image = Image.open(BytesIO(image_data))
-                                    logger.debug(
-                                        f"Successfully extracted image from content object: {image.size}, {image.mode}"
-                                    )
-                                    return image
-                # If content is a string, try to extract image from it
-                elif isinstance(message.content, str):
-                    content_str = message.content
-                    logger.debug(
-                        f"Response content (string): {content_str[:200] if len(content_str) > 200 else content_str}"
-                    )
+class AsyncOpenAIImageProvider(AsyncImageProvider):
+    """Image generation using the AsyncOpenAI client (one event loop, many in-flight calls)"""
 
-                    # Try to extract Markdown image URL: ![...](url)
-                    markdown_pattern = r"!\[.*?\]\((https?://[^\s\)]+)\)"
-                    markdown_matches = re.findall(markdown_pattern, content_str)
-                    if markdown_matches:
-                        image_url = markdown_matches[0]  # Use the first image URL found
-                        logger.debug(f"Found Markdown image URL: {image_url}")
-                        try:
-                            response = requests.get(image_url, timeout=30, stream=True)
-                            response.raise_for_status()
-                            image = Image.open(BytesIO(response.content))
-                            image.load()  # Ensure image is fully loaded
-                            logger.debug(
-                                f"Successfully downloaded image from Markdown URL: {image.size}, {image.mode}"
-                            )
-                            return image
-                        except Exception as download_error:
-                            logger.warning(
-                                f"Failed to download image from Markdown URL: {download_error}"
-                            )
-
-                    # Try to extract plain URL (not in Markdown format)
-                    url_pattern = r"(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)"
-                    url_matches = re.findall(url_pattern, content_str, re.IGNORECASE)
-                    if url_matches:
-                        image_url = url_matches[0]
-                        logger.debug(f"Found plain image URL: {image_url}")
-                        try:
-                            response = requests.get(image_url, timeout=30, stream=True)
-                            response.raise_for_status()
-                            image = Image.open(BytesIO(response.content))
-                            image.load()
-                            logger.debug(
-                                f"Successfully downloaded image from plain URL: {image.size}, {image.mode}"
-                            )
-                            return image
-                        except Exception as download_error:
-                            logger.warning(
-                                f"Failed to download image from plain URL: {download_error}"
-                            )
-
-                    # Try to extract base64 data URL from string
-                    base64_pattern = r"data:image/[^;]+;base64,([A-Za-z0-9+/=]+)"
-                    base64_matches = re.findall(base64_pattern, content_str)
-                    if base64_matches:
-                        base64_data = base64_matches[0]
-                        logger.debug(f"Found base64 image data in string")
-                        try:
-                            image_data = base64.b64decode(base64_data)
-                            image = Image.open(BytesIO(image_data))
-                            logger.debug(
-                                f"Successfully extracted base64 image from string: {image.size}, {image.mode}"
-                            )
-                            return image
-                        except Exception as decode_error:
-                            logger.warning(
-                                f"Failed to decode base64 image from string: {decode_error}"
-                            )
-
-            # Log raw response for debugging
-            logger.warning(
-                f"Unable to extract image. Raw message type: {type(message)}"
+    # Request building and response parsing are shared with the sync provider
+    _encode_image_to_base64 = OpenAIImageProvider._encode_image_to_base64
+    _build_messages = OpenAIImageProvider._build_messages
+    _extract_image = OpenAIImageProvider._extract_image
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: str = None,
+        model: str = "gemini-3-pro-image-preview",
+        upload_policy: Optional[UploadPolicy] = None,
+    ):
+        """
+        Initialize async OpenAI image provider
+
+        Args:
+            api_key: API key
+            api_base: API base URL (e.g., https://aihubmix.com/v1)
+            model: Model name to use
+            upload_policy: Reference-image resize/encode policy (default: from config)
+        """
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=api_base,
+            timeout=get_config().OPENAI_TIMEOUT,
+            max_retries=get_config().OPENAI_MAX_RETRIES,
+        )
+        self.model = model
+        self.upload_policy = upload_policy or UploadPolicy.from_config()
+
+    async def generate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+    ) -> Optional[Image.Image]:
+        """
+        Generate image using AsyncOpenAI
+
+        Reference image encoding and response parsing (which may download
+        the result over plain HTTP) are CPU/blocking work, so they run in the
+        default executor instead of on the event loop.
+
+        Args:
+            prompt: The image generation prompt
+            ref_images: Optional list of reference images
+            aspect_ratio: Image aspect ratio
+            resolution: Image resolution (only 1K supported, parameter ignored)
+
+        Returns:
+            Generated PIL Image object, or None if failed
+        """
+        try:
+            messages = await asyncio.to_thread(
+                self._build_messages, prompt, ref_images, aspect_ratio
             )
-            logger.warning(
-                f"Message content type: {type(getattr(message, 'content', None))}"
+
+            logger.debug(
+                f"Calling AsyncOpenAI API for image generation with {len(ref_images) if ref_images else 0} reference images..."
             )
-            logger.warning(f"Message content: {getattr(message, 'content', 'N/A')}")
 
-            raise ValueError("No valid multimodal response received from OpenAI API")
+            async with get_rate_limiter("openai_image").async_slot():
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    modalities=["text", "image"],
+                )
+            record_prompt_usage(self.model, response)
+
+            return await asyncio.to_thread(
+                self._extract_image, response.choices[0].message
+            )
 
         except Exception as e:
-            error_detail = f"Error generating image with OpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
+            error_detail = f"Error generating image with AsyncOpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
+
+    async def aclose(self):
+        """Close the underlying HTTP connection pool"""
+        await self.client.close()
@@ -0,0 +1,85 @@
+"""
+Reference-image upload policy
+
+Templates and material images are often 2K-4K PNGs, while the OpenAI-format
+image path only produces ~1K output. Sending them at full size and JPEG
+quality 95 puts several megabytes of base64 into every slide request for no
+visible benefit, so reference images are downscaled to a maximum long edge
+and re-encoded (JPEG or WebP) before upload.
+
+The encoded payload depends on the policy, which is part of the
+EncodedImageCache key: each image is resized and encoded once per policy and
+reused for every slide.
+
+Configured by IMAGE_UPLOAD_MAX_EDGE / IMAGE_UPLOAD_QUALITY / IMAGE_UPLOAD_FORMAT.
+"""
+
+import base64
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Tuple
+
+from PIL import Image
+
+UPLOAD_FORMATS = ("JPEG", "WEBP")
+
+
+@dataclass(frozen=True)
+class UploadPolicy:
+    """How reference images are resized and encoded before upload"""
+
+    max_edge: int = 0  # 0 keeps the original size
+    quality: int = 95
+    format: str = "JPEG"
+
+    @classmethod
+    def from_config(cls) -> "UploadPolicy":
+        from banana_slides.config import get_config
+
+        config = get_config()
+        image_format = config.IMAGE_UPLOAD_FORMAT.upper()
+        return cls(
+            max_edge=max(0, config.IMAGE_UPLOAD_MAX_EDGE),
+            quality=min(100, max(1, config.IMAGE_UPLOAD_QUALITY)),
+            format=image_format if image_format in UPLOAD_FORMATS else "JPEG",
+        )
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format.lower()}"
+
+    @property
+    def variant(self) -> Tuple:
+        """Encoded-payload cache variant for this policy"""
+        return (self.format, self.quality, self.max_edge)
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        """Downscale to max_edge and convert to a mode the target format supports"""
+        if self.max_edge and max(image.size) > self.max_edge:
+            scale = self.max_edge / max(image.size)
+            size = (
+                max(1, round(image.width * scale)),
+                max(1, round(image.height * scale)),
+            )
+            image = image.resize(size, Image.LANCZOS)
+
+        if self.format == "JPEG":
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        return image
+
+    def encode(self, image: Image.Image) -> bytes:
+        """Resized, encoded image bytes"""
+        buffered = BytesIO()
+        self.prepare(image).save(buffered, format=self.format, quality=self.quality)
+        return buffered.getvalue()
+
+    def encode_base64(self, image: Image.Image) -> str:
+        return base64.b64encode(self.encode(image)).decode("utf-8")
+
+
+# What every request sent before the upload policy existed
+LEGACY_UPLOAD_POLICY = UploadPolicy(max_edge=0, quality=95, format="JPEG")
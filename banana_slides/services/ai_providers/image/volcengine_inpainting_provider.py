@@ -11,6 +11,7 @@ from io import BytesIO
 from typing import Optional
 from PIL import Image
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from ...rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -145,11 +146,12 @@ class VolcengineInpaintingProvider:
             
             try:
                 # 使用SDK的通用API调用方法
-                response = service.json(
-                    "CVProcess",
-                    {},  # query params
-                    json.dumps(request_body)  # body
-                )
+                with get_rate_limiter("volcengine_inpaint").slot():
+                    response = service.json(
+                        "CVProcess",
+                        {},  # query params
+                        json.dumps(request_body)  # body
+                    )
                 
                 # 解析响应
                 if isinstance(response, str):
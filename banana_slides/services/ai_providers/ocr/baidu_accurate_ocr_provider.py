@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional, Literal
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from ...rate_limiter import get_rate_limiter, BAIDU_THROTTLE_ERROR_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -200,10 +201,13 @@ class BaiduAccurateOCRProvider:
             data = '&'.join([f"{k}={v}" for k, v in form_data.items()])
             
             logger.info("🌐 发送请求到百度高精度OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
+            with get_rate_limiter("baidu_ocr").slot() as slot:
+                response = requests.post(url, headers=headers, data=data, timeout=60)
+                response.raise_for_status()
+                
+                result = response.json()
+                if result.get('error_code') in BAIDU_THROTTLE_ERROR_CODES:
+                    slot.mark_throttled()
             
             # 检查错误
             if 'error_code' in result:
@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from ...rate_limiter import get_rate_limiter, BAIDU_THROTTLE_ERROR_CODES
 
 logger = logging.getLogger(__name__)
 
@@ -123,10 +124,13 @@ class BaiduTableOCRProvider:
             data = f"image={image_encoded}&cell_contents={'true' if cell_contents else 'false'}&return_excel={'true' if return_excel else 'false'}"
             
             logger.info(f"🌐 发送请求到百度表格OCR API...")
-            response = requests.post(url, headers=headers, data=data, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
+            with get_rate_limiter("baidu_ocr").slot() as slot:
+                response = requests.post(url, headers=headers, data=data, timeout=60)
+                response.raise_for_status()
+                
+                result = response.json()
+                if result.get('error_code') in BAIDU_THROTTLE_ERROR_CODES:
+                    slot.mark_throttled()
             
             # 检查错误
             if 'error_code' in result:
@@ -0,0 +1,119 @@
+"""
+Provider-side prompt caching helpers
+
+Prompt builders return a CacheablePrompt (a str with ``prefix``/``suffix``)
+whose prefix is byte-identical for every page of a deck. Upstream prefix/KV
+caches match on the leading tokens of a request, so the prefix must come
+first and stay stable; how it is sent is controlled by PROMPT_CACHE_MODE:
+
+- off: one user message containing prefix + suffix (default)
+- messages: the prefix in its own user message, the per-page suffix in the next
+- cache_control: like messages, with an explicit ``cache_control`` breakpoint
+  on the prefix (honoured by Anthropic/OpenRouter style gateways)
+
+Cached-token counts reported by the endpoint (usage.prompt_tokens_details)
+are aggregated per model for monitoring and benchmarks.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROMPT_CACHE_MODES = ("off", "messages", "cache_control")
+
+
+def _prompt_cache_mode() -> str:
+    from banana_slides.config import get_config
+
+    mode = get_config().PROMPT_CACHE_MODE
+    return mode if mode in PROMPT_CACHE_MODES else "off"
+
+
+def build_user_messages(
+    prompt: str, leading_content: Optional[List[dict]] = None
+) -> List[dict]:
+    """
+    Build the user message(s) for a prompt
+
+    Args:
+        prompt: Prompt text; a CacheablePrompt may be split per PROMPT_CACHE_MODE
+        leading_content: Content parts (e.g. reference images) placed before
+            the per-page text; when given (even empty) content is sent as a
+            list of parts
+
+    Returns:
+        List of chat messages
+    """
+    prefix = getattr(prompt, "prefix", None)
+    suffix = getattr(prompt, "suffix", None)
+    mode = _prompt_cache_mode()
+
+    if prefix is None or suffix is None or mode == "off":
+        if leading_content is not None:
+            return [
+                {
+                    "role": "user",
+                    "content": [*leading_content, {"type": "text", "text": str(prompt)}],
+                }
+            ]
+        return [{"role": "user", "content": str(prompt)}]
+
+    prefix_part = {"type": "text", "text": prefix}
+    if mode == "cache_control":
+        prefix_part["cache_control"] = {"type": "ephemeral"}
+
+    if leading_content is not None:
+        suffix_content = [*leading_content, {"type": "text", "text": suffix}]
+    else:
+        suffix_content = suffix
+
+    return [
+        {"role": "user", "content": [prefix_part]},
+        {"role": "user", "content": suffix_content},
+    ]
+
+
+_usage: Dict[str, Dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+
+def record_prompt_usage(model: str, response) -> None:
+    """Add a chat completion's prompt/cached token counts to the per-model totals"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) or 0
+    if not cached_tokens:
+        # Anthropic-style gateways
+        cached_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
+
+    with _usage_lock:
+        stats = _usage.setdefault(
+            model, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        )
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+
+
+def get_prompt_usage_stats() -> Dict[str, dict]:
+    """Per-model prompt token totals and the share served from the upstream cache"""
+    with _usage_lock:
+        snapshot = {model: dict(stats) for model, stats in _usage.items()}
+    for stats in snapshot.values():
+        stats["cached_ratio"] = (
+            stats["cached_tokens"] / stats["prompt_tokens"]
+            if stats["prompt_tokens"]
+            else 0.0
+        )
+    return snapshot
+
+
+def reset_prompt_usage_stats():
+    with _usage_lock:
+        _usage.clear()
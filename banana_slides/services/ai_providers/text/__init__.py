@@ -1,6 +1,23 @@
 """Text generation providers"""
 
-from .base import TextProvider
-from .openai_provider import OpenAITextProvider
+from .base import AsyncTextProvider, TextProvider
+from .cache import (
+    AsyncCachedTextProvider,
+    CachedTextProvider,
+    ResponseCache,
+    bypass_response_cache,
+    get_response_cache,
+)
+from .openai_provider import AsyncOpenAITextProvider, OpenAITextProvider
 
-__all__ = ["TextProvider", "OpenAITextProvider"]
+__all__ = [
+    "TextProvider",
+    "AsyncTextProvider",
+    "OpenAITextProvider",
+    "AsyncOpenAITextProvider",
+    "ResponseCache",
+    "CachedTextProvider",
+    "AsyncCachedTextProvider",
+    "bypass_response_cache",
+    "get_response_cache",
+]
@@ -20,3 +20,30 @@ class TextProvider(ABC):
             Generated text content
         """
         pass
+
+
+class AsyncTextProvider(ABC):
+    """Abstract base class for asyncio-native text generation"""
+    
+    @abstractmethod
+    async def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text content from prompt without blocking the event loop
+        
+        Args:
+            prompt: The input prompt for text generation
+            thinking_budget: Budget for thinking/reasoning (provider-specific)
+            
+        Returns:
+            Generated text content
+        """
+        pass
+
+    async def aclose(self):
+        """
+        Release network resources held by the provider
+
+        Deliberately not abstract: providers without a persistent client
+        have nothing to release and keep this no-op default.
+        """
+        return None
@@ -0,0 +1,364 @@
+"""
+Content-addressed response cache for text generation providers
+
+Responses are keyed by sha256(model, prompt, thinking_budget) and stored in a
+local SQLite file, so identical prompts (retries, regenerations, re-running
+``create`` with the same idea) become a disk lookup instead of an LLM call.
+
+Entries expire after a TTL and the store is trimmed least-recently-used first
+once it grows past its size limit.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from .base import AsyncTextProvider, TextProvider
+
+logger = logging.getLogger(__name__)
+
+# Per-call bypass flag (see bypass_response_cache)
+_bypass_cache: ContextVar[bool] = ContextVar("bypass_response_cache", default=False)
+
+
+@contextmanager
+def bypass_response_cache():
+    """
+    Skip the response cache for calls made inside this block
+
+    Fresh responses are still written back, so the next cached call sees them.
+
+    Usage:
+        with bypass_response_cache():
+            ai_service.generate_page_description(...)
+    """
+    token = _bypass_cache.set(True)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+class ResponseCache:
+    """SQLite-backed text response cache with TTL and size-based LRU eviction"""
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 200 * 1024 * 1024,
+    ):
+        """
+        Args:
+            db_path: SQLite file path (parent directory is created if missing)
+            ttl_seconds: Entry lifetime; <= 0 disables expiry
+            max_bytes: Upper bound on stored response bytes before LRU eviction
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS text_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_text_responses_accessed_at "
+            "ON text_responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        model: str, prompt: str, thinking_budget: int, response_schema: dict = None
+    ) -> str:
+        """Content hash of everything that determines the response"""
+        parts = [model, prompt, thinking_budget]
+        if response_schema is not None:
+            parts.append(response_schema)
+        payload = json.dumps(
+            parts, ensure_ascii=False, separators=(",", ":"), sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM text_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM text_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE text_responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self._stats["hits"] += 1
+            return row[0]
+
+    def set(self, key: str, response: str, model: str = None):
+        """Store a response and evict old entries if the store is over budget"""
+        if response is None:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO text_responses "
+                "(key, model, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._stats["writes"] += 1
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def invalidate(self, key: str):
+        """Drop one entry (e.g. a response that failed to parse)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM text_responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM text_responses")
+            self._conn.commit()
+
+    def _evict_locked(self, now: float):
+        """Expire by TTL, then trim least-recently-used entries down to max_bytes"""
+        evicted = 0
+        if self.ttl_seconds > 0:
+            evicted += self._conn.execute(
+                "DELETE FROM text_responses WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            ).rowcount
+
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM text_responses"
+        ).fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            stale_keys = []
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM text_responses ORDER BY accessed_at ASC"
+            ):
+                stale_keys.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany(
+                "DELETE FROM text_responses WHERE key = ?", stale_keys
+            )
+            evicted += len(stale_keys)
+
+        self._stats["evictions"] += evicted
+
+    def stats(self) -> dict:
+        """Hit/miss counters plus current store size"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM text_responses"
+            ).fetchone()
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats.update(
+            {
+                "entries": entries,
+                "bytes": total,
+                "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            }
+        )
+        return stats
+
+
+class CachedTextProvider(TextProvider):
+    """TextProvider wrapper that serves repeated prompts from a ResponseCache"""
+
+    def __init__(self, provider: TextProvider, cache: ResponseCache):
+        self.provider = provider
+        self.cache = cache
+        self.model = getattr(provider, "model", None)
+
+    def __getattr__(self, name):
+        # Keep optional capabilities of the wrapped provider (e.g. generate_with_image)
+        if name == "provider":
+            raise AttributeError(name)
+        return getattr(self.provider, name)
+
+    def cache_key(
+        self, prompt: str, thinking_budget: int = 1000, response_schema: dict = None
+    ) -> str:
+        return self.cache.make_key(self.model, prompt, thinking_budget, response_schema)
+
+    def _cached(self, key: str, generate) -> str:
+        if not _bypass_cache.get():
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.debug(f"Text response cache hit: {key[:12]}")
+                return cached
+
+        response = generate()
+        self.cache.set(key, response, model=self.model)
+        return response
+
+    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        return self._cached(
+            self.cache_key(prompt, thinking_budget),
+            lambda: self.provider.generate_text(prompt, thinking_budget=thinking_budget),
+        )
+
+    def stream_text(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """Replay a cached response as one chunk, or stream and cache the full text"""
+        key = self.cache_key(prompt, thinking_budget)
+        if not _bypass_cache.get():
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.debug(f"Text response cache hit: {key[:12]}")
+                yield cached
+                return
+
+        chunks = []
+        for chunk in self.provider.stream_text(prompt, thinking_budget=thinking_budget):
+            chunks.append(chunk)
+            yield chunk
+        # Only reached when the stream completed, so partial responses are never cached
+        self.cache.set(key, "".join(chunks), model=self.model)
+
+    def generate_structured(
+        self, prompt: str, response_schema: dict, thinking_budget: int = 1000
+    ) -> str:
+        if not hasattr(self.provider, "generate_structured"):
+            raise NotImplementedError("Wrapped provider has no structured output")
+        return self._cached(
+            self.cache_key(prompt, thinking_budget, response_schema),
+            lambda: self.provider.generate_structured(
+                prompt, response_schema, thinking_budget=thinking_budget
+            ),
+        )
+
+    def invalidate(
+        self, prompt: str, thinking_budget: int = 1000, response_schema: dict = None
+    ):
+        """Forget the cached response for this prompt"""
+        self.cache.invalidate(self.cache_key(prompt, thinking_budget, response_schema))
+
+
+class AsyncCachedTextProvider(AsyncTextProvider):
+    """AsyncTextProvider wrapper sharing the same ResponseCache"""
+
+    def __init__(self, provider: AsyncTextProvider, cache: ResponseCache):
+        self.provider = provider
+        self.cache = cache
+        self.model = getattr(provider, "model", None)
+
+    def __getattr__(self, name):
+        if name == "provider":
+            raise AttributeError(name)
+        return getattr(self.provider, name)
+
+    def cache_key(
+        self, prompt: str, thinking_budget: int = 1000, response_schema: dict = None
+    ) -> str:
+        return self.cache.make_key(self.model, prompt, thinking_budget, response_schema)
+
+    async def _cached(self, key: str, generate) -> str:
+        if not _bypass_cache.get():
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                logger.debug(f"Text response cache hit: {key[:12]}")
+                return cached
+
+        response = await generate()
+        await asyncio.to_thread(self.cache.set, key, response, self.model)
+        return response
+
+    async def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        return await self._cached(
+            self.cache_key(prompt, thinking_budget),
+            lambda: self.provider.generate_text(prompt, thinking_budget=thinking_budget),
+        )
+
+    async def generate_structured(
+        self, prompt: str, response_schema: dict, thinking_budget: int = 1000
+    ) -> str:
+        if not hasattr(self.provider, "generate_structured"):
+            raise NotImplementedError("Wrapped provider has no structured output")
+        return await self._cached(
+            self.cache_key(prompt, thinking_budget, response_schema),
+            lambda: self.provider.generate_structured(
+                prompt, response_schema, thinking_budget=thinking_budget
+            ),
+        )
+
+    def invalidate(
+        self, prompt: str, thinking_budget: int = 1000, response_schema: dict = None
+    ):
+        """Forget the cached response for this prompt"""
+        self.cache.invalidate(self.cache_key(prompt, thinking_budget, response_schema))
+
+    async def aclose(self):
+        await self.provider.aclose()
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Process-wide ResponseCache built from config, or None when disabled
+
+    Controlled by TEXT_CACHE_ENABLED / TEXT_CACHE_PATH / TEXT_CACHE_TTL /
+    TEXT_CACHE_MAX_MB.
+    """
+    global _response_cache
+    from banana_slides.config import get_config
+
+    config = get_config()
+    if not config.TEXT_CACHE_ENABLED:
+        return None
+
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    db_path=config.TEXT_CACHE_PATH,
+                    ttl_seconds=config.TEXT_CACHE_TTL,
+                    max_bytes=int(config.TEXT_CACHE_MAX_MB * 1024 * 1024),
+                )
+                logger.info(f"Text response cache enabled at {config.TEXT_CACHE_PATH}")
+    return _response_cache
@@ -3,13 +3,24 @@ OpenAI SDK implementation for text generation
 """
 
 import logging
-from openai import OpenAI
-from .base import TextProvider
+from typing import Iterator
+from openai import OpenAI, AsyncOpenAI
+from .base import TextProvider, AsyncTextProvider
+from ...rate_limiter import get_rate_limiter
+from ..prompt_cache import build_user_messages, record_prompt_usage
 from banana_slides.config import get_config
 
 logger = logging.getLogger(__name__)
 
 
+def _json_schema_format(response_schema: dict) -> dict:
+    """Build the response_format payload for structured output"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "response", "schema": response_schema},
+    }
+
+
 class OpenAITextProvider(TextProvider):
     """Text generation using OpenAI SDK (compatible with Gemini via proxy)"""
 
@@ -43,7 +54,117 @@ class OpenAITextProvider(TextProvider):
         Returns:
             Generated text
         """
-        response = self.client.chat.completions.create(
-            model=self.model, messages=[{"role": "user", "content": prompt}]
+        with get_rate_limiter("openai_text").slot():
+            response = self.client.chat.completions.create(
+                model=self.model, messages=build_user_messages(prompt)
+            )
+        record_prompt_usage(self.model, response)
+        return response.choices[0].message.content
+
+    def stream_text(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """
+        Stream generated text chunk by chunk (chat completions stream)
+
+        Args:
+            prompt: The input prompt
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+
+        Yields:
+            Text deltas as they arrive
+        """
+        with get_rate_limiter("openai_text").slot():
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=build_user_messages(prompt),
+                stream=True,
+            )
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                stream.close()
+
+    def generate_structured(
+        self, prompt: str, response_schema: dict, thinking_budget: int = 1000
+    ) -> str:
+        """
+        Generate JSON constrained by a JSON schema (response_format=json_schema)
+
+        Args:
+            prompt: The input prompt
+            response_schema: JSON schema with an object root
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+
+        Returns:
+            JSON text matching the schema
+
+        Raises:
+            openai.BadRequestError: The endpoint does not support structured output
+        """
+        with get_rate_limiter("openai_text").slot():
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=build_user_messages(prompt),
+                response_format=_json_schema_format(response_schema),
+            )
+        record_prompt_usage(self.model, response)
+        return response.choices[0].message.content
+
+
+class AsyncOpenAITextProvider(AsyncTextProvider):
+    """Text generation using the AsyncOpenAI client (one event loop, many in-flight calls)"""
+
+    def __init__(
+        self, api_key: str, api_base: str = None, model: str = "gemini-3-flash-preview"
+    ):
+        """
+        Initialize async OpenAI text provider
+
+        Args:
+            api_key: API key
+            api_base: API base URL (e.g., https://aihubmix.com/v1)
+            model: Model name to use
+        """
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=api_base,
+            timeout=get_config().OPENAI_TIMEOUT,
+            max_retries=get_config().OPENAI_MAX_RETRIES,
         )
+        self.model = model
+
+    async def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text using AsyncOpenAI
+
+        Args:
+            prompt: The input prompt
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+
+        Returns:
+            Generated text
+        """
+        async with get_rate_limiter("openai_text").async_slot():
+            response = await self.client.chat.completions.create(
+                model=self.model, messages=build_user_messages(prompt)
+            )
+        record_prompt_usage(self.model, response)
         return response.choices[0].message.content
+
+    async def generate_structured(
+        self, prompt: str, response_schema: dict, thinking_budget: int = 1000
+    ) -> str:
+        """Async counterpart of OpenAITextProvider.generate_structured"""
+        async with get_rate_limiter("openai_text").async_slot():
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=build_user_messages(prompt),
+                response_format=_json_schema_format(response_schema),
+            )
+        record_prompt_usage(self.model, response)
+        return response.choices[0].message.content
+
+    async def aclose(self):
+        """Close the underlying HTTP connection pool"""
+        await self.client.close()
@@ -177,9 +177,28 @@ def get_provider_cache_info() -> dict:
     Returns:
         Dictionary with cache statistics
     """
+    from ..core.generator import get_json_generation_stats
+    from .ai_providers import (
+        get_encoded_image_cache,
+        get_prompt_usage_stats,
+        get_response_cache,
+    )
+    from .hedging import get_hedging_stats
+    from .rate_limiter import get_rate_limiter_stats
+    from .reference_images import get_reference_image_loader
+
+    response_cache = get_response_cache()
+
     with _cache_lock:
         return {
             "text_providers": list(_text_provider_cache.keys()),
             "image_providers": list(_image_provider_cache.keys()),
             "total_cached": len(_text_provider_cache) + len(_image_provider_cache),
+            "text_response_cache": response_cache.stats() if response_cache else None,
+            "rate_limiters": get_rate_limiter_stats(),
+            "image_encode_cache": get_encoded_image_cache().stats(),
+            "json_generation": get_json_generation_stats(),
+            "prompt_usage": get_prompt_usage_stats(),
+            "hedging": get_hedging_stats(),
+            "reference_images": get_reference_image_loader().stats(),
         }
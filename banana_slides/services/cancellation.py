@@ -0,0 +1,189 @@
+"""
+Cooperative cancellation and deadlines for background tasks
+
+A running task cannot be killed from outside its thread, so cancellation is
+cooperative: every task run gets a CancellationToken, long operations take it
+as ``cancel_token`` and call ``raise_if_cancelled()`` between steps, and a
+cancelled (or timed out) run ends with TaskCancelled instead of finishing its
+remaining pages.
+
+- ``TaskManager.cancel_task(task_id)`` cancels the token of a running task
+  (and drops it from the queue if it has not started yet)
+- a deadline cancels the token by itself once it expires
+- ``remaining()`` / ``timeout()`` bound blocking HTTP calls by the deadline;
+  a blocking call already in flight cannot be interrupted, but asyncio code
+  can register ``on_cancel`` to cancel its tasks, which aborts the request
+
+Usage:
+    with task_cancellation(task_id, deadline=600) as token:
+        run_task(task_id)
+
+    # inside the task (any thread)
+    token = get_task_token(task_id)
+    token.raise_if_cancelled()
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CANCELLED = "cancelled"
+DEADLINE_EXCEEDED = "deadline exceeded"
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task whose token was cancelled or whose deadline passed"""
+
+    def __init__(self, reason: str = CANCELLED):
+        super().__init__(f"Task {reason}")
+        self.reason = reason
+
+
+class CancellationToken:
+    """Cancellation flag shared by all threads of one task run, with an optional deadline"""
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        Args:
+            deadline: Seconds from now after which the token cancels itself (None = no deadline)
+        """
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._reason: Optional[str] = None
+        self._callbacks: List[Callable[[str], None]] = []
+        self._deadline_at = time.monotonic() + deadline if deadline else None
+        self._timer: Optional[threading.Timer] = None
+        if deadline:
+            # Fires the on_cancel callbacks even if nobody polls the token
+            self._timer = threading.Timer(deadline, self.cancel, args=(DEADLINE_EXCEEDED,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._deadline_at is not None and time.monotonic() >= self._deadline_at:
+            self.cancel(DEADLINE_EXCEEDED)
+            return True
+        return False
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason
+
+    def cancel(self, reason: str = CANCELLED) -> bool:
+        """Cancel the token; returns False if it was already cancelled"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        if self._timer is not None:
+            self._timer.cancel()
+        for callback in callbacks:
+            try:
+                callback(reason)
+            except Exception as e:
+                logger.warning(f"Cancellation callback failed: {e}")
+        return True
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise TaskCancelled(self._reason or CANCELLED)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (0 once passed), None without a deadline"""
+        if self._deadline_at is None:
+            return None
+        return max(0.0, self._deadline_at - time.monotonic())
+
+    def timeout(self, default: Optional[float]) -> Optional[float]:
+        """A request timeout that does not outlast the deadline"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if default is None:
+            return remaining
+        return min(default, remaining)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled (True) or timeout seconds passed (False)"""
+        remaining = self.remaining()
+        if remaining is not None and (timeout is None or remaining < timeout):
+            if not self._event.wait(remaining):
+                self.cancel(DEADLINE_EXCEEDED)
+            return True
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback: Callable[[str], None]):
+        """Call callback(reason) once the token is cancelled (at once if it already is)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self._reason)
+
+    def close(self):
+        """Stop the deadline timer of a finished run"""
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+_tokens: Dict[str, CancellationToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def register_task_token(task_id: str, deadline: Optional[float] = None) -> CancellationToken:
+    """Create the token of a task run starting in this process"""
+    token = CancellationToken(deadline)
+    with _tokens_lock:
+        _tokens[task_id] = token
+    return token
+
+
+def release_task_token(task_id: str, token: Optional[CancellationToken] = None):
+    """Forget the token of a finished run (only if it is still token)"""
+    with _tokens_lock:
+        current = _tokens.get(task_id)
+        if current is not None and (token is None or current is token):
+            del _tokens[task_id]
+    if token is not None:
+        token.close()
+
+
+def get_task_token(task_id: str) -> CancellationToken:
+    """The token of a task running in this process (a fresh, never-cancelled one otherwise)"""
+    with _tokens_lock:
+        token = _tokens.get(task_id)
+    return token if token is not None else CancellationToken()
+
+
+def cancel_task_token(task_id: str, reason: str = CANCELLED) -> bool:
+    """Cancel a task running in this process; False if it is not running here"""
+    with _tokens_lock:
+        token = _tokens.get(task_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+
+def running_task_ids() -> List[str]:
+    with _tokens_lock:
+        return list(_tokens)
+
+
+@contextmanager
+def task_cancellation(task_id: str, deadline: Optional[float] = None) -> Iterator[CancellationToken]:
+    """Register a token for the duration of one task run"""
+    token = register_task_token(task_id, deadline)
+    try:
+        yield token
+    finally:
+        release_task_token(task_id, token)
@@ -13,6 +13,7 @@ from typing import Optional, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 from markitdown import MarkItDown
+from .rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -288,13 +289,14 @@ class FileParserService:
         }
         
         try:
-            response = requests.post(
-                self.get_upload_url_api,
-                headers=headers,
-                json=upload_data,
-                timeout=30
-            )
-            response.raise_for_status()
+            with get_rate_limiter("mineru").slot():
+                response = requests.post(
+                    self.get_upload_url_api,
+                    headers=headers,
+                    json=upload_data,
+                    timeout=30
+                )
+                response.raise_for_status()
             result = response.json()
             
             if result.get("code") != 0:
@@ -314,7 +316,7 @@ class FileParserService:
     def _upload_file(self, file_path: str, upload_url: str) -> Optional[str]:
         """Upload file to MinerU"""
         try:
-            with open(file_path, 'rb') as f:
+            with open(file_path, 'rb') as f, get_rate_limiter("mineru").slot():
                 response = requests.put(
                     upload_url,
                     data=f,
@@ -354,8 +356,9 @@ class FileParserService:
                 return None, None, error_msg
             
             try:
-                response = requests.get(result_url, headers=headers, timeout=30)
-                response.raise_for_status()
+                with get_rate_limiter("mineru").slot():
+                    response = requests.get(result_url, headers=headers, timeout=30)
+                    response.raise_for_status()
                 task_info = response.json()
                 
                 if task_info.get("code") != 0:
@@ -390,8 +393,9 @@ class FileParserService:
             Tuple of (markdown_content, extract_id, error_message)
         """
         try:
-            response = requests.get(zip_url, timeout=60)
-            response.raise_for_status()
+            with get_rate_limiter("mineru").slot():
+                response = requests.get(zip_url, timeout=60)
+                response.raise_for_status()
             
             # Generate unique directory name for this extraction
             import uuid
@@ -668,19 +672,20 @@ class FileParserService:
                 image.save(buffered, format="JPEG", quality=95)
                 base64_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
                 
-                response = client.chat.completions.create(
-                    model=self.image_caption_model,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}},
-                                {"type": "text", "text": prompt}
-                            ]
-                        }
-                    ],
-                    temperature=0.3
-                )
+                with get_rate_limiter("openai_text").slot():
+                    response = client.chat.completions.create(
+                        model=self.image_caption_model,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": [
+                                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}},
+                                    {"type": "text", "text": prompt}
+                                ]
+                            }
+                        ],
+                        temperature=0.3
+                    )
                 caption = response.choices[0].message.content.strip()
             else:
                 # Use Gemini SDK format (default)
@@ -690,13 +695,14 @@ class FileParserService:
                     logger.warning("Gemini client not initialized, skipping caption generation")
                     return ""
                 
-                result = client.models.generate_content(
-                    model=self.image_caption_model,
-                    contents=[image, prompt],
-                    config=types.GenerateContentConfig(
-                        temperature=0.3,  # Lower temperature for more consistent captions
+                with get_rate_limiter("gemini_text").slot():
+                    result = client.models.generate_content(
+                        model=self.image_caption_model,
+                        contents=[image, prompt],
+                        config=types.GenerateContentConfig(
+                            temperature=0.3,  # Lower temperature for more consistent captions
+                        )
                     )
-                )
                 caption = result.text.strip()
             
             return caption
@@ -0,0 +1,338 @@
+"""
+Speculative hedged requests for long-tail upstream calls
+
+Image generation usually takes ~20 s, but a few calls hang until the client
+timeout and hold up the whole deck. With hedging enabled, a call that is
+still running after the running p90 latency gets a duplicate request; the
+first valid result wins and the other one is discarded (a blocking HTTP call
+cannot be interrupted, so the loser finishes in the background and its
+result is dropped).
+
+Each deck gets a HedgeBudget so a slow upstream cannot double the request
+volume: at most ``ceil(pages * IMAGE_HEDGE_BUDGET_RATIO)`` duplicates.
+
+Latency is measured from the moment the request gets its rate limiter slot
+(see rate_limiter.watch_slots), not from submission: time spent queueing
+behind a throttled limiter neither counts towards the percentile nor fires a
+hedge, which would only add load to an overloaded provider.
+
+Usage:
+    budget = deck_hedge_budget(len(pages))  # None unless IMAGE_HEDGE_ENABLED
+    image = get_hedger("openai_image").call(
+        lambda: provider.generate_image(...), budget=budget
+    )
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from .rate_limiter import watch_slots
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values, q: float) -> Optional[float]:
+    """Nearest-rank percentile of an iterable, None if empty"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class HedgeBudget:
+    """Thread-safe cap on the number of hedges for one deck"""
+
+    def __init__(self, max_hedges: int):
+        self.max_hedges = max(0, max_hedges)
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_deck(cls, page_count: int, ratio: float = None) -> "HedgeBudget":
+        """Budget of ceil(page_count * ratio) hedges (IMAGE_HEDGE_BUDGET_RATIO by default)"""
+        if ratio is None:
+            from ..config import get_config
+
+            ratio = get_config().IMAGE_HEDGE_BUDGET_RATIO
+        return cls(math.ceil(max(0, page_count) * ratio))
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.used >= self.max_hedges:
+                return False
+            self.used += 1
+            return True
+
+
+def deck_hedge_budget(page_count: int) -> Optional[HedgeBudget]:
+    """Budget for one deck, or None when IMAGE_HEDGE_ENABLED is off"""
+    from ..config import get_config
+
+    if not get_config().IMAGE_HEDGE_ENABLED:
+        return None
+    return HedgeBudget.for_deck(page_count)
+
+
+class _UpstreamClock:
+    """Start of one upstream request: when it began running, or when its limiter slot was granted"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._queued = True  # Until a pool thread picks the call up
+
+    def slot_waiting(self):
+        with self._lock:
+            self._queued = True
+
+    def slot_acquired(self):
+        with self._lock:
+            self._queued = False
+            self._started = time.monotonic()
+
+    start = slot_acquired
+
+    def elapsed(self) -> Optional[float]:
+        """Seconds the request has been upstream, None while it waits for a slot"""
+        with self._lock:
+            return None if self._queued else time.monotonic() - self._started
+
+
+class Hedger:
+    """Runs calls with a duplicate request once they exceed the running latency percentile"""
+
+    # Re-check interval while the primary is still waiting for a limiter slot
+    QUEUED_POLL_SECONDS = 0.5
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 0.9,
+        window: int = 200,
+        min_samples: int = 10,
+        min_delay: float = 5.0,
+        max_workers: int = 32,
+    ):
+        """
+        Args:
+            name: Upstream name (for logs and metrics)
+            percentile: Latency percentile after which a hedge fires
+            window: Number of recent latencies the percentile is computed over
+            min_samples: Samples needed before hedging starts
+            min_delay: Never hedge earlier than this many seconds
+            max_workers: Threads running primaries and hedges
+        """
+        self.name = name
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"hedge-{name}"
+        )
+        self._lock = threading.Lock()
+        # Latency of every request that completed (primaries and hedges)
+        self._latencies = deque(maxlen=window)
+        # Latency the caller saw vs. what the primary alone would have taken
+        self._effective = deque(maxlen=window)
+        self._unhedged = deque(maxlen=window)
+        self._stats = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "rescued": 0,
+            "budget_exhausted": 0,
+            "saved_seconds": 0.0,
+        }
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which to hedge, or None while there are too few samples"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            return max(self.min_delay, _percentile(self._latencies, self.percentile))
+
+    def _run(self, fn: Callable[[], Any], clock: _UpstreamClock) -> Any:
+        """Run fn on a pool thread, recording its upstream latency"""
+        clock.start()
+        with watch_slots(clock):
+            try:
+                return fn()
+            finally:
+                latency = clock.elapsed()
+                if latency is not None:
+                    with self._lock:
+                        self._latencies.append(latency)
+
+    def _wait_for_hedge(self, primary, clock: _UpstreamClock, delay: float) -> bool:
+        """Wait until the primary has been upstream for delay seconds; False if it finished first"""
+        while True:
+            elapsed = clock.elapsed()
+            if elapsed is None:
+                timeout = min(delay, self.QUEUED_POLL_SECONDS)
+            elif elapsed >= delay:
+                return True
+            else:
+                timeout = delay - elapsed
+            if wait([primary], timeout=timeout).done:
+                return False
+
+    def _wait_primary(self, primary, started: float) -> Any:
+        """Unhedged path: the caller sees exactly the primary's latency"""
+        result = primary.result()
+        latency = time.monotonic() - started
+        self._record_outcome(latency, latency)
+        return result
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        budget: Optional[HedgeBudget] = None,
+        is_valid: Callable[[Any], bool] = lambda result: result is not None,
+    ) -> Any:
+        """
+        Run fn, hedging it once if it runs past the latency percentile
+
+        Args:
+            fn: Zero-argument callable making the upstream request
+            budget: Deck budget; None disables hedging for this call
+            is_valid: A result that fails this check does not win the race
+
+        Returns:
+            The first valid result (or the primary's result if no hedge ran)
+
+        Raises:
+            The last error if no request produced a valid result
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+
+        started = time.monotonic()
+        clock = _UpstreamClock()
+        primary = self._executor.submit(self._run, fn, clock)
+
+        delay = self.hedge_delay() if budget is not None else None
+        if delay is None or not self._wait_for_hedge(primary, clock, delay):
+            return self._wait_primary(primary, started)
+
+        if not budget.try_acquire():
+            with self._lock:
+                self._stats["budget_exhausted"] += 1
+            return self._wait_primary(primary, started)
+
+        hedge_started = time.monotonic()
+        hedge = self._executor.submit(self._run, fn, _UpstreamClock())
+        with self._lock:
+            self._stats["hedged"] += 1
+        logger.info(
+            f"Hedging {self.name} request after {hedge_started - started:.1f}s "
+            f"(budget {budget.used}/{budget.max_hedges})"
+        )
+
+        pending = {primary, hedge}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if not is_valid(result):
+                    continue
+
+                finished = time.monotonic()
+                for loser in pending:
+                    loser.cancel()  # Only effective if it has not started yet
+
+                if future is primary:
+                    self._record_outcome(finished - started, finished - started)
+                elif primary.done():
+                    # Primary already failed: the hedge rescued the call outright
+                    with self._lock:
+                        self._stats["hedge_wins"] += 1
+                        self._stats["rescued"] += 1
+                else:
+                    with self._lock:
+                        self._stats["hedge_wins"] += 1
+                    # Compare against the primary once it finally returns
+                    primary.add_done_callback(
+                        lambda _, finished=finished: self._record_outcome(
+                            time.monotonic() - started, finished - started
+                        )
+                    )
+                return result
+
+        if last_error is not None:
+            raise last_error
+        return result
+
+    def _record_outcome(self, unhedged: float, effective: float):
+        """
+        Record the latency the caller saw and what the primary alone would have taken
+        """
+        with self._lock:
+            self._unhedged.append(unhedged)
+            self._effective.append(effective)
+            self._stats["saved_seconds"] += max(0.0, unhedged - effective)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge rate, win rate and p99 latency with vs. without hedging"""
+        with self._lock:
+            stats = dict(self._stats)
+            p99_unhedged = _percentile(self._unhedged, 0.99)
+            p99_effective = _percentile(self._effective, 0.99)
+            p90 = _percentile(self._latencies, self.percentile)
+
+        calls = stats["calls"]
+        stats.update(
+            {
+                "name": self.name,
+                "hedge_rate": stats["hedged"] / calls if calls else 0.0,
+                "hedge_delay": p90,
+                "p99_unhedged": p99_unhedged,
+                "p99_effective": p99_effective,
+                "p99_saved": (p99_unhedged - p99_effective)
+                if p99_unhedged is not None and p99_effective is not None
+                else 0.0,
+            }
+        )
+        return stats
+
+
+_hedgers: Dict[str, Hedger] = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(name: str) -> Hedger:
+    """Process-wide Hedger for an upstream, configured from IMAGE_HEDGE_* settings"""
+    hedger = _hedgers.get(name)
+    if hedger is not None:
+        return hedger
+
+    with _hedgers_lock:
+        if name not in _hedgers:
+            from ..config import get_config
+
+            config = get_config()
+            _hedgers[name] = Hedger(
+                name,
+                percentile=config.IMAGE_HEDGE_PERCENTILE,
+                min_samples=config.IMAGE_HEDGE_MIN_SAMPLES,
+                min_delay=config.IMAGE_HEDGE_MIN_DELAY,
+            )
+        return _hedgers[name]
+
+
+def get_hedging_stats() -> Dict[str, dict]:
+    """Stats for every hedger created so far"""
+    with _hedgers_lock:
+        hedgers = list(_hedgers.values())
+    return {hedger.name: hedger.stats() for hedger in hedgers}
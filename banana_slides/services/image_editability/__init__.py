@@ -8,9 +8,11 @@
 
 组件：
 - 数据模型（BBox, EditableElement, EditableImage）
+- 图片句柄（ImageHandle，每张图片只解码一次，需要文件时才编码）
 - 元素提取器（ElementExtractor及其实现）
 - Inpaint提供者（InpaintProvider及其实现）
 - 工厂和配置（ServiceConfig）
+- 结果缓存（EditableResultCache 复用可编辑化结果，MinerUResultCache 复用 MinerU 解析结果）
 - 主服务类（ImageEditabilityService）
 
 Example:
@@ -39,6 +41,9 @@ Example:
 # 数据模型
 from .data_models import BBox, EditableElement, EditableImage
 
+# 图片句柄
+from .image_handle import ImageHandle
+
 # 坐标映射
 from .coordinate_mapper import CoordinateMapper
 
@@ -84,6 +89,10 @@ from .factories import (
     ServiceConfig
 )
 
+# 结果缓存
+from .result_cache import EditableResultCache, get_result_cache
+from .mineru_cache import MinerUResultCache, get_mineru_cache
+
 # 主服务
 from .service import ImageEditabilityService
 
@@ -92,6 +101,8 @@ __all__ = [
     'BBox',
     'EditableElement',
     'EditableImage',
+    # 图片句柄
+    'ImageHandle',
     # 坐标映射
     'CoordinateMapper',
     # 元素提取器
@@ -121,6 +132,11 @@ __all__ = [
     'InpaintProviderFactory',
     'TextAttributeExtractorFactory',
     'ServiceConfig',
+    # 结果缓存
+    'EditableResultCache',
+    'get_result_cache',
+    'MinerUResultCache',
+    'get_mineru_cache',
     # 主服务
     'ImageEditabilityService',
 ]
@@ -14,10 +14,13 @@ import logging
 import tempfile
 import uuid
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from typing import Dict, Any, List, Optional, Tuple, Type
 from pathlib import Path
 from PIL import Image
 
+from .mineru_cache import get_mineru_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -125,7 +128,9 @@ class MinerUElementExtractor(ElementExtractor):
             upload_folder: 上传文件夹路径
         """
         self._parser_service = parser_service
-        self._upload_folder = upload_folder
+        self._upload_folder = Path(upload_folder)
+        # 解析结果缓存（图片内容哈希 → mineru_files/<extract_id>），未启用时为 None
+        self._cache = get_mineru_cache(self._upload_folder / 'mineru_files')
     
     def supports_type(self, element_type: Optional[str]) -> bool:
         """MinerU支持所有通用类型（除了特殊的表格单元格）"""
@@ -142,23 +147,30 @@ class MinerUElementExtractor(ElementExtractor):
         
         支持的kwargs:
         - depth: int, 递归深度（用于日志）
+        - image_size: (width, height), 调用者已知的图片尺寸，不传则读取文件头
         """
         depth = kwargs.get('depth', 0)
         
         # 获取图片尺寸
-        img = Image.open(image_path)
-        image_size = img.size  # (width, height)
-        
-        # 1. 检查缓存
-        cached_dir = self._find_cache(image_path)
-        if cached_dir:
-            logger.info(f"{'  ' * depth}使用MinerU缓存")
-            mineru_result_dir = cached_dir
-        else:
-            # 2. 解析图片
-            mineru_result_dir = self._parse_image(image_path, depth)
-            if not mineru_result_dir:
-                return ExtractionResult(elements=[])
+        image_size = kwargs.get('image_size')
+        if not image_size:
+            with Image.open(image_path) as img:
+                image_size = img.size  # (width, height)
+        
+        # 1. 检查缓存（同一进程内相同图片只解析一次，其他线程等待后命中缓存）
+        cache_key = self._cache_key(image_path)
+        with self._cache.locked(cache_key) if cache_key else nullcontext():
+            cached_dir = self._find_cache(cache_key)
+            if cached_dir:
+                logger.info(f"{'  ' * depth}使用MinerU缓存")
+                mineru_result_dir = cached_dir
+            else:
+                # 2. 解析图片
+                mineru_result_dir = self._parse_image(image_path, depth)
+                if not mineru_result_dir:
+                    return ExtractionResult(elements=[])
+                if cache_key:
+                    mineru_result_dir = self._cache.store(cache_key, mineru_result_dir)
         
         # 3. 提取元素
         elements = self._extract_from_result(
@@ -175,23 +187,22 @@ class MinerUElementExtractor(ElementExtractor):
         
         return ExtractionResult(elements=elements, context=context)
     
-    def _find_cache(self, image_path: str) -> Optional[str]:
-        """查找缓存的MinerU结果"""
+    def _cache_key(self, image_path: str) -> Optional[str]:
+        """图片内容哈希（未启用缓存或读取失败时为 None）"""
+        if self._cache is None:
+            return None
         try:
-            import hashlib
-            import time
-            
-            img_path = Path(image_path)
-            if not img_path.exists():
-                return None
-            
-            mineru_files_dir = self._upload_folder / 'mineru_files'
-            if not mineru_files_dir.exists():
-                return None
-            
-            # 简单策略：不使用缓存（更安全）
+            return self._cache.make_key(image_path)
+        except OSError as e:
+            logger.debug(f"计算缓存键失败: {e}")
             return None
-            
+    
+    def _find_cache(self, cache_key: Optional[str]) -> Optional[str]:
+        """查找缓存的MinerU结果（已校验 layout.json / content_list.json 存在）"""
+        if not cache_key:
+            return None
+        try:
+            return self._cache.lookup(cache_key)
         except Exception as e:
             logger.debug(f"查找缓存失败: {e}")
             return None
@@ -484,8 +495,10 @@ class BaiduOCRElementExtractor(ElementExtractor):
             # OCR结果通常会包含image_size，如果没有则自己获取
             table_img_size = ocr_result.get('image_size')
             if not table_img_size:
-                img = Image.open(image_path)
-                table_img_size = img.size
+                table_img_size = kwargs.get('image_size')
+            if not table_img_size:
+                with Image.open(image_path) as img:
+                    table_img_size = img.size
             
             logger.info(f"{'  ' * depth}百度OCR识别到 {len(table_cells)} 个单元格")
             
@@ -14,6 +14,7 @@ from .extractors import (
     ExtractorRegistry,
 )
 from .hybrid_extractor import HybridElementExtractor, create_hybrid_extractor
+from .result_cache import EditableResultCache, get_result_cache
 from .inpaint_providers import (
     InpaintProvider,
     DefaultInpaintProvider,
@@ -441,6 +442,9 @@ class ServiceConfig:
         max_depth: int = 1,
         min_image_size: int = 200,
         min_image_area: int = 40000,
+        extractor_method: Optional[str] = None,
+        inpaint_method: Optional[str] = None,
+        result_cache: Optional[EditableResultCache] = None,
     ):
         """
         初始化服务配置
@@ -452,6 +456,9 @@ class ServiceConfig:
             max_depth: 最大递归深度（默认1）
             min_image_size: 最小图片尺寸
             min_image_area: 最小图片面积
+            extractor_method: 实际使用的提取方法（用作结果缓存键的一部分）
+            inpaint_method: 实际使用的重绘方法（用作结果缓存键的一部分）
+            result_cache: 可编辑化结果缓存（None 表示不缓存）
         """
         self.upload_folder = upload_folder
         self.extractor_registry = extractor_registry
@@ -459,6 +466,9 @@ class ServiceConfig:
         self.max_depth = max_depth
         self.min_image_size = min_image_size
         self.min_image_area = min_image_area
+        self.extractor_method = extractor_method
+        self.inpaint_method = inpaint_method
+        self.result_cache = result_cache
 
     @classmethod
     def from_defaults(
@@ -514,6 +524,7 @@ class ServiceConfig:
                 - contain_threshold: 混合提取器包含判断阈值（默认0.8）
                 - intersection_threshold: 混合提取器交集判断阈值（默认0.3）
                 - enhance_quality: 混合Inpaint是否启用画质提升（默认True）
+                - use_result_cache: 是否按图片内容缓存可编辑化结果（默认取 EDITABLE_CACHE_ENABLED）
 
         Returns:
             ServiceConfig实例
@@ -527,10 +538,14 @@ class ServiceConfig:
             logger.info(
                 f"extractor_method={extractor_method} -> use_hybrid_extractor={use_hybrid_extractor}"
             )
+        use_result_cache = kwargs.get("use_result_cache")
+
         # 自动从 Flask config 获取配置
         from flask import current_app, has_app_context
 
         if has_app_context() and current_app:
+            if use_result_cache is None:
+                use_result_cache = current_app.config.get("EDITABLE_CACHE_ENABLED", True)
             if mineru_token is None:
                 mineru_token = current_app.config.get("MINERU_TOKEN")
             if mineru_api_base is None:
@@ -581,16 +596,19 @@ class ServiceConfig:
 
             if hybrid_extractor:
                 extractor_registry.register_default(hybrid_extractor)
+                effective_extractor_method = "hybrid"
                 logger.info("✅ 混合提取器已创建（MinerU + 百度高精度OCR）")
             else:
                 # 回退到MinerU
                 mineru_extractor = MinerUElementExtractor(parser_service, upload_path)
                 extractor_registry.register_default(mineru_extractor)
+                effective_extractor_method = "mineru"
                 logger.warning("⚠️ 混合提取器创建失败，回退到MinerU提取器")
         else:
             # 使用纯MinerU提取器
             mineru_extractor = MinerUElementExtractor(parser_service, upload_path)
             extractor_registry.register_default(mineru_extractor)
+            effective_extractor_method = "mineru"
             logger.info("✅ MinerU提取器已创建（通用分割）")
 
         # 创建Inpaint提供者
@@ -649,6 +667,11 @@ class ServiceConfig:
             inpaint_registry.register_default(generative_provider)
             logger.info("✅ 重绘注册表已创建（GenerativeEdit通用）")
 
+        # 可编辑化结果缓存（按图片内容哈希复用，未修改的页面重新导出时不再重新分析）
+        result_cache = None
+        if use_result_cache is None or use_result_cache:
+            result_cache = get_result_cache(upload_path / "editable_images" / "cache")
+
         return cls(
             upload_folder=upload_path,
             extractor_registry=extractor_registry,
@@ -656,6 +679,9 @@ class ServiceConfig:
             max_depth=kwargs.get("max_depth", 1),
             min_image_size=kwargs.get("min_image_size", 200),
             min_image_area=kwargs.get("min_image_area", 40000),
+            extractor_method=effective_extractor_method,
+            inpaint_method=effective_inpaint_method,
+            result_cache=result_cache,
         )
 
 
@@ -10,7 +10,6 @@
 """
 import logging
 from typing import Dict, Any, List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 
 from .extractors import (
@@ -20,6 +19,7 @@ from .extractors import (
     MinerUElementExtractor,
     BaiduAccurateOCRElementExtractor
 )
+from ..worker_pool import get_worker_pool
 
 logger = logging.getLogger(__name__)
 
@@ -233,21 +233,22 @@ class HybridElementExtractor(ElementExtractor):
         def run_baidu_ocr():
             return self._baidu_ocr_extractor.extract(image_path, element_type, **kwargs)
         
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_mineru = executor.submit(run_mineru)
-            future_baidu = executor.submit(run_baidu_ocr)
-            
-            # 等待两个任务完成
-            for future in as_completed([future_mineru, future_baidu]):
-                try:
-                    if future == future_mineru:
-                        mineru_result = future.result()
-                        logger.info(f"{indent}  ✅ MinerU识别到 {len(mineru_result.elements)} 个元素")
-                    else:
-                        baidu_result = future.result()
-                        logger.info(f"{indent}  ✅ 百度OCR识别到 {len(baidu_result.elements)} 个元素")
-                except Exception as e:
-                    logger.error(f"{indent}  ❌ 提取失败: {e}")
+        # 提交到共享线程池；在池内线程中等待时会直接执行尚未开始的那一个
+        pool = get_worker_pool()
+        future_mineru = pool.submit(run_mineru)
+        future_baidu = pool.submit(run_baidu_ocr)
+        
+        # 等待两个任务完成
+        for future in pool.as_completed([future_mineru, future_baidu]):
+            try:
+                if future == future_mineru:
+                    mineru_result = future.result()
+                    logger.info(f"{indent}  ✅ MinerU识别到 {len(mineru_result.elements)} 个元素")
+                else:
+                    baidu_result = future.result()
+                    logger.info(f"{indent}  ✅ 百度OCR识别到 {len(baidu_result.elements)} 个元素")
+            except Exception as e:
+                logger.error(f"{indent}  ❌ 提取失败: {e}")
         
         # 确保两个结果都存在
         if mineru_result is None:
@@ -0,0 +1,156 @@
+"""
+图片句柄 - 可编辑化流程中每张图片只解码一次，需要文件时才编码
+
+ImageHandle 包装一张页面图片或它的一个裁剪区域，在各处理步骤之间传递：
+- 文件来源的图片在第一次访问像素时解码，提取、元素裁剪、重绘共用同一份像素
+- size 只读取文件头，不解码像素
+- crop() 返回裁剪视图（父句柄 + 区域），访问像素时才从父图裁剪
+- file_path() 只在需要文件的地方（MinerU 上传、OCR、生成式编辑等 HTTP 调用）编码；
+  文件来源的图片、已保存为元素裁剪图的区域直接返回已有路径，其余编码为临时 PNG（每个句柄只编码一次）
+- close() 删除该句柄及其裁剪视图创建的临时文件并释放像素；可作为上下文管理器使用
+
+Example:
+    >>> with ImageHandle.open("page.png") as page:
+    ...     width, height = page.size
+    ...     title = page.crop((0, 0, 400, 100))
+    ...     ocr(title.file_path())   # 编码为临时 PNG
+    ... # 退出时临时文件被删除
+"""
+import logging
+import os
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+class ImageHandle:
+    """解码一次、按需编码的图片句柄（线程安全）"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        image: Optional[Image.Image] = None,
+        parent: Optional['ImageHandle'] = None,
+        box: Optional[Tuple[int, int, int, int]] = None
+    ):
+        """
+        请使用 open() / from_image() / crop() 创建
+
+        Args:
+            path: 已有的图片文件（内容与该句柄的像素一致，不会被删除）
+            image: 已解码的图片
+            parent: 裁剪视图的父句柄
+            box: 裁剪视图在父图中的区域 (x0, y0, x1, y1)
+        """
+        self._path = path
+        self._image = image
+        self._parent = parent
+        self._box = box
+        self._size: Optional[Tuple[int, int]] = image.size if image is not None else None
+        self._temp_path: Optional[str] = None
+        self._children: List['ImageHandle'] = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def open(cls, path: str) -> 'ImageHandle':
+        """文件来源的图片（第一次访问像素时解码）"""
+        return cls(path=str(path))
+
+    @classmethod
+    def from_image(cls, image: Image.Image) -> 'ImageHandle':
+        """内存中的图片（需要文件时编码为临时 PNG）"""
+        return cls(image=image)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height)，不解码像素"""
+        if self._size is None:
+            if self._box is not None:
+                x0, y0, x1, y1 = self._box
+                self._size = (x1 - x0, y1 - y0)
+            else:
+                with Image.open(self._path) as img:
+                    self._size = img.size
+        return self._size
+
+    @property
+    def image(self) -> Image.Image:
+        """解码后的像素（只解码/裁剪一次，调用者不应原地修改）"""
+        with self._lock:
+            if self._image is None:
+                if self._parent is not None:
+                    self._image = self._parent.image.crop(self._box)
+                else:
+                    img = Image.open(self._path)
+                    img.load()  # 读取像素后文件即关闭
+                    self._image = img
+                self._size = self._image.size
+            return self._image
+
+    def crop(self, box, path: Optional[str] = None) -> 'ImageHandle':
+        """
+        裁剪视图（区域会被限制在图片范围内）
+
+        Args:
+            box: (x0, y0, x1, y1)，可为浮点数
+            path: 已保存了该区域像素的文件（如元素裁剪图），需要文件时直接使用
+        """
+        width, height = self.size
+        clamped = (
+            max(0, int(box[0])),
+            max(0, int(box[1])),
+            min(width, int(box[2])),
+            min(height, int(box[3]))
+        )
+        if clamped[2] <= clamped[0] or clamped[3] <= clamped[1]:
+            raise ValueError(f"裁剪区域为空: {box}")
+        child = ImageHandle(path=path, parent=self, box=clamped)
+        with self._lock:
+            self._children.append(child)
+        return child
+
+    def file_path(self) -> str:
+        """该图片的文件路径，没有现成文件时编码为临时 PNG（close() 时删除）"""
+        if self._path is not None:
+            return self._path
+        with self._lock:
+            if self._temp_path is None:
+                fd, temp_path = tempfile.mkstemp(suffix='.png', prefix='editable_')
+                os.close(fd)
+                try:
+                    self.image.save(temp_path, format='PNG')
+                except Exception:
+                    os.remove(temp_path)
+                    raise
+                self._temp_path = temp_path
+            return self._temp_path
+
+    def release(self):
+        """释放解码后的像素（之后访问会重新解码），保留临时文件"""
+        with self._lock:
+            if self._path is not None or self._parent is not None:
+                self._image = None
+
+    def close(self):
+        """删除该句柄及其裁剪视图的临时文件并释放像素"""
+        with self._lock:
+            children, self._children = self._children, []
+            temp_path, self._temp_path = self._temp_path, None
+        for child in children:
+            child.close()
+        if temp_path is not None:
+            try:
+                os.remove(temp_path)
+            except OSError as e:
+                logger.debug(f"删除临时图片失败 {temp_path}: {e}")
+        self.release()
+
+    def __enter__(self) -> 'ImageHandle':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
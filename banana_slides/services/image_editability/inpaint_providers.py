@@ -9,14 +9,19 @@ Inpaint提供者 - 抽象不同的inpaint实现
 
 以及注册表：
 - InpaintProviderRegistry - 元素类型到重绘方法的映射注册表
+
+所有实现都接受 cancel_token 参数（services.cancellation.CancellationToken）：
+调用外部服务前检查，任务取消时抛出 TaskCancelled 而不是返回 None
 """
 import logging
-import tempfile
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict
 from PIL import Image
 
 from utils.mask_utils import create_mask_from_bboxes
+from .image_handle import ImageHandle
+from ..cancellation import TaskCancelled
 
 logger = logging.getLogger(__name__)
 
@@ -47,14 +52,38 @@ class InpaintProvider(ABC):
             image: 原始PIL图像对象
             bboxes: 边界框列表，每个bbox格式为 (x0, y0, x1, y1)
             types: 可选的元素类型列表，与bboxes一一对应（如 'text', 'image', 'table'等）
-            **kwargs: 其他由具体实现自定义的参数
+            **kwargs: 其他由具体实现自定义的参数（cancel_token 为任务取消令牌）
         
         Returns:
             处理后的PIL图像对象，失败返回None
+        
+        Raises:
+            TaskCancelled: 任务已取消或超过截止时间
         """
         pass
 
 
+@contextmanager
+def _image_file(image: Image.Image, image_handle: Optional[ImageHandle] = None) -> Iterator[str]:
+    """
+    图片的文件路径（AI服务需要文件路径）
+    
+    image 就是 image_handle 的像素时复用句柄已有的文件；否则编码为临时 PNG，退出时删除
+    """
+    if image_handle is not None and image_handle.image is image:
+        yield image_handle.file_path()
+        return
+    with ImageHandle.from_image(image) as handle:
+        yield handle.file_path()
+
+
+def _check_cancelled(kwargs: dict):
+    """调用外部服务前检查 kwargs 中的取消令牌"""
+    cancel_token = kwargs.get('cancel_token')
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
 class DefaultInpaintProvider(InpaintProvider):
     """
     基于InpaintingService的默认Inpaint提供者
@@ -95,6 +124,7 @@ class DefaultInpaintProvider(InpaintProvider):
         save_mask_path = kwargs.get('save_mask_path')
         full_page_image = kwargs.get('full_page_image')
         crop_box = kwargs.get('crop_box')
+        _check_cancelled(kwargs)
         
         try:
             result_img = self.inpainting_service.remove_regions_by_bboxes(
@@ -108,6 +138,8 @@ class DefaultInpaintProvider(InpaintProvider):
                 crop_box=crop_box
             )
             return result_img
+        except TaskCancelled:
+            raise
         except Exception as e:
             logger.error(f"DefaultInpaintProvider处理失败: {e}", exc_info=True)
             return None
@@ -160,9 +192,11 @@ class GenerativeEditInpaintProvider(InpaintProvider):
         支持的kwargs参数：
         - aspect_ratio: str, 宽高比，默认使用初始化时的值
         - resolution: str, 分辨率，默认使用初始化时的值
+        - image_handle: ImageHandle, image 所属的图片句柄，有现成文件时不再重新编码
         """
         aspect_ratio = kwargs.get('aspect_ratio', self.aspect_ratio)
         resolution = kwargs.get('resolution', self.resolution)
+        _check_cancelled(kwargs)
         
         try:
             from banana_slides.services.prompts import get_clean_background_prompt
@@ -170,22 +204,19 @@ class GenerativeEditInpaintProvider(InpaintProvider):
             # 获取清理背景的prompt
             edit_instruction = get_clean_background_prompt()
             
-            # 保存临时图片文件（AI服务需要文件路径）
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                image.save(tmp_path)
-            
             logger.info("GenerativeEditInpaintProvider: 开始生成式编辑重绘...")
             
-            # 调用AI服务编辑图片
-            clean_bg_image = self.ai_service.edit_image(
-                prompt=edit_instruction,
-                current_image_path=tmp_path,
-                aspect_ratio=aspect_ratio,
-                resolution=resolution,
-                original_description=None,
-                additional_ref_images=None
-            )
+            # 调用AI服务编辑图片（临时文件在调用结束后删除）
+            with _image_file(image, kwargs.get('image_handle')) as image_path:
+                clean_bg_image = self.ai_service.edit_image(
+                    prompt=edit_instruction,
+                    current_image_path=image_path,
+                    aspect_ratio=aspect_ratio,
+                    resolution=resolution,
+                    original_description=None,
+                    additional_ref_images=None,
+                    cancel_token=kwargs.get('cancel_token')
+                )
             
             if not clean_bg_image:
                 logger.error("GenerativeEditInpaintProvider: 生成式编辑返回空结果")
@@ -203,6 +234,8 @@ class GenerativeEditInpaintProvider(InpaintProvider):
             logger.info("GenerativeEditInpaintProvider: 重绘完成")
             return clean_bg_image
         
+        except TaskCancelled:
+            raise
         except Exception as e:
             logger.error(f"GenerativeEditInpaintProvider处理失败: {e}", exc_info=True)
             return None
@@ -245,6 +278,7 @@ class BaiduInpaintProvider(InpaintProvider):
         - expand_pixels: int, 扩展像素数，默认2
         """
         expand_pixels = kwargs.get('expand_pixels', 2)
+        _check_cancelled(kwargs)
         
         try:
             logger.info(f"BaiduInpaintProvider: 开始修复 {len(bboxes)} 个区域...")
@@ -265,6 +299,8 @@ class BaiduInpaintProvider(InpaintProvider):
             mask = create_mask_from_bboxes(image.size, bboxes, expand_pixels=0)
             return Image.composite(result_image, image, mask.convert('L'))
         
+        except TaskCancelled:
+            raise
         except Exception as e:
             logger.error(f"BaiduInpaintProvider处理失败: {e}", exc_info=True)
             return None
@@ -323,6 +359,7 @@ class HybridInpaintProvider(InpaintProvider):
         """
         expand_pixels = kwargs.get('expand_pixels', 2)
         enhance_quality = kwargs.get('enhance_quality', self._enhance_quality)
+        cancel_token = kwargs.get('cancel_token')
         
         try:
             # Step 1: 百度图像修复 - 精确去除文字
@@ -332,7 +369,8 @@ class HybridInpaintProvider(InpaintProvider):
                 image=image,
                 bboxes=bboxes,
                 types=types,
-                expand_pixels=expand_pixels
+                expand_pixels=expand_pixels,
+                cancel_token=cancel_token
             )
             
             if repaired_image is None:
@@ -350,7 +388,8 @@ class HybridInpaintProvider(InpaintProvider):
                     repaired_image,
                     inpainted_bboxes=bboxes,  # 传入被修复的区域
                     aspect_ratio=kwargs.get('aspect_ratio'),
-                    resolution=kwargs.get('resolution')
+                    resolution=kwargs.get('resolution'),
+                    cancel_token=cancel_token
                 )
                 
                 if enhanced_image:
@@ -363,6 +402,8 @@ class HybridInpaintProvider(InpaintProvider):
                 logger.info("HybridInpaintProvider: 跳过画质提升")
                 return repaired_image
         
+        except TaskCancelled:
+            raise
         except Exception as e:
             logger.error(f"HybridInpaintProvider处理失败: {e}", exc_info=True)
             return None
@@ -372,7 +413,8 @@ class HybridInpaintProvider(InpaintProvider):
         image: Image.Image,
         inpainted_bboxes: Optional[List[tuple]] = None,
         aspect_ratio: Optional[str] = None,
-        resolution: Optional[str] = None
+        resolution: Optional[str] = None,
+        cancel_token=None
     ) -> Optional[Image.Image]:
         """
         使用生成式模型提升图像画质
@@ -382,16 +424,12 @@ class HybridInpaintProvider(InpaintProvider):
             inpainted_bboxes: 被修复区域的bbox列表，格式为 [(x0, y0, x1, y1), ...]
             aspect_ratio: 宽高比（可选）
             resolution: 分辨率（可选）
+            cancel_token: 任务取消令牌（可选）
         
         Returns:
             提升画质后的图像
         """
         try:
-            # 保存临时图片
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                image.save(tmp_path)
-            
             # 将bboxes转换为百分比形式（相对于图片宽高）
             regions = None
             if inpainted_bboxes:
@@ -425,15 +463,17 @@ class HybridInpaintProvider(InpaintProvider):
             ar = aspect_ratio or self._generative_provider.aspect_ratio
             res = resolution or self._generative_provider.resolution
             
-            # 调用AI服务
-            enhanced_image = self._generative_provider.ai_service.edit_image(
-                prompt=enhance_prompt,
-                current_image_path=tmp_path,
-                aspect_ratio=ar,
-                resolution=res,
-                original_description=None,
-                additional_ref_images=None
-            )
+            # 调用AI服务（修复结果编码为临时文件，调用结束后删除）
+            with _image_file(image) as image_path:
+                enhanced_image = self._generative_provider.ai_service.edit_image(
+                    prompt=enhance_prompt,
+                    current_image_path=image_path,
+                    aspect_ratio=ar,
+                    resolution=res,
+                    original_description=None,
+                    additional_ref_images=None,
+                    cancel_token=cancel_token
+                )
             
             if not enhanced_image:
                 return None
@@ -448,6 +488,8 @@ class HybridInpaintProvider(InpaintProvider):
             
             return enhanced_image
         
+        except TaskCancelled:
+            raise
         except Exception as e:
             logger.error(f"画质提升失败: {e}", exc_info=True)
             return None
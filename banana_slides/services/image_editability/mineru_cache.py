@@ -0,0 +1,271 @@
+"""
+MinerU 解析结果缓存 - 相同图片不再重复上传 MinerU 解析
+
+索引：uploads/mineru_files/.image_index/<图片内容 sha256>.json，内容为
+{"extract_id", "size", "created_at"}，指向 uploads/mineru_files/<extract_id>/。
+- 每个索引文件先写临时文件再 os.replace，并发导出不会读到写了一半的索引
+- 命中前检查 layout.json 与 *_content_list.json 存在且非空，否则丢弃该条目
+- 两个进程同时解析同一张图片时，后写入者保留已有条目并删除自己的重复目录
+- 索引文件的 mtime 记录最近使用时间，用于按时间与总大小回收
+
+回收只删除索引中登记的目录：参考文件解析产生的 mineru_files 目录被 Markdown
+内容引用，不在索引中，永远不会被回收。
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = '.image_index'
+# 缓存格式版本：解析方式变化时递增，使旧条目失效
+CACHE_VERSION = 'v1'
+
+
+class MinerUResultCache:
+    """图片内容哈希 → MinerU 结果目录的索引，支持按时间/大小回收"""
+
+    def __init__(
+        self,
+        mineru_files_dir: Union[str, Path],
+        max_bytes: int = 2048 * 1024 * 1024,
+        max_age_seconds: float = 30 * 24 * 3600,
+        gc_interval_seconds: float = 600,
+    ):
+        """
+        Args:
+            mineru_files_dir: MinerU 结果根目录（uploads/mineru_files）
+            max_bytes: 登记目录的总大小上限，超出后按最近使用时间回收（<= 0 不限制）
+            max_age_seconds: 超过该时间未使用的条目被回收（<= 0 不限制）
+            gc_interval_seconds: 写入新条目后自动回收的最小间隔
+        """
+        self.mineru_files_dir = Path(mineru_files_dir)
+        self.index_dir = self.mineru_files_dir / INDEX_DIR
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.gc_interval_seconds = gc_interval_seconds
+
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, list] = {}  # key -> [锁, 使用者数]
+        self._last_gc = 0.0
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'invalid': 0, 'collected': 0}
+
+    @staticmethod
+    def make_key(image_path: str) -> str:
+        """图片内容哈希"""
+        digest = hashlib.sha256(CACHE_VERSION.encode('utf-8'))
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @contextmanager
+    def locked(self, key: str) -> Iterator[None]:
+        """同一进程内同一张图片只解析一次：其他线程等待后直接命中缓存"""
+        with self._lock:
+            holder = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if holder[1] == 0:
+                    del self._key_locks[key]
+
+    def lookup(self, key: str) -> Optional[str]:
+        """返回有效的结果目录，未命中或条目无效时返回 None"""
+        entry = self._read_entry(key)
+        if entry is None:
+            self._count('misses')
+            return None
+
+        result_dir = self.mineru_files_dir / entry['extract_id']
+        if not self.is_valid_result(result_dir):
+            logger.warning(f"MinerU缓存条目无效，已丢弃: {entry['extract_id']}")
+            self._remove_entry(key, entry)
+            self._count('invalid')
+            self._count('misses')
+            return None
+
+        try:
+            os.utime(self._index_path(key))  # 记录最近使用时间
+        except OSError:
+            pass
+        self._count('hits')
+        return str(result_dir)
+
+    def store(self, key: str, result_dir: Union[str, Path]) -> str:
+        """
+        登记新解析的结果目录，返回此后应使用的目录
+
+        若另一进程已登记了同一图片的有效结果，返回已有目录并删除 result_dir。
+        """
+        result_dir = Path(result_dir)
+        if not self.is_valid_result(result_dir):
+            # 不完整的结果不登记，调用者仍可使用（与未启用缓存时一致）
+            return str(result_dir)
+
+        existing = self.lookup(key)
+        if existing is not None and Path(existing).resolve() != result_dir.resolve():
+            shutil.rmtree(result_dir, ignore_errors=True)
+            return existing
+
+        entry = {
+            'extract_id': result_dir.name,
+            'size': self._dir_size(result_dir),
+            'created_at': time.time(),
+        }
+        self._write_entry(key, entry)
+        self._count('writes')
+
+        if time.time() - self._last_gc >= self.gc_interval_seconds:
+            self.gc()
+        return str(result_dir)
+
+    def gc(self) -> int:
+        """回收超龄条目，再按最近使用时间回收到总大小上限以内；返回回收的条目数"""
+        self._last_gc = time.time()
+        now = time.time()
+        entries = []  # (最近使用时间, key, entry)
+        for index_file in self.index_dir.glob('*.json'):
+            key = index_file.stem
+            try:
+                accessed_at = index_file.stat().st_mtime
+            except OSError:
+                continue
+            entry = self._read_entry(key)
+            if entry is None:
+                continue
+            if not (self.mineru_files_dir / entry['extract_id']).is_dir():
+                self._remove_entry(key, entry)
+                continue
+            entries.append((accessed_at, key, entry))
+
+        entries.sort(key=lambda item: item[0])
+        collected = 0
+        total = sum(entry.get('size', 0) for _, _, entry in entries)
+        for accessed_at, key, entry in entries:
+            expired = self.max_age_seconds > 0 and now - accessed_at > self.max_age_seconds
+            oversized = self.max_bytes > 0 and total > self.max_bytes
+            if not expired and not oversized:
+                continue
+            self._remove_entry(key, entry)
+            total -= entry.get('size', 0)
+            collected += 1
+
+        if collected:
+            logger.info(f"MinerU缓存回收 {collected} 个条目，剩余 {total / 1024 / 1024:.1f} MB")
+        self._count('collected', collected)
+        return collected
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    @staticmethod
+    def is_valid_result(result_dir: Union[str, Path]) -> bool:
+        """结果目录包含非空的 layout.json 与 *_content_list.json"""
+        result_dir = Path(result_dir)
+        try:
+            layout_file = result_dir / 'layout.json'
+            if not layout_file.is_file() or layout_file.stat().st_size == 0:
+                return False
+            return any(
+                path.stat().st_size > 0 for path in result_dir.glob('*_content_list.json')
+            )
+        except OSError:
+            return False
+
+    # ------------------------------------------------------------ 索引文件
+
+    def _index_path(self, key: str) -> Path:
+        return self.index_dir / f"{key}.json"
+
+    def _read_entry(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._index_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        extract_id = entry.get('extract_id') if isinstance(entry, dict) else None
+        # extract_id 只能是 mineru_files 下的一级目录名
+        if not extract_id or os.sep in extract_id or extract_id.startswith('.'):
+            return None
+        return entry
+
+    def _write_entry(self, key: str, entry: dict):
+        tmp_path = self.index_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._index_path(key))
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _remove_entry(self, key: str, entry: dict):
+        """先删除索引（其他进程立即看不到），再删除结果目录"""
+        index_path = self._index_path(key)
+        current = self._read_entry(key)
+        if current is not None and current.get('extract_id') != entry['extract_id']:
+            return  # 已被其他进程替换为新条目
+        try:
+            index_path.unlink()
+        except OSError:
+            pass
+        shutil.rmtree(self.mineru_files_dir / entry['extract_id'], ignore_errors=True)
+
+    @staticmethod
+    def _dir_size(path: Path) -> int:
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+
+_caches: Dict[str, MinerUResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_mineru_cache(mineru_files_dir: Union[str, Path]) -> Optional[MinerUResultCache]:
+    """按目录共享缓存实例；MINERU_CACHE_ENABLED 关闭时返回 None"""
+    from ...config import get_config
+
+    config = get_config()
+    if not config.MINERU_CACHE_ENABLED:
+        return None
+
+    cache_key = os.path.abspath(str(mineru_files_dir))
+    cache = _caches.get(cache_key)
+    if cache is not None:
+        return cache
+    with _caches_lock:
+        if cache_key not in _caches:
+            _caches[cache_key] = MinerUResultCache(
+                cache_key,
+                max_bytes=int(config.MINERU_CACHE_MAX_MB * 1024 * 1024),
+                max_age_seconds=config.MINERU_CACHE_MAX_AGE_DAYS * 24 * 3600,
+            )
+        return _caches[cache_key]
@@ -0,0 +1,347 @@
+"""
+可编辑化结果缓存 - 按图片内容复用 make_image_editable 的结果
+
+缓存键：sha256(图片字节) + 提取方法 + 重绘方法 + max_depth
+每个条目保存在 uploads/editable_images/cache/<key>/ 下：
+- result.json：EditableImage.to_dict()，文件路径改写为相对条目目录的路径
+- files/：元素裁剪图与 clean background（含各层子图）的副本（同一文件系统上为硬链接）
+
+引用计数：引用者为根图片的绝对路径，每个引用者指向一个条目。
+- 同一路径的图片内容变化后，引用转移到新条目，旧条目引用数归零即删除
+- 引用者文件已不存在（项目/页面被删除）的引用在写入新条目时清理
+
+重新导出 30 页、只改了 1 页的演示文稿时，其余 29 页直接命中缓存。
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .data_models import EditableImage
+
+logger = logging.getLogger(__name__)
+
+RESULT_FILE = 'result.json'
+FILES_DIR = 'files'
+
+
+class EditableResultCache:
+    """基于 SQLite 索引的可编辑化结果缓存（引用计数淘汰）"""
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        """
+        Args:
+            cache_dir: 缓存目录（条目目录与 index.db 都在其中）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / 'index.db'), timeout=30, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS refs (
+                owner TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_refs_key ON refs (key)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        image_path: str,
+        extractor_method: Optional[str],
+        inpaint_method: Optional[str],
+        max_depth: int
+    ) -> str:
+        """图片内容哈希 + 决定结果的配置"""
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        payload = json.dumps(
+            [digest.hexdigest(), extractor_method, inpaint_method, max_depth],
+            separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def owner_of(image_path: str) -> str:
+        return os.path.abspath(image_path)
+
+    def get(self, key: str, image_path: str) -> Optional[EditableImage]:
+        """
+        查找缓存结果，命中时登记 image_path 对该条目的引用
+
+        返回的 EditableImage 使用新的 image_id / element_id（与其他页面不冲突），
+        文件路径指向缓存条目中的副本，image_path 为本次传入的路径。
+        """
+        entry_dir = self.cache_dir / key
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+
+            try:
+                with open(entry_dir / RESULT_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                data = self._resolve_paths(data, entry_dir)
+            except (OSError, ValueError) as e:
+                # 条目文件损坏或被删除：丢弃条目，当作未命中
+                logger.warning(f"可编辑化缓存条目损坏 [{key[:12]}]，已丢弃: {e}")
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.execute("DELETE FROM refs WHERE key = ?", (key,))
+                self._conn.commit()
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                self._stats['misses'] += 1
+                return None
+
+            now = time.time()
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            evict_dirs = self._set_ref_locked(self.owner_of(image_path), key, now)
+            self._conn.commit()
+            self._stats['hits'] += 1
+
+        self._remove_dirs(evict_dirs)
+        data['image_path'] = image_path
+        return EditableImage.from_dict(self._reassign_ids(data))
+
+    def put(self, key: str, image_path: str, editable_image: EditableImage):
+        """保存结果（复制其引用的文件）并登记 image_path 对该条目的引用"""
+        entry_dir = self.cache_dir / key
+        if not entry_dir.exists():
+            # 先写到临时目录再改名，其他线程/进程看不到写了一半的条目
+            tmp_dir = self.cache_dir / f".tmp-{uuid.uuid4().hex}"
+            try:
+                (tmp_dir / FILES_DIR).mkdir(parents=True)
+                data, size = self._store_files(editable_image.to_dict(), tmp_dir)
+                with open(tmp_dir / RESULT_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # 同一内容已由其他线程写入（目录已存在）或写入失败
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                if not entry_dir.exists():
+                    raise
+                size = 0
+        else:
+            size = 0
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO entries (key, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, size, now, now),
+            )
+            evict_dirs = self._set_ref_locked(self.owner_of(image_path), key, now)
+            evict_dirs += self._prune_refs_locked()
+            self._conn.commit()
+            self._stats['writes'] += 1
+        self._remove_dirs(evict_dirs)
+
+    def release(self, image_path: str):
+        """删除 image_path 的引用（引用数归零的条目随之删除）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key FROM refs WHERE owner = ?", (self.owner_of(image_path),)
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM refs WHERE owner = ?", (self.owner_of(image_path),))
+            evict_dirs = self._evict_unreferenced_locked([row[0]])
+            self._conn.commit()
+        self._remove_dirs(evict_dirs)
+
+    def refcount(self, key: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM refs WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+    def stats(self) -> dict:
+        """命中/未命中计数与当前条目数、占用空间"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            refs = self._conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'refs': refs,
+            'bytes': total,
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0,
+        })
+        return stats
+
+    # ------------------------------------------------------------ 引用与淘汰
+
+    def _set_ref_locked(self, owner: str, key: str, now: float) -> list:
+        """owner 改为引用 key；返回因此无人引用而需删除的条目目录"""
+        row = self._conn.execute(
+            "SELECT key FROM refs WHERE owner = ?", (owner,)
+        ).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO refs (owner, key, updated_at) VALUES (?, ?, ?)",
+            (owner, key, now),
+        )
+        if row is not None and row[0] != key:
+            return self._evict_unreferenced_locked([row[0]])
+        return []
+
+    def _prune_refs_locked(self) -> list:
+        """清理引用者文件已不存在的引用"""
+        dead = [
+            (owner, key)
+            for owner, key in self._conn.execute("SELECT owner, key FROM refs").fetchall()
+            if not os.path.exists(owner)
+        ]
+        if not dead:
+            return []
+        self._conn.executemany(
+            "DELETE FROM refs WHERE owner = ?", [(owner,) for owner, _ in dead]
+        )
+        return self._evict_unreferenced_locked({key for _, key in dead})
+
+    def _evict_unreferenced_locked(self, keys) -> list:
+        evicted = []
+        for key in keys:
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM refs WHERE key = ?", (key,)
+            ).fetchone()[0]
+            if count == 0:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                evicted.append(self.cache_dir / key)
+        self._stats['evictions'] += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _remove_dirs(dirs):
+        for path in dirs:
+            shutil.rmtree(path, ignore_errors=True)
+
+    # ------------------------------------------------------------ 文件与路径
+
+    _PATH_FIELDS = ('image_path', 'inpainted_background_path')
+
+    def _store_files(self, data: Dict[str, Any], entry_dir: Path):
+        """把结果引用的文件放入条目目录，路径改写为相对路径；返回 (data, 字节数)"""
+        counter = [0, 0]  # 文件序号, 总字节数
+
+        def store(path: Optional[str]) -> Optional[str]:
+            if not path or not os.path.isfile(path):
+                return None
+            name = f"{counter[0]}{Path(path).suffix or '.png'}"
+            counter[0] += 1
+            target = entry_dir / FILES_DIR / name
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copy2(path, target)
+            counter[1] += target.stat().st_size
+            return f"{FILES_DIR}/{name}"
+
+        def store_element(elem: Dict[str, Any]):
+            for field_name in self._PATH_FIELDS:
+                elem[field_name] = store(elem.get(field_name))
+            for child in elem.get('children', []):
+                store_element(child)
+
+        data['clean_background'] = store(data.get('clean_background'))
+        for elem in data.get('elements', []):
+            store_element(elem)
+        # 根图片路径因调用者而异，命中时替换为本次的路径
+        data['image_path'] = None
+        return data, counter[1]
+
+    def _resolve_paths(self, data: Dict[str, Any], entry_dir: Path) -> Dict[str, Any]:
+        """相对路径改回绝对路径（引用的文件缺失时抛出 OSError）"""
+
+        def resolve(path: Optional[str]) -> Optional[str]:
+            if not path:
+                return None
+            full_path = entry_dir / path
+            if not full_path.is_file():
+                raise FileNotFoundError(str(full_path))
+            return str(full_path)
+
+        def resolve_element(elem: Dict[str, Any]):
+            for field_name in self._PATH_FIELDS:
+                elem[field_name] = resolve(elem.get(field_name))
+            for child in elem.get('children', []):
+                resolve_element(child)
+
+        data['clean_background'] = resolve(data.get('clean_background'))
+        for elem in data.get('elements', []):
+            resolve_element(elem)
+        return data
+
+    @staticmethod
+    def _reassign_ids(data: Dict[str, Any]) -> Dict[str, Any]:
+        """为缓存结果分配新的 image_id / element_id（格式 {image_id}_{序号}）"""
+        new_ids: Dict[str, str] = {}
+
+        def new_id(old_id: str) -> str:
+            if old_id not in new_ids:
+                new_ids[old_id] = str(uuid.uuid4())[:8]
+            return new_ids[old_id]
+
+        def reassign(elem: Dict[str, Any]):
+            prefix, sep, index = elem['element_id'].rpartition('_')
+            if sep:
+                elem['element_id'] = f"{new_id(prefix)}_{index}"
+            for child in elem.get('children', []):
+                reassign(child)
+
+        data['image_id'] = new_id(data['image_id'])
+        for elem in data.get('elements', []):
+            reassign(elem)
+        return data
+
+
+_caches: Dict[str, EditableResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(cache_dir: Union[str, Path]) -> EditableResultCache:
+    """按目录共享缓存实例（同一进程内复用 SQLite 连接）"""
+    cache_key = os.path.abspath(str(cache_dir))
+    cache = _caches.get(cache_key)
+    if cache is not None:
+        return cache
+    with _caches_lock:
+        if cache_key not in _caches:
+            _caches[cache_key] = EditableResultCache(cache_key)
+        return _caches[cache_key]
@@ -10,14 +10,16 @@
 import logging
 import uuid
 from typing import List, Optional, Tuple
-from PIL import Image
 
 from .data_models import BBox, EditableElement, EditableImage
 from .coordinate_mapper import CoordinateMapper
 from .extractors import ElementExtractor, ExtractionResult
 from .inpaint_providers import InpaintProvider
 from .factories import ServiceConfig
-from .helpers import collect_bboxes_from_elements, should_recurse_into_element, crop_element_from_image
+from .helpers import collect_bboxes_from_elements, should_recurse_into_element
+from .image_handle import ImageHandle
+from ..cancellation import CancellationToken, TaskCancelled
+from ..worker_pool import get_worker_pool
 
 logger = logging.getLogger(__name__)
 
@@ -59,13 +61,18 @@ class ImageEditabilityService:
         self._min_image_size = config.min_image_size
         self._min_image_area = config.min_image_area
         self._max_child_coverage_ratio = 0.85
+        # 结果缓存：键包含提取方法、重绘方法与 max_depth
+        self._result_cache = config.result_cache
+        self._extractor_method = config.extractor_method
+        self._inpaint_method = config.inpaint_method
         
         extractors = self._extractor_registry.get_all_extractors()
         inpaint_providers = self._inpaint_registry.get_all_providers()
         logger.info(
             f"ImageEditabilityService: {len(extractors)} extractors, "
             f"{len(inpaint_providers)} inpaint providers, "
-            f"max_depth={self._max_depth}"
+            f"max_depth={self._max_depth}, "
+            f"result_cache={'on' if self._result_cache else 'off'}"
         )
     
     def make_image_editable(
@@ -76,13 +83,21 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox] = None,
         root_image_size: Optional[Tuple[int, int]] = None,
         element_type: Optional[str] = None,
-        root_image_path: Optional[str] = None
+        root_image_path: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        image_handle: Optional[ImageHandle] = None,
+        root_image_handle: Optional[ImageHandle] = None
     ) -> EditableImage:
         """
         将图片转换为可编辑结构（递归）
         
         线程安全：此方法可以被多个线程并行调用
         
+        配置了结果缓存时，内容与配置都相同的根图片直接返回缓存的结果（不调用提取/重绘）
+        
+        每张页面图片只解码一次（ImageHandle），元素裁剪、重绘与子图递归共用同一份像素；
+        子图以裁剪视图传递，处理完即删除其临时文件
+        
         Args:
             image_path: 图片路径
             depth: 当前递归深度（内部使用）
@@ -91,6 +106,9 @@ class ImageEditabilityService:
             root_image_size: 根图片尺寸（内部使用）
             element_type: 元素类型，用于选择提取器（内部使用）
             root_image_path: 根图片路径（内部使用）
+            cancel_token: 任务取消令牌，每个处理步骤之前检查，也传给重绘方法
+            image_handle: image_path 对应的图片句柄（内部使用，调用者负责关闭）
+            root_image_handle: 根图片句柄（内部使用）
         
         Returns:
             EditableImage对象
@@ -98,14 +116,66 @@ class ImageEditabilityService:
         Raises:
             FileNotFoundError: 图片文件不存在
             ValueError: 图片格式不支持
+            TaskCancelled: 任务已取消或超过截止时间
         """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        
+        # 0. 根图片先查结果缓存（子图的结果包含在根图片的缓存条目中）
+        cache_key = None
+        if depth == 0 and self._result_cache is not None:
+            cached, cache_key = self._load_cached_result(image_path)
+            if cached is not None:
+                return cached
+        
+        # 根图片的句柄由本次调用创建并在结束时关闭（删除所有子图临时文件）
+        owns_handle = image_handle is None
+        if owns_handle:
+            image_handle = ImageHandle.open(image_path)
+        try:
+            editable_image = self._make_image_editable(
+                image_path=image_path,
+                image_handle=image_handle,
+                root_image_handle=root_image_handle or image_handle,
+                depth=depth,
+                parent_id=parent_id,
+                parent_bbox=parent_bbox,
+                root_image_size=root_image_size,
+                element_type=element_type,
+                root_image_path=root_image_path,
+                cancel_token=cancel_token
+            )
+        finally:
+            if owns_handle:
+                image_handle.close()
+        
+        if cache_key is not None:
+            try:
+                self._result_cache.put(cache_key, image_path, editable_image)
+            except Exception as e:
+                logger.warning(f"写入可编辑化结果缓存失败: {e}")
+        return editable_image
+    
+    def _make_image_editable(
+        self,
+        image_path: str,
+        image_handle: ImageHandle,
+        root_image_handle: ImageHandle,
+        depth: int,
+        parent_id: Optional[str],
+        parent_bbox: Optional[BBox],
+        root_image_size: Optional[Tuple[int, int]],
+        element_type: Optional[str],
+        root_image_path: Optional[str],
+        cancel_token: Optional[CancellationToken]
+    ) -> EditableImage:
+        """make_image_editable 的处理流程（图片句柄已就绪）"""
         image_id = str(uuid.uuid4())[:8]
         logger.info(f"{'  ' * depth}[{image_id}] 开始处理")
         
-        # 1. 加载图片
+        # 1. 读取图片尺寸（只读文件头，像素在第一次使用时解码）
         try:
-            img = Image.open(image_path)
-            width, height = img.size
+            width, height = image_handle.size
         except Exception as e:
             logger.error(f"无法加载图片 {image_path}: {e}")
             raise
@@ -120,7 +190,8 @@ class ImageEditabilityService:
         extraction_result = self._extract_elements(
             image_path=image_path,
             element_type=element_type,
-            depth=depth
+            depth=depth,
+            image_size=(width, height)
         )
         
         # 从context获取image_size（提取器自己获取）
@@ -132,23 +203,25 @@ class ImageEditabilityService:
             parent_bbox=parent_bbox,
             image_size=extracted_image_size,
             root_image_size=root_image_size,
-            source_image_path=image_path  # 传入源图片路径用于裁剪
+            source_image=image_handle  # 从已解码的图片裁剪元素
         )
         
         logger.info(f"{'  ' * depth}提取到 {len(elements)} 个元素")
         
         # 3. 生成clean background（根据元素类型选择重绘方法）
         clean_background = None
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
         if self._inpaint_registry and elements:
             clean_background = self._generate_clean_background(
-                image_path=image_path,
+                image_handle=image_handle,
+                root_image_handle=root_image_handle,
                 elements=elements,
                 image_id=image_id,
                 depth=depth,
                 parent_bbox=parent_bbox,
-                root_image_path=root_image_path,
-                image_size=(width, height),
-                element_type=element_type  # 传递元素类型以选择对应的重绘方法
+                element_type=element_type,  # 传递元素类型以选择对应的重绘方法
+                cancel_token=cancel_token
             )
         
         # 4. 递归处理子元素
@@ -156,12 +229,14 @@ class ImageEditabilityService:
         if depth + 1 < self._max_depth:
             self._process_children(
                 elements=elements,
-                current_image_path=image_path,
+                image_handle=image_handle,
+                root_image_handle=root_image_handle,
                 depth=depth,
                 image_id=image_id,
                 root_image_size=root_image_size,
                 current_image_size=(width, height),
-                root_image_path=root_image_path
+                root_image_path=root_image_path,
+                cancel_token=cancel_token
             )
         
         # 5. 构建结果
@@ -179,11 +254,30 @@ class ImageEditabilityService:
         logger.info(f"{'  ' * depth}[{image_id}] 处理完成")
         return editable_image
     
+    def _load_cached_result(self, image_path: str) -> Tuple[Optional[EditableImage], Optional[str]]:
+        """查询结果缓存，返回 (缓存结果或 None, 缓存键)；缓存出错时不影响正常处理"""
+        try:
+            cache_key = self._result_cache.make_key(
+                image_path, self._extractor_method, self._inpaint_method, self._max_depth
+            )
+        except OSError:
+            # 图片不存在等错误交给正常流程报告
+            return None, None
+        try:
+            cached = self._result_cache.get(cache_key, image_path)
+        except Exception as e:
+            logger.warning(f"读取可编辑化结果缓存失败: {e}")
+            return None, cache_key
+        if cached is not None:
+            logger.info(f"[{cached.image_id}] 命中可编辑化结果缓存: {image_path}")
+        return cached, cache_key
+    
     def _extract_elements(
         self,
         image_path: str,
         element_type: Optional[str],
-        depth: int
+        depth: int,
+        image_size: Optional[Tuple[int, int]] = None
     ) -> ExtractionResult:
         """提取元素（完全依赖提取器接口）"""
         logger.info(f"{'  ' * depth}提取元素...")
@@ -191,11 +285,12 @@ class ImageEditabilityService:
         # 选择提取器
         extractor = self._select_extractor(element_type)
         
-        # 调用提取器（提取器自己处理所有细节，包括获取image_size）
+        # 调用提取器（提取器自己处理所有细节；image_size 避免提取器再次打开图片）
         return extractor.extract(
             image_path=image_path,
             element_type=element_type,
-            depth=depth
+            depth=depth,
+            image_size=image_size
         )
     
     def _select_extractor(self, element_type: Optional[str]) -> ElementExtractor:
@@ -212,7 +307,7 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox],
         image_size: Tuple[int, int],
         root_image_size: Tuple[int, int],
-        source_image_path: Optional[str] = None
+        source_image: Optional[ImageHandle] = None
     ) -> List[EditableElement]:
         """
         将提取器返回的字典转换为EditableElement对象
@@ -225,11 +320,11 @@ class ImageEditabilityService:
         # 准备输出目录
         output_dir = None
         source_img = None
-        if source_image_path:
+        if source_image is not None and element_dicts:
             output_dir = self._upload_folder / 'editable_images' / image_id / 'elements'
             output_dir.mkdir(parents=True, exist_ok=True)
             try:
-                source_img = Image.open(source_image_path)
+                source_img = source_image.image
             except Exception as e:
                 logger.warning(f"无法加载源图片进行裁剪: {e}")
         
@@ -285,22 +380,18 @@ class ImageEditabilityService:
             
             elements.append(element)
         
-        # 关闭源图片
-        if source_img:
-            source_img.close()
-        
         return elements
     
     def _generate_clean_background(
         self,
-        image_path: str,
+        image_handle: ImageHandle,
+        root_image_handle: ImageHandle,
         elements: List[EditableElement],
         image_id: str,
         depth: int,
         parent_bbox: Optional[BBox],
-        root_image_path: str,
-        image_size: Tuple[int, int],
-        element_type: Optional[str] = None
+        element_type: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> Optional[str]:
         """
         生成clean background
@@ -319,7 +410,7 @@ class ImageEditabilityService:
         
         try:
             bboxes = collect_bboxes_from_elements(elements)
-            img = Image.open(image_path)
+            img = image_handle.image
             img_width, img_height = img.size
             element_types = [elem.element_type for elem in elements]
             
@@ -336,10 +427,10 @@ class ImageEditabilityService:
             else:
                 crop_box = None
             
-            # 加载完整页面图像
+            # 完整页面图像（与根图片共用已解码的像素）
             full_page_img = None
-            if root_image_path != image_path:
-                full_page_img = Image.open(root_image_path)
+            if root_image_handle is not image_handle:
+                full_page_img = root_image_handle.image
             
             # 过滤覆盖过大的bbox
             filtered_bboxes = []
@@ -369,7 +460,9 @@ class ImageEditabilityService:
                 expand_pixels=10,
                 save_mask_path=str(output_dir / 'mask.png'),
                 full_page_image=full_page_img,
-                crop_box=crop_box
+                crop_box=crop_box,
+                cancel_token=cancel_token,
+                image_handle=image_handle  # 需要文件的重绘方法复用已有文件而不是重新编码
             )
             
             if result_img is None:
@@ -380,6 +473,8 @@ class ImageEditabilityService:
             result_img.save(str(output_path))
             return str(output_path)
         
+        except TaskCancelled:
+            raise
         except Exception as e:
             logger.error(f"生成clean background失败: {e}", exc_info=True)
             return None
@@ -387,14 +482,22 @@ class ImageEditabilityService:
     def _process_children(
         self,
         elements: List[EditableElement],
-        current_image_path: str,
+        image_handle: ImageHandle,
+        root_image_handle: ImageHandle,
         depth: int,
         image_id: str,
         root_image_size: Tuple[int, int],
         current_image_size: Tuple[int, int],
-        root_image_path: str
+        root_image_path: str,
+        cancel_token: Optional[CancellationToken] = None
     ):
-        """递归处理子元素（通过裁剪原图获取子图，并行处理多个子元素）"""
+        """
+        递归处理子元素（从已解码的原图取裁剪视图作为子图，并行处理多个子元素）
+        
+        子图直接使用元素裁剪图文件（像素相同），没有时才编码临时文件；子元素处理完即关闭其句柄
+        
+        任务取消时丢弃尚未开始的子元素并抛出 TaskCancelled（进行中的子元素在下一个检查点自行结束）
+        """
         logger.info(f"{'  ' * depth}递归处理子元素...")
         
         # 筛选需要递归的元素
@@ -413,45 +516,47 @@ class ImageEditabilityService:
             return
         
         # 并行处理多个子元素
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
         def process_single_element(element):
             """处理单个子元素"""
+            child_handle = None
             try:
-                # 从当前图片裁剪出子区域
-                child_image_path = crop_element_from_image(
-                    source_image_path=current_image_path,
-                    bbox=element.bbox
-                )
+                # 从当前图片取子区域的裁剪视图
+                child_handle = image_handle.crop(element.bbox.to_tuple(), path=element.image_path)
                 
                 child_editable = self.make_image_editable(
-                    image_path=child_image_path,
+                    image_path=child_handle.file_path(),
                     depth=depth + 1,
                     parent_id=image_id,
                     parent_bbox=element.bbox_global,
                     root_image_size=root_image_size,
                     element_type=element.element_type,
-                    root_image_path=root_image_path
+                    root_image_path=root_image_path,
+                    cancel_token=cancel_token,
+                    image_handle=child_handle,
+                    root_image_handle=root_image_handle
                 )
                 
                 return element, child_editable, None
             
+            except TaskCancelled:
+                raise
             except Exception as e:
                 return element, None, e
+            finally:
+                if child_handle is not None:
+                    child_handle.close()
         
         logger.info(f"{'  ' * depth}  并行处理 {len(elements_to_process)} 个子元素...")
         
-        # 使用线程池并行处理
-        max_workers = min(8, len(elements_to_process))  # 限制并发数
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(process_single_element, elem): elem for elem in elements_to_process}
+        # 提交到共享线程池（不再每张图片新建线程池），每张图片最多 8 个子元素同时执行；
+        # 在池内线程中等待时会直接执行尚未开始的子元素，嵌套等待不会死锁
+        pool = get_worker_pool()
+        for _, future in pool.map_unordered(process_single_element, elements_to_process, limit=8):
+            element, child_editable, error = future.result()
             
-            for future in as_completed(futures):
-                element, child_editable, error = future.result()
-                
-                if error:
-                    logger.error(f"{'  ' * depth}  ✗ {element.element_id} 失败: {error}")
-                else:
-                    element.children = child_editable.elements
-                    element.inpainted_background_path = child_editable.clean_background
-                    logger.info(f"{'  ' * depth}  ✓ {element.element_id} 完成: {len(child_editable.elements)} 个子元素")
+            if error:
+                logger.error(f"{'  ' * depth}  ✗ {element.element_id} 失败: {error}")
+            else:
+                element.children = child_editable.elements
+                element.inpainted_background_path = child_editable.clean_background
+                logger.info(f"{'  ' * depth}  ✓ {element.element_id} 完成: {len(child_editable.elements)} 个子元素")
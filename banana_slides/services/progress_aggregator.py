@@ -0,0 +1,211 @@
+"""
+Coalesced task progress writes
+
+Deck tasks used to expire the session, re-query the page and the task and
+commit twice for every finished page. With several worker threads on SQLite
+that serialises on the database write lock. A ProgressAggregator buffers page
+results and the task's counters and writes them from one thread as bulk
+UPDATEs: every TASK_PROGRESS_FLUSH_SECONDS, as soon as
+TASK_PROGRESS_FLUSH_PAGES results are pending, and always when it is closed
+(the task finished or raised).
+
+    with ProgressAggregator.from_config(app, task_id, total=len(pages)) as progress:
+        ...
+        progress.record(page_id, ok=True, status="DESCRIPTION_GENERATED",
+                        description_content={"text": text})
+        progress.record(page_id, ok=False)  # page marked FAILED
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam
+
+from ..models import Page, Task, db
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressAggregator:
+    """Buffers per-page results of one task and flushes them in batches"""
+
+    # Attempts at the final flush before buffered results are given up
+    CLOSE_RETRIES = 3
+
+    def __init__(
+        self,
+        app,
+        task_id: str,
+        total: int,
+        flush_seconds: float = 0.5,
+        flush_pages: int = 10,
+        label: str = "Progress",
+    ):
+        """
+        Args:
+            app: Flask app providing the database context of the flush thread
+            task_id: Task whose progress is written
+            total: Pages in the task
+            flush_seconds: Longest time a result stays buffered
+            flush_pages: Flush early once this many results are pending
+            label: Prefix of the progress log line
+        """
+        self.app = app
+        self.task_id = task_id
+        self.total = total
+        self.flush_seconds = flush_seconds
+        self.flush_pages = max(1, flush_pages)
+        self.label = label
+
+        self.completed = 0
+        self.failed = 0
+        self.flushes = 0
+        self._pages: Dict[str, Dict] = {}  # page_id -> column values to write
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, app, task_id: str, total: int, label: str = "Progress") -> "ProgressAggregator":
+        from ..config import get_config
+
+        config = get_config()
+        return cls(
+            app,
+            task_id,
+            total,
+            flush_seconds=config.TASK_PROGRESS_FLUSH_SECONDS,
+            flush_pages=config.TASK_PROGRESS_FLUSH_PAGES,
+            label=label,
+        )
+
+    def __enter__(self) -> "ProgressAggregator":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"progress-{self.task_id[:8]}", daemon=True
+            )
+            self._thread.start()
+
+    def record(
+        self,
+        page_id: str,
+        ok: bool,
+        status: Optional[str] = None,
+        description_content: Optional[Dict] = None,
+    ):
+        """
+        Count one finished page
+
+        Args:
+            page_id: Page the result belongs to
+            ok: Counted as completed, otherwise as failed (and the page marked FAILED)
+            status: Page status to write for a completed page (None = leave as is)
+            description_content: Description to write with the status
+        """
+        values = {}
+        if not ok:
+            values["status"] = "FAILED"
+        elif status is not None:
+            values["status"] = status
+            if description_content is not None:
+                values["description_content"] = json.dumps(
+                    description_content, ensure_ascii=False
+                )
+
+        with self._lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            if values:
+                self._pages[page_id] = values
+            self._dirty = True
+            if len(self._pages) >= self.flush_pages:
+                self._wakeup.set()
+
+    def close(self):
+        """Write everything still buffered and stop the flush thread"""
+        self._closed.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        elif self._dirty:
+            with self.app.app_context():
+                self._flush()
+
+    def _run(self):
+        with self.app.app_context():
+            retries = self.CLOSE_RETRIES
+            while True:
+                self._wakeup.wait(self.flush_seconds)
+                self._wakeup.clear()
+                closed = self._closed.is_set()
+                if self._dirty:
+                    self._flush()
+                if closed:
+                    if not self._dirty:
+                        return
+                    retries -= 1
+                    if retries <= 0:
+                        logger.error(
+                            f"Giving up on progress of task {self.task_id} "
+                            f"({len(self._pages)} page updates not written)"
+                        )
+                        return
+
+    def _flush(self):
+        with self._lock:
+            pages, self._pages = self._pages, {}
+            completed, failed = self.completed, self.failed
+            self._dirty = False
+
+        now = datetime.utcnow()
+        # One executemany per set of columns
+        groups: Dict[tuple, list] = {}
+        for page_id, values in pages.items():
+            row = {f"_{name}": value for name, value in values.items()}
+            groups.setdefault(tuple(sorted(values)), []).append(
+                {"_page_id": page_id, "_updated_at": now, **row}
+            )
+
+        try:
+            for columns, rows in groups.items():
+                statement = (
+                    Page.__table__.update()
+                    .where(Page.__table__.c.id == bindparam("_page_id"))
+                    .values({name: bindparam(f"_{name}") for name in (*columns, "updated_at")})
+                )
+                db.session.execute(statement, rows)
+            db.session.execute(
+                Task.__table__.update()
+                .where(Task.__table__.c.id == self.task_id)
+                .values(
+                    progress=json.dumps(
+                        {"total": self.total, "completed": completed, "failed": failed}
+                    )
+                )
+            )
+            db.session.commit()
+            self.flushes += 1
+            logger.info(f"{self.label}: {completed}/{self.total} pages completed")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to write progress of task {self.task_id}: {e}", exc_info=True)
+            with self._lock:
+                # Keep newer results recorded meanwhile; retry on the next flush
+                for page_id, values in pages.items():
+                    self._pages.setdefault(page_id, values)
+                self._dirty = True
@@ -230,49 +230,24 @@ Now parse the outline text above into the structured format. Return only the JSO
     return final_prompt
 
 
-def get_page_description_prompt(
-    project_context: "ProjectContext",
-    outline: list,
-    page_outline: dict,
-    page_index: int,
-    part_info: str = "",
-    language: str = None,
-) -> str:
-    """
-    生成单个页面描述的 prompt
-
-    Args:
-        project_context: 项目上下文对象，包含所有原始信息
-        outline: 完整大纲
-        page_outline: 当前页面的大纲
-        page_index: 页面编号（从1开始）
-        part_info: 可选的章节信息
-
-    Returns:
-        格式化后的 prompt 字符串
-    """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
-    # 根据项目类型选择最相关的原始输入
+def _get_original_input(project_context: "ProjectContext") -> str:
+    """根据项目类型选择最相关的原始输入"""
     if project_context.creation_type == "idea" and project_context.idea_prompt:
-        original_input = project_context.idea_prompt
+        return project_context.idea_prompt
     elif project_context.creation_type == "outline" and project_context.outline_text:
-        original_input = f"用户提供的大纲：\n{project_context.outline_text}"
+        return f"用户提供的大纲：\n{project_context.outline_text}"
     elif (
         project_context.creation_type == "descriptions"
         and project_context.description_text
     ):
-        original_input = f"用户提供的描述：\n{project_context.description_text}"
+        return f"用户提供的描述：\n{project_context.description_text}"
     else:
-        original_input = project_context.idea_prompt or ""
+        return project_context.idea_prompt or ""
 
-    prompt = f"""\
-我们正在为PPT的每一页生成内容描述。
-用户的原始需求是：\n{original_input}\n
-我们已经有了完整的大纲：\n{outline}\n{part_info}
-现在请为第 {page_index} 页生成描述：
-{page_outline}
-{"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if page_index == 1 else ""}
 
+def _get_page_description_guidelines() -> str:
+    """页面描述的写作要求和输出格式示例（单页和批量 prompt 共用）"""
+    return """\
 【重要提示】生成的"页面文字"部分会直接渲染到PPT页面上，因此请务必注意：
 1. 文字内容要简洁精炼，每条要点控制在15-25字以内
 2. 条理清晰，使用列表形式组织内容
@@ -282,7 +257,6 @@ def get_page_description_prompt(
 
 输出格式示例：
 页面标题：原始社会：与自然共生
-{"副标题：人类祖先和自然的相处之道" if page_index == 1 else ""}
 
 页面文字：
 - 狩猎采集文明：人类活动规模小，对环境影响有限
@@ -293,15 +267,142 @@ def get_page_description_prompt(
 其他页面素材（如果文件中存在请积极添加，包括markdown图片链接、公式、表格等）
 
 【关于图片】如果参考文件中包含以 /files/ 开头的本地文件URL图片（例如 /files/mineru/xxx/image.png），请将这些图片以markdown格式输出，例如：![图片描述](/files/mineru/xxx/image.png)。这些图片会被包含在PPT页面中。
+"""
 
+
+# 第一页（封面）的额外要求，放在每页后缀中
+_FIRST_PAGE_DESCRIPTION_HINT = (
+    "**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等"
+    "（副标题输出到标题后，例如“副标题：人类祖先和自然的相处之道”）, 不添加任何素材。**"
+)
+
+
+class CacheablePrompt(str):
+    """
+    由可缓存前缀和每页后缀组成的 prompt
+
+    作为普通字符串使用时等于 prefix + suffix，可以直接传给任何 provider。
+    同一个项目内所有页面的 prefix 逐字节相同，上游的前缀缓存（prefix/KV cache）
+    可以命中。支持的 provider 会按 PROMPT_CACHE_MODE 把两部分拆成独立消息，
+    并可附带 cache_control 提示。
+
+    注意：拆分前缀改变了 prompt 的文字，并不与拆分前完全相同。描述 prompt 的
+    写作要求移到了当前页大纲之前，章节信息和首页提示移到了后缀，首页副标题示例
+    改为放在首页提示中；图片 prompt 的页面描述、章节和素材图片说明移到了设计指南
+    与额外要求之后。模型输出可能随之略有变化。
+    """
+
+    def __new__(cls, prefix: str, suffix: str):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix = prefix
+        prompt.suffix = suffix
+        return prompt
+
+    def __getnewargs__(self):
+        return (self.prefix, self.suffix)
+
+
+def get_page_description_prompt_prefix(
+    project_context: "ProjectContext", outline: list, language: str = None
+) -> str:
+    """
+    页面描述 prompt 的可缓存前缀：参考文件、原始需求、完整大纲和固定的写作要求
+
+    同一项目的所有页面（以及批量描述）共享该前缀
+    """
+    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    original_input = _get_original_input(project_context)
+
+    prefix = f"""\
+我们正在为PPT的页面生成内容描述。
+用户的原始需求是：\n{original_input}\n
+我们已经有了完整的大纲：\n{outline}\n
+每一页的描述都需要遵循以下要求：
+{_get_page_description_guidelines()}
 {get_language_instruction(language)}
 """
+    return files_xml + prefix
 
-    final_prompt = files_xml + prompt
+
+def get_page_description_prompt(
+    project_context: "ProjectContext",
+    outline: list,
+    page_outline: dict,
+    page_index: int,
+    part_info: str = "",
+    language: str = None,
+) -> CacheablePrompt:
+    """
+    生成单个页面描述的 prompt
+
+    Args:
+        project_context: 项目上下文对象，包含所有原始信息
+        outline: 完整大纲
+        page_outline: 当前页面的大纲
+        page_index: 页面编号（从1开始）
+        part_info: 可选的章节信息
+
+    Returns:
+        CacheablePrompt：前缀为 get_page_description_prompt_prefix，后缀为当前页信息
+    """
+    prefix = get_page_description_prompt_prefix(project_context, outline, language)
+    suffix = f"""\
+现在请为第 {page_index} 页生成描述：
+{page_outline}{part_info}
+{_FIRST_PAGE_DESCRIPTION_HINT if page_index == 1 else ""}
+"""
+
+    final_prompt = CacheablePrompt(prefix, suffix)
     logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
     return final_prompt
 
 
+def get_batch_page_description_prompt(
+    project_context: "ProjectContext",
+    outline: list,
+    pages: List[tuple],
+    language: str = None,
+) -> CacheablePrompt:
+    """
+    一次生成多个页面描述的 prompt
+
+    前缀与单页 prompt 相同（参考文件、原始需求和完整大纲只出现一次），
+    后缀列出本批页面和 JSON 输出格式
+
+    Args:
+        project_context: 项目上下文对象，包含所有原始信息
+        outline: 完整大纲
+        pages: [(页面编号（从1开始）, 页面大纲), ...]
+
+    Returns:
+        CacheablePrompt，要求返回 [{"page_index": 页码, "description": 描述}, ...]
+    """
+    prefix = get_page_description_prompt_prefix(project_context, outline, language)
+
+    page_blocks = []
+    for page_index, page_outline in pages:
+        part_info = (
+            f"（所属章节：{page_outline['part']}）" if "part" in page_outline else ""
+        )
+        page_blocks.append(f"第 {page_index} 页{part_info}：\n{page_outline}")
+    pages_text = "\n\n".join(page_blocks)
+    has_first_page = any(page_index == 1 for page_index, _ in pages)
+
+    suffix = f"""\
+现在请为以下 {len(pages)} 页分别生成描述：
+{pages_text}
+{_FIRST_PAGE_DESCRIPTION_HINT if has_first_page else ""}
+
+请返回一个 JSON 数组，每页一个元素，按页码顺序排列，格式为：
+[{{"page_index": 页码, "description": "该页的完整描述（按上面的输出格式）"}}, ...]
+只返回 JSON 数组，不要包含其他文字。
+"""
+
+    final_prompt = CacheablePrompt(prefix, suffix)
+    logger.debug(f"[get_batch_page_description_prompt] Final prompt:\n{final_prompt}")
+    return final_prompt
+
+
 def get_image_generation_prompt(
     page_desc: str,
     outline_text: str,
@@ -311,10 +412,13 @@ def get_image_generation_prompt(
     language: str = None,
     has_template: bool = True,
     page_index: int = 1,
-) -> str:
+) -> CacheablePrompt:
     """
     生成图片生成 prompt
 
+    前缀（角色、大纲、设计指南、语言和额外要求）在整个项目内不变，
+    后缀为当前页的描述、章节、素材图片提示和封面提示
+
     Args:
         page_desc: 页面描述文本
         outline_text: 大纲文本
@@ -325,26 +429,26 @@ def get_image_generation_prompt(
         has_template: 是否有模板图片（False表示无模板图模式）
 
     Returns:
-        格式化后的 prompt 字符串
+        CacheablePrompt（可直接当作字符串使用）
     """
     # 如果有素材图片，在 prompt 中明确告知 AI
     material_images_note = ""
     if has_material_images:
         material_images_note = (
-            "\n\n提示："
+            "\n提示："
             + (
                 "除了模板参考图片（用于风格参考）外，还提供了额外的素材图片。"
                 if has_template
                 else "用户提供了额外的素材图片。"
             )
             + "这些素材图片是可供挑选和使用的元素，你可以从这些素材图片中选择合适的图片、图标、图表或其他视觉元素"
-            "直接整合到生成的PPT页面中。请根据页面内容的需要，智能地选择和组合这些素材图片中的元素。"
+            "直接整合到生成的PPT页面中。请根据页面内容的需要，智能地选择和组合这些素材图片中的元素。\n"
         )
 
     # 添加额外要求到提示词
     extra_req_text = ""
     if extra_requirements and extra_requirements.strip():
-        extra_req_text = f"\n\n额外要求（请务必遵循）：\n{extra_requirements}\n"
+        extra_req_text = f"\n额外要求（请务必遵循）：\n{extra_requirements}\n"
 
     # 根据是否有模板生成不同的设计指南内容（保持原prompt要点顺序）
     template_style_guideline = (
@@ -357,21 +461,14 @@ def get_image_generation_prompt(
     )
 
     # 该处参考了@歸藏的A工具箱
-    prompt = f"""\
+    prefix = f"""\
 你是一位专家级UI UX演示设计师，专注于生成设计良好的PPT页面。
-当前PPT页面的页面描述如下:
-<page_description>
-{page_desc}
-</page_description>
 
 <reference_information>
 整个PPT的大纲为：
 {outline_text}
-
-当前位于章节：{current_section}
 </reference_information>
 
-
 <design_guidelines>
 - 要求文字清晰锐利, 画面为4K分辨率，16:9比例。
 {template_style_guideline}
@@ -380,11 +477,20 @@ def get_image_generation_prompt(
 {forbidden_template_text_guidline}- 使用大小恰当的装饰性图形或插画对空缺位置进行填补。
 </design_guidelines>
 {get_ppt_language_instruction(language)}
-{material_images_note}{extra_req_text}
+{extra_req_text}
+"""
+    suffix = f"""\
+当前PPT页面的页面描述如下:
+<page_description>
+{page_desc}
+</page_description>
 
+当前位于章节：{current_section}
+{material_images_note}
 {"**注意：当前页面为ppt的封面页，请你采用专业的封面设计美学技巧，务必凸显出页面标题，分清主次，确保一下就能抓住观众的注意力。**" if page_index == 1 else ""}
 """
 
+    prompt = CacheablePrompt(prefix, suffix)
     logger.debug(f"[get_image_generation_prompt] Final prompt:\n{prompt}")
     return prompt
 
@@ -0,0 +1,331 @@
+"""
+Per-provider rate limiting and adaptive concurrency
+
+Every worker pool in the app (TaskManager, description/image workers, caption
+generation, editability recursion, style extraction) ends up calling a small
+set of upstream APIs. Sizing each pool independently lets them pile onto one
+provider at the same time and turn 429s into retry storms.
+
+This module keeps one process-wide limiter per upstream provider:
+
+- token bucket for requests per second (0 = unlimited)
+- cap on in-flight requests
+- AIMD: the in-flight cap is halved on 429/5xx/timeouts and grows back by
+  roughly one slot per window of successful calls. A burst of throttled
+  requests halves it once: only requests sent after the last decrease can
+  trigger the next one
+
+Usage:
+    from banana_slides.services.rate_limiter import get_rate_limiter
+
+    with get_rate_limiter("openai_image").slot():
+        response = client.chat.completions.create(...)
+
+    # Errors that come back as HTTP 200 (e.g. Baidu error_code 18)
+    with get_rate_limiter("baidu_ocr").slot() as slot:
+        result = requests.post(...).json()
+        if result.get("error_code") in BAIDU_THROTTLE_ERROR_CODES:
+            slot.mark_throttled()
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Baidu AI open platform: 4 = request limit reached, 18 = QPS limit reached
+BAIDU_THROTTLE_ERROR_CODES = {4, 18}
+
+# Per-thread observer of slot waits (see watch_slots)
+_slot_watchers = threading.local()
+
+
+@contextmanager
+def watch_slots(watcher):
+    """
+    Report limiter waits on the current thread to watcher
+
+    watcher.slot_waiting() is called when acquire() starts and
+    watcher.slot_acquired() once the slot is granted, so callers timing an
+    upstream request (e.g. services.hedging) can leave the queueing out.
+    """
+    previous = getattr(_slot_watchers, "watcher", None)
+    _slot_watchers.watcher = watcher
+    try:
+        yield watcher
+    finally:
+        _slot_watchers.watcher = previous
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """
+    Whether an exception means the upstream is overloaded (429, 5xx or timeout)
+
+    Works for openai.APIStatusError (status_code), requests.HTTPError
+    (response.status_code) and wrapped exceptions (``raise ... from e``).
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        status = getattr(exc, "status_code", None)
+        if status is None:
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+        if isinstance(status, int) and (status == 429 or status >= 500):
+            return True
+        if "Timeout" in type(exc).__name__:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+class _Slot:
+    """Handle yielded by RateLimiter.slot() to report soft throttling"""
+
+    __slots__ = ("throttled", "epoch")
+
+    def __init__(self, epoch: Optional[int] = None):
+        self.throttled = False
+        self.epoch = epoch
+
+    def mark_throttled(self):
+        self.throttled = True
+
+
+class RateLimiter:
+    """Token bucket + AIMD in-flight limiter for one upstream provider"""
+
+    def __init__(
+        self,
+        name: str,
+        rps: float = 0,
+        max_in_flight: int = 8,
+        min_in_flight: int = 1,
+        decrease_factor: float = 0.5,
+    ):
+        """
+        Args:
+            name: Provider key (for logs and metrics)
+            rps: Sustained requests per second; 0 disables the token bucket
+            max_in_flight: Upper bound on concurrent requests
+            min_in_flight: Floor the adaptive limit never shrinks below
+            decrease_factor: Multiplier applied to the limit on throttling
+        """
+        self.name = name
+        self.rps = rps
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_in_flight = max(1, min(min_in_flight, self.max_in_flight))
+        self.decrease_factor = decrease_factor
+
+        self._cond = threading.Condition()
+        self._limit = float(self.max_in_flight)
+        self._in_flight = 0
+        # Number of decreases so far; a slot remembers the value it was acquired under
+        self._epoch = 0
+        self._burst = max(1.0, rps)
+        self._tokens = self._burst
+        self._last_refill = time.monotonic()
+
+        self._stats = {
+            "acquired": 0,
+            "throttled": 0,
+            "errors": 0,
+            "wait_seconds": 0.0,
+            "peak_in_flight": 0,
+        }
+
+    @property
+    def limit(self) -> int:
+        """Current adaptive in-flight limit"""
+        return max(self.min_in_flight, int(self._limit))
+
+    def _try_acquire_locked(self) -> Optional[float]:
+        """
+        Take a slot if possible
+
+        Returns:
+            0 when acquired, seconds until a token is available, or None when
+            blocked on the in-flight cap (wait for a release)
+        """
+        if self._in_flight >= self.limit:
+            return None
+
+        if self.rps > 0:
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._last_refill) * self.rps
+            )
+            self._last_refill = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rps
+            self._tokens -= 1
+
+        self._in_flight += 1
+        self._stats["acquired"] += 1
+        self._stats["peak_in_flight"] = max(
+            self._stats["peak_in_flight"], self._in_flight
+        )
+        return 0
+
+    def acquire(self) -> int:
+        """
+        Block until a request may be sent
+
+        Returns:
+            The decrease epoch to pass back to release()
+        """
+        watcher = getattr(_slot_watchers, "watcher", None)
+        if watcher is not None:
+            watcher.slot_waiting()
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._try_acquire_locked()
+                if wait == 0:
+                    break
+                self._cond.wait(timeout=wait)
+            self._stats["wait_seconds"] += time.monotonic() - start
+            epoch = self._epoch
+        if watcher is not None:
+            watcher.slot_acquired()
+        return epoch
+
+    async def acquire_async(self) -> int:
+        """Event-loop friendly acquire (never blocks the loop)"""
+        start = time.monotonic()
+        while True:
+            with self._cond:
+                wait = self._try_acquire_locked()
+                if wait == 0:
+                    self._stats["wait_seconds"] += time.monotonic() - start
+                    return self._epoch
+            await asyncio.sleep(wait if wait is not None else 0.05)
+
+    def release(
+        self, throttled: bool = False, error: bool = False, epoch: Optional[int] = None
+    ):
+        """
+        Return a slot and feed the outcome into AIMD
+
+        Args:
+            throttled: Upstream signalled overload (429/5xx/timeout/quota code)
+            error: Request failed for another reason (no limit change)
+            epoch: Value returned by acquire(); a throttled slot acquired before
+                the last decrease does not decrease the limit again (None = always)
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            if throttled:
+                self._stats["throttled"] += 1
+                if epoch is None or epoch == self._epoch:
+                    old_limit = self.limit
+                    self._limit = max(
+                        float(self.min_in_flight), self._limit * self.decrease_factor
+                    )
+                    self._epoch += 1
+                    logger.warning(
+                        f"Rate limiter [{self.name}] throttled, in-flight limit {old_limit} -> {self.limit}"
+                    )
+            elif error:
+                self._stats["errors"] += 1
+            elif self._limit < self.max_in_flight:
+                # Additive increase: about +1 slot per full window of successes
+                self._limit = min(
+                    float(self.max_in_flight), self._limit + 1.0 / self._limit
+                )
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Acquire/release around one upstream call"""
+        handle = _Slot(self.acquire())
+        try:
+            yield handle
+        except Exception as e:
+            throttled = handle.throttled or is_throttle_error(e)
+            self.release(throttled=throttled, error=not throttled, epoch=handle.epoch)
+            raise
+        except BaseException:
+            # GeneratorExit (abandoned stream), cancellation, KeyboardInterrupt
+            self.release(error=True)
+            raise
+        else:
+            self.release(throttled=handle.throttled, epoch=handle.epoch)
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """Async counterpart of slot()"""
+        handle = _Slot(await self.acquire_async())
+        try:
+            yield handle
+        except Exception as e:
+            throttled = handle.throttled or is_throttle_error(e)
+            self.release(throttled=throttled, error=not throttled, epoch=handle.epoch)
+            raise
+        except BaseException:
+            # GeneratorExit (abandoned stream), cancellation, KeyboardInterrupt
+            self.release(error=True)
+            raise
+        else:
+            self.release(throttled=handle.throttled, epoch=handle.epoch)
+
+    def stats(self) -> dict:
+        """Snapshot of counters and current limits"""
+        with self._cond:
+            return {
+                "name": self.name,
+                "rps": self.rps,
+                "limit": self.limit,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                **self._stats,
+            }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """
+    Get the process-wide limiter for a provider
+
+    Known providers (configured via Config.RATE_LIMITS): openai_text,
+    openai_image, baidu_ocr, baidu_inpaint, volcengine_inpaint, mineru.
+    Unknown names get an unlimited-RPS limiter with the default in-flight cap.
+    """
+    limiter = _limiters.get(name)
+    if limiter is not None:
+        return limiter
+
+    with _limiters_lock:
+        if name not in _limiters:
+            from ..config import get_config
+
+            settings = get_config().RATE_LIMITS.get(name, {})
+            _limiters[name] = RateLimiter(
+                name,
+                rps=settings.get("rps", 0),
+                max_in_flight=settings.get("max_in_flight", 8),
+            )
+            logger.info(
+                f"Created rate limiter [{name}]: rps={_limiters[name].rps}, "
+                f"max_in_flight={_limiters[name].max_in_flight}"
+            )
+        return _limiters[name]
+
+
+def get_rate_limiter_stats() -> Dict[str, dict]:
+    """Stats for every limiter created so far (for monitoring/debugging)"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+def reset_rate_limiters():
+    """Drop all limiters so they are rebuilt from config (tests/config reload)"""
+    with _limiters_lock:
+        _limiters.clear()
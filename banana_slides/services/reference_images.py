@@ -0,0 +1,387 @@
+"""
+Shared reference-image loader
+
+Material images cited in page descriptions (http(s) URLs, ``/files/mineru/``
+paths, local files) used to be fetched and decoded again for every page and
+every regeneration. All reference images now go through one process-wide
+loader:
+
+- http(s) downloads share a pooled ``requests.Session`` and are capped at
+  REF_IMAGE_MAX_DOWNLOAD_MB
+- downloaded bytes are kept on disk, keyed by URL, and revalidated with
+  ``If-None-Match`` / ``If-Modified-Since`` once older than
+  REF_IMAGE_REVALIDATE_SECONDS (stale copies are served if the host is down)
+- decoded images are kept in a memory LRU, already downscaled to
+  REF_IMAGE_MAX_EDGE, keyed by source (file path + mtime, or URL + ETag)
+- concurrent loads of the same source are collapsed into one (single-flight)
+
+Returned images are shared between callers and must be treated as read-only.
+Each carries its cache key in ``image.info`` so the encoded-payload cache can
+reuse its JPEG/base64 encoding without fingerprinting pixels.
+
+Usage:
+    image = get_reference_image_loader().load("https://example.com/chart.png")
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from ..utils.path_utils import find_mineru_file_with_prefix
+from .ai_providers.image.encoding_cache import SOURCE_KEY_INFO
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceImageLoader:
+    """Loads reference images with download, disk, decode and in-flight dedup caches"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_edge: int = 2048,
+        memory_bytes: int = 128 * 1024 * 1024,
+        disk_bytes: int = 500 * 1024 * 1024,
+        max_download_bytes: int = 20 * 1024 * 1024,
+        revalidate_seconds: float = 3600.0,
+        timeout: float = 30.0,
+        pool_size: int = 16,
+    ):
+        """
+        Args:
+            cache_dir: Directory for downloaded image bytes
+            max_edge: Decoded images are downscaled to this long edge (0 = keep size)
+            memory_bytes: Upper bound on decoded pixels kept in memory
+            disk_bytes: Upper bound on the download cache directory
+            max_download_bytes: Larger responses are rejected
+            revalidate_seconds: Cached downloads younger than this are used
+                without contacting the host
+            timeout: HTTP timeout in seconds
+            pool_size: Connections kept per host
+        """
+        self.cache_dir = cache_dir
+        self.max_edge = max_edge
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_download_bytes = max_download_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._images: "OrderedDict[Hashable, Tuple[Image.Image, int]]" = OrderedDict()
+        self._image_bytes = 0
+        self._inflight: Dict[Hashable, Future] = {}
+        self._stats = {
+            "requests": 0,
+            "memory_hits": 0,
+            "deduplicated": 0,
+            "decoded": 0,
+            "downloads": 0,
+            "download_bytes": 0,
+            "disk_hits": 0,
+            "revalidated": 0,
+            "stale_served": 0,
+            "failures": 0,
+            "evictions": 0,
+        }
+
+    # ---- public API ----
+
+    def load(self, ref: str, max_edge: Optional[int] = None) -> Optional[Image.Image]:
+        """
+        Load a reference image from a local path, http(s) URL or /files/mineru/ path
+
+        Args:
+            ref: Image reference
+            max_edge: Override for the downscale target (None = loader default)
+
+        Returns:
+            Decoded PIL image, or None if the reference cannot be resolved
+        """
+        max_edge = self.max_edge if max_edge is None else max_edge
+        self._count("requests")
+
+        try:
+            if ref.startswith("http://") or ref.startswith("https://"):
+                return self._single_flight(
+                    ("url", ref, max_edge), lambda: self._load_url(ref, max_edge)
+                )
+
+            path = ref
+            if not os.path.exists(path) and ref.startswith("/files/mineru/"):
+                matched = find_mineru_file_with_prefix(ref)
+                path = str(matched) if matched else None
+            if not path or not os.path.isfile(path):
+                logger.warning(f"Reference image not found: {ref}")
+                return None
+            return self.load_file(path, max_edge)
+        except Exception as e:
+            self._count("failures")
+            logger.error(f"Failed to load reference image {ref}: {str(e)}")
+            return None
+
+    def load_file(self, path: str, max_edge: Optional[int] = None) -> Image.Image:
+        """
+        Load a local image file through the decode cache
+
+        Raises:
+            OSError: If the file cannot be read or decoded
+        """
+        max_edge = self.max_edge if max_edge is None else max_edge
+        stat = os.stat(path)
+        key = ("file", os.path.abspath(path), stat.st_mtime_ns, stat.st_size, max_edge)
+        return self._single_flight(key, lambda: self._decode_cached(key, path, max_edge))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "cached_images": len(self._images),
+                "cached_image_bytes": self._image_bytes,
+            }
+
+    def clear(self):
+        """Drop decoded images (the download cache on disk is kept)"""
+        with self._lock:
+            self._images.clear()
+            self._image_bytes = 0
+
+    # ---- caching helpers ----
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _single_flight(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn once per key at a time; concurrent callers wait for the same result"""
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                leader = True
+            else:
+                self._stats["deduplicated"] += 1
+                leader = False
+
+        if not leader:
+            return pending.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _decode_cached(self, key: Hashable, path: str, max_edge: int) -> Image.Image:
+        with self._lock:
+            entry = self._images.get(key)
+            if entry is not None:
+                self._images.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[0]
+
+        image = self._decode(path, max_edge)
+        image.info[SOURCE_KEY_INFO] = key
+        size = image.width * image.height * len(image.getbands())
+
+        with self._lock:
+            self._stats["decoded"] += 1
+            if key not in self._images and size <= self.memory_bytes:
+                self._images[key] = (image, size)
+                self._image_bytes += size
+                while self._image_bytes > self.memory_bytes:
+                    _, (_, old_size) = self._images.popitem(last=False)
+                    self._image_bytes -= old_size
+                    self._stats["evictions"] += 1
+        return image
+
+    @staticmethod
+    def _decode(path: str, max_edge: int) -> Image.Image:
+        """Decode a file, downscaling to max_edge (JPEG decodes at reduced size directly)"""
+        with Image.open(path) as source:
+            if max_edge and max(source.size) > max_edge:
+                source.draft(source.mode, (max_edge, max_edge))
+            source.load()
+            image = source.copy()
+        if max_edge and max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        return image
+
+    # ---- downloads ----
+
+    def _cache_paths(self, url: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest[:2], digest)
+        return base + ".bin", base + ".json"
+
+    @staticmethod
+    def _read_meta(meta_path: str) -> Optional[dict]:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _load_url(self, url: str, max_edge: int) -> Optional[Image.Image]:
+        data_path, meta = self._fetch(url)
+        if data_path is None:
+            return None
+        # The ETag (or content digest) identifies the version of the image
+        version = meta.get("etag") or meta.get("sha256")
+        key = ("url", url, version, max_edge)
+        return self._decode_cached(key, data_path, max_edge)
+
+    def _fetch(self, url: str) -> Tuple[Optional[str], dict]:
+        """
+        Make sure the URL's bytes are in the disk cache
+
+        Returns:
+            (path of the cached bytes or None, metadata)
+        """
+        data_path, meta_path = self._cache_paths(url)
+        meta = self._read_meta(meta_path) if os.path.exists(data_path) else None
+
+        if meta and time.time() - meta.get("fetched_at", 0) < self.revalidate_seconds:
+            self._count("disk_hits")
+            return data_path, meta
+
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            logger.debug(f"Downloading reference image: {url}")
+            with self._session.get(
+                url, headers=headers, timeout=self.timeout, stream=True
+            ) as response:
+                if response.status_code == 304 and meta:
+                    meta["fetched_at"] = time.time()
+                    self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+                    self._count("revalidated")
+                    return data_path, meta
+
+                response.raise_for_status()
+                declared = int(response.headers.get("Content-Length") or 0)
+                if declared > self.max_download_bytes:
+                    raise ValueError(
+                        f"Image is {declared} bytes, limit is {self.max_download_bytes}"
+                    )
+
+                chunks = []
+                received = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    received += len(chunk)
+                    if received > self.max_download_bytes:
+                        raise ValueError(
+                            f"Image exceeds download limit of {self.max_download_bytes} bytes"
+                        )
+                    chunks.append(chunk)
+                data = b"".join(chunks)
+
+                new_meta = {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "content_type": response.headers.get("Content-Type"),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "fetched_at": time.time(),
+                }
+        except Exception as e:
+            if meta:
+                logger.warning(f"Revalidating {url} failed ({str(e)}), using cached copy")
+                self._count("stale_served")
+                return data_path, meta
+            self._count("failures")
+            logger.error(f"Failed to download image from {url}: {str(e)}")
+            return None, {}
+
+        self._write_atomic(data_path, data)
+        self._write_atomic(meta_path, json.dumps(new_meta).encode("utf-8"))
+        self._count("downloads")
+        self._count("download_bytes", len(data))
+        self._evict_disk()
+        return data_path, new_meta
+
+    def _evict_disk(self):
+        """Delete the least recently fetched downloads until the cache fits disk_bytes"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".bin"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.disk_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            for victim in (path, path[: -len(".bin")] + ".json"):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+            total -= size
+            if total <= self.disk_bytes:
+                break
+
+
+_loader: Optional[ReferenceImageLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_reference_image_loader() -> ReferenceImageLoader:
+    """Process-wide loader configured by the REF_IMAGE_* settings"""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                from ..config import get_config
+
+                config = get_config()
+                _loader = ReferenceImageLoader(
+                    cache_dir=config.REF_IMAGE_CACHE_DIR,
+                    max_edge=config.REF_IMAGE_MAX_EDGE,
+                    memory_bytes=int(config.REF_IMAGE_MEMORY_CACHE_MB * 1024 * 1024),
+                    disk_bytes=int(config.REF_IMAGE_DISK_CACHE_MB * 1024 * 1024),
+                    max_download_bytes=int(config.REF_IMAGE_MAX_DOWNLOAD_MB * 1024 * 1024),
+                    revalidate_seconds=config.REF_IMAGE_REVALIDATE_SECONDS,
+                )
+    return _loader
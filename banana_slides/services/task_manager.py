@@ -1,43 +1,391 @@
 """
-Task Manager - handles background tasks using ThreadPoolExecutor
-No need for Celery or Redis, uses in-memory task tracking
+Task Manager - handles background tasks
+
+By default tasks go through a durable queue (see services.task_queue): they
+survive restarts and can be drained by several ``banana-slides worker``
+processes. TASK_QUEUE_BACKEND=memory keeps them in process, dispatched by a
+FairScheduler instead of a plain ThreadPoolExecutor.
+
+Scheduling (both modes):
+
+- every task has a priority class: interactive (edits, material images)
+  > single_page > bulk (deck generation) > export
+- TASK_RESERVED_INTERACTIVE_SLOTS worker slots only take interactive tasks,
+  so a burst of exports cannot occupy every worker
+- a waiting task gains one class of priority per TASK_PRIORITY_AGING_SECONDS,
+  so bulk work still progresses under constant interactive load
+- within a class, projects are served round-robin (fair share), so one
+  project's queued tasks do not delay another project's
+
+Cancellation (see services.cancellation): ``cancel_task`` drops a queued task
+or cancels the token of a running one, which stops at its next check
+(between pages, before each model call) and ends as CANCELLED. Every run
+also gets a deadline (TASK_DEADLINE_SECONDS or ``submit_task(deadline=...)``)
+after which it is cancelled the same way.
 """
 
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, List, Dict, Any
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
 from sqlalchemy import func
 from ..models import db, Task, Page, Material, PageImageVersion
 from ..utils import get_filtered_pages
+from .cancellation import (
+    CANCELLED,
+    TaskCancelled,
+    cancel_task_token,
+    get_task_token,
+    task_cancellation,
+)
+from .hedging import deck_hedge_budget
+from .progress_aggregator import ProgressAggregator
+from .task_queue import (
+    DEADLINE_KEY,
+    TEMP_DIR_ARG,
+    TaskWorker,
+    create_task_queue,
+    discard_task_files,
+    serialize_call,
+    stage_task_files,
+)
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Priority classes, most urgent first (the index is the numeric priority)
+PRIORITY_CLASSES = ("interactive", "single_page", "bulk", "export")
+
+_TASK_PRIORITY_CLASSES = {
+    "edit_page_image_task": "interactive",
+    "generate_material_image_task": "interactive",
+    "generate_single_page_image_task": "single_page",
+    "generate_descriptions_task": "bulk",
+    "generate_images_task": "bulk",
+    "generate_pages_pipeline_task": "bulk",
+    "generate_pages_async_task": "bulk",
+    "export_editable_pptx_with_recursive_analysis_task": "export",
+}
+
+
+def priority_class_for(func: Callable) -> str:
+    """Default priority class of a task function (unknown tasks count as bulk)"""
+    return _TASK_PRIORITY_CLASSES.get(getattr(func, "__name__", ""), "bulk")
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SchedulerMetrics:
+    """Per priority class dispatch counts and queue wait times"""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._classes = {
+            name: {
+                "dispatched": 0,
+                "running": 0,
+                "wait_seconds": 0.0,
+                "waits": deque(maxlen=window),
+            }
+            for name in PRIORITY_CLASSES
+        }
+
+    def record_dispatch(self, priority: int, waited: float):
+        with self._lock:
+            stats = self._classes[PRIORITY_CLASSES[priority]]
+            stats["dispatched"] += 1
+            stats["running"] += 1
+            stats["wait_seconds"] += waited
+            stats["waits"].append(waited)
+
+    def record_done(self, priority: int):
+        with self._lock:
+            self._classes[PRIORITY_CLASSES[priority]]["running"] -= 1
+
+    def stats(self, depths: Optional[Dict[int, int]] = None) -> Dict[str, dict]:
+        """
+        Args:
+            depths: Queued tasks per numeric priority (from the scheduler or queue)
+        """
+        depths = depths or {}
+        with self._lock:
+            result = {}
+            for priority, name in enumerate(PRIORITY_CLASSES):
+                stats = self._classes[name]
+                dispatched = stats["dispatched"]
+                result[name] = {
+                    "queued": depths.get(priority, 0),
+                    "running": stats["running"],
+                    "dispatched": dispatched,
+                    "avg_wait": stats["wait_seconds"] / dispatched if dispatched else 0.0,
+                    "p95_wait": _percentile(stats["waits"], 0.95),
+                }
+            return result
+
+
+class FairScheduler:
+    """
+    In-process priority scheduler with per-project round-robin
+
+    Tasks are queued per (priority class, project); a fixed set of worker
+    threads always takes the task with the lowest aged priority, rotating
+    between projects inside a class.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        reserved_interactive: int = 1,
+        aging_seconds: float = 120.0,
+        metrics: Optional[SchedulerMetrics] = None,
+    ):
+        """
+        Args:
+            max_workers: Tasks run at the same time
+            reserved_interactive: Slots that only interactive tasks may use
+            aging_seconds: Waiting this long raises a task by one priority class (0 = never)
+            metrics: Where dispatch counts and wait times are recorded
+        """
+        self.max_workers = max_workers
+        self.reserved_interactive = min(reserved_interactive, max_workers - 1)
+        self.aging_seconds = aging_seconds
+        self.metrics = metrics or SchedulerMetrics()
+
+        # priority -> OrderedDict(project_id -> deque[(enqueued_at, seq, fn, future)])
+        self._queues = [OrderedDict() for _ in PRIORITY_CLASSES]
+        self._depths = [0] * len(PRIORITY_CLASSES)
+        self._running = 0
+        self._seq = 0
+        self._shutdown = False
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, fn: Callable[[], Any], priority: int, project_id: Optional[str]) -> Future:
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new tasks after shutdown")
+            self._seq += 1
+            projects = self._queues[priority]
+            projects.setdefault(project_id, deque()).append(
+                (time.monotonic(), self._seq, fn, future)
+            )
+            self._depths[priority] += 1
+            if not self._threads:
+                for i in range(self.max_workers):
+                    thread = threading.Thread(
+                        target=self._worker_loop, name=f"task-scheduler-{i}", daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+            self._cond.notify()
+        return future
+
+    def _pick(self):
+        """Pop the next task (caller holds the lock), or None if nothing may run now"""
+        free = self.max_workers - self._running
+        max_priority = len(PRIORITY_CLASSES) - 1 if free > self.reserved_interactive else 0
+        now = time.monotonic()
+
+        candidates = []
+        for priority in range(max_priority + 1):
+            projects = self._queues[priority]
+            if not projects:
+                continue
+            # The next project in round-robin order
+            enqueued_at, seq = next(iter(projects.values()))[0][:2]
+            aged = priority
+            if self.aging_seconds > 0:
+                aged -= (now - enqueued_at) / self.aging_seconds
+            candidates.append((aged, seq, priority))
+        if not candidates:
+            return None
+
+        _, _, priority = min(candidates)
+        projects = self._queues[priority]
+        project_id, tasks = projects.popitem(last=False)
+        enqueued_at, _, fn, future = tasks.popleft()
+        if tasks:
+            projects[project_id] = tasks  # Back of the round-robin order
+        self._depths[priority] -= 1
+        return priority, now - enqueued_at, fn, future
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                picked = self._pick()
+                while picked is None:
+                    if self._shutdown and not any(self._depths):
+                        return
+                    self._cond.wait()
+                    picked = self._pick()
+                self._running += 1
+
+            priority, waited, fn, future = picked
+            self.metrics.record_dispatch(priority, waited)
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn())
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                self.metrics.record_done(priority)
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+    def depths(self) -> Dict[int, int]:
+        with self._cond:
+            return dict(enumerate(self._depths))
+
+    def shutdown(self, wait: bool = True):
+        """Run what is queued, then stop the worker threads"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
 
-class TaskManager:
-    """Simple task manager using ThreadPoolExecutor"""
 
-    def __init__(self, max_workers: int = 4):
-        """Initialize task manager"""
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.active_tasks = {}  # task_id -> Future
+class TaskManager:
+    """Task manager backed by a durable queue, or by a FairScheduler in memory mode"""
+
+    def __init__(self, max_workers: int = 4, backend: Optional[str] = None):
+        """
+        Initialize task manager
+
+        Args:
+            max_workers: Worker threads for the memory backend
+            backend: memory / database / redis (default: TASK_QUEUE_BACKEND)
+        """
+        self.max_workers = max_workers
+        self.metrics = SchedulerMetrics()
+        self.scheduler = None  # FairScheduler, created on first use (memory backend)
+        self.active_tasks = {}  # task_id -> Future (memory backend)
         self.lock = threading.Lock()
+        self.backend = backend
+        self._queue = None
+        self._worker = None
+
+    def _get_backend(self) -> str:
+        if self.backend is None:
+            from ..config import get_config
 
-    def submit_task(self, task_id: str, func: Callable, *args, **kwargs):
-        """Submit a background task"""
-        future = self.executor.submit(func, task_id, *args, **kwargs)
+            self.backend = get_config().TASK_QUEUE_BACKEND
+        return self.backend
 
+    def _get_scheduler(self) -> FairScheduler:
         with self.lock:
-            self.active_tasks[task_id] = future
+            if self.scheduler is None:
+                from ..config import get_config
+
+                config = get_config()
+                self.scheduler = FairScheduler(
+                    max_workers=self.max_workers,
+                    reserved_interactive=config.TASK_RESERVED_INTERACTIVE_SLOTS,
+                    aging_seconds=config.TASK_PRIORITY_AGING_SECONDS,
+                    metrics=self.metrics,
+                )
+            return self.scheduler
 
-        # Add callback to clean up when done and log exceptions
-        future.add_done_callback(lambda f: self._task_done_callback(task_id, f))
+    def _get_queue(self, app):
+        """Durable queue (and, if enabled, the embedded worker draining it)"""
+        with self.lock:
+            if self._queue is None:
+                from ..config import get_config
 
-    def _task_done_callback(self, task_id: str, future):
-        """Handle task completion and log any exceptions"""
+                self._queue = create_task_queue(app, self._get_backend())
+                if get_config().TASK_EMBEDDED_WORKER:
+                    self._worker = TaskWorker.from_config(
+                        self._queue, app, metrics=self.metrics
+                    )
+                    self._worker.start()
+            return self._queue
+
+    def submit_task(
+        self,
+        task_id: str,
+        func: Callable,
+        *args,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ):
+        """
+        Submit a background task
+
+        Args:
+            task_id: Task row ID (first argument of func)
+            func: Task function
+            priority: Priority class (default: by task function, see PRIORITY_CLASSES)
+            deadline: Seconds a run may take before it is cancelled (default: TASK_DEADLINE_SECONDS)
+        """
+        from ..config import get_config
+
+        priority_class = priority or priority_class_for(func)
+        if priority_class not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown task priority class: {priority_class}")
+        rank = PRIORITY_CLASSES.index(priority_class)
+        project_id = kwargs.get("project_id", args[0] if args else None)
+
+        if self._get_backend() == "memory":
+            run_deadline = deadline or get_config().TASK_DEADLINE_SECONDS or None
+
+            def run():
+                with task_cancellation(task_id, run_deadline):
+                    return func(task_id, *args, **kwargs)
+
+            future = self._get_scheduler().submit(run, rank, project_id)
+
+            with self.lock:
+                self.active_tasks[task_id] = future
+
+            # Add callback to clean up when done and log exceptions
+            temp_dir = kwargs.get(TEMP_DIR_ARG)
+            future.add_done_callback(
+                lambda f: self._task_done_callback(task_id, f, temp_dir)
+            )
+            return
+
+        app = kwargs.get("app")
+        if app is None:
+            from flask import current_app
+
+            app = current_app._get_current_object()
+
+        func_name, payload = serialize_call(func, task_id, args, kwargs)
+        stage_task_files(
+            task_id, payload, app.config.get("UPLOAD_FOLDER") or get_config().UPLOAD_FOLDER
+        )
+        if deadline:
+            payload[DEADLINE_KEY] = deadline
+        self._get_queue(app).enqueue(
+            task_id,
+            func_name,
+            payload,
+            max_attempts=get_config().TASK_MAX_ATTEMPTS,
+            priority=rank,
+            project_id=project_id,
+        )
+        if self._worker is not None:
+            self._worker.wake()
+
+    def _task_done_callback(self, task_id: str, future, temp_dir: Optional[str] = None):
+        """Handle task completion, log any exceptions and remove the task's temp_dir"""
         try:
+            if future.cancelled():
+                logger.info(f"Task {task_id} was cancelled before it started")
+                return
             # Check if task raised an exception
             exception = future.exception()
             if exception:
@@ -48,6 +396,7 @@ class TaskManager:
         except Exception as e:
             logger.error(f"Error in task callback for {task_id}: {e}", exc_info=True)
         finally:
+            discard_task_files({TEMP_DIR_ARG: temp_dir})
             self._cleanup_task(task_id)
 
     def _cleanup_task(self, task_id: str):
@@ -57,19 +406,126 @@ class TaskManager:
                 del self.active_tasks[task_id]
 
     def is_task_active(self, task_id: str) -> bool:
-        """Check if task is still running"""
+        """Check if task is still queued or running"""
+        with self.lock:
+            if task_id in self.active_tasks:
+                return True
+            queue = self._queue
+        return queue is not None and queue.is_pending(task_id)
+
+    def cancel_task(self, task_id: str, app=None) -> bool:
+        """
+        Cancel a queued or running task
+
+        The Task row is set to CANCELLED at once. A queued task is dropped; a
+        running one stops at its next cancellation check (in another worker
+        process within TASK_CANCEL_POLL_SECONDS). A blocking model call that
+        is already in flight still runs to completion, its result is discarded.
+
+        Args:
+            task_id: Task row ID
+            app: Flask app (default: current_app)
+
+        Returns:
+            False if the task does not exist or has already finished
+        """
+        if app is None:
+            from flask import current_app
+
+            app = current_app._get_current_object()
+
+        with app.app_context():
+            task = Task.query.get(task_id)
+            if task is None or task.status not in ("PENDING", "PROCESSING"):
+                return False
+            task.status = "CANCELLED"
+            task.error_message = f"Task {CANCELLED}"
+            task.completed_at = datetime.utcnow()
+            db.session.commit()
+
+        with self.lock:
+            future = self.active_tasks.get(task_id)
+            queue = self._queue
+        if future is not None and future.cancel():
+            logger.info(f"Task {task_id} cancelled before it started")
+        elif self._get_backend() != "memory":
+            # Without starting an embedded worker just to drop a job
+            queue = queue or create_task_queue(app, self._get_backend())
+            if queue.cancel(task_id):
+                logger.info(f"Task {task_id} removed from the queue")
+        if cancel_task_token(task_id):
+            logger.info(f"Task {task_id} cancellation requested")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth, running tasks and wait times per priority class
+
+        Running/dispatched/wait figures cover tasks dispatched by this process
+        (the scheduler or the embedded worker); queue depth covers the whole queue.
+        """
         with self.lock:
-            return task_id in self.active_tasks
+            scheduler, queue = self.scheduler, self._queue
+        if scheduler is not None:
+            depths = scheduler.depths()
+        elif queue is not None:
+            depths = queue.depths()
+        else:
+            depths = {}
+        return {"backend": self._get_backend(), "classes": self.metrics.stats(depths)}
 
     def shutdown(self):
-        """Shutdown the executor"""
-        self.executor.shutdown(wait=True)
+        """Stop dispatching after running (and, in memory mode, queued) tasks finish"""
+        if self._worker is not None:
+            self._worker.stop()
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=True)
 
 
 # Global task manager instance
 task_manager = TaskManager(max_workers=4)
 
 
+def _mark_task_cancelled(
+    task_id: str,
+    reason: str,
+    project_id: Optional[str] = None,
+    page_ids: Optional[List[str]] = None,
+):
+    """
+    将任务标记为 CANCELLED（已取消或超过截止时间），不再重试
+
+    与失败不同，取消不代表页面有问题：仍处于 GENERATING 的页面（project_id
+    下，可按 page_ids 过滤）恢复为生成前的状态，而不是 FAILED
+    """
+    db.session.rollback()
+    task = Task.query.get(task_id)
+    if task:
+        task.status = "CANCELLED"
+        task.error_message = f"Task {reason}"
+        task.completed_at = task.completed_at or datetime.utcnow()
+    if project_id:
+        query = Page.query.filter(
+            Page.project_id == project_id, Page.status == "GENERATING"
+        )
+        if page_ids:
+            query = query.filter(Page.id.in_(page_ids))
+        for page in query:
+            page.status = (
+                "COMPLETED" if page.generated_image_path else "DESCRIPTION_GENERATED"
+            )
+    db.session.commit()
+    logger.info(f"Task {task_id} CANCELLED ({reason})")
+
+
+def _stop_if_cancelled(cancel_token, futures):
+    """任务被取消时丢弃尚未开始的 future 并抛出 TaskCancelled（进行中的调用会跑完）"""
+    if cancel_token.cancelled:
+        for future in futures:
+            future.cancel()
+        cancel_token.raise_if_cancelled()
+
+
 def save_image_with_version(
     image,
     project_id: str,
@@ -152,6 +608,7 @@ def generate_descriptions_task(
     max_workers: int = 5,
     app=None,
     language: str = None,
+    batch_descriptions: bool = False,
 ):
     """
     Background task for generating page descriptions
@@ -168,6 +625,7 @@ def generate_descriptions_task(
         max_workers: Maximum number of parallel workers
         app: Flask app instance
         language: Output language (zh, en, ja, auto)
+        batch_descriptions: Generate several pages per LLM call (batches run in parallel)
     """
     if app is None:
         raise ValueError("Flask app instance must be provided")
@@ -181,6 +639,8 @@ def generate_descriptions_task(
                 logger.error(f"Task {task_id} not found")
                 return
 
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
             task.status = "PROCESSING"
             db.session.commit()
             logger.info(f"Task {task_id} status updated to PROCESSING")
@@ -202,9 +662,10 @@ def generate_descriptions_task(
             task.set_progress({"total": len(pages), "completed": 0, "failed": 0})
             db.session.commit()
 
-            # Generate descriptions in parallel
-            completed = 0
-            failed = 0
+            # 页面状态与任务进度由聚合器批量写入，避免每页两次提交争用 SQLite 写锁
+            progress = ProgressAggregator.from_config(
+                app, task_id, len(pages), label="Description Progress"
+            )
 
             def generate_single_desc(page_id, page_outline, page_index):
                 """
@@ -213,6 +674,7 @@ def generate_descriptions_task(
                 """
                 # 关键修复：在子线程中也需要应用上下文
                 with app.app_context():
+                    cancel_token.raise_if_cancelled()
                     try:
                         # Get singleton AI service instance
                         from banana_slides.services.ai_service_manager import (
@@ -246,41 +708,90 @@ def generate_descriptions_task(
                         )
                         return (page_id, None, str(e))
 
+            def generate_batch_desc(batch):
+                """
+                Generate descriptions for a batch of pages in one call
+                batch: [(page_id, page_outline, page_index), ...]
+                """
+                with app.app_context():
+                    from banana_slides.services.ai_service_manager import (
+                        get_ai_service,
+                    )
+
+                    cancel_token.raise_if_cancelled()
+                    page_ids = {page_index: page_id for page_id, _, page_index in batch}
+                    try:
+                        descriptions, errors = get_ai_service().generate_page_descriptions_batch(
+                            project_context,
+                            outline,
+                            [(page_index, page_outline) for _, page_outline, page_index in batch],
+                            language=language,
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to generate description batch: {e}")
+                        return [(page_id, None, str(e)) for page_id, _, _ in batch]
+
+                    generated_at = datetime.utcnow().isoformat()
+                    return [
+                        (
+                            page_ids[page_index],
+                            {"text": descriptions[page_index], "generated_at": generated_at}
+                            if page_index in descriptions
+                            else None,
+                            str(errors[page_index]) if page_index in errors else None,
+                        )
+                        for page_index in page_ids
+                    ]
+
             # Use ThreadPoolExecutor for parallel generation
             # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_desc, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
+            page_jobs = [
+                (page.id, page_data, i)
+                for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
+            ]
+            with progress, ThreadPoolExecutor(max_workers=max_workers) as executor:
+                if batch_descriptions:
+                    # 批量模式：参考文件/大纲每批只发送一次，批次之间并行
+                    batches = ai_service.plan_description_batches(
+                        project_context,
+                        outline,
+                        [(page_index, page_data) for _, page_data, page_index in page_jobs],
+                        language=language,
+                    )
+                    jobs_by_index = {job[2]: job for job in page_jobs}
+                    futures = [
+                        executor.submit(
+                            generate_batch_desc,
+                            [jobs_by_index[page_index] for page_index, _ in batch],
+                        )
+                        for batch in batches
+                    ]
+                    logger.info(
+                        f"Generating {len(page_jobs)} descriptions in {len(batches)} batches"
+                    )
+                else:
+                    futures = [
+                        executor.submit(generate_single_desc, *job) for job in page_jobs
+                    ]
 
                 # Process results as they complete
                 for future in as_completed(futures):
-                    page_id, desc_content, error = future.result()
-
-                    db.session.expire_all()
-
-                    # Update page in database
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = "FAILED"
-                            failed += 1
-                        else:
-                            page.set_description_content(desc_content)
-                            page.status = "DESCRIPTION_GENERATED"
-                            completed += 1
-
-                        db.session.commit()
-
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(
-                            f"Description Progress: {completed}/{len(pages)} pages completed"
+                    try:
+                        results = future.result() if batch_descriptions else [future.result()]
+                    except TaskCancelled:
+                        _stop_if_cancelled(cancel_token, futures)
+                        raise
+                    for page_id, desc_content, error in results:
+                        progress.record(
+                            page_id,
+                            ok=not error and desc_content is not None,
+                            status="DESCRIPTION_GENERATED",
+                            description_content=desc_content,
                         )
+                    # 已完成的页面先写入，再丢弃尚未开始的页面
+                    _stop_if_cancelled(cancel_token, futures)
+
+            completed, failed = progress.completed, progress.failed
 
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -303,6 +814,8 @@ def generate_descriptions_task(
                     f"Project {project_id} status updated to DESCRIPTIONS_GENERATED"
                 )
 
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason)
         except Exception as e:
             # Mark task as failed
             task = Task.query.get(task_id)
@@ -348,6 +861,8 @@ def generate_images_task(
             if not task:
                 return
 
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
             task.status = "PROCESSING"
             db.session.commit()
 
@@ -362,9 +877,12 @@ def generate_images_task(
             task.set_progress({"total": len(pages), "completed": 0, "failed": 0})
             db.session.commit()
 
-            # Generate images in parallel
-            completed = 0
-            failed = 0
+            # 成功页面已在子线程中保存；失败状态与任务进度由聚合器批量写入
+            progress = ProgressAggregator.from_config(
+                app, task_id, len(pages), label="Image Progress"
+            )
+            # 可选的对冲请求预算（IMAGE_HEDGE_ENABLED），整个任务共享
+            hedge_budget = deck_hedge_budget(len(pages))
 
             def generate_single_image(page_id, page_data, page_index):
                 """
@@ -373,6 +891,7 @@ def generate_images_task(
                 """
                 # 关键修复：在子线程中也需要应用上下文
                 with app.app_context():
+                    cancel_token.raise_if_cancelled()
                     try:
                         logger.debug(
                             f"Starting image generation for page {page_id}, index {page_index}"
@@ -456,6 +975,8 @@ def generate_images_task(
                             additional_ref_images=page_additional_ref_images
                             if page_additional_ref_images
                             else None,
+                            hedge_budget=hedge_budget,
+                            cancel_token=cancel_token,
                         )
                         logger.info(
                             f"✅ Image generated successfully for page {page_index}"
@@ -472,6 +993,8 @@ def generate_images_task(
 
                         return (page_id, image_path, None)
 
+                    except TaskCancelled:
+                        raise
                     except Exception as e:
                         import traceback
 
@@ -483,7 +1006,7 @@ def generate_images_task(
 
             # Use ThreadPoolExecutor for parallel generation
             # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with progress, ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = [
                     executor.submit(generate_single_image, page.id, page_data, i)
                     for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
@@ -491,31 +1014,16 @@ def generate_images_task(
 
                 # Process results as they complete
                 for future in as_completed(futures):
-                    page_id, image_path, error = future.result()
-
-                    db.session.expire_all()
+                    try:
+                        page_id, image_path, error = future.result()
+                    except TaskCancelled:
+                        _stop_if_cancelled(cancel_token, futures)
+                        raise
+                    # 图片已在子线程中保存并创建版本记录，这里只需要计数
+                    progress.record(page_id, ok=not error)
+                    _stop_if_cancelled(cancel_token, futures)
 
-                    # Update page in database (主要是为了更新失败状态)
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = "FAILED"
-                            failed += 1
-                            db.session.commit()
-                        else:
-                            # 图片已在子线程中保存并创建版本记录，这里只需要更新计数
-                            completed += 1
-                            # 刷新页面对象以获取最新状态
-                            db.session.refresh(page)
-
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(
-                            f"Image Progress: {completed}/{len(pages)} pages completed"
-                        )
+            completed, failed = progress.completed, progress.failed
 
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -536,6 +1044,8 @@ def generate_images_task(
                 db.session.commit()
                 logger.info(f"Project {project_id} status updated to COMPLETED")
 
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason, project_id=project_id, page_ids=page_ids)
         except Exception as e:
             # Mark task as failed
             task = Task.query.get(task_id)
@@ -546,6 +1056,432 @@ def generate_images_task(
                 db.session.commit()
 
 
+def generate_pages_pipeline_task(
+    task_id: str,
+    project_id: str,
+    ai_service,
+    project_context,
+    file_service,
+    outline: List[Dict],
+    use_template: bool = True,
+    text_workers: int = 5,
+    image_workers: int = 8,
+    aspect_ratio: str = "16:9",
+    resolution: str = "2K",
+    app=None,
+    extra_requirements: str = None,
+    language: str = None,
+):
+    """
+    Background task that pipelines description and image generation per page
+
+    与 generate_descriptions_task + generate_images_task 串行执行不同，
+    每一页的描述生成完成后立即进入图片生成阶段，文本和图片阶段分别限流，
+    端到端耗时接近 max(文本, 图片) 而不是两者之和。
+
+    Note: app instance MUST be passed from the request context
+
+    Args:
+        text_workers: Maximum concurrent description calls
+        image_workers: Maximum concurrent image calls
+        language: Output language (zh, en, ja, auto)
+    """
+    from ..core.pipeline import run_page_pipeline
+
+    if app is None:
+        raise ValueError("Flask app instance must be provided")
+
+    with app.app_context():
+        try:
+            task = Task.query.get(task_id)
+            if not task:
+                logger.error(f"Task {task_id} not found")
+                return
+
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
+            task.status = "PROCESSING"
+            db.session.commit()
+
+            pages_data = ai_service.flatten_outline(outline)
+            pages = (
+                Page.query.filter_by(project_id=project_id)
+                .order_by(Page.order_index)
+                .all()
+            )
+
+            if len(pages) != len(pages_data):
+                raise ValueError("Page count mismatch")
+
+            task.set_progress({"total": len(pages), "completed": 0, "failed": 0})
+            db.session.commit()
+
+            def describe(page_id, payload):
+                """在子线程中生成描述，只传递 page_id，不传递 ORM 对象"""
+                page_data, page_index = payload
+                cancel_token.raise_if_cancelled()
+                with app.app_context():
+                    from banana_slides.services.ai_service_manager import (
+                        get_ai_service,
+                    )
+
+                    return get_ai_service().generate_page_description(
+                        project_context,
+                        outline,
+                        page_data,
+                        page_index,
+                        language=language,
+                    )
+
+            hedge_budget = deck_hedge_budget(len(pages))
+
+            def render(page_id, payload, desc_text):
+                """在子线程中生成并保存图片（描述已由主线程写入数据库）"""
+                page_data, page_index = payload
+                with app.app_context():
+                    from banana_slides.services.ai_service_manager import (
+                        get_ai_service,
+                    )
+
+                    ai_service = get_ai_service()
+                    page_obj = Page.query.get(page_id)
+                    if not page_obj:
+                        raise ValueError(f"Page {page_id} not found")
+
+                    page_obj.status = "GENERATING"
+                    db.session.commit()
+
+                    image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
+
+                    # 在子线程中动态获取模板路径，确保使用最新模板
+                    page_ref_image_path = None
+                    if use_template:
+                        page_ref_image_path = file_service.get_template_path(project_id)
+
+                    prompt = ai_service.generate_image_prompt(
+                        outline,
+                        page_data,
+                        desc_text,
+                        page_index,
+                        has_material_images=bool(image_urls),
+                        extra_requirements=extra_requirements,
+                        language=language,
+                        has_template=use_template,
+                    )
+                    image = ai_service.generate_image(
+                        prompt,
+                        page_ref_image_path,
+                        aspect_ratio,
+                        resolution,
+                        additional_ref_images=image_urls if image_urls else None,
+                        hedge_budget=hedge_budget,
+                        cancel_token=cancel_token,
+                    )
+                    if not image:
+                        raise ValueError("Failed to generate image")
+
+                    image_path, _ = save_image_with_version(
+                        image, project_id, page_id, file_service, page_obj=page_obj
+                    )
+                    return image_path
+
+            # 失败状态与任务进度批量写入；描述仍立即写入，图片阶段会覆盖页面状态
+            progress = ProgressAggregator.from_config(
+                app, task_id, len(pages), label="Pipeline Progress"
+            )
+
+            def on_description(page_id, desc_text, error):
+                if error is None and desc_text:
+                    db.session.expire_all()
+                    page = Page.query.get(page_id)
+                    if page:
+                        page.set_description_content(
+                            {
+                                "text": desc_text,
+                                "generated_at": datetime.utcnow().isoformat(),
+                            }
+                        )
+                        page.status = "DESCRIPTION_GENERATED"
+                        db.session.commit()
+                    return
+
+                if isinstance(error, TaskCancelled):
+                    return
+                # 描述失败的页面不会进入图片阶段，直接计为失败
+                progress.record(page_id, ok=False)
+
+            def on_image(page_id, image_path, error):
+                if isinstance(error, TaskCancelled):
+                    return  # 页面状态在任务取消时统一恢复
+                progress.record(page_id, ok=error is None)
+
+            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
+            with progress:
+                run_page_pipeline(
+                    [
+                        (page.id, (page_data, i))
+                        for i, (page, page_data) in enumerate(
+                            zip(pages, pages_data, strict=True), 1
+                        )
+                    ],
+                    describe=describe,
+                    render=render,
+                    text_workers=text_workers,
+                    image_workers=image_workers,
+                    on_description=on_description,
+                    on_image=on_image,
+                    cancel_token=cancel_token,
+                )
+            completed, failed = progress.completed, progress.failed
+
+            task = Task.query.get(task_id)
+            if task:
+                task.status = "COMPLETED"
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+                logger.info(
+                    f"Task {task_id} COMPLETED - {completed} pages generated, {failed} failed"
+                )
+
+            from ..models import Project
+
+            project = Project.query.get(project_id)
+            if project and failed == 0:
+                project.status = "COMPLETED"
+                db.session.commit()
+                logger.info(f"Project {project_id} status updated to COMPLETED")
+
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason, project_id=project_id)
+        except Exception as e:
+            task = Task.query.get(task_id)
+            if task:
+                task.status = "FAILED"
+                task.error_message = str(e)
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+
+
+def generate_pages_async_task(
+    task_id: str,
+    project_id: str,
+    ai_service,
+    project_context,
+    file_service,
+    outline: List[Dict],
+    use_template: bool = True,
+    text_concurrency: int = 5,
+    image_concurrency: int = 8,
+    aspect_ratio: str = "16:9",
+    resolution: str = "2K",
+    app=None,
+    extra_requirements: str = None,
+    language: str = None,
+):
+    """
+    Background task that runs the description → image pipeline on an asyncio loop
+
+    与 generate_pages_pipeline_task 行为一致，但所有模型调用都在同一个事件循环中
+    通过 AsyncOpenAI 发起，并发数由信号量控制，不再为每个请求占用一个线程。
+    页面写入（图片编码与保存、数据库提交）经 asyncio.to_thread 在独立的应用上下文
+    中执行，不会阻塞事件循环上其他进行中的请求。
+
+    Note: app instance MUST be passed from the request context
+
+    Args:
+        text_concurrency: Maximum in-flight description calls
+        image_concurrency: Maximum in-flight image calls
+        language: Output language (zh, en, ja, auto)
+    """
+    import asyncio
+
+    from ..core.generator import AIService
+    from ..core.pipeline import run_page_pipeline_async
+
+    if app is None:
+        raise ValueError("Flask app instance must be provided")
+
+    with app.app_context():
+        try:
+            task = Task.query.get(task_id)
+            if not task:
+                logger.error(f"Task {task_id} not found")
+                return
+
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
+            task.status = "PROCESSING"
+            db.session.commit()
+
+            pages_data = ai_service.flatten_outline(outline)
+            pages = (
+                Page.query.filter_by(project_id=project_id)
+                .order_by(Page.order_index)
+                .all()
+            )
+
+            if len(pages) != len(pages_data):
+                raise ValueError("Page count mismatch")
+
+            task.set_progress({"total": len(pages), "completed": 0, "failed": 0})
+            db.session.commit()
+
+            # 异步客户端绑定事件循环：每个任务使用独立的 AIService，复用同步 provider
+            task_ai_service = AIService(
+                text_provider=ai_service.text_provider,
+                image_provider=ai_service.image_provider,
+            )
+
+            async def write(fn, *args):
+                # Own app context, hence own session: the task's session is not thread-safe
+                def run():
+                    with app.app_context():
+                        return fn(*args)
+
+                return await asyncio.to_thread(run)
+
+            def save_description(page_id, desc_text):
+                page = Page.query.get(page_id)
+                if page:
+                    page.set_description_content(
+                        {
+                            "text": desc_text,
+                            "generated_at": datetime.utcnow().isoformat(),
+                        }
+                    )
+                    page.status = "DESCRIPTION_GENERATED"
+                    db.session.commit()
+
+            def mark_generating(page_id):
+                page = Page.query.get(page_id)
+                if page:
+                    page.status = "GENERATING"
+                    db.session.commit()
+
+            def save_image(page_id, image):
+                save_image_with_version(
+                    image, project_id, page_id, file_service, page_obj=Page.query.get(page_id)
+                )
+
+            async def describe(page_id, payload):
+                page_data, page_index = payload
+                desc_text = await task_ai_service.generate_page_description_async(
+                    project_context,
+                    outline,
+                    page_data,
+                    page_index,
+                    language=language,
+                )
+                if desc_text:
+                    await write(save_description, page_id, desc_text)
+                return desc_text
+
+            async def render(page_id, payload, desc_text):
+                page_data, page_index = payload
+                await write(mark_generating, page_id)
+
+                image_urls = task_ai_service.extract_image_urls_from_markdown(
+                    desc_text
+                )
+                page_ref_image_path = None
+                if use_template:
+                    page_ref_image_path = file_service.get_template_path(project_id)
+
+                prompt = task_ai_service.generate_image_prompt(
+                    outline,
+                    page_data,
+                    desc_text,
+                    page_index,
+                    has_material_images=bool(image_urls),
+                    extra_requirements=extra_requirements,
+                    language=language,
+                    has_template=use_template,
+                )
+                image = await task_ai_service.generate_image_async(
+                    prompt,
+                    page_ref_image_path,
+                    aspect_ratio,
+                    resolution,
+                    additional_ref_images=image_urls if image_urls else None,
+                    cancel_token=cancel_token,
+                )
+                if not image:
+                    raise ValueError("Failed to generate image")
+                try:
+                    await write(save_image, page_id, image)
+                except Exception as e:
+                    logger.error(f"Failed to save image for page {page_id}: {e}")
+                    raise
+                return image
+
+            # 失败状态与任务进度批量写入；描述仍立即写入，图片阶段会覆盖页面状态
+            progress = ProgressAggregator.from_config(
+                app, task_id, len(pages), label="Async Progress"
+            )
+
+            # Descriptions and images are already saved by describe/render
+            def on_description(page_id, desc_text, error):
+                if (error is None and desc_text) or isinstance(error, TaskCancelled):
+                    return
+                progress.record(page_id, ok=False)
+
+            def on_image(page_id, image, error):
+                if isinstance(error, TaskCancelled):
+                    return  # 页面状态在任务取消时统一恢复
+                progress.record(page_id, ok=error is None)
+
+            async def run_pipeline():
+                try:
+                    await run_page_pipeline_async(
+                        [
+                            (page.id, (page_data, i))
+                            for i, (page, page_data) in enumerate(
+                                zip(pages, pages_data, strict=True), 1
+                            )
+                        ],
+                        describe=describe,
+                        render=render,
+                        text_concurrency=text_concurrency,
+                        image_concurrency=image_concurrency,
+                        on_description=on_description,
+                        on_image=on_image,
+                        cancel_token=cancel_token,
+                    )
+                finally:
+                    await task_ai_service.aclose()
+
+            with progress:
+                asyncio.run(run_pipeline())
+            completed, failed = progress.completed, progress.failed
+
+            task = Task.query.get(task_id)
+            if task:
+                task.status = "COMPLETED"
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+                logger.info(
+                    f"Task {task_id} COMPLETED - {completed} pages generated, {failed} failed"
+                )
+
+            from ..models import Project
+
+            project = Project.query.get(project_id)
+            if project and failed == 0:
+                project.status = "COMPLETED"
+                db.session.commit()
+                logger.info(f"Project {project_id} status updated to COMPLETED")
+
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason, project_id=project_id)
+        except Exception as e:
+            task = Task.query.get(task_id)
+            if task:
+                task.status = "FAILED"
+                task.error_message = str(e)
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+
+
 def generate_single_page_image_task(
     task_id: str,
     project_id: str,
@@ -575,6 +1511,8 @@ def generate_single_page_image_task(
             if not task:
                 return
 
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
             task.status = "PROCESSING"
             db.session.commit()
 
@@ -647,6 +1585,7 @@ def generate_single_page_image_task(
                 additional_ref_images=additional_ref_images
                 if additional_ref_images
                 else None,
+                cancel_token=cancel_token,
             )
 
             if not image:
@@ -665,6 +1604,8 @@ def generate_single_page_image_task(
 
             logger.info(f"✅ Task {task_id} COMPLETED - Page {page_id} image generated")
 
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason, project_id=project_id, page_ids=[page_id])
         except Exception as e:
             import traceback
 
@@ -704,6 +1645,8 @@ def edit_page_image_task(
     Background task for editing a page image
 
     Note: app instance MUST be passed from the request context
+    temp_dir is owned by the task manager, which removes it once the task has
+    finished for good (a retried attempt still needs the reference images)
     """
     if app is None:
         raise ValueError("Flask app instance must be provided")
@@ -715,6 +1658,8 @@ def edit_page_image_task(
             if not task:
                 return
 
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
             task.status = "PROCESSING"
             db.session.commit()
 
@@ -737,26 +1682,17 @@ def edit_page_image_task(
 
             # Edit image
             logger.info(f"🎨 Editing image for page {page_id}...")
-            try:
-                image = ai_service.edit_image(
-                    edit_instruction,
-                    current_image_path,
-                    aspect_ratio,
-                    resolution,
-                    original_description=original_description,
-                    additional_ref_images=additional_ref_images
-                    if additional_ref_images
-                    else None,
-                )
-            finally:
-                # Clean up temp directory if created
-                if temp_dir:
-                    import shutil
-                    from pathlib import Path
-
-                    temp_path = Path(temp_dir)
-                    if temp_path.exists():
-                        shutil.rmtree(temp_dir)
+            image = ai_service.edit_image(
+                edit_instruction,
+                current_image_path,
+                aspect_ratio,
+                resolution,
+                original_description=original_description,
+                additional_ref_images=additional_ref_images
+                if additional_ref_images
+                else None,
+                cancel_token=cancel_token,
+            )
 
             if not image:
                 raise ValueError("Failed to edit image")
@@ -774,21 +1710,14 @@ def edit_page_image_task(
 
             logger.info(f"✅ Task {task_id} COMPLETED - Page {page_id} image edited")
 
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason, project_id=project_id, page_ids=[page_id])
         except Exception as e:
             import traceback
 
             error_detail = traceback.format_exc()
             logger.error(f"Task {task_id} FAILED: {error_detail}")
 
-            # Clean up temp directory on error
-            if temp_dir:
-                import shutil
-                from pathlib import Path
-
-                temp_path = Path(temp_dir)
-                if temp_path.exists():
-                    shutil.rmtree(temp_dir)
-
             # Mark task as failed
             task = Task.query.get(task_id)
             if task:
@@ -822,6 +1751,7 @@ def generate_material_image_task(
     复用核心的generate_image逻辑，但保存到Material表而不是Page表
 
     Note: app instance MUST be passed from the request context
+    temp_dir is removed by the task manager, not here (see edit_page_image_task)
     project_id can be None for global materials (but Task model requires a project_id,
     so we use a special value 'global' for task tracking)
     """
@@ -835,6 +1765,8 @@ def generate_material_image_task(
             if not task:
                 return
 
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
             task.status = "PROCESSING"
             db.session.commit()
 
@@ -846,6 +1778,7 @@ def generate_material_image_task(
                 aspect_ratio=aspect_ratio,
                 resolution=resolution,
                 additional_ref_images=additional_ref_images or None,
+                cancel_token=cancel_token,
             )
 
             if not image:
@@ -893,6 +1826,8 @@ def generate_material_image_task(
                 f"✅ Task {task_id} COMPLETED - Material {material.id} generated"
             )
 
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason)
         except Exception as e:
             import traceback
 
@@ -907,15 +1842,6 @@ def generate_material_image_task(
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
 
-        finally:
-            # Clean up temp directory
-            if temp_dir:
-                import shutil
-
-                temp_path = Path(temp_dir)
-                if temp_path.exists():
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-
 
 def export_editable_pptx_with_recursive_analysis_task(
     task_id: str,
@@ -969,6 +1895,9 @@ def export_editable_pptx_with_recursive_analysis_task(
         logger.info(f"开始递归分析导出任务 {task_id} for project {project_id}")
 
         try:
+            cancel_token = get_task_token(task_id)
+            cancel_token.raise_if_cancelled()
+
             # Get project
             project = Project.query.get(project_id)
             if not project:
@@ -1100,6 +2029,7 @@ def export_editable_pptx_with_recursive_analysis_task(
                     progress_callback=progress_callback,
                     export_extractor_method=export_extractor_method,
                     export_inpaint_method=export_inpaint_method,
+                    cancel_token=cancel_token,
                 )
             )
 
@@ -1145,6 +2075,8 @@ def export_editable_pptx_with_recursive_analysis_task(
                     f"✓ 任务 {task_id} 完成 - 递归分析导出成功（深度={max_depth}）"
                 )
 
+        except TaskCancelled as e:
+            _mark_task_cancelled(task_id, e.reason)
         except Exception as e:
             import traceback
 
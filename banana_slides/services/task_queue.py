@@ -0,0 +1,991 @@
+"""
+Durable task queue
+
+The in-memory TaskManager loses queued and running work on restart and
+leaves their Task rows stuck in PROCESSING. With a durable backend, every
+submitted task is written to a queue that any number of worker processes
+(``banana-slides worker``) drain:
+
+- database (default): the ``task_jobs`` table next to ``tasks``, leased with
+  compare-and-set UPDATEs so several workers can share one database
+- redis: a local Redis-compatible store (``pip install redis``), leased with
+  Lua scripts over a ready and a leased sorted set
+
+Delivery is at-least-once:
+
+- a worker leases a job for TASK_LEASE_SECONDS and extends the lease with a
+  heartbeat every TASK_HEARTBEAT_SECONDS while the task runs
+- a job whose lease expires (worker crashed or was killed) becomes visible
+  again and is picked up by another worker
+- a task that raises (the run crashed rather than failing cleanly) is
+  retried with exponential backoff (TASK_RETRY_BACKOFF_SECONDS, capped at
+  TASK_RETRY_BACKOFF_MAX) until TASK_MAX_ATTEMPTS, then marked DEAD and its
+  Task row FAILED
+- a task that returns with its Task row FAILED has handled its own error
+  (bad input, a 4xx from the provider, ...); it is marked DEAD at once, since
+  re-running it would repeat paid, non-idempotent model calls
+
+Jobs carry a priority class (see task_manager.PRIORITY_CLASSES) and their
+project. Workers lease the most urgent class first, aging waiting jobs by one
+class per TASK_PRIORITY_AGING_SECONDS, and keep TASK_RESERVED_INTERACTIVE_SLOTS
+of their slots for interactive jobs. The database backend also rotates
+between projects within a class; the redis backend serves each class in
+arrival order.
+
+Cancelling a task (``TaskManager.cancel_task``) removes a job that has not
+been leased yet; a running job is cancelled through its CancellationToken
+(see services.cancellation): workers poll for Task rows set to CANCELLED
+every TASK_CANCEL_POLL_SECONDS. Cancelled and timed-out tasks are not retried.
+
+Task functions keep their signature ``func(task_id, ..., app=None)``. Their
+arguments are stored as JSON; ``ai_service``, ``file_service`` and ``app`` are
+not stored but provided by the worker, and ``project_context`` is stored via
+``ProjectContext.to_dict()``.
+
+A ``temp_dir`` argument (uploaded reference images) is moved into
+UPLOAD_FOLDER/task_files/<task_id> on enqueue, so every attempt on every
+worker host sees the same files, and is removed once the job is finished for
+good (done, dead or cancelled) rather than after each attempt.
+"""
+
+import functools
+import importlib
+import inspect
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from ..models import Task, TaskJob, db
+from .cancellation import TaskCancelled, cancel_task_token, task_cancellation
+
+logger = logging.getLogger(__name__)
+
+QUEUE_BACKENDS = ("memory", "database", "redis")
+
+# Numeric priorities (0 = interactive ... 3 = export), see task_manager.PRIORITY_CLASSES
+PRIORITY_LEVELS = 4
+DEFAULT_PRIORITY = 2
+
+# Provided by the worker instead of being stored in the payload
+_INJECTED_ARGS = ("ai_service", "file_service", "app")
+
+# Payload entry holding the run deadline in seconds (not a task function argument)
+DEADLINE_KEY = "_deadline_seconds"
+
+# Task function argument naming a directory of files owned by the task
+TEMP_DIR_ARG = "temp_dir"
+
+
+@dataclass
+class LeasedJob:
+    """A job leased by one worker"""
+
+    task_id: str
+    func_name: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    priority: int = DEFAULT_PRIORITY
+    project_id: Optional[str] = None
+    waited: float = 0.0  # Seconds between becoming due and being leased
+
+
+def retry_delay(attempts: int, base: float, cap: float) -> float:
+    """Exponential backoff with jitter for the given (1-based) attempt"""
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def serialize_call(func: Callable, task_id: str, args: tuple, kwargs: dict) -> Tuple[str, Dict]:
+    """
+    Turn a task call into (func_name, JSON payload)
+
+    Raises:
+        ValueError: If the function is not importable or an argument is not JSON-serializable
+    """
+    func_name = f"{func.__module__}:{func.__qualname__}"
+    if not func.__module__.startswith("banana_slides.") or "<" in func.__qualname__:
+        raise ValueError(f"Task function {func_name} is not importable by workers")
+
+    bound = inspect.signature(func).bind_partial(task_id, *args, **kwargs)
+    payload = {}
+    for name, value in bound.arguments.items():
+        if name == "task_id" or name in _INJECTED_ARGS:
+            continue
+        if name == "project_context" and value is not None:
+            value = value.to_dict()
+        payload[name] = value
+
+    try:
+        json.dumps(payload)
+    except TypeError as e:
+        raise ValueError(f"Task {func_name} has arguments that cannot be queued: {e}") from e
+    return func_name, payload
+
+
+def stage_task_files(task_id: str, payload: Dict, upload_folder: str):
+    """
+    Move the payload's temp_dir into shared upload storage, in place
+
+    Arguments naming files inside the old directory (alone or in a list) are
+    rewritten to the new location.
+    """
+    temp_dir = payload.get(TEMP_DIR_ARG)
+    if not temp_dir or not os.path.isdir(temp_dir):
+        return
+    source = os.path.abspath(temp_dir)
+    shared = os.path.abspath(upload_folder)
+    if source.startswith(shared + os.sep):
+        return
+    target = os.path.join(shared, "task_files", task_id)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(source, target)
+
+    def rebase(value):
+        if isinstance(value, str) and value:
+            path = os.path.abspath(value)
+            if path == source or path.startswith(source + os.sep):
+                return target + path[len(source):]
+        return value
+
+    for name, value in payload.items():
+        if isinstance(value, list):
+            payload[name] = [rebase(item) for item in value]
+        else:
+            payload[name] = rebase(value)
+
+
+def discard_task_files(payload: Optional[Dict]):
+    """Remove the temp_dir of a task that will not run again"""
+    temp_dir = (payload or {}).get(TEMP_DIR_ARG)
+    if temp_dir:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def resolve_call(func_name: str, payload: Dict, app) -> Callable[[str], Any]:
+    """Import a task function and bind its stored and injected arguments"""
+    module_name, _, qualname = func_name.partition(":")
+    if not module_name.startswith("banana_slides."):
+        raise ValueError(f"Refusing to run task function outside banana_slides: {func_name}")
+
+    target = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        target = getattr(target, attr)
+
+    params = inspect.signature(target).parameters
+    kwargs = dict(payload)
+    if "ai_service" in params:
+        from .ai_service_manager import get_ai_service
+
+        kwargs["ai_service"] = get_ai_service()
+    if "file_service" in params:
+        from ..config import get_config
+        from ..core.file_service import FileService
+
+        kwargs["file_service"] = FileService(
+            app.config.get("UPLOAD_FOLDER") or get_config().UPLOAD_FOLDER
+        )
+    if isinstance(kwargs.get("project_context"), dict):
+        from ..core.generator import ProjectContext
+
+        context = kwargs["project_context"]
+        kwargs["project_context"] = ProjectContext(
+            context, reference_files_content=context.get("reference_files_content")
+        )
+    if "app" in params:
+        kwargs["app"] = app
+    return functools.partial(target, **kwargs)
+
+
+def _update_task_row(app, task_id: str, status: str, error: Optional[str] = None):
+    """Reflect queue state on the user-visible Task row"""
+    with app.app_context():
+        task = Task.query.get(task_id)
+        if task is None:
+            return
+        task.status = status
+        task.error_message = error
+        if status in ("FAILED", "CANCELLED"):
+            task.completed_at = datetime.utcnow()
+        db.session.commit()
+
+
+class DatabaseTaskQueue:
+    """Queue stored in the task_jobs table of the application database"""
+
+    # Due jobs considered per priority class when choosing the next lease
+    CANDIDATES_PER_CLASS = 20
+
+    def __init__(self, app, aging_seconds: float = 120.0):
+        """
+        Args:
+            app: Flask app providing the database context
+            aging_seconds: Waiting this long raises a job by one priority class (0 = never)
+        """
+        self.app = app
+        self.aging_seconds = aging_seconds
+        # project_id -> monotonic time this process last leased one of its jobs
+        self._last_served: Dict[Optional[str], float] = {}
+        self._served_lock = threading.Lock()
+
+    @staticmethod
+    def _ready(now: datetime):
+        """Jobs that may be leased: queued and due, or leased with an expired lease"""
+        return or_(
+            and_(TaskJob.status == "QUEUED", TaskJob.available_at <= now),
+            and_(
+                TaskJob.status == "LEASED",
+                TaskJob.lease_expires_at <= now,
+                TaskJob.attempts < TaskJob.max_attempts,
+            ),
+        )
+
+    def enqueue(
+        self,
+        task_id: str,
+        func_name: str,
+        payload: Dict,
+        max_attempts: int = 3,
+        priority: int = DEFAULT_PRIORITY,
+        project_id: Optional[str] = None,
+    ):
+        with self.app.app_context():
+            job = TaskJob(
+                task_id=task_id,
+                func_name=func_name,
+                status="QUEUED",
+                attempts=0,
+                max_attempts=max_attempts,
+                priority=priority,
+                project_id=project_id,
+                available_at=datetime.utcnow(),
+            )
+            job.set_payload(payload)
+            db.session.merge(job)
+            db.session.commit()
+
+    def _candidates(self, now: datetime, max_priority: int) -> List[TaskJob]:
+        """The oldest due jobs of each priority class up to max_priority"""
+        candidates = []
+        for priority in range(max_priority + 1):
+            candidates.extend(
+                TaskJob.query.filter(self._ready(now), TaskJob.priority == priority)
+                .order_by(TaskJob.available_at)
+                .limit(self.CANDIDATES_PER_CLASS)
+                .all()
+            )
+        return candidates
+
+    def _choose(self, candidates: List[TaskJob], now: datetime) -> TaskJob:
+        """
+        Most urgent class after aging, then the least recently served project
+        in that class, then the oldest job of that project
+        """
+
+        def aged(job: TaskJob) -> float:
+            if self.aging_seconds <= 0:
+                return job.priority
+            waited = (now - job.available_at).total_seconds()
+            return job.priority - waited / self.aging_seconds
+
+        head = min(candidates, key=aged)
+        same_class = [job for job in candidates if job.priority == head.priority]
+        with self._served_lock:
+            return min(
+                same_class,
+                key=lambda job: (self._last_served.get(job.project_id, 0.0), job.available_at),
+            )
+
+    def _mark_served(self, project_id: Optional[str]):
+        with self._served_lock:
+            self._last_served[project_id] = time.monotonic()
+            if len(self._last_served) > 10000:
+                # Forget the projects served longest ago
+                for key, _ in sorted(self._last_served.items(), key=lambda item: item[1])[:5000]:
+                    del self._last_served[key]
+
+    def lease(
+        self, worker_id: str, lease_seconds: float, max_priority: Optional[int] = None
+    ) -> Optional[LeasedJob]:
+        """
+        Lease the next job
+
+        Args:
+            max_priority: Only consider jobs of this priority or more urgent
+                (0 = interactive only); None for all classes
+        """
+        if max_priority is None:
+            max_priority = PRIORITY_LEVELS - 1
+        with self.app.app_context():
+            now = datetime.utcnow()
+            self._reap_expired(now)
+
+            # Another worker may win the race for a candidate; try the next one
+            for _ in range(5):
+                candidates = self._candidates(now, max_priority)
+                if not candidates:
+                    return None
+                candidate = self._choose(candidates, now)
+
+                leased = (
+                    TaskJob.query.filter(
+                        TaskJob.task_id == candidate.task_id, self._ready(now)
+                    ).update(
+                        {
+                            "status": "LEASED",
+                            "lease_owner": worker_id,
+                            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                            "attempts": TaskJob.attempts + 1,
+                            "updated_at": now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.session.commit()
+                if leased == 1:
+                    self._mark_served(candidate.project_id)
+                    job = TaskJob.query.get(candidate.task_id)
+                    return LeasedJob(
+                        task_id=job.task_id,
+                        func_name=job.func_name,
+                        payload=job.get_payload(),
+                        attempts=job.attempts,
+                        max_attempts=job.max_attempts,
+                        priority=job.priority,
+                        project_id=job.project_id,
+                        waited=max(0.0, (now - candidate.available_at).total_seconds()),
+                    )
+            return None
+
+    def _reap_expired(self, now: datetime):
+        """Expired leases with no attempts left are dead"""
+        expired = TaskJob.query.filter(
+            TaskJob.status == "LEASED",
+            TaskJob.lease_expires_at <= now,
+            TaskJob.attempts >= TaskJob.max_attempts,
+        ).all()
+        for job in expired:
+            error = f"Lease expired after {job.attempts} attempts (worker lost)"
+            dead = TaskJob.query.filter(
+                TaskJob.task_id == job.task_id,
+                TaskJob.status == "LEASED",
+                TaskJob.lease_expires_at <= now,
+            ).update(
+                {"status": "DEAD", "lease_owner": None, "last_error": error},
+                synchronize_session=False,
+            )
+            db.session.commit()
+            if dead:
+                logger.error(f"Task {job.task_id} is dead: {error}")
+                _update_task_row(self.app, job.task_id, "FAILED", error)
+                discard_task_files(job.get_payload())
+
+    def _update_owned(self, job: LeasedJob, worker_id: str, values: Dict) -> bool:
+        with self.app.app_context():
+            updated = TaskJob.query.filter(
+                TaskJob.task_id == job.task_id,
+                TaskJob.status == "LEASED",
+                TaskJob.lease_owner == worker_id,
+            ).update({**values, "updated_at": datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+            return updated == 1
+
+    def heartbeat(self, job: LeasedJob, worker_id: str, lease_seconds: float) -> bool:
+        """Extend the lease; False if the job is no longer ours"""
+        return self._update_owned(
+            job,
+            worker_id,
+            {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)},
+        )
+
+    def complete(self, job: LeasedJob, worker_id: str) -> bool:
+        return self._update_owned(
+            job, worker_id, {"status": "DONE", "lease_owner": None, "last_error": None}
+        )
+
+    def fail(
+        self, job: LeasedJob, worker_id: str, error: str, delay: float, retry: bool = True
+    ) -> str:
+        """
+        Schedule a retry after delay seconds, or mark the job dead; returns the new status
+
+        Args:
+            retry: False marks the job dead regardless of the attempts left
+        """
+        if not retry or job.attempts >= job.max_attempts:
+            status, values = "DEAD", {"status": "DEAD"}
+        else:
+            status = "QUEUED"
+            values = {
+                "status": "QUEUED",
+                "available_at": datetime.utcnow() + timedelta(seconds=delay),
+            }
+        if self._update_owned(
+            job, worker_id, {**values, "lease_owner": None, "last_error": error}
+        ):
+            return status
+        return "LOST"
+
+    def cancel(self, task_id: str) -> bool:
+        """Drop a job that is not leased; False if it is running or already finished"""
+        with self.app.app_context():
+            cancelled = TaskJob.query.filter(
+                TaskJob.task_id == task_id, TaskJob.status == "QUEUED"
+            ).update(
+                {"status": "CANCELLED", "updated_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.session.commit()
+            if cancelled != 1:
+                return False
+            discard_task_files(TaskJob.query.get(task_id).get_payload())
+            return True
+
+    def is_pending(self, task_id: str) -> bool:
+        with self.app.app_context():
+            job = TaskJob.query.get(task_id)
+            return job is not None and job.status in ("QUEUED", "LEASED")
+
+    def stats(self) -> Dict[str, int]:
+        with self.app.app_context():
+            rows = (
+                db.session.query(TaskJob.status, func.count(TaskJob.task_id))
+                .group_by(TaskJob.status)
+                .all()
+            )
+            return {status: count for status, count in rows}
+
+    def depths(self) -> Dict[int, int]:
+        """Queued (not leased) jobs per priority"""
+        with self.app.app_context():
+            rows = (
+                db.session.query(TaskJob.priority, func.count(TaskJob.task_id))
+                .filter(TaskJob.status == "QUEUED")
+                .group_by(TaskJob.priority)
+                .all()
+            )
+            return {priority: count for priority, count in rows}
+
+
+# Requeue expired leases (or mark them dead), then lease the due job with the
+# lowest aged priority. KEYS[1] is the leased set, KEYS[2 + p] the ready set
+# of priority p.
+_REDIS_LEASE = """
+local now = tonumber(ARGV[1])
+local prefix = ARGV[4]
+local max_priority = tonumber(ARGV[5])
+local aging = tonumber(ARGV[6])
+local dead = {}
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+  redis.call('ZREM', KEYS[1], id)
+  local key = prefix .. ':job:' .. id
+  local attempts = tonumber(redis.call('HGET', key, 'attempts') or '0')
+  local max_attempts = tonumber(redis.call('HGET', key, 'max_attempts') or '1')
+  if attempts >= max_attempts then
+    redis.call('HSET', key, 'status', 'DEAD', 'lease_owner', '')
+    table.insert(dead, id)
+  else
+    local priority = tonumber(redis.call('HGET', key, 'priority') or '2')
+    redis.call('HSET', key, 'status', 'QUEUED', 'lease_owner', '')
+    redis.call('ZADD', KEYS[2 + priority], now, id)
+  end
+end
+local leased, leased_from, best, waited = '', nil, nil, 0
+for priority = 0, max_priority do
+  local head = redis.call('ZRANGEBYSCORE', KEYS[2 + priority], '-inf', now, 'WITHSCORES', 'LIMIT', 0, 1)
+  if #head > 0 then
+    local wait = now - tonumber(head[2])
+    local aged = priority
+    if aging > 0 then
+      aged = priority - wait / aging
+    end
+    if best == nil or aged < best then
+      best, leased, leased_from, waited = aged, head[1], KEYS[2 + priority], wait
+    end
+  end
+end
+if leased ~= '' then
+  local key = prefix .. ':job:' .. leased
+  redis.call('ZREM', leased_from, leased)
+  redis.call('ZADD', KEYS[1], tonumber(ARGV[2]), leased)
+  redis.call('HINCRBY', key, 'attempts', 1)
+  redis.call('HSET', key, 'status', 'LEASED', 'lease_owner', ARGV[3])
+end
+return {leased, dead, tostring(waited)}
+"""
+
+_REDIS_HEARTBEAT = """
+if redis.call('HGET', KEYS[2], 'lease_owner') == ARGV[1]
+    and redis.call('ZSCORE', KEYS[1], ARGV[3]) then
+  redis.call('ZADD', KEYS[1], tonumber(ARGV[2]), ARGV[3])
+  return 1
+end
+return 0
+"""
+
+# Release a lease as DONE, DEAD or QUEUED (retry at ARGV[4])
+_REDIS_FINISH = """
+if redis.call('HGET', KEYS[3], 'lease_owner') ~= ARGV[1]
+    or not redis.call('ZSCORE', KEYS[2], ARGV[2]) then
+  return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[2])
+redis.call('HSET', KEYS[3], 'status', ARGV[3], 'lease_owner', '', 'last_error', ARGV[5])
+if ARGV[3] == 'QUEUED' then
+  redis.call('ZADD', KEYS[1], tonumber(ARGV[4]), ARGV[2])
+else
+  redis.call('EXPIRE', KEYS[3], tonumber(ARGV[6]))
+end
+return 1
+"""
+
+
+class RedisTaskQueue:
+    """Queue stored in a Redis-compatible server (requires the redis package)"""
+
+    # Finished job hashes are kept this long for inspection
+    FINISHED_TTL = 7 * 24 * 3600
+
+    def __init__(
+        self, app, url: str, prefix: str = "banana_slides:tasks", aging_seconds: float = 120.0
+    ):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "TASK_QUEUE_BACKEND=redis requires the redis package (pip install redis)"
+            ) from e
+
+        self.app = app
+        self.prefix = prefix
+        self.aging_seconds = aging_seconds
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._ready_keys = [f"{prefix}:ready:{p}" for p in range(PRIORITY_LEVELS)]
+        self._leased_key = f"{prefix}:leased"
+        self._lease_script = self._redis.register_script(_REDIS_LEASE)
+        self._heartbeat_script = self._redis.register_script(_REDIS_HEARTBEAT)
+        self._finish_script = self._redis.register_script(_REDIS_FINISH)
+
+    def _job_key(self, task_id: str) -> str:
+        return f"{self.prefix}:job:{task_id}"
+
+    def enqueue(
+        self,
+        task_id: str,
+        func_name: str,
+        payload: Dict,
+        max_attempts: int = 3,
+        priority: int = DEFAULT_PRIORITY,
+        project_id: Optional[str] = None,
+    ):
+        pipe = self._redis.pipeline()
+        pipe.delete(self._job_key(task_id))
+        pipe.hset(
+            self._job_key(task_id),
+            mapping={
+                "func_name": func_name,
+                "payload": json.dumps(payload),
+                "status": "QUEUED",
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "priority": priority,
+                "project_id": project_id or "",
+                "lease_owner": "",
+                "last_error": "",
+            },
+        )
+        pipe.zadd(self._ready_keys[priority], {task_id: time.time()})
+        pipe.execute()
+
+    def lease(
+        self, worker_id: str, lease_seconds: float, max_priority: Optional[int] = None
+    ) -> Optional[LeasedJob]:
+        if max_priority is None:
+            max_priority = PRIORITY_LEVELS - 1
+        now = time.time()
+        leased, dead, waited = self._lease_script(
+            keys=[self._leased_key, *self._ready_keys],
+            args=[
+                now,
+                now + lease_seconds,
+                worker_id,
+                self.prefix,
+                max_priority,
+                self.aging_seconds,
+            ],
+        )
+        for task_id in dead:
+            error = "Lease expired on the last attempt (worker lost)"
+            logger.error(f"Task {task_id} is dead: {error}")
+            self._redis.hset(self._job_key(task_id), "last_error", error)
+            self._redis.expire(self._job_key(task_id), self.FINISHED_TTL)
+            _update_task_row(self.app, task_id, "FAILED", error)
+            discard_task_files(self._payload(task_id))
+
+        if not leased:
+            return None
+        job = self._redis.hgetall(self._job_key(leased))
+        return LeasedJob(
+            task_id=leased,
+            func_name=job["func_name"],
+            payload=json.loads(job.get("payload") or "{}"),
+            attempts=int(job["attempts"]),
+            max_attempts=int(job["max_attempts"]),
+            priority=int(job.get("priority", DEFAULT_PRIORITY)),
+            project_id=job.get("project_id") or None,
+            waited=float(waited),
+        )
+
+    def _payload(self, task_id: str) -> Dict:
+        return json.loads(self._redis.hget(self._job_key(task_id), "payload") or "{}")
+
+    def heartbeat(self, job: LeasedJob, worker_id: str, lease_seconds: float) -> bool:
+        return bool(
+            self._heartbeat_script(
+                keys=[self._leased_key, self._job_key(job.task_id)],
+                args=[worker_id, time.time() + lease_seconds, job.task_id],
+            )
+        )
+
+    def _finish(self, job: LeasedJob, worker_id: str, status: str, available_at: float, error: str) -> bool:
+        return bool(
+            self._finish_script(
+                keys=[
+                    self._ready_keys[job.priority],
+                    self._leased_key,
+                    self._job_key(job.task_id),
+                ],
+                args=[worker_id, job.task_id, status, available_at, error, self.FINISHED_TTL],
+            )
+        )
+
+    def complete(self, job: LeasedJob, worker_id: str) -> bool:
+        return self._finish(job, worker_id, "DONE", 0, "")
+
+    def fail(
+        self, job: LeasedJob, worker_id: str, error: str, delay: float, retry: bool = True
+    ) -> str:
+        status = "DEAD" if not retry or job.attempts >= job.max_attempts else "QUEUED"
+        if self._finish(job, worker_id, status, time.time() + delay, error):
+            return status
+        return "LOST"
+
+    def cancel(self, task_id: str) -> bool:
+        """Drop a job that is not leased; False if it is running or already finished"""
+        priority = self._redis.hget(self._job_key(task_id), "priority")
+        if priority is None:
+            return False
+        # Removing it from the ready set wins against a concurrent lease
+        if not self._redis.zrem(self._ready_keys[int(priority)], task_id):
+            return False
+        pipe = self._redis.pipeline()
+        pipe.hset(self._job_key(task_id), "status", "CANCELLED")
+        pipe.expire(self._job_key(task_id), self.FINISHED_TTL)
+        pipe.execute()
+        discard_task_files(self._payload(task_id))
+        return True
+
+    def is_pending(self, task_id: str) -> bool:
+        return self._redis.hget(self._job_key(task_id), "status") in ("QUEUED", "LEASED")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "QUEUED": sum(self.depths().values()),
+            "LEASED": self._redis.zcard(self._leased_key),
+        }
+
+    def depths(self) -> Dict[int, int]:
+        """Queued (not leased) jobs per priority"""
+        pipe = self._redis.pipeline()
+        for key in self._ready_keys:
+            pipe.zcard(key)
+        return dict(enumerate(pipe.execute()))
+
+
+def create_task_queue(app, backend: Optional[str] = None):
+    """Build the durable queue configured by TASK_QUEUE_BACKEND (or backend)"""
+    from ..config import get_config
+
+    config = get_config()
+    backend = (backend or config.TASK_QUEUE_BACKEND).lower()
+    if backend == "redis":
+        return RedisTaskQueue(
+            app, config.TASK_QUEUE_REDIS_URL, aging_seconds=config.TASK_PRIORITY_AGING_SECONDS
+        )
+    if backend == "database":
+        return DatabaseTaskQueue(app, aging_seconds=config.TASK_PRIORITY_AGING_SECONDS)
+    raise ValueError(f"Unknown durable task queue backend: {backend}")
+
+
+class TaskWorker:
+    """Leases jobs from a queue and runs them on a thread pool, heartbeating their leases"""
+
+    def __init__(
+        self,
+        queue,
+        app,
+        concurrency: int = 4,
+        lease_seconds: float = 120.0,
+        heartbeat_seconds: float = 30.0,
+        poll_seconds: float = 1.0,
+        backoff_seconds: float = 10.0,
+        backoff_max: float = 600.0,
+        worker_id: Optional[str] = None,
+        reserved_interactive: int = 1,
+        metrics=None,
+        deadline_seconds: float = 0.0,
+        cancel_poll_seconds: float = 2.0,
+    ):
+        """
+        Args:
+            queue: DatabaseTaskQueue or RedisTaskQueue
+            app: Flask app providing the database context for tasks
+            concurrency: Tasks run at the same time
+            lease_seconds: Visibility timeout of a leased job
+            heartbeat_seconds: Interval between lease extensions
+            poll_seconds: Sleep between polls when the queue is empty
+            backoff_seconds: First retry delay (doubled per attempt)
+            backoff_max: Upper bound on the retry delay
+            worker_id: Lease owner name (default: host:pid:random)
+            reserved_interactive: Slots that only interactive jobs may use
+            metrics: Optional task_manager.SchedulerMetrics recording waits per class
+            deadline_seconds: Run deadline of jobs enqueued without one (0 = none)
+            cancel_poll_seconds: Interval between checks for cancelled Task rows
+        """
+        self.queue = queue
+        self.app = app
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = min(heartbeat_seconds, lease_seconds / 3)
+        self.deadline_seconds = deadline_seconds
+        self.cancel_poll_seconds = min(cancel_poll_seconds, self.heartbeat_seconds)
+        self.poll_seconds = poll_seconds
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max = backoff_max
+        self.reserved_interactive = min(reserved_interactive, concurrency - 1)
+        self.metrics = metrics
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        )
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="task-worker"
+        )
+        self._running: Dict[str, LeasedJob] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._drained = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(
+        cls, queue, app, concurrency: Optional[int] = None, metrics=None
+    ) -> "TaskWorker":
+        from ..config import get_config
+
+        config = get_config()
+        return cls(
+            queue,
+            app,
+            concurrency=concurrency or config.TASK_WORKER_CONCURRENCY,
+            lease_seconds=config.TASK_LEASE_SECONDS,
+            heartbeat_seconds=config.TASK_HEARTBEAT_SECONDS,
+            poll_seconds=config.TASK_QUEUE_POLL_SECONDS,
+            backoff_seconds=config.TASK_RETRY_BACKOFF_SECONDS,
+            backoff_max=config.TASK_RETRY_BACKOFF_MAX,
+            reserved_interactive=config.TASK_RESERVED_INTERACTIVE_SLOTS,
+            metrics=metrics,
+            deadline_seconds=config.TASK_DEADLINE_SECONDS,
+            cancel_poll_seconds=config.TASK_CANCEL_POLL_SECONDS,
+        )
+
+    def start(self):
+        """Run the worker loop in a background thread (embedded in the web process)"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.run, name=f"task-worker-{self.worker_id}", daemon=True
+            )
+            self._thread.start()
+
+    def wake(self):
+        """Poll immediately instead of waiting for the next poll interval"""
+        self._wakeup.set()
+
+    def stop(self):
+        """Stop leasing new jobs; run() returns once running jobs have finished"""
+        self._stop.set()
+        self._wakeup.set()
+
+    def run(self):
+        """Lease and run jobs until stop() is called"""
+        logger.info(
+            f"Task worker {self.worker_id} started (concurrency={self.concurrency})"
+        )
+        heartbeat = threading.Thread(
+            target=self._heartbeat_loop, name="task-heartbeat", daemon=True
+        )
+        heartbeat.start()
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    free = self.concurrency - len(self._running)
+                job = None
+                if free > 0:
+                    # The last reserved slots only take interactive jobs
+                    max_priority = None if free > self.reserved_interactive else 0
+                    try:
+                        job = self.queue.lease(
+                            self.worker_id, self.lease_seconds, max_priority=max_priority
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to lease a task: {e}", exc_info=True)
+                if job is not None:
+                    with self._lock:
+                        self._running[job.task_id] = job
+                    if self.metrics is not None:
+                        self.metrics.record_dispatch(job.priority, job.waited)
+                    self._executor.submit(self._execute, job)
+                    continue
+
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+        finally:
+            self._stop.set()
+            self._executor.shutdown(wait=True)
+            self._drained.set()
+            heartbeat.join()
+            logger.info(f"Task worker {self.worker_id} stopped")
+
+    def _execute(self, job: LeasedJob):
+        logger.info(
+            f"Running task {job.task_id} ({job.func_name}), "
+            f"attempt {job.attempts}/{job.max_attempts}"
+        )
+        error = None
+        retry = True
+        payload = dict(job.payload)
+        deadline = payload.pop(DEADLINE_KEY, None) or self.deadline_seconds or None
+        try:
+            if self._task_status(job.task_id) == "CANCELLED":
+                logger.info(f"Task {job.task_id} was cancelled before it started")
+            else:
+                with self.app.app_context():
+                    call = resolve_call(job.func_name, payload, self.app)
+                with task_cancellation(job.task_id, deadline):
+                    call(job.task_id)
+                # The task returned: a FAILED row is its own verdict, not a crash
+                error = self._task_error(job.task_id)
+                retry = False
+        except TaskCancelled as e:
+            # Raised outside the task's own error handling: still not retried
+            logger.info(f"Task {job.task_id} {e.reason}")
+            _update_task_row(self.app, job.task_id, "CANCELLED", f"Task {e.reason}")
+        except Exception as e:
+            logger.error(f"Task {job.task_id} raised: {e}", exc_info=True)
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self._running.pop(job.task_id, None)
+            if self.metrics is not None:
+                self.metrics.record_done(job.priority)
+            self._wakeup.set()
+
+        try:
+            if error is None:
+                if self.queue.complete(job, self.worker_id):
+                    discard_task_files(job.payload)
+                else:
+                    logger.warning(f"Task {job.task_id} finished after its lease was lost")
+                return
+
+            if not retry:
+                if self.queue.fail(job, self.worker_id, error, 0, retry=False) == "DEAD":
+                    discard_task_files(job.payload)
+                logger.error(f"Task {job.task_id} failed, not retrying: {error}")
+                return
+
+            delay = retry_delay(job.attempts, self.backoff_seconds, self.backoff_max)
+            status = self.queue.fail(job, self.worker_id, error, delay)
+            if status == "QUEUED":
+                logger.warning(
+                    f"Task {job.task_id} failed (attempt {job.attempts}/{job.max_attempts}), "
+                    f"retrying in {delay:.0f}s: {error}"
+                )
+                _update_task_row(
+                    self.app,
+                    job.task_id,
+                    "PENDING",
+                    f"Retrying after attempt {job.attempts} failed: {error}",
+                )
+            elif status == "DEAD":
+                logger.error(f"Task {job.task_id} failed permanently: {error}")
+                _update_task_row(self.app, job.task_id, "FAILED", error)
+                discard_task_files(job.payload)
+        except Exception as e:
+            logger.error(f"Failed to record result of task {job.task_id}: {e}", exc_info=True)
+
+    def _task_status(self, task_id: str) -> Optional[str]:
+        with self.app.app_context():
+            task = Task.query.get(task_id)
+            return task.status if task is not None else None
+
+    def _task_error(self, task_id: str) -> Optional[str]:
+        """
+        Task functions catch their own errors and mark the Task row FAILED
+        (CANCELLED tasks count as finished)
+        """
+        with self.app.app_context():
+            task = Task.query.get(task_id)
+            if task is not None and task.status == "FAILED":
+                return task.error_message or "Task failed"
+        return None
+
+    def _cancel_poll(self, jobs: List[LeasedJob]):
+        """Cancel the tokens of running jobs whose Task row was set to CANCELLED elsewhere"""
+        with self.app.app_context():
+            cancelled = [
+                task_id
+                for (task_id,) in db.session.query(Task.id).filter(
+                    Task.id.in_([job.task_id for job in jobs]), Task.status == "CANCELLED"
+                )
+            ]
+            db.session.rollback()
+        for task_id in cancelled:
+            if cancel_task_token(task_id):
+                logger.info(f"Task {task_id} was cancelled, stopping it")
+
+    def _heartbeat_loop(self):
+        # Keeps running after stop() until the running jobs have drained
+        last_heartbeat = time.monotonic()
+        while not self._drained.wait(self.cancel_poll_seconds):
+            with self._lock:
+                jobs = list(self._running.values())
+            if jobs:
+                try:
+                    self._cancel_poll(jobs)
+                except Exception as e:
+                    logger.warning(f"Checking for cancelled tasks failed: {e}")
+            if time.monotonic() - last_heartbeat < self.heartbeat_seconds:
+                continue
+            last_heartbeat = time.monotonic()
+            for job in jobs:
+                try:
+                    if not self.queue.heartbeat(job, self.worker_id, self.lease_seconds):
+                        logger.warning(
+                            f"Lost lease on task {job.task_id}; another worker may run it again"
+                        )
+                except Exception as e:
+                    logger.warning(f"Heartbeat for task {job.task_id} failed: {e}")
@@ -0,0 +1,304 @@
+"""
+Process-wide shared worker pool for nested parallel work
+
+Editable export used to nest thread pools: one per export (pages), one per
+image (child elements, up to 8, recursively), one per hybrid extraction
+(MinerU + Baidu OCR) and one for text style extraction.  Thread count grew
+multiplicatively with pages x children x depth, and so did the memory held by
+images being processed at the same time.
+
+All of these layers now submit into one bounded pool:
+
+- ``submit()`` returns a regular ``concurrent.futures.Future``
+- ``as_completed()`` / ``wait()`` / ``map_unordered()`` wait for futures of
+  this pool without deadlocking: a pool thread that waits on children it
+  submitted runs the ones that have not started yet itself ("help while
+  waiting") instead of blocking a thread the children need
+- work submitted from inside the pool goes to the front of the queue, so
+  started pages finish their children before new pages are picked up
+  (depth-first, which keeps the number of images in memory low)
+- threads start lazily up to ``max_workers`` and exit after being idle
+
+Waiting on a child with ``future.result()`` from a pool thread bypasses the
+helping and can deadlock a saturated pool; wait through the pool instead.
+
+Usage:
+    pool = get_worker_pool()
+    futures = [pool.submit(process, item) for item in items]
+    for future in pool.as_completed(futures):
+        handle(future.result())
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future
+from concurrent.futures import wait as futures_wait
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _WorkItem:
+    __slots__ = ("pool", "future", "fn", "args", "kwargs", "claimed")
+
+    def __init__(self, pool: "WorkerPool", fn: Callable, args: tuple, kwargs: dict):
+        self.pool = pool
+        self.future: Future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.claimed = False
+
+
+class WorkerPool:
+    """Bounded thread pool whose workers help run the children they wait on"""
+
+    def __init__(self, max_workers: int = 16, name: str = "worker-pool", idle_seconds: float = 60.0):
+        """
+        Args:
+            max_workers: Maximum number of pool threads
+            name: Thread name prefix
+            idle_seconds: An idle thread exits after this many seconds without work
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.name = name
+        self.idle_seconds = idle_seconds
+        self._cond = threading.Condition()
+        self._queue: Deque[_WorkItem] = deque()
+        self._threads: Set[threading.Thread] = set()
+        self._local = threading.local()
+        self._idle = 0
+        self._shutdown = False
+        self._thread_counter = 0
+        # Stats
+        self._running = 0
+        self._peak_running = 0
+        self._peak_threads = 0
+        self._inline_runs = 0
+        self._completed = 0
+
+    # ---------------------------------------------------------------- submit
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        item = _WorkItem(self, fn, args, kwargs)
+        item.future._work_item = item
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError(f"Worker pool {self.name} is shut down")
+            if self.in_worker():
+                self._queue.appendleft(item)
+            else:
+                self._queue.append(item)
+            if len(self._threads) < self.max_workers and len(self._queue) > self._idle:
+                self._start_thread()
+            self._cond.notify()
+        return item.future
+
+    def in_worker(self) -> bool:
+        """Whether the calling thread is one of this pool's threads"""
+        return getattr(self._local, "worker", False)
+
+    # --------------------------------------------------------------- waiting
+
+    def as_completed(self, futures: Iterable[Future]) -> Iterator[Future]:
+        """Yield futures as they finish (any order), helping with unstarted ones"""
+        pending = set(futures)
+        while pending:
+            for future in self._wait_any(pending):
+                pending.discard(future)
+                yield future
+
+    def wait(self, futures: Iterable[Future]):
+        """Block until all futures are done (results/exceptions stay on the futures)"""
+        for _ in self.as_completed(futures):
+            pass
+
+    def map_unordered(
+        self, fn: Callable[[Any], Any], items: Iterable[Any], limit: Optional[int] = None
+    ) -> Iterator[Tuple[Any, Future]]:
+        """
+        Run fn(item) for every item and yield (item, future) as each finishes
+
+        At most ``limit`` items of this call are queued or running at once
+        (None = all), so one large batch cannot fill the shared queue.  Closing
+        the iterator early (break or an exception in the loop body) cancels
+        the items that have not started.
+        """
+        items = iter(items)
+        in_flight: Dict[Future, Any] = {}
+
+        def fill():
+            while not limit or len(in_flight) < limit:
+                item = next(items, _MISSING)
+                if item is _MISSING:
+                    return
+                in_flight[self.submit(fn, item)] = item
+
+        try:
+            fill()
+            while in_flight:
+                for future in self._wait_any(in_flight):
+                    yield in_flight.pop(future), future
+                fill()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _wait_any(self, pending) -> List[Future]:
+        """Return the done futures of pending, waiting for at least one"""
+        while True:
+            done = [future for future in pending if future.done()]
+            if done:
+                return done
+            if self.in_worker():
+                item = self._claim_any(pending)
+                if item is not None:
+                    self._run(item)
+                    continue
+            futures_wait(pending, return_when=FIRST_COMPLETED)
+
+    def _claim_any(self, futures) -> Optional[_WorkItem]:
+        with self._cond:
+            for future in futures:
+                item = getattr(future, "_work_item", None)
+                if item is not None and item.pool is self and not item.claimed:
+                    item.claimed = True
+                    self._inline_runs += 1
+                    return item
+        return None
+
+    # --------------------------------------------------------------- workers
+
+    def _start_thread(self):
+        # Called with the lock held
+        self._thread_counter += 1
+        thread = threading.Thread(
+            target=self._worker, name=f"{self.name}_{self._thread_counter}", daemon=True
+        )
+        self._threads.add(thread)
+        self._peak_threads = max(self._peak_threads, len(self._threads))
+        thread.start()
+
+    def _pop(self) -> Optional[_WorkItem]:
+        # Called with the lock held; items claimed by a helping waiter are skipped
+        while self._queue:
+            item = self._queue.popleft()
+            if not item.claimed:
+                item.claimed = True
+                return item
+        return None
+
+    def _worker(self):
+        self._local.worker = True
+        while True:
+            with self._cond:
+                item = self._pop()
+                while item is None:
+                    if self._shutdown:
+                        self._threads.discard(threading.current_thread())
+                        return
+                    self._idle += 1
+                    notified = self._cond.wait(self.idle_seconds)
+                    self._idle -= 1
+                    item = self._pop()
+                    if item is None and not notified:
+                        self._threads.discard(threading.current_thread())
+                        return
+            self._run(item)
+
+    def _run(self, item: _WorkItem):
+        future = item.future
+        # Drop references to arguments as soon as the item is taken
+        fn, args, kwargs = item.fn, item.args, item.kwargs
+        item.fn = item.args = item.kwargs = None
+        if not future.set_running_or_notify_cancel():
+            return
+        with self._cond:
+            self._running += 1
+            self._peak_running = max(self._peak_running, self._running)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            del fn, args, kwargs
+            with self._cond:
+                self._running -= 1
+                self._completed += 1
+
+    # ------------------------------------------------------------- lifecycle
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_workers": self.max_workers,
+                "threads": len(self._threads),
+                "peak_threads": self._peak_threads,
+                "idle": self._idle,
+                "queued": sum(1 for item in self._queue if not item.claimed),
+                "running": self._running,
+                "peak_running": self._peak_running,
+                "inline_runs": self._inline_runs,
+                "completed": self._completed,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Cancel queued work and stop the threads once they finish their current item"""
+        with self._cond:
+            self._shutdown = True
+            while self._queue:
+                item = self._queue.popleft()
+                if not item.claimed:
+                    item.claimed = True
+                    item.future.cancel()
+            threads = list(self._threads)
+            self._cond.notify_all()
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """The process-wide pool (size from Config.WORKER_POOL_SIZE)"""
+    global _pool
+    pool = _pool
+    if pool is not None:
+        return pool
+
+    with _pool_lock:
+        if _pool is None:
+            from ..config import get_config
+
+            _pool = WorkerPool(get_config().WORKER_POOL_SIZE, name="shared-worker")
+            logger.info(f"Created shared worker pool: max_workers={_pool.max_workers}")
+        return _pool
+
+
+def reset_worker_pool():
+    """Shut the pool down so it is rebuilt from config (tests/config reload)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
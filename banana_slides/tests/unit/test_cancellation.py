@@ -0,0 +1,91 @@
+"""
+任务取消令牌测试
+
+验证取消、截止时间、回调、按任务 ID 登记的令牌，以及异步生图对令牌的检查
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from banana_slides.core.generator import AIService
+from banana_slides.services.cancellation import (
+    DEADLINE_EXCEEDED,
+    CancellationToken,
+    TaskCancelled,
+    cancel_task_token,
+    get_task_token,
+    task_cancellation,
+)
+
+
+class TestCancellationToken:
+    def test_cancel_raises_with_reason(self):
+        token = CancellationToken()
+        token.raise_if_cancelled()
+        assert token.cancel() is True
+        assert token.cancel() is False  # 只生效一次
+        with pytest.raises(TaskCancelled) as excinfo:
+            token.raise_if_cancelled()
+        assert excinfo.value.reason == "cancelled"
+
+    def test_deadline_cancels_and_bounds_timeout(self):
+        token = CancellationToken(deadline=0.05)
+        assert token.timeout(600) <= 0.05
+        assert token.timeout(None) <= 0.05
+        assert token.wait(5) is True
+        assert token.cancelled
+        assert token.reason == DEADLINE_EXCEEDED
+
+    def test_deadline_fires_callbacks_without_polling(self):
+        token = CancellationToken(deadline=0.05)
+        reasons = []
+        token.on_cancel(reasons.append)
+        time.sleep(0.2)
+        assert reasons == [DEADLINE_EXCEEDED]
+
+    def test_callback_after_cancel_runs_at_once(self):
+        token = CancellationToken()
+        token.cancel("stop")
+        reasons = []
+        token.on_cancel(reasons.append)
+        assert reasons == ["stop"]
+
+    def test_no_deadline(self):
+        token = CancellationToken()
+        assert token.remaining() is None
+        assert token.timeout(30) == 30
+        assert token.wait(0.01) is False
+
+
+class TestTaskTokens:
+    def test_registered_while_running(self):
+        with task_cancellation("task-1") as token:
+            assert get_task_token("task-1") is token
+            assert cancel_task_token("task-1") is True
+            assert token.cancelled
+        # 运行结束后不再登记
+        assert cancel_task_token("task-1") is False
+        assert not get_task_token("task-1").cancelled
+
+
+class TestAsyncImageCancellation:
+    def test_cancelled_request_is_discarded(self):
+        token = CancellationToken()
+
+        class CancellingImageProvider:
+            async def generate_image(self, **kwargs):
+                token.cancel()  # 请求进行中任务被取消
+                return object()
+
+        service = AIService(
+            text_provider=object(),
+            image_provider=object(),
+            async_image_provider=CancellingImageProvider(),
+        )
+        # TaskCancelled 原样抛出，不会被包装成普通的生成失败
+        with pytest.raises(TaskCancelled):
+            asyncio.run(service.generate_image_async("prompt", cancel_token=token))
+        with pytest.raises(TaskCancelled):
+            asyncio.run(service.generate_image_async("prompt", cancel_token=token))
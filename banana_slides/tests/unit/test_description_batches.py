@@ -0,0 +1,126 @@
+"""
+批量页面描述测试
+
+验证按上下文窗口划分批次，以及批量响应缺页或无法解析时逐页兜底
+"""
+
+import json
+
+import pytest
+
+from banana_slides.config import get_config
+from banana_slides.core.generator import AIService, ProjectContext
+from banana_slides.services.prompts import get_batch_page_description_prompt
+
+
+class FakeTextProvider:
+    """批量 prompt 返回 batch_response，单页 prompt 返回 "desc N"（或按 fail_pages 抛错）"""
+
+    def __init__(self, batch_response="[]", fail_pages=()):
+        self.batch_response = batch_response
+        self.fail_pages = set(fail_pages)
+        self.batch_calls = 0
+        self.single_pages = []
+
+    def generate_text(self, prompt, thinking_budget=0):
+        if '"page_index"' in prompt:
+            self.batch_calls += 1
+            return self.batch_response
+        page_index = int(prompt.split("现在请为第 ")[1].split(" 页")[0])
+        self.single_pages.append(page_index)
+        if page_index in self.fail_pages:
+            raise RuntimeError("upstream 500")
+        return f"desc {page_index}"
+
+
+def make_service(provider):
+    return AIService(text_provider=provider, image_provider=object())
+
+
+def make_context(reference_text=""):
+    files = [{"filename": "ref.md", "content": reference_text}] if reference_text else []
+    return ProjectContext({"idea_prompt": "测试", "creation_type": "idea"}, files)
+
+
+PAGES = [(i, {"title": f"第{i}页", "points": []}) for i in range(1, 8)]
+OUTLINE = [page for _, page in PAGES]
+
+
+@pytest.fixture
+def config(monkeypatch):
+    config = get_config()
+    monkeypatch.setattr(config, "TEXT_STRUCTURED_OUTPUT", "off")
+    monkeypatch.setattr(config, "TEXT_CONTEXT_TOKENS", 128000)
+    monkeypatch.setattr(config, "DESCRIPTION_TOKENS_PER_PAGE", 1500)
+    return config
+
+
+class TestPlanDescriptionBatches:
+    def test_batches_are_contiguous_and_capped(self, config):
+        service = make_service(FakeTextProvider())
+        batches = service.plan_description_batches(make_context(), OUTLINE, PAGES, max_pages=3)
+        assert [[index for index, _ in batch] for batch in batches] == [
+            [1, 2, 3],
+            [4, 5, 6],
+            [7],
+        ]
+
+    def test_batch_size_follows_remaining_context(self, config, monkeypatch):
+        service = make_service(FakeTextProvider())
+        context = make_context()
+        shared = service._estimate_tokens(
+            get_batch_page_description_prompt(context, OUTLINE, [], "zh")
+        )
+        # 共享部分之外恰好能放下两页
+        monkeypatch.setattr(
+            config, "TEXT_CONTEXT_TOKENS", shared + 2 * config.DESCRIPTION_TOKENS_PER_PAGE
+        )
+        batches = service.plan_description_batches(context, OUTLINE, PAGES, max_pages=8)
+        assert [len(batch) for batch in batches] == [2, 2, 2, 1]
+
+    def test_oversized_references_fall_back_to_single_pages(self, config):
+        service = make_service(FakeTextProvider())
+        context = make_context("参考" * 200000)
+        batches = service.plan_description_batches(context, OUTLINE, PAGES)
+        assert all(len(batch) == 1 for batch in batches)
+        assert len(batches) == len(PAGES)
+
+
+class TestGeneratePageDescriptionsBatch:
+    def test_missing_pages_fall_back_to_single_calls(self, config):
+        provider = FakeTextProvider(
+            json.dumps(
+                [
+                    {"page_index": 1, "description": "batch 1"},
+                    {"page_index": 3, "description": "batch 3"},
+                    # 不属于本批的页面和空描述都被忽略
+                    {"page_index": 9, "description": "other"},
+                    {"page_index": 2, "description": "  "},
+                ]
+            )
+        )
+        descriptions, errors = make_service(provider).generate_page_descriptions_batch(
+            make_context(), OUTLINE, PAGES[:3]
+        )
+        assert descriptions == {1: "batch 1", 2: "desc 2", 3: "batch 3"}
+        assert errors == {}
+        assert provider.batch_calls == 1
+        assert provider.single_pages == [2]
+
+    def test_unparsable_batch_falls_back_without_retry(self, config):
+        provider = FakeTextProvider("这不是 JSON", fail_pages=[2])
+        descriptions, errors = make_service(provider).generate_page_descriptions_batch(
+            make_context(), OUTLINE, PAGES[:3]
+        )
+        # 批量调用只尝试一次，随后逐页生成；逐页失败的页面记录异常
+        assert provider.batch_calls == 1
+        assert descriptions == {1: "desc 1", 3: "desc 3"}
+        assert isinstance(errors[2], RuntimeError)
+
+    def test_single_page_batch_skips_batch_prompt(self, config):
+        provider = FakeTextProvider()
+        descriptions, _ = make_service(provider).generate_page_descriptions_batch(
+            make_context(), OUTLINE, PAGES[:1]
+        )
+        assert descriptions == {1: "desc 1"}
+        assert provider.batch_calls == 0
@@ -0,0 +1,141 @@
+"""
+可编辑化结果缓存测试
+
+验证按内容命中、路径与 ID 改写、引用计数淘汰以及损坏条目的处理
+"""
+
+import os
+
+import pytest
+
+from banana_slides.services.image_editability.data_models import (
+    BBox,
+    EditableElement,
+    EditableImage,
+)
+from banana_slides.services.image_editability.result_cache import EditableResultCache
+
+
+def make_result(tmp_path, image_path):
+    """模拟 make_image_editable 的输出：一个带子元素的图片元素与 clean background"""
+    work = tmp_path / "work"
+    work.mkdir(exist_ok=True)
+    for name in ("crop.png", "child.png", "bg.png", "child_bg.png"):
+        (work / name).write_bytes(name.encode())
+    child = EditableElement(
+        element_id="bbbb2222_0",
+        element_type="text",
+        bbox=BBox(0, 0, 5, 5),
+        bbox_global=BBox(10, 10, 15, 15),
+        content="标题",
+        image_path=str(work / "child.png"),
+    )
+    element = EditableElement(
+        element_id="aaaa1111_0",
+        element_type="image",
+        bbox=BBox(10, 10, 50, 50),
+        bbox_global=BBox(10, 10, 50, 50),
+        image_path=str(work / "crop.png"),
+        children=[child],
+        inpainted_background_path=str(work / "child_bg.png"),
+    )
+    return EditableImage(
+        image_id="aaaa1111",
+        image_path=str(image_path),
+        width=100,
+        height=100,
+        elements=[element],
+        clean_background=str(work / "bg.png"),
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EditableResultCache(tmp_path / "cache")
+
+
+def write_image(path, content: bytes):
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestEditableResultCache:
+    def test_hit_rebuilds_tree_with_new_ids(self, cache, tmp_path):
+        image = write_image(tmp_path / "page1.png", b"slide-1")
+        key = cache.make_key(image, "hybrid", "generative", 2)
+        assert cache.get(key, image) is None
+
+        cache.put(key, image, make_result(tmp_path, image))
+        # 原始文件删除后缓存条目仍然可用
+        for name in os.listdir(tmp_path / "work"):
+            os.remove(tmp_path / "work" / name)
+
+        cached = cache.get(key, image)
+        assert cached is not None
+        assert cached.image_path == image
+        assert cached.image_id != "aaaa1111"
+        element = cached.elements[0]
+        assert element.element_id == f"{cached.image_id}_0"
+        assert element.children[0].element_id.endswith("_0")
+        assert element.children[0].element_id != "bbbb2222_0"
+        assert element.children[0].content == "标题"
+        with open(element.children[0].image_path, "rb") as f:
+            assert f.read() == b"child.png"
+        with open(cached.clean_background, "rb") as f:
+            assert f.read() == b"bg.png"
+
+    def test_key_depends_on_content_and_config(self, tmp_path):
+        a = write_image(tmp_path / "a.png", b"same")
+        b = write_image(tmp_path / "b.png", b"same")
+        key = EditableResultCache.make_key(a, "hybrid", "generative", 2)
+        assert EditableResultCache.make_key(b, "hybrid", "generative", 2) == key
+        assert EditableResultCache.make_key(a, "mineru", "generative", 2) != key
+        assert EditableResultCache.make_key(a, "hybrid", "generative", 1) != key
+
+    def test_changed_image_releases_old_entry(self, cache, tmp_path):
+        image = write_image(tmp_path / "page1.png", b"v1")
+        old_key = cache.make_key(image, "hybrid", "generative", 2)
+        cache.put(old_key, image, make_result(tmp_path, image))
+
+        # 同一路径的图片被重新生成
+        write_image(tmp_path / "page1.png", b"v2")
+        new_key = cache.make_key(image, "hybrid", "generative", 2)
+        cache.put(new_key, image, make_result(tmp_path, image))
+
+        assert cache.refcount(old_key) == 0
+        assert not (tmp_path / "cache" / old_key).exists()
+        assert cache.get(old_key, image) is None
+        assert cache.refcount(new_key) == 1
+
+    def test_shared_entry_survives_until_last_reference(self, cache, tmp_path):
+        page1 = write_image(tmp_path / "page1.png", b"same")
+        page2 = write_image(tmp_path / "page2.png", b"same")
+        key = cache.make_key(page1, "hybrid", "generative", 2)
+        cache.put(key, page1, make_result(tmp_path, page1))
+        assert cache.get(key, page2) is not None
+        assert cache.refcount(key) == 2
+
+        cache.release(page1)
+        assert cache.get(key, page2) is not None
+        cache.release(page2)
+        assert not (tmp_path / "cache" / key).exists()
+
+    def test_deleted_owner_is_pruned(self, cache, tmp_path):
+        page1 = write_image(tmp_path / "page1.png", b"one")
+        key1 = cache.make_key(page1, "hybrid", "generative", 2)
+        cache.put(key1, page1, make_result(tmp_path, page1))
+        os.remove(page1)
+
+        page2 = write_image(tmp_path / "page2.png", b"two")
+        cache.put(cache.make_key(page2, "hybrid", "generative", 2), page2, make_result(tmp_path, page2))
+        assert cache.refcount(key1) == 0
+        assert not (tmp_path / "cache" / key1).exists()
+
+    def test_missing_file_is_a_miss(self, cache, tmp_path):
+        image = write_image(tmp_path / "page1.png", b"slide")
+        key = cache.make_key(image, "hybrid", "generative", 2)
+        cache.put(key, image, make_result(tmp_path, image))
+        os.remove(tmp_path / "cache" / key / "files" / "0.png")
+
+        assert cache.get(key, image) is None
+        assert cache.stats()["entries"] == 0
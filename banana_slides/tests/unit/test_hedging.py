@@ -0,0 +1,147 @@
+"""
+对冲请求测试
+
+验证百分位、每个项目的对冲预算、对冲胜出 / 挽救路径，以及限流排队时间不计入延迟
+"""
+
+import threading
+import time
+
+from banana_slides.services.hedging import HedgeBudget, Hedger, _percentile
+from banana_slides.services.rate_limiter import RateLimiter
+
+
+def primed_hedger(latency=0.05, samples=10):
+    """已有足够延迟样本、约 latency 秒后触发对冲的 Hedger"""
+    hedger = Hedger("test", min_samples=samples, min_delay=0)
+    hedger._latencies.extend([latency] * samples)
+    return hedger
+
+
+def calls_in_order(*behaviours):
+    """第 n 次调用执行 behaviours[n]"""
+    lock = threading.Lock()
+    count = [0]
+
+    def fn():
+        with lock:
+            index = count[0]
+            count[0] += 1
+        return behaviours[index]()
+
+    fn.count = count
+    return fn
+
+
+def after(seconds, result=None, error=None):
+    def behaviour():
+        time.sleep(seconds)
+        if error is not None:
+            raise error
+        return result
+
+    return behaviour
+
+
+class TestPercentileAndBudget:
+    def test_percentile_nearest_rank(self):
+        assert _percentile([], 0.9) is None
+        assert _percentile(range(1, 11), 0.9) == 9
+        assert _percentile([3, 1, 2], 0.99) == 3
+        assert _percentile([5], 0.5) == 5
+
+    def test_budget_for_deck_rounds_up(self):
+        assert HedgeBudget.for_deck(10, ratio=0.1).max_hedges == 1
+        assert HedgeBudget.for_deck(11, ratio=0.1).max_hedges == 2
+        assert HedgeBudget.for_deck(0, ratio=0.1).max_hedges == 0
+
+    def test_budget_is_shared_across_threads(self):
+        budget = HedgeBudget(3)
+        granted = []
+        threads = [
+            threading.Thread(target=lambda: granted.append(budget.try_acquire()))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert granted.count(True) == 3
+        assert budget.used == 3
+
+    def test_no_hedge_delay_until_min_samples(self):
+        hedger = Hedger("test", min_samples=3, min_delay=1.0)
+        assert hedger.hedge_delay() is None
+        hedger._latencies.extend([0.1, 0.2, 0.3])
+        # 不早于 min_delay
+        assert hedger.hedge_delay() == 1.0
+
+
+class TestHedgerCall:
+    def test_fast_primary_is_not_hedged(self):
+        hedger = primed_hedger()
+        fn = calls_in_order(after(0, "primary"))
+        assert hedger.call(fn, budget=HedgeBudget(5)) == "primary"
+        assert fn.count[0] == 1
+        assert hedger.stats()["hedged"] == 0
+
+    def test_hedge_wins_against_slow_primary(self):
+        hedger = primed_hedger()
+        fn = calls_in_order(after(1.0, "primary"), after(0, "hedge"))
+        budget = HedgeBudget(5)
+
+        start = time.monotonic()
+        assert hedger.call(fn, budget=budget) == "hedge"
+        assert time.monotonic() - start < 0.8
+        stats = hedger.stats()
+        assert stats["hedged"] == 1
+        assert stats["hedge_wins"] == 1
+        assert stats["rescued"] == 0
+        assert budget.used == 1
+
+    def test_hedge_rescues_failed_primary(self):
+        hedger = primed_hedger()
+        fn = calls_in_order(
+            after(0.15, error=RuntimeError("upstream 500")), after(0.3, "hedge")
+        )
+        assert hedger.call(fn, budget=HedgeBudget(5)) == "hedge"
+        stats = hedger.stats()
+        assert stats["hedge_wins"] == 1
+        assert stats["rescued"] == 1
+
+    def test_invalid_result_does_not_win(self):
+        hedger = primed_hedger()
+        fn = calls_in_order(after(0.3, "primary"), after(0, None))
+        assert hedger.call(fn, budget=HedgeBudget(5)) == "primary"
+        assert hedger.stats()["hedge_wins"] == 0
+
+    def test_exhausted_budget_waits_for_primary(self):
+        hedger = primed_hedger()
+        fn = calls_in_order(after(0.2, "primary"))
+        assert hedger.call(fn, budget=HedgeBudget(0)) == "primary"
+        stats = hedger.stats()
+        assert stats["hedged"] == 0
+        assert stats["budget_exhausted"] == 1
+
+    def test_no_budget_disables_hedging(self):
+        hedger = primed_hedger()
+        fn = calls_in_order(after(0.2, "primary"))
+        assert hedger.call(fn, budget=None) == "primary"
+        assert fn.count[0] == 1
+
+
+class TestLimiterWait:
+    def test_slot_wait_neither_hedges_nor_counts_as_latency(self):
+        hedger = primed_hedger()
+        limiter = RateLimiter("test", max_in_flight=1)
+        limiter.acquire()  # 其他请求占住唯一的槽位
+        threading.Timer(0.4, limiter.release).start()
+
+        def fn():
+            with limiter.slot():
+                return "image"
+
+        assert hedger.call(fn, budget=HedgeBudget(5)) == "image"
+        assert hedger.stats()["hedged"] == 0
+        # 记录的是拿到槽位之后的上游耗时，而不是排队的 0.4 秒
+        assert hedger._latencies[-1] < 0.2
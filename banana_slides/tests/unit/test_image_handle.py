@@ -0,0 +1,54 @@
+"""
+图片句柄测试
+
+验证只解码一次、裁剪视图、按需编码以及临时文件的清理
+"""
+
+import os
+
+import pytest
+from PIL import Image
+
+from banana_slides.services.image_editability.image_handle import ImageHandle
+
+
+@pytest.fixture
+def page_path(tmp_path):
+    path = tmp_path / "page.png"
+    img = Image.new("RGB", (100, 80), color=(255, 255, 255))
+    img.paste((255, 0, 0), (10, 10, 30, 20))
+    img.save(path)
+    return str(path)
+
+
+class TestImageHandle:
+    def test_pixels_decoded_once(self, page_path):
+        with ImageHandle.open(page_path) as page:
+            assert page.size == (100, 80)
+            assert page.image is page.image
+
+    def test_crop_view_is_clamped_and_shares_pixels(self, page_path):
+        with ImageHandle.open(page_path) as page:
+            crop = page.crop((10.6, 10.2, 130, 20))
+            assert crop.size == (90, 10)
+            assert crop.image.getpixel((0, 0)) == (255, 0, 0)
+            with pytest.raises(ValueError):
+                page.crop((50, 50, 50, 60))
+
+    def test_file_path_reuses_existing_file(self, page_path, tmp_path):
+        element_path = str(tmp_path / "element.png")
+        with ImageHandle.open(page_path) as page:
+            assert page.file_path() == page_path
+            crop = page.crop((10, 10, 30, 20), path=element_path)
+            assert crop.file_path() == element_path
+        assert os.path.exists(page_path)
+
+    def test_temp_file_removed_on_close(self, page_path):
+        with ImageHandle.open(page_path) as page:
+            crop = page.crop((10, 10, 30, 20))
+            temp_path = crop.file_path()
+            assert crop.file_path() == temp_path
+            with Image.open(temp_path) as img:
+                assert img.size == (20, 10)
+        # 关闭父句柄时一并删除裁剪视图的临时文件
+        assert not os.path.exists(temp_path)
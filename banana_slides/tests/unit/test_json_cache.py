@@ -0,0 +1,52 @@
+"""
+JSON 列解析缓存测试
+
+验证 JSONColumnCache 的复用、赋值失效与非法 JSON 处理
+"""
+
+import json
+
+from banana_slides.models.json_cache import JSONColumnCache
+
+
+class Document(JSONColumnCache):
+    """只有一个 JSON 文本列的假模型"""
+
+    def __init__(self, content=None):
+        self.content = content
+
+    def get_content(self):
+        return self._get_json("content", dict)
+
+    def set_content(self, data):
+        self._set_json("content", data, ensure_ascii=False)
+
+
+class TestJSONColumnCache:
+    def test_reuses_parsed_value_for_same_string(self):
+        doc = Document(json.dumps({"text": "a"}))
+        first = doc.get_content()
+        assert first == {"text": "a"}
+        assert doc.get_content() is first
+
+    def test_set_replaces_cached_value(self):
+        doc = Document(json.dumps({"text": "a"}))
+        doc.get_content()
+        doc.set_content({"text": "中文"})
+        assert doc.content == '{"text": "中文"}'
+        assert doc.get_content() == {"text": "中文"}
+
+    def test_direct_assignment_invalidates(self):
+        # 例如批量 UPDATE 后 refresh 载入了新的字符串
+        doc = Document(json.dumps({"text": "a"}))
+        doc.get_content()
+        doc.content = json.dumps({"text": "b"})
+        assert doc.get_content() == {"text": "b"}
+
+    def test_empty_and_invalid_return_default(self):
+        doc = Document()
+        assert doc.get_content() == {}
+        doc.set_content(None)
+        assert doc.content is None
+        doc.content = "{not json"
+        assert doc.get_content() == {}
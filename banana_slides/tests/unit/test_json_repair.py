@@ -0,0 +1,53 @@
+"""
+JSON 本地修复测试
+
+验证代码块、前后说明文字、尾随逗号的修复，以及字符串中的括号和转义不被误判
+"""
+
+import json
+
+import pytest
+
+from banana_slides.utils.json_repair import (
+    extract_balanced_json,
+    remove_trailing_commas,
+    repair_json,
+    strip_code_fences,
+)
+
+
+class TestHelpers:
+    def test_strip_code_fences(self):
+        assert strip_code_fences('```json\n[1, 2]\n```') == "[1, 2]"
+        assert strip_code_fences('说明\n```\n{"a": 1}\n```\n结尾') == '{"a": 1}'
+        assert strip_code_fences("  [1]  ") == "[1]"
+
+    def test_extract_balanced_json_ignores_brackets_in_strings(self):
+        text = '结果如下：{"title": "a ] } \\" [", "points": [1]} 以上'
+        assert extract_balanced_json(text) == '{"title": "a ] } \\" [", "points": [1]}'
+        assert extract_balanced_json("没有 JSON") is None
+        # 括号不匹配
+        assert extract_balanced_json("[1, 2}") is None
+
+    def test_remove_trailing_commas_outside_strings(self):
+        assert remove_trailing_commas('[1, 2, ]') == "[1, 2 ]"
+        assert remove_trailing_commas('{"a": [1,],}') == '{"a": [1]}'
+        # 字符串里的 ",]" 保持不变
+        assert remove_trailing_commas('["a,]", "b\\",]"]') == '["a,]", "b\\",]"]'
+
+
+class TestRepairJson:
+    def test_valid_json_is_parsed_as_is(self):
+        assert repair_json(' {"a": 1} ') == {"a": 1}
+
+    def test_fenced_block_with_preamble(self):
+        text = '好的，以下是大纲：\n```json\n[{"title": "A"}]\n```\n希望对你有帮助'
+        assert repair_json(text) == [{"title": "A"}]
+
+    def test_balanced_block_with_trailing_commas(self):
+        text = '大纲：[{"title": "A", "points": ["x", "y",],},] 完毕'
+        assert repair_json(text) == [{"title": "A", "points": ["x", "y"]}]
+
+    def test_unrepairable_raises_original_error(self):
+        with pytest.raises(json.JSONDecodeError):
+            repair_json('[{"title": "A"')
@@ -0,0 +1,65 @@
+"""
+流式 JSON 数组解析测试
+
+验证元素在完整时立即产出、字符串中的括号/逗号/转义、前后多余文本、
+提前出现的 ] 以及无法解析的元素
+"""
+
+from banana_slides.utils.json_stream import JsonArrayStream
+
+
+def feed_chars(stream, text):
+    """逐字符喂入，返回每个元素完成时已消费的字符数"""
+    completed = []
+    for i, ch in enumerate(text, 1):
+        completed.extend((i, element) for element in stream.feed(ch))
+    return completed
+
+
+class TestJsonArrayStream:
+    def test_elements_complete_before_array_ends(self):
+        text = '[{"title": "A"}, {"title": "B"}]'
+        completed = feed_chars(JsonArrayStream(), text)
+        assert [element for _, element in completed] == [{"title": "A"}, {"title": "B"}]
+        # 第一个元素在它的 } 处就已产出
+        assert completed[0][0] == text.index("}") + 1
+
+    def test_strings_with_brackets_commas_and_escapes(self):
+        stream = JsonArrayStream()
+        text = r'["a, ]", {"t": "x \"}] ,\\"}, "\\", "end"]'
+        elements = stream.feed(text)
+        assert elements == ["a, ]", {"t": 'x "}] ,\\'}, "\\", "end"]
+        assert stream.finished and stream.errors == 0
+
+    def test_escape_split_across_chunks(self):
+        stream = JsonArrayStream()
+        # 反斜杠在上一个分片末尾，下一个分片开头的引号仍属于字符串
+        chunks = ['["a\\', '", b"', "]"]
+        elements = [element for chunk in chunks for element in stream.feed(chunk)]
+        assert elements == ['a", b']
+        assert stream.finished
+
+    def test_preamble_fences_and_trailing_text_are_ignored(self):
+        stream = JsonArrayStream()
+        text = '好的：\n```json\n[1, {"a": [2, 3]}, true]\n```\n[4]'
+        assert stream.feed(text) == [1, {"a": [2, 3]}, True]
+        assert stream.finished
+        assert stream.feed("[5]") == []
+
+    def test_early_close_finishes_stream(self):
+        stream = JsonArrayStream()
+        assert stream.feed('[{"title": "A"}] 之后的 {"title": "B"}') == [{"title": "A"}]
+        assert stream.finished
+        assert stream.feed(', {"title": "C"}]') == []
+
+    def test_trailing_comma_and_unparsable_elements(self):
+        stream = JsonArrayStream()
+        elements = stream.feed('[{"a": 1,}, {oops}, {"b": 2}]')
+        # 尾随逗号被修复，无法解析的元素被跳过并计数
+        assert elements == [{"a": 1}, {"b": 2}]
+        assert stream.errors == 1
+
+    def test_not_started_without_bracket(self):
+        stream = JsonArrayStream()
+        assert stream.feed("还在思考……") == []
+        assert not stream.started
@@ -0,0 +1,96 @@
+"""
+MinerU 解析结果缓存测试
+
+验证按图片内容命中、结果校验、并发重复解析的处理与按时间/大小回收
+"""
+
+import os
+import time
+
+import pytest
+
+from banana_slides.services.image_editability.mineru_cache import MinerUResultCache
+
+
+def make_result(root, extract_id, size=10, complete=True):
+    """模拟 MinerU 解压出的结果目录"""
+    result_dir = root / extract_id
+    result_dir.mkdir(parents=True)
+    (result_dir / "layout.json").write_text('{"pdf_info": []}')
+    if complete:
+        (result_dir / "abc_content_list.json").write_text("[]")
+    (result_dir / "full.md").write_bytes(b"x" * size)
+    return result_dir
+
+
+@pytest.fixture
+def mineru_dir(tmp_path):
+    return tmp_path / "mineru_files"
+
+
+@pytest.fixture
+def cache(mineru_dir):
+    return MinerUResultCache(mineru_dir, max_bytes=0, max_age_seconds=0)
+
+
+def write_image(path, content: bytes):
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestMinerUResultCache:
+    def test_same_content_hits(self, cache, mineru_dir, tmp_path):
+        key = cache.make_key(write_image(tmp_path / "a.png", b"slide"))
+        assert cache.lookup(key) is None
+
+        result_dir = make_result(mineru_dir, "e1")
+        assert cache.store(key, result_dir) == str(result_dir)
+        # 不同路径、相同内容
+        assert cache.make_key(write_image(tmp_path / "b.png", b"slide")) == key
+        assert cache.lookup(key) == str(result_dir)
+        assert cache.make_key(write_image(tmp_path / "c.png", b"other")) != key
+
+    def test_incomplete_result_is_not_indexed(self, cache, mineru_dir, tmp_path):
+        key = cache.make_key(write_image(tmp_path / "a.png", b"slide"))
+        result_dir = make_result(mineru_dir, "e1", complete=False)
+        assert cache.store(key, result_dir) == str(result_dir)
+        assert cache.lookup(key) is None
+
+    def test_broken_entry_is_dropped(self, cache, mineru_dir, tmp_path):
+        key = cache.make_key(write_image(tmp_path / "a.png", b"slide"))
+        result_dir = make_result(mineru_dir, "e1")
+        cache.store(key, result_dir)
+        os.remove(result_dir / "layout.json")
+
+        assert cache.lookup(key) is None
+        assert not result_dir.exists()
+        assert not (mineru_dir / ".image_index" / f"{key}.json").exists()
+
+    def test_duplicate_parse_keeps_first_result(self, cache, mineru_dir, tmp_path):
+        key = cache.make_key(write_image(tmp_path / "a.png", b"slide"))
+        first = make_result(mineru_dir, "e1")
+        second = make_result(mineru_dir, "e2")
+        cache.store(key, first)
+
+        # 另一个进程同时解析了同一张图片
+        assert cache.store(key, second) == str(first)
+        assert not second.exists()
+
+    def test_gc_by_age_and_size(self, mineru_dir, tmp_path):
+        cache = MinerUResultCache(mineru_dir, max_bytes=250, max_age_seconds=3600)
+        keys = []
+        for i in range(3):
+            key = cache.make_key(write_image(tmp_path / f"{i}.png", bytes([i])))
+            cache.store(key, make_result(mineru_dir, f"e{i}", size=100))
+            keys.append(key)
+        unrelated = make_result(mineru_dir, "reference_doc")  # 参考文件解析结果，不在索引中
+
+        old = time.time() - 7200
+        os.utime(mineru_dir / ".image_index" / f"{keys[0]}.json", (old, old))
+        cache.lookup(keys[2])  # 最近使用
+        time.sleep(0.01)
+
+        assert cache.gc() >= 1
+        assert cache.lookup(keys[0]) is None  # 超龄
+        assert cache.lookup(keys[2]) is not None
+        assert unrelated.exists()
@@ -0,0 +1,50 @@
+"""
+流式大纲测试
+
+验证流结束后按内容而不是数量与完整响应对账
+"""
+
+import json
+
+from banana_slides.core.generator import AIService, ProjectContext
+
+
+class StreamingTextProvider:
+    """按给定分片流式返回文本的 text_provider"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def stream_text(self, prompt, thinking_budget=0):
+        yield from self.chunks
+
+
+def stream_outline(text, chunk_size=7):
+    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+    service = AIService(text_provider=StreamingTextProvider(chunks), image_provider=object())
+    context = ProjectContext({"idea_prompt": "测试", "creation_type": "idea"})
+    return list(service.generate_outline_stream(context, language="zh"))
+
+
+PAGES = [
+    {"title": "A", "points": ["a"]},
+    {"part": "第一部分", "pages": [{"title": "B", "points": ["b"]}]},
+    {"title": "C", "points": ["c"]},
+]
+
+
+class TestOutlineStreamReconciliation:
+    def test_streamed_pages_are_not_repeated(self):
+        pages = stream_outline(json.dumps(PAGES, ensure_ascii=False))
+        assert [page["title"] for page in pages] == ["A", "B", "C"]
+        assert pages[1]["part"] == "第一部分"
+
+    def test_pages_missed_by_stream_are_emitted_at_the_end(self):
+        # 流式解析器把前言里的示例数组当成了大纲，完整响应从代码块中取出真正的大纲
+        text = (
+            '例如 [{"title": "示例", "points": []}]\n'
+            f"```json\n{json.dumps(PAGES, ensure_ascii=False)}\n```"
+        )
+        pages = stream_outline(text)
+        # 已产出的示例页无法撤回；真正的大纲一页不少地补发
+        assert [page["title"] for page in pages] == ["示例", "A", "B", "C"]
@@ -0,0 +1,220 @@
+"""
+页面流水线测试
+
+验证逐项消费输入：流式大纲尚未结束时页面已开始生成，且不阻塞事件循环或调用线程；
+以及线程版流水线的失败处理与取消
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from banana_slides.core.pipeline import run_page_pipeline, run_page_pipeline_async
+from banana_slides.services.cancellation import CancellationToken, TaskCancelled
+
+
+def run_pipeline(items, events, described=None):
+    async def describe(key, payload):
+        events.append(("describe", key))
+        if described is not None:
+            described.set()
+        return f"desc {key}"
+
+    async def render(key, payload, description):
+        return f"image {key}"
+
+    results = {}
+    asyncio.run(
+        run_page_pipeline_async(
+            items,
+            describe=describe,
+            render=render,
+            on_image=lambda key, result, error: results.__setitem__(key, result),
+        )
+    )
+    return results
+
+
+class TestIncrementalItems:
+    def test_page_starts_before_blocking_generator_ends(self):
+        events = []
+        described = threading.Event()
+
+        def outline():
+            yield 0, "page 0"
+            # 阻塞的流式调用：只有事件循环没被占住，第一页才能开始生成
+            assert described.wait(5)
+            events.append(("outline", 1))
+            yield 1, "page 1"
+
+        results = run_pipeline(outline(), events, described)
+        assert events[:2] == [("describe", 0), ("outline", 1)]
+        assert results == {0: "image 0", 1: "image 1"}
+
+    def test_async_generator_items(self):
+        events = []
+
+        async def outline():
+            for key in range(3):
+                await asyncio.sleep(0)
+                events.append(("outline", key))
+                yield key, f"page {key}"
+
+        results = run_pipeline(outline(), events)
+        assert results == {0: "image 0", 1: "image 1", 2: "image 2"}
+        assert events.index(("describe", 0)) < events.index(("outline", 2))
+
+    def test_list_items(self):
+        results = run_pipeline([(0, "a"), (1, "b")], [])
+        assert results == {0: "image 0", 1: "image 1"}
+
+
+class TestThreadedPipeline:
+    def test_image_starts_while_generator_blocks(self):
+        rendered = threading.Event()
+        events = []
+
+        def outline():
+            yield 0, "page 0"
+            # 流式大纲阻塞期间，第一页的描述应当已经交给图片阶段
+            assert rendered.wait(5)
+            events.append(("outline", 1))
+            yield 1, "page 1"
+
+        def render(key, payload, description):
+            events.append(("render", key))
+            rendered.set()
+            return f"image {key}"
+
+        results = {}
+        run_page_pipeline(
+            outline(),
+            describe=lambda key, payload: f"desc {key}",
+            render=render,
+            on_image=lambda key, result, error: results.__setitem__(key, result),
+        )
+        assert events[:2] == [("render", 0), ("outline", 1)]
+        assert results == {0: "image 0", 1: "image 1"}
+
+    def test_callbacks_run_on_calling_thread(self):
+        caller = threading.current_thread()
+        threads = set()
+
+        def record(*args):
+            threads.add(threading.current_thread())
+
+        run_page_pipeline(
+            iter([(0, "a"), (1, "b")]),
+            describe=lambda key, payload: "desc",
+            render=lambda key, payload, description: "image",
+            on_item=record,
+            on_items_done=record,
+            on_description=record,
+            on_image=record,
+        )
+        assert threads == {caller}
+
+    def test_items_are_announced_before_description(self):
+        order = []
+        run_page_pipeline(
+            [(0, "a"), (1, "b")],
+            describe=lambda key, payload: "desc",
+            render=lambda key, payload, description: "image",
+            on_item=lambda key, payload: order.append(("item", key)),
+            on_items_done=lambda: order.append(("done", None)),
+            on_description=lambda key, result, error: order.append(("desc", key)),
+        )
+        assert order.index(("item", 0)) < order.index(("desc", 0))
+        assert order.index(("item", 1)) < order.index(("desc", 1))
+        assert order.index(("item", 1)) < order.index(("done", None))
+
+    def test_failed_description_is_not_rendered(self):
+        def describe(key, payload):
+            if key == 1:
+                raise RuntimeError("upstream 500")
+            return "" if key == 2 else "desc"
+
+        descriptions, images = {}, {}
+        run_page_pipeline(
+            [(0, "a"), (1, "b"), (2, "c")],
+            describe=describe,
+            render=lambda key, payload, description: f"image {key}",
+            on_description=lambda key, result, error: descriptions.__setitem__(key, error),
+            on_image=lambda key, result, error: images.__setitem__(key, result),
+        )
+        assert isinstance(descriptions[1], RuntimeError)
+        # 失败或为空的描述都不会进入图片阶段
+        assert images == {0: "image 0"}
+
+    def test_failed_render_is_reported(self):
+        def render(key, payload, description):
+            raise RuntimeError("image failed")
+
+        images = {}
+        run_page_pipeline(
+            [(0, "a")],
+            describe=lambda key, payload: "desc",
+            render=render,
+            on_image=lambda key, result, error: images.__setitem__(key, error),
+        )
+        assert isinstance(images[0], RuntimeError)
+
+    def test_items_error_propagates(self):
+        def outline():
+            yield 0, "a"
+            raise ValueError("stream broke")
+
+        with pytest.raises(ValueError, match="stream broke"):
+            run_page_pipeline(
+                outline(),
+                describe=lambda key, payload: "desc",
+                render=lambda key, payload, description: "image",
+            )
+
+    def test_cancel_drops_pages_not_started(self):
+        token = CancellationToken()
+        described = []
+        first_started = threading.Event()
+
+        def describe(key, payload):
+            described.append(key)
+            first_started.set()
+            time.sleep(0.2)
+            return "desc"
+
+        threading.Thread(target=lambda: first_started.wait(5) and token.cancel()).start()
+        start = time.monotonic()
+        with pytest.raises(TaskCancelled):
+            run_page_pipeline(
+                [(key, "page") for key in range(10)],
+                describe=describe,
+                render=lambda key, payload, description: "image",
+                text_workers=1,
+                cancel_token=token,
+            )
+        # 只有已开始的那一页跑完，其余页面被丢弃
+        assert described == [0]
+        assert time.monotonic() - start < 1.0
+
+    def test_cancel_wakes_up_blocked_stream(self):
+        token = CancellationToken()
+        unblock = threading.Event()
+
+        def outline():
+            yield 0, "a"
+            unblock.wait(5)
+            yield 1, "b"
+
+        threading.Timer(0.1, token.cancel).start()
+        try:
+            with pytest.raises(TaskCancelled):
+                run_page_pipeline(
+                    outline(),
+                    describe=lambda key, payload: "desc",
+                    render=lambda key, payload, description: "image",
+                    cancel_token=token,
+                )
+        finally:
+            unblock.set()
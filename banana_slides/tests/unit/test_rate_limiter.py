@@ -0,0 +1,119 @@
+"""
+上游限流器测试
+
+验证令牌桶、并发上限以及 AIMD 自适应收缩/恢复
+"""
+
+import threading
+import time
+
+import pytest
+
+from banana_slides.services.rate_limiter import RateLimiter, is_throttle_error
+
+
+class ThrottledError(Exception):
+    """模拟 openai.RateLimitError（带 status_code）"""
+
+    status_code = 429
+
+
+class TestRateLimiter:
+    """限流器测试"""
+
+    def test_in_flight_cap_is_respected(self):
+        """并发请求数不超过 max_in_flight"""
+        limiter = RateLimiter("test", max_in_flight=2)
+
+        def call():
+            with limiter.slot():
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = limiter.stats()
+        assert stats["acquired"] == 8
+        assert stats["peak_in_flight"] <= 2
+        assert stats["in_flight"] == 0
+
+    def test_token_bucket_limits_rate(self):
+        """超过突发额度后按 rps 放行"""
+        limiter = RateLimiter("test", rps=20, max_in_flight=100)
+
+        start = time.monotonic()
+        for _ in range(30):
+            with limiter.slot():
+                pass
+        elapsed = time.monotonic() - start
+
+        # 前 20 个为突发额度，剩余 10 个约需 0.5 秒
+        assert elapsed >= 0.4
+
+    def test_throttle_shrinks_and_success_recovers(self):
+        """429 时并发上限减半，成功调用后逐步恢复"""
+        limiter = RateLimiter("test", max_in_flight=8)
+
+        with pytest.raises(ThrottledError):
+            with limiter.slot():
+                raise ThrottledError()
+        assert limiter.limit == 4
+
+        for _ in range(50):
+            with limiter.slot():
+                pass
+        assert limiter.limit == 8
+
+    def test_soft_throttle_and_plain_errors(self):
+        """mark_throttled 触发收缩，普通异常不改变上限"""
+        limiter = RateLimiter("test", max_in_flight=4)
+
+        with limiter.slot() as slot:
+            slot.mark_throttled()
+        assert limiter.limit == 2
+
+        with pytest.raises(ValueError):
+            with limiter.slot():
+                raise ValueError("bad input")
+        assert limiter.limit == 2
+        assert limiter.stats()["errors"] == 1
+
+    def test_concurrent_throttles_halve_once(self):
+        """同一批在途请求同时 429，上限只减半一次"""
+        limiter = RateLimiter("test", max_in_flight=8)
+        all_in_flight = threading.Barrier(8)
+
+        def call():
+            with pytest.raises(ThrottledError):
+                with limiter.slot():
+                    all_in_flight.wait(5)
+                    raise ThrottledError()
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert limiter.limit == 4
+        assert limiter.stats()["throttled"] == 8
+
+        # 减半之后发出的请求再被限流，才会继续收缩
+        with limiter.slot() as slot:
+            slot.mark_throttled()
+        assert limiter.limit == 2
+
+    def test_is_throttle_error_follows_cause(self):
+        """被包装的 429 异常同样识别为限流"""
+        try:
+            try:
+                raise ThrottledError()
+            except ThrottledError as e:
+                raise Exception("wrapped") from e
+        except Exception as wrapped:
+            assert is_throttle_error(wrapped)
+
+        assert not is_throttle_error(ValueError("x"))
@@ -0,0 +1,177 @@
+"""
+参考图加载器测试
+
+验证主参考图保持原始分辨率、素材参考图按 max_edge 缩小，
+以及并发加载合并（single-flight）与按 ETag 重新校验下载缓存
+"""
+
+import io
+import threading
+import time
+
+import pytest
+import requests
+from PIL import Image
+
+from banana_slides.core import generator
+from banana_slides.core.generator import AIService
+from banana_slides.services.reference_images import ReferenceImageLoader
+
+
+def save_image(path, size=(400, 200), color="red"):
+    Image.new("RGB", size, color).save(path)
+    return str(path)
+
+
+@pytest.fixture
+def loader(tmp_path):
+    return ReferenceImageLoader(cache_dir=str(tmp_path / "cache"), max_edge=100)
+
+
+class TestRefImageResolution:
+    def test_primary_image_keeps_full_resolution(self, tmp_path, loader, monkeypatch):
+        monkeypatch.setattr(generator, "get_reference_image_loader", lambda: loader)
+        template = save_image(tmp_path / "template.png")
+        material = save_image(tmp_path / "material.png", color="blue")
+
+        service = AIService(text_provider=object(), image_provider=object())
+        primary, extra = service._load_ref_images(template, [material])
+        assert primary.size == (400, 200)
+        # 素材图仍然缩小到 max_edge
+        assert extra.size == (100, 50)
+
+
+def png_bytes(color="red", size=(40, 20)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i : i + chunk_size]
+
+
+class FakeSession:
+    """按顺序返回预设响应，并记录每次请求的条件头"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.requests.append(dict(headers or {}))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+URL = "https://example.com/chart.png"
+
+
+@pytest.fixture
+def url_loader(tmp_path):
+    # revalidate_seconds=0：每次都向源站重新校验
+    return ReferenceImageLoader(
+        cache_dir=str(tmp_path / "cache"), max_edge=100, revalidate_seconds=0
+    )
+
+
+class TestSingleFlight:
+    def test_concurrent_loads_decode_once(self, tmp_path, loader, monkeypatch):
+        path = save_image(tmp_path / "material.png")
+        decode = ReferenceImageLoader._decode
+
+        def slow_decode(path, max_edge):
+            time.sleep(0.2)
+            return decode(path, max_edge)
+
+        monkeypatch.setattr(ReferenceImageLoader, "_decode", staticmethod(slow_decode))
+        barrier = threading.Barrier(5)
+        results = []
+
+        def load():
+            barrier.wait()
+            results.append(loader.load(path))
+
+        threads = [threading.Thread(target=load) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 5 and all(image is results[0] for image in results)
+        stats = loader.stats()
+        assert stats["decoded"] == 1
+        assert stats["deduplicated"] == 4
+
+    def test_failed_load_leaves_no_inflight_entry(self, tmp_path, loader):
+        path = tmp_path / "broken.png"
+        path.write_bytes(b"not an image")
+        assert loader.load(str(path)) is None
+        assert loader._inflight == {}
+        assert loader.stats()["failures"] == 1
+
+
+class TestEtagRevalidation:
+    def test_not_modified_reuses_cached_bytes_and_image(self, url_loader):
+        url_loader._session = FakeSession(
+            FakeResponse(200, png_bytes(), {"ETag": '"v1"'}),
+            FakeResponse(304),
+        )
+        first = url_loader.load(URL)
+        second = url_loader.load(URL)
+
+        assert second is first
+        assert url_loader._session.requests[1]["If-None-Match"] == '"v1"'
+        stats = url_loader.stats()
+        assert stats["downloads"] == 1
+        assert stats["revalidated"] == 1
+        assert stats["memory_hits"] == 1
+
+    def test_changed_etag_downloads_new_version(self, url_loader):
+        url_loader._session = FakeSession(
+            FakeResponse(200, png_bytes("red"), {"ETag": '"v1"'}),
+            FakeResponse(200, png_bytes("blue"), {"ETag": '"v2"'}),
+        )
+        first = url_loader.load(URL)
+        second = url_loader.load(URL)
+
+        assert second is not first
+        assert first.getpixel((0, 0)) == (255, 0, 0)
+        assert second.getpixel((0, 0)) == (0, 0, 255)
+        assert url_loader.stats()["downloads"] == 2
+
+    def test_stale_copy_served_when_host_is_down(self, url_loader):
+        url_loader._session = FakeSession(
+            FakeResponse(200, png_bytes(), {"ETag": '"v1"'}),
+            requests.ConnectionError("host down"),
+        )
+        first = url_loader.load(URL)
+        assert url_loader.load(URL) is first
+        assert url_loader.stats()["stale_served"] == 1
+
+    def test_fresh_copy_skips_the_request(self, tmp_path):
+        loader = ReferenceImageLoader(cache_dir=str(tmp_path / "cache"), max_edge=100)
+        loader._session = FakeSession(FakeResponse(200, png_bytes(), {"ETag": '"v1"'}))
+        loader.load(URL)
+        loader.load(URL)
+        assert len(loader._session.requests) == 1
+        assert loader.stats()["disk_hits"] == 1
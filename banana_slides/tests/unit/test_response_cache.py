@@ -0,0 +1,93 @@
+"""
+文本响应缓存测试
+
+验证 ResponseCache / CachedTextProvider 的命中、绕过、失效与淘汰逻辑
+"""
+
+import time
+
+import pytest
+
+from banana_slides.services.ai_providers.text.base import TextProvider
+from banana_slides.services.ai_providers.text.cache import (
+    CachedTextProvider,
+    ResponseCache,
+    bypass_response_cache,
+)
+
+
+class CountingTextProvider(TextProvider):
+    """记录调用次数的假 provider"""
+
+    model = "mock-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        self.calls += 1
+        return f"response:{prompt}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "text_cache.db"), ttl_seconds=3600)
+
+
+class TestResponseCache:
+    """响应缓存测试"""
+
+    def test_repeated_prompt_hits_cache(self, cache):
+        """相同提示词第二次调用直接命中缓存"""
+        provider = CachedTextProvider(CountingTextProvider(), cache)
+
+        assert provider.generate_text("hello") == "response:hello"
+        assert provider.generate_text("hello") == "response:hello"
+
+        assert provider.provider.calls == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_key_includes_thinking_budget(self, cache):
+        """thinking_budget 不同视为不同请求"""
+        provider = CachedTextProvider(CountingTextProvider(), cache)
+
+        provider.generate_text("hello", thinking_budget=1000)
+        provider.generate_text("hello", thinking_budget=2000)
+
+        assert provider.provider.calls == 2
+
+    def test_bypass_and_invalidate(self, cache):
+        """绕过缓存和失效后都会重新调用模型"""
+        provider = CachedTextProvider(CountingTextProvider(), cache)
+        provider.generate_text("hello")
+
+        with bypass_response_cache():
+            provider.generate_text("hello")
+        assert provider.provider.calls == 2
+
+        provider.invalidate("hello")
+        provider.generate_text("hello")
+        assert provider.provider.calls == 3
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        """超过 TTL 的条目不再命中"""
+        cache = ResponseCache(str(tmp_path / "ttl.db"), ttl_seconds=0.001)
+        cache.set("k", "v")
+
+        time.sleep(0.01)
+        assert cache.get("k") is None
+
+    def test_lru_eviction_respects_size_limit(self, tmp_path):
+        """超出容量时优先淘汰最久未访问的条目"""
+        cache = ResponseCache(str(tmp_path / "lru.db"), max_bytes=10)
+        cache.set("old", "aaaaa")
+        cache.set("recent", "bbbbb")
+        cache.get("old")  # old 变为最近访问
+        cache.set("new", "ccccc")
+
+        assert cache.get("recent") is None
+        assert cache.get("old") == "aaaaa"
+        assert cache.get("new") == "ccccc"
+        assert cache.stats()["bytes"] <= 10
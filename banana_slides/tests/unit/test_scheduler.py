@@ -0,0 +1,116 @@
+"""
+进程内公平调度器测试
+
+验证 FairScheduler 的优先级、老化、按项目轮转与交互任务预留槽位
+"""
+
+import threading
+import time
+
+import pytest
+
+from banana_slides.services.task_manager import (
+    PRIORITY_CLASSES,
+    FairScheduler,
+    SchedulerMetrics,
+)
+
+INTERACTIVE, SINGLE_PAGE, BULK, EXPORT = range(len(PRIORITY_CLASSES))
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(**kwargs):
+        scheduler = FairScheduler(**kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown(wait=True)
+
+
+def block(scheduler, priority=INTERACTIVE, project_id="blocker"):
+    """占住一个槽位，直到返回的 Event 被 set"""
+    release, started = threading.Event(), threading.Event()
+
+    def run():
+        started.set()
+        release.wait(5)
+
+    scheduler.submit(run, priority, project_id)
+    assert started.wait(5)
+    return release
+
+
+def recorder(order, name):
+    return lambda: order.append(name)
+
+
+class TestFairScheduler:
+    def test_interactive_overtakes_queued_exports(self, make_scheduler):
+        scheduler = make_scheduler(max_workers=1, reserved_interactive=0, aging_seconds=0)
+        release = block(scheduler)
+        order = []
+        futures = [
+            scheduler.submit(recorder(order, "export-1"), EXPORT, "p1"),
+            scheduler.submit(recorder(order, "export-2"), EXPORT, "p1"),
+            scheduler.submit(recorder(order, "edit"), INTERACTIVE, "p1"),
+        ]
+        release.set()
+        for future in futures:
+            future.result(5)
+        assert order == ["edit", "export-1", "export-2"]
+
+    def test_aging_promotes_starved_task(self, make_scheduler):
+        scheduler = make_scheduler(max_workers=1, reserved_interactive=0, aging_seconds=0.05)
+        release = block(scheduler)
+        order = []
+        futures = [scheduler.submit(recorder(order, "export"), EXPORT, "p1")]
+        # 等待超过 3 个老化周期，导出任务的有效优先级高于新来的交互任务
+        time.sleep(0.3)
+        futures.append(scheduler.submit(recorder(order, "edit"), INTERACTIVE, "p2"))
+        release.set()
+        for future in futures:
+            future.result(5)
+        assert order == ["export", "edit"]
+
+    def test_projects_alternate_within_class(self, make_scheduler):
+        scheduler = make_scheduler(max_workers=1, reserved_interactive=0, aging_seconds=0)
+        release = block(scheduler)
+        order = []
+        futures = [
+            scheduler.submit(recorder(order, f"a{i}"), BULK, "project-a") for i in range(3)
+        ]
+        futures += [
+            scheduler.submit(recorder(order, f"b{i}"), BULK, "project-b") for i in range(2)
+        ]
+        release.set()
+        for future in futures:
+            future.result(5)
+        assert order == ["a0", "b0", "a1", "b1", "a2"]
+
+    def test_reserved_slot_stays_free_for_interactive(self, make_scheduler):
+        metrics = SchedulerMetrics()
+        scheduler = make_scheduler(
+            max_workers=2, reserved_interactive=1, aging_seconds=0, metrics=metrics
+        )
+        release = block(scheduler, priority=EXPORT)
+        second_export = scheduler.submit(lambda: None, EXPORT, "p1")
+        time.sleep(0.1)
+        # 剩下的一个槽位只留给交互任务
+        assert not second_export.running() and not second_export.done()
+        assert scheduler.depths()[EXPORT] == 1
+
+        edit = scheduler.submit(lambda: "edited", INTERACTIVE, "p2")
+        assert edit.result(5) == "edited"
+        assert not second_export.done()
+
+        release.set()
+        second_export.result(5)
+        stats = metrics.stats(scheduler.depths())
+        assert stats["export"]["dispatched"] == 2
+        assert stats["interactive"]["dispatched"] == 1
+        assert stats["export"]["queued"] == 0
@@ -0,0 +1,331 @@
+"""
+持久化任务队列测试
+
+在 SQLite 上验证 DatabaseTaskQueue 的租约抢占、过期回收、失败退避、
+取消，以及 TaskWorker 对失败 / 取消 / 崩溃任务是否重试
+"""
+
+import functools
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from banana_slides.models import Project, Task, TaskJob, db, init_engine
+from banana_slides.services import task_queue
+from banana_slides.services.task_queue import (
+    DatabaseTaskQueue,
+    TaskWorker,
+    retry_delay,
+    stage_task_files,
+)
+
+WORKER = "worker-a"
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'queue.db'}"
+    init_engine(app)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def queue(app):
+    return DatabaseTaskQueue(app, aging_seconds=0)
+
+
+def create_task(app, status="PENDING") -> str:
+    with app.app_context():
+        project = Project(idea_prompt="queue test", status="DRAFT")
+        db.session.add(project)
+        db.session.flush()
+        task = Task(project_id=project.id, task_type="GENERATE_IMAGES", status=status)
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+
+def enqueue(app, queue, max_attempts=3, payload=None, **kwargs) -> str:
+    task_id = create_task(app)
+    queue.enqueue(
+        task_id, "banana_slides.fake:task", payload or {}, max_attempts=max_attempts, **kwargs
+    )
+    return task_id
+
+
+def job_row(app, task_id) -> dict:
+    with app.app_context():
+        job = TaskJob.query.get(task_id)
+        return {
+            "status": job.status,
+            "attempts": job.attempts,
+            "available_at": job.available_at,
+            "last_error": job.last_error,
+        }
+
+
+def task_row(app, task_id):
+    with app.app_context():
+        task = Task.query.get(task_id)
+        return task.status, task.error_message
+
+
+def expire_lease(app, task_id):
+    """模拟持有租约的 worker 失联"""
+    with app.app_context():
+        job = TaskJob.query.get(task_id)
+        job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+
+class TestLease:
+    def test_concurrent_lease_is_won_once(self, app):
+        task_id = enqueue(app, DatabaseTaskQueue(app))
+        barrier = threading.Barrier(4)
+        results = []
+
+        def lease(worker_id):
+            # 每个线程一个队列实例，相当于多个 worker 进程
+            worker_queue = DatabaseTaskQueue(app)
+            barrier.wait()
+            results.append(worker_queue.lease(worker_id, 60))
+
+        threads = [threading.Thread(target=lease, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        leased = [job for job in results if job is not None]
+        assert len(leased) == 1
+        assert leased[0].task_id == task_id
+        assert job_row(app, task_id)["attempts"] == 1
+
+    def test_lease_updates_only_if_still_ready(self, app, queue):
+        task_id = enqueue(app, queue)
+        # 两个 worker 选中同一个候选：第二个的条件更新不命中
+        with app.app_context():
+            candidate = queue._candidates(datetime.utcnow(), 3)[0]
+        assert queue.lease("w1", 60).task_id == task_id
+        with app.app_context():
+            now = datetime.utcnow()
+            updated = TaskJob.query.filter(
+                TaskJob.task_id == candidate.task_id, queue._ready(now)
+            ).update({"lease_owner": "w2"}, synchronize_session=False)
+            db.session.commit()
+        assert updated == 0
+        assert queue.lease("w2", 60) is None
+
+
+class TestExpiredLeases:
+    def test_expired_lease_is_leased_again(self, app, queue):
+        task_id = enqueue(app, queue, max_attempts=3)
+        first = queue.lease("w1", 60)
+        expire_lease(app, task_id)
+
+        second = queue.lease("w2", 60)
+        assert second.task_id == task_id
+        assert second.attempts == 2
+        # 失联的 worker 不能再结束这个任务
+        assert queue.complete(first, "w1") is False
+        assert queue.complete(second, "w2") is True
+        assert job_row(app, task_id)["status"] == "DONE"
+
+    def test_expired_last_attempt_is_reaped_dead(self, app, queue):
+        task_id = enqueue(app, queue, max_attempts=1)
+        queue.lease("w1", 60)
+        expire_lease(app, task_id)
+
+        assert queue.lease("w2", 60) is None
+        job = job_row(app, task_id)
+        assert job["status"] == "DEAD"
+        assert "Lease expired" in job["last_error"]
+        status, error = task_row(app, task_id)
+        assert status == "FAILED"
+        assert "worker lost" in error
+
+
+class TestFail:
+    def test_fail_requeues_after_delay(self, app, queue):
+        task_id = enqueue(app, queue, max_attempts=3)
+        job = queue.lease(WORKER, 60)
+
+        before = datetime.utcnow()
+        assert queue.fail(job, WORKER, "boom", 60) == "QUEUED"
+        row = job_row(app, task_id)
+        assert row["status"] == "QUEUED"
+        assert row["last_error"] == "boom"
+        assert row["available_at"] >= before + timedelta(seconds=59)
+        # 退避期内不可租用
+        assert queue.lease(WORKER, 60) is None
+
+    def test_fail_on_last_attempt_is_dead(self, app, queue):
+        task_id = enqueue(app, queue, max_attempts=2)
+        for _ in range(2):
+            job = queue.lease(WORKER, 60)
+            status = queue.fail(job, WORKER, "boom", 0)
+        assert job.attempts == 2
+        assert status == "DEAD"
+        assert job_row(app, task_id)["status"] == "DEAD"
+        assert queue.lease(WORKER, 60) is None
+
+    def test_fail_without_retry_is_dead(self, app, queue):
+        task_id = enqueue(app, queue, max_attempts=3)
+        job = queue.lease(WORKER, 60)
+        assert queue.fail(job, WORKER, "bad prompt", 0, retry=False) == "DEAD"
+        assert job_row(app, task_id)["attempts"] == 1
+
+    def test_fail_by_other_worker_is_lost(self, app, queue):
+        enqueue(app, queue)
+        job = queue.lease(WORKER, 60)
+        assert queue.fail(job, "someone-else", "boom", 0) == "LOST"
+
+    def test_retry_delay_backs_off_up_to_cap(self):
+        for attempts, base in [(1, 10), (2, 20), (3, 40)]:
+            assert base / 2 <= retry_delay(attempts, 10, 600) <= base
+        assert retry_delay(20, 10, 600) <= 600
+
+
+class TestCancel:
+    def test_cancel_before_start(self, app, queue):
+        task_id = enqueue(app, queue)
+        assert queue.is_pending(task_id)
+        assert queue.cancel(task_id) is True
+        assert job_row(app, task_id)["status"] == "CANCELLED"
+        assert not queue.is_pending(task_id)
+        assert queue.lease(WORKER, 60) is None
+        assert queue.cancel(task_id) is False
+
+    def test_leased_job_is_not_dropped(self, app, queue):
+        task_id = enqueue(app, queue)
+        queue.lease(WORKER, 60)
+        assert queue.cancel(task_id) is False
+        assert job_row(app, task_id)["status"] == "LEASED"
+
+    def test_cancel_removes_temp_dir(self, app, queue, tmp_path):
+        temp_dir = tmp_path / "refs"
+        temp_dir.mkdir()
+        task_id = enqueue(app, queue, payload={"temp_dir": str(temp_dir)})
+        assert queue.cancel(task_id) is True
+        assert not temp_dir.exists()
+
+
+class TestStageTaskFiles:
+    def test_moves_temp_dir_and_rewrites_paths(self, tmp_path):
+        temp_dir = tmp_path / "tmp" / "upload123"
+        temp_dir.mkdir(parents=True)
+        (temp_dir / "ref.png").write_bytes(b"png")
+        upload_folder = tmp_path / "uploads"
+        payload = {
+            "temp_dir": str(temp_dir),
+            "additional_ref_images": [str(temp_dir / "ref.png"), "/elsewhere/b.png"],
+            "prompt": "draw a banana",
+        }
+
+        stage_task_files("task-1", payload, str(upload_folder))
+
+        target = upload_folder / "task_files" / "task-1"
+        assert not temp_dir.exists()
+        assert payload["temp_dir"] == str(target)
+        assert payload["additional_ref_images"] == [
+            str(target / "ref.png"),
+            "/elsewhere/b.png",
+        ]
+        assert payload["prompt"] == "draw a banana"
+        assert (target / "ref.png").read_bytes() == b"png"
+
+
+class TestWorkerExecute:
+    """TaskWorker._execute 的重试判定"""
+
+    @pytest.fixture
+    def worker(self, app, queue, monkeypatch):
+        calls = []
+
+        def run(task_id, mode=None, temp_dir=None, app=None):
+            calls.append(task_id)
+            with app.app_context():
+                task = Task.query.get(task_id)
+                if mode == "crash":
+                    raise RuntimeError("worker crashed")
+                task.status = {"fail": "FAILED", "cancel": "CANCELLED"}.get(mode, "COMPLETED")
+                task.error_message = "bad prompt" if mode == "fail" else None
+                db.session.commit()
+
+        def resolve(func_name, payload, app):
+            return functools.partial(run, app=app, **payload)
+
+        monkeypatch.setattr(task_queue, "resolve_call", resolve)
+        worker = TaskWorker(queue, app, concurrency=1, backoff_seconds=0, backoff_max=0)
+        worker.calls = calls
+        yield worker
+        worker._executor.shutdown(wait=True)
+
+    def run_once(self, worker):
+        job = worker.queue.lease(worker.worker_id, 60)
+        assert job is not None
+        worker._execute(job)
+        return job
+
+    def test_success_completes(self, app, queue, worker):
+        task_id = enqueue(app, queue)
+        self.run_once(worker)
+        assert job_row(app, task_id)["status"] == "DONE"
+        assert task_row(app, task_id)[0] == "COMPLETED"
+
+    def test_failed_row_is_not_retried(self, app, queue, worker):
+        task_id = enqueue(app, queue, max_attempts=3, payload={"mode": "fail"})
+        self.run_once(worker)
+        job = job_row(app, task_id)
+        assert job["status"] == "DEAD"
+        assert job["attempts"] == 1
+        assert task_row(app, task_id) == ("FAILED", "bad prompt")
+        assert queue.lease(WORKER, 60) is None
+
+    def test_cancelled_row_is_not_retried(self, app, queue, worker):
+        task_id = enqueue(app, queue, payload={"mode": "cancel"})
+        self.run_once(worker)
+        assert job_row(app, task_id)["status"] == "DONE"
+        assert task_row(app, task_id)[0] == "CANCELLED"
+
+    def test_cancelled_before_start_does_not_run(self, app, queue, worker):
+        task_id = enqueue(app, queue)
+        with app.app_context():
+            Task.query.get(task_id).status = "CANCELLED"
+            db.session.commit()
+        self.run_once(worker)
+        assert worker.calls == []
+        assert job_row(app, task_id)["status"] == "DONE"
+
+    def test_crash_is_retried_until_dead(self, app, queue, worker, tmp_path):
+        temp_dir = tmp_path / "refs"
+        temp_dir.mkdir()
+        task_id = enqueue(
+            app, queue, max_attempts=2, payload={"mode": "crash", "temp_dir": str(temp_dir)}
+        )
+
+        self.run_once(worker)
+        job = job_row(app, task_id)
+        assert job["status"] == "QUEUED"
+        assert "RuntimeError" in job["last_error"]
+        assert task_row(app, task_id)[0] == "PENDING"
+        # 重试仍需要上传的参考图
+        assert temp_dir.exists()
+
+        self.run_once(worker)
+        assert job_row(app, task_id)["status"] == "DEAD"
+        status, error = task_row(app, task_id)
+        assert status == "FAILED"
+        assert "worker crashed" in error
+        assert len(worker.calls) == 2
+        assert not os.path.exists(temp_dir)
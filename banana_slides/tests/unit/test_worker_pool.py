@@ -0,0 +1,143 @@
+"""
+共享工作线程池测试
+
+验证嵌套等待不会死锁、线程数有上限、并发窗口与提前结束时的取消，
+以及子任务优先、空闲线程退出与关闭时的取消
+"""
+
+import threading
+import time
+
+import pytest
+
+from banana_slides.services.worker_pool import WorkerPool
+
+
+def run_tree(pool, depth, fanout):
+    """模拟递归可编辑化：每层提交子任务并在池内等待"""
+    if depth == 0:
+        time.sleep(0.005)
+        return 1
+    futures = [pool.submit(run_tree, pool, depth - 1, fanout) for _ in range(fanout)]
+    return sum(future.result() for future in pool.as_completed(futures))
+
+
+class TestWorkerPool:
+    def test_nested_waits_do_not_deadlock_single_thread(self):
+        pool = WorkerPool(max_workers=1)
+        try:
+            future = pool.submit(run_tree, pool, 3, 3)
+            pool.wait([future])
+            assert future.result() == 27
+            assert pool.stats()["inline_runs"] > 0
+        finally:
+            pool.shutdown()
+
+    def test_thread_count_is_bounded(self):
+        pool = WorkerPool(max_workers=4)
+        try:
+            futures = [pool.submit(run_tree, pool, 2, 4) for _ in range(8)]
+            assert sum(f.result() for f in pool.as_completed(futures)) == 8 * 16
+            assert pool.stats()["peak_threads"] <= 4
+        finally:
+            pool.shutdown()
+
+    def test_exception_is_kept_on_future(self):
+        pool = WorkerPool(max_workers=2)
+        try:
+            future = pool.submit(lambda: 1 / 0)
+            pool.wait([future])
+            with pytest.raises(ZeroDivisionError):
+                future.result()
+        finally:
+            pool.shutdown()
+
+    def test_map_unordered_limits_in_flight(self):
+        pool = WorkerPool(max_workers=8)
+        lock = threading.Lock()
+        active = [0, 0]  # 当前并发数, 峰值
+
+        def work(item):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return item * 2
+
+        try:
+            results = {item: f.result() for item, f in pool.map_unordered(work, range(20), limit=3)}
+            assert results == {i: i * 2 for i in range(20)}
+            assert active[1] <= 3
+        finally:
+            pool.shutdown()
+
+    def test_closing_map_unordered_cancels_unstarted(self):
+        pool = WorkerPool(max_workers=1)
+        started = []
+
+        def work(item):
+            started.append(item)
+            time.sleep(0.02)
+            if item == 0:
+                raise RuntimeError("stop")
+            return item
+
+        try:
+            with pytest.raises(RuntimeError):
+                for _, future in pool.map_unordered(work, range(10)):
+                    future.result()
+            time.sleep(0.1)
+            # 第一个失败后，尚未开始的任务被取消
+            assert len(started) < 10
+        finally:
+            pool.shutdown()
+
+
+class TestSchedulingAndLifecycle:
+    def test_children_run_before_queued_top_level_work(self):
+        pool = WorkerPool(max_workers=1)
+        order = []
+
+        def parent():
+            order.append("parent")
+            children = [pool.submit(order.append, f"child-{i}") for i in range(2)]
+            pool.wait(children)
+
+        try:
+            futures = [pool.submit(parent), pool.submit(order.append, "next-page")]
+            pool.wait(futures)
+            # 已开始的页面先完成自己的子任务，再处理新页面（深度优先）
+            assert order[0] == "parent" and order[-1] == "next-page"
+            assert sorted(order[1:3]) == ["child-0", "child-1"]
+        finally:
+            pool.shutdown()
+
+    def test_idle_threads_exit(self):
+        pool = WorkerPool(max_workers=2, idle_seconds=0.05)
+        try:
+            pool.wait([pool.submit(time.sleep, 0.01) for _ in range(2)])
+            deadline = time.monotonic() + 2
+            while pool.stats()["threads"] and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert pool.stats()["threads"] == 0
+            # 线程退出后再次提交会按需重新启动线程
+            assert pool.submit(lambda: "again").result(5) == "again"
+        finally:
+            pool.shutdown()
+
+    def test_shutdown_cancels_queued_work(self):
+        pool = WorkerPool(max_workers=1)
+        release = threading.Event()
+        running = pool.submit(release.wait, 5)
+        queued = pool.submit(lambda: "never")
+        time.sleep(0.05)
+
+        pool.shutdown(wait=False)
+        assert queued.cancelled()
+        with pytest.raises(RuntimeError):
+            pool.submit(lambda: None)
+
+        release.set()
+        assert running.result(5) is True
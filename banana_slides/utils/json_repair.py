@@ -0,0 +1,128 @@
+"""
+Tolerant JSON parsing for LLM responses
+
+Models often wrap JSON in markdown fences, add a sentence before/after it, or
+leave trailing commas. Each of those used to cost a full extra LLM round trip
+(generate_json re-calls the model on JSONDecodeError); repairing them locally
+first is practically free.
+"""
+import json
+import re
+from typing import Any, Optional
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.DOTALL)
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the body of the first ``` fenced block, or the stripped text"""
+    match = _FENCE_PATTERN.search(text)
+    if match:
+        return match.group(1).strip()
+    return text.strip()
+
+
+def extract_balanced_json(text: str) -> Optional[str]:
+    """
+    Extract the first balanced {...} or [...] block, ignoring brackets in strings
+
+    Returns:
+        The JSON-looking substring, or None if no balanced block exists
+    """
+    start = None
+    stack = []
+    in_string = False
+    escaped = False
+
+    for i, ch in enumerate(text):
+        if start is None:
+            if ch in "[{":
+                start = i
+                stack.append("]" if ch == "[" else "}")
+            continue
+
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+        elif ch in "]}":
+            if not stack or ch != stack[-1]:
+                return None
+            stack.pop()
+            if not stack:
+                return text[start : i + 1]
+
+    return None
+
+
+def remove_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing ] or }, outside of strings"""
+    result = []
+    in_string = False
+    escaped = False
+    pending_comma = None  # index in result of a comma that may be trailing
+
+    for ch in text:
+        if in_string:
+            result.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+            pending_comma = None
+        elif ch == ",":
+            pending_comma = len(result)
+        elif ch in "]}":
+            if pending_comma is not None:
+                result.pop(pending_comma)
+            pending_comma = None
+        elif not ch.isspace():
+            pending_comma = None
+        result.append(ch)
+
+    return "".join(result)
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse JSON from an LLM response, repairing common formatting problems
+
+    Tries, in order: the text as-is, the fenced block body, the first balanced
+    bracket block, and each of those with trailing commas removed.
+
+    Raises:
+        json.JSONDecodeError: If no candidate parses (the original error)
+    """
+    stripped = text.strip()
+    try:
+        return json.loads(stripped)
+    except json.JSONDecodeError as e:
+        original_error = e
+
+    candidates = [strip_code_fences(stripped)]
+    balanced = extract_balanced_json(candidates[0])
+    if balanced:
+        candidates.append(balanced)
+
+    for candidate in candidates:
+        for attempt in (candidate, remove_trailing_commas(candidate)):
+            try:
+                return json.loads(attempt)
+            except json.JSONDecodeError:
+                continue
+
+    raise original_error
@@ -0,0 +1,108 @@
+"""
+Incremental parsing of a streamed JSON array
+
+Used to act on the elements of a long model response (e.g. outline pages)
+while the rest of the response is still being generated.
+"""
+import json
+import logging
+from typing import Any, List
+
+from .json_repair import remove_trailing_commas
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayStream:
+    """
+    Feed text chunks, get back each top-level array element once it is complete
+
+    Anything before the first ``[`` (markdown fences, a preamble sentence) and
+    after the matching ``]`` is ignored. Brackets, commas and escapes inside
+    strings are handled, so elements may contain arbitrary text.
+
+    Usage:
+        stream = JsonArrayStream()
+        for chunk in provider.stream_text(prompt):
+            for element in stream.feed(chunk):
+                handle(element)
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.errors = 0
+
+        self._element: List[str] = []
+        self._depth = 0  # nesting depth inside the root array
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume a chunk of text
+
+        Returns:
+            Elements completed by this chunk, in order
+        """
+        completed = []
+        for ch in chunk:
+            if self.finished:
+                break
+
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+                continue
+
+            if self._in_string:
+                self._element.append(ch)
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._emit(completed)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._element.append(ch)
+            elif ch in "[{":
+                self._depth += 1
+                self._element.append(ch)
+            elif ch in "]}":
+                if self._depth == 0:
+                    # End of the root array
+                    self._emit(completed)
+                    self.finished = True
+                    continue
+                self._depth -= 1
+                self._element.append(ch)
+                if self._depth == 0:
+                    self._emit(completed)
+            elif ch == "," and self._depth == 0:
+                self._emit(completed)
+            else:
+                self._element.append(ch)
+
+        return completed
+
+    def _emit(self, completed: List[Any]):
+        """Parse the buffered element (if any) and append it to completed"""
+        text = "".join(self._element).strip()
+        self._element.clear()
+        if not text:
+            return
+
+        for candidate in (text, remove_trailing_commas(text)):
+            try:
+                completed.append(json.loads(candidate))
+                return
+            except json.JSONDecodeError:
+                continue
+
+        self.errors += 1
+        logger.debug(f"Skipping unparsable streamed element: {text[:200]}")
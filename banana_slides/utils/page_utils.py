@@ -1,7 +1,7 @@
 """
 Page utilities - shared helpers for parsing page_ids and fetching pages
 """
-from typing import List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
 from flask import Request
 
 
@@ -58,3 +58,29 @@ def get_filtered_pages(project_id: str, page_ids: Optional[List[str]] = None):
     else:
         return Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
 
+
+
+def count_pages_by_project(project_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    Count pages of several projects in one grouped query.
+    
+    Args:
+        project_ids: Project IDs
+        
+    Returns:
+        Dict of project ID to page count (projects without pages are omitted)
+    """
+    from sqlalchemy import func
+
+    from ..models import Page, db
+    
+    project_ids = list(project_ids)
+    if not project_ids:
+        return {}
+    rows = (
+        db.session.query(Page.project_id, func.count(Page.id))
+        .filter(Page.project_id.in_(project_ids))
+        .group_by(Page.project_id)
+        .all()
+    )
+    return {project_id: count for project_id, count in rows}
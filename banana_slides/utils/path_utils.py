@@ -3,11 +3,42 @@ Path utilities for handling MinerU file paths and prefix matching
 """
 import os
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# 目录列表缓存：{目录: (mtime_ns, 文件名列表)}，目录内容变化时 mtime 随之变化
+_MAX_CACHED_DIRS = 256
+_dir_listing_cache: "OrderedDict[str, Tuple[int, List[str]]]" = OrderedDict()
+_dir_listing_lock = threading.Lock()
+
+
+def _list_dir_cached(dirpath: Path) -> List[str]:
+    """
+    列出目录下的文件名，按目录 mtime 缓存
+
+    MinerU 的图片目录在解压后不再变化，同一页面的多张素材图、同一项目的多个页面
+    都会查询同一个目录，缓存后前缀匹配不再每次调用 os.listdir。
+    """
+    key = str(dirpath)
+    mtime_ns = os.stat(key).st_mtime_ns
+    with _dir_listing_lock:
+        entry = _dir_listing_cache.get(key)
+        if entry is not None and entry[0] == mtime_ns:
+            _dir_listing_cache.move_to_end(key)
+            return entry[1]
+
+    names = os.listdir(key)
+    with _dir_listing_lock:
+        _dir_listing_cache[key] = (mtime_ns, names)
+        _dir_listing_cache.move_to_end(key)
+        while len(_dir_listing_cache) > _MAX_CACHED_DIRS:
+            _dir_listing_cache.popitem(last=False)
+    return names
+
 
 def convert_mineru_path_to_local(mineru_path: str, project_root: Optional[Path] = None) -> Optional[Path]:
     """
@@ -98,7 +129,7 @@ def find_file_with_prefix(file_path: Path) -> Optional[Path]:
         prefix, ext = os.path.splitext(filename)
         if len(prefix) >= 5:
             try:
-                for fname in os.listdir(dirpath):
+                for fname in _list_dir_cached(dirpath):
                     fp, fe = os.path.splitext(fname)
                     if fp.lower().startswith(prefix.lower()) and fe.lower() == ext.lower():
                         matched_path = dirpath / fname